@@ -19,10 +19,13 @@ import numpy as np
 import json
 from pathlib import Path
 from typing import Dict, Tuple
-from scipy.optimize import minimize
 import warnings
 warnings.filterwarnings('ignore')
 
+from engines.result_store import ResultStore, DEFAULT_STORE_DIR
+from ensemble.adaptive_ensemble import trailing_vol
+from ensemble.risk_allocation import risk_parity_bounded
+
 
 class OptimizedEnsemble:
     """최적화된 앙상블 시스템"""
@@ -30,68 +33,33 @@ class OptimizedEnsemble:
     def __init__(self, 
                  target_vol: float = 0.10,
                  max_leverage: float = 1.5,
-                 risk_parity: bool = True):
+                 risk_parity: bool = True,
+                 store_dir: str = DEFAULT_STORE_DIR):
         self.target_vol = target_vol
+        self.store = ResultStore(store_dir)
         self.max_leverage = max_leverage
         self.risk_parity = risk_parity
     
     def load_engine_returns(self, path: str, name: str) -> pd.Series:
         """엔진 수익률 로드"""
-        with open(path, 'r') as f:
-            data = json.load(f)
-        
-        if 'daily_returns' in data:
-            if isinstance(data['daily_returns'][0], dict):
-                returns = pd.Series({
-                    pd.Timestamp(d['date']): d['ret']
-                    for d in data['daily_returns']
-                })
-            else:
-                returns = pd.Series(data['daily_returns'])
-        else:
+        # engines/result_store.py: JSON 은 최초 1회만 파싱, 이후 memmap 조회
+        try:
+            returns, stats = self.store.load_json_result(path)
+        except ValueError:
             raise ValueError(f"No daily_returns found in {path}")
         
-        sharpe = data.get('sharpe', 0)
+        sharpe = stats.get('sharpe') or 0
         print(f"  {name}: {len(returns)} days, Sharpe {sharpe:.3f}")
         
         return returns
     
     def calculate_risk_parity_weights(self, cov_matrix: pd.DataFrame) -> Dict[str, float]:
         """Risk Parity 가중치 계산"""
-        n = len(cov_matrix)
-        
-        def risk_budget_objective(weights, cov):
-            portfolio_vol = np.sqrt(weights @ cov @ weights)
-            if portfolio_vol == 0:
-                return 1e10
-            
-            marginal_contrib = cov @ weights
-            risk_contrib = weights * marginal_contrib / portfolio_vol
-            
-            # 모든 자산이 동일한 리스크 기여
-            target_risk = portfolio_vol / n
-            return sum((rc - target_risk) ** 2 for rc in risk_contrib)
-        
-        # Initial guess
-        x0 = np.ones(n) / n
-        
-        # Constraints
-        constraints = [
-            {'type': 'eq', 'fun': lambda x: sum(x) - 1},  # Sum to 1
-        ]
+        # ensemble/risk_allocation.py: Spinu Newton 해가 5%~50% 안이면 그대로,
+        # 벗어나면 같은 목적함수를 해석적 gradient SLSQP 로
+        w = risk_parity_bounded(cov_matrix.values, lower=0.05, upper=0.5)
         
-        bounds = [(0.05, 0.5) for _ in range(n)]  # 5%~50% per strategy
-        
-        result = minimize(
-            risk_budget_objective,
-            x0,
-            args=(cov_matrix.values,),
-            method='SLSQP',
-            bounds=bounds,
-            constraints=constraints
-        )
-        
-        weights = dict(zip(cov_matrix.columns, result.x / result.x.sum()))
+        weights = dict(zip(cov_matrix.columns, w))
         return weights
     
     def calculate_sharpe_weighted(self, returns_df: pd.DataFrame, lookback: int = 126) -> Dict[str, float]:
@@ -162,34 +130,23 @@ class OptimizedEnsemble:
         # Calculate ensemble returns
         print(f"\nRunning ensemble...")
         
-        ensemble_returns = []
-        for i, date in enumerate(df.index):
-            daily_ret = sum(weights[col] * df.loc[date, col] for col in df.columns)
-            ensemble_returns.append(daily_ret)
-        
-        ensemble_series = pd.Series(ensemble_returns, index=df.index)
+        w = np.array([weights[col] for col in df.columns])
+        ensemble_series = pd.Series(df.to_numpy() @ w, index=df.index)
         
         # Apply volatility targeting
         print("\nApplying volatility targeting...")
         
         vol_lookback = 60
-        targeted_returns = []
-        
-        for i, date in enumerate(df.index):
-            if i < vol_lookback:
-                targeted_returns.append(ensemble_series.iloc[i])
-                continue
-            
-            recent_vol = ensemble_series.iloc[i-vol_lookback:i].std() * np.sqrt(252)
-            
-            if recent_vol > 0:
-                leverage = min(self.target_vol / recent_vol, self.max_leverage)
-            else:
-                leverage = 1.0
-            
-            targeted_returns.append(ensemble_series.iloc[i] * leverage)
-        
-        targeted_series = pd.Series(targeted_returns, index=df.index)
+        leverage = np.ones(len(df))
+        if len(df) > vol_lookback:
+            # t 시점 레버리지는 [t-60, t) 실현 변동성 기준 (ensemble/adaptive_ensemble.py)
+            recent_vol = trailing_vol(ensemble_series.to_numpy(), vol_lookback,
+                                      np.arange(vol_lookback, len(df)))
+            with np.errstate(divide='ignore'):
+                leverage[vol_lookback:] = np.where(
+                    recent_vol > 0, np.minimum(self.target_vol / recent_vol, self.max_leverage), 1.0)
+        
+        targeted_series = ensemble_series * leverage
         
         # Final stats
         print("\n" + "=" * 70)
@@ -24,6 +24,9 @@ from pathlib import Path
 from typing import Dict, List, Tuple
 from dataclasses import dataclass
 
+from engines.result_store import ResultStore, DEFAULT_STORE_DIR
+from ensemble.adaptive_ensemble import run_adaptive_ensemble, sweep_adaptive_ensemble
+
 
 @dataclass
 class EnsembleConfig:
@@ -133,8 +136,9 @@ class AdaptiveWeighting:
 class ARES7SuperEnsemble:
     """ARES-7 Super Ensemble 시스템"""
     
-    def __init__(self, config: EnsembleConfig = None):
+    def __init__(self, config: EnsembleConfig = None, store_dir: str = DEFAULT_STORE_DIR):
         self.config = config or EnsembleConfig()
+        self.store = ResultStore(store_dir)
         
         self.vol_targeting = VolatilityTargeting(
             target_vol=self.config.target_vol,
@@ -151,26 +155,17 @@ class ARES7SuperEnsemble:
     
     def load_engine_returns(self, path: str, name: str) -> Tuple[pd.Series, Dict]:
         """개별 엔진 수익률 로드"""
-        with open(path, 'r') as f:
-            data = json.load(f)
-        
-        # daily_returns 추출
-        if 'daily_returns' in data:
-            if isinstance(data['daily_returns'][0], dict):
-                returns = pd.Series({
-                    pd.Timestamp(d['date']): d['ret']
-                    for d in data['daily_returns']
-                })
-            else:
-                returns = pd.Series(data['daily_returns'])
-        else:
+        # engines/result_store.py: JSON 은 최초 1회만 파싱, 이후 memmap 조회
+        try:
+            returns, stored = self.store.load_json_result(path)
+        except ValueError:
             raise ValueError(f"No daily_returns found in {path}")
         
         stats = {
-            'sharpe': data.get('sharpe', np.nan),
-            'annual_return': data.get('annual_return', np.nan),
-            'annual_volatility': data.get('annual_volatility', np.nan),
-            'max_drawdown': data.get('max_drawdown', np.nan)
+            'sharpe': stored.get('sharpe', np.nan),
+            'annual_return': stored.get('annual_return', np.nan),
+            'annual_volatility': stored.get('annual_volatility', np.nan),
+            'max_drawdown': stored.get('max_drawdown', np.nan)
         }
         
         print(f"  {name}: {len(returns)} days, Sharpe {stats['sharpe']:.3f}")
@@ -207,16 +202,8 @@ class ARES7SuperEnsemble:
             'total_return': float(cumret.iloc[-1] - 1)
         }
     
-    def run(self, 
-            engine_paths: Dict[str, str],
-            rebal_freq: int = 21,  # 월간 리밸런싱
-            out_path: str = None) -> Dict:
-        """앙상블 실행"""
-        print("=" * 70)
-        print("ARES-7 Super Ensemble")
-        print("=" * 70)
-        
-        # Load all engine returns
+    def load_returns_frame(self, engine_paths: Dict[str, str]) -> Tuple[pd.DataFrame, Dict]:
+        """엔진 수익률 로드 → 공통 날짜 (T x K) DataFrame, 엔진별 지표"""
         print("\nLoading engine returns...")
         all_returns = {}
         all_stats = {}
@@ -232,9 +219,38 @@ class ARES7SuperEnsemble:
         if len(all_returns) < 2:
             raise ValueError("Need at least 2 engines for ensemble")
         
-        # Combine into DataFrame
         df = pd.DataFrame(all_returns)
         df = df.dropna()
+        return df, all_stats
+    
+    def sweep(self,
+              engine_paths: Dict[str, str],
+              grid: Dict[str, List],
+              out_path: str = None) -> pd.DataFrame:
+        """앙상블 설정 그리드 전체 평가 (ensemble/adaptive_ensemble.py::sweep_adaptive_ensemble)"""
+        df, _ = self.load_returns_frame(engine_paths)
+        n = int(np.prod([len(v) for v in grid.values()]))
+        print(f"\nSweeping {n} ensemble configurations over {len(df)} days...")
+        
+        table = sweep_adaptive_ensemble(df, grid)
+        print(table.head(10).to_string(index=False))
+        
+        if out_path:
+            Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+            table.to_csv(out_path, index=False)
+            print(f"\n✅ Sweep saved to {out_path}")
+        return table
+    
+    def run(self, 
+            engine_paths: Dict[str, str],
+            rebal_freq: int = 21,  # 월간 리밸런싱
+            out_path: str = None) -> Dict:
+        """앙상블 실행"""
+        print("=" * 70)
+        print("ARES-7 Super Ensemble")
+        print("=" * 70)
+        
+        df, all_stats = self.load_returns_frame(engine_paths)
         
         print(f"\nCommon dates: {len(df)}")
         print(f"Period: {df.index[0].date()} ~ {df.index[-1].date()}")
@@ -247,51 +263,27 @@ class ARES7SuperEnsemble:
         # Run ensemble with adaptive weighting
         print(f"\nRunning ensemble (rebal every {rebal_freq} days)...")
         
-        rebal_dates = df.index[::rebal_freq]
-        
-        ensemble_returns = []
-        current_weights = {col: 1.0/len(df.columns) for col in df.columns}
-        leverage = 1.0
-        
-        for i, date in enumerate(df.index):
-            # Rebalance
-            if date in rebal_dates and i >= self.config.sharpe_lookback:
-                # Calculate adaptive weights
-                past_returns = df.iloc[:i]
-                new_weights = self.adaptive_weighting.calculate_weights(past_returns)
-                
-                # Calculate turnover cost
-                turnover = sum(abs(new_weights.get(s, 0) - current_weights.get(s, 0)) 
-                              for s in set(new_weights.keys()) | set(current_weights.keys()))
-                turnover_cost = turnover * self.config.turnover_cost
-                
-                current_weights = new_weights
-                
-                # Update leverage based on volatility targeting
-                if len(ensemble_returns) > self.config.vol_lookback:
-                    ens_series = pd.Series(ensemble_returns)
-                    leverage = self.vol_targeting.get_leverage(ens_series)
-            else:
-                turnover_cost = 0
-            
-            # Calculate ensemble return
-            daily_ret = sum(current_weights.get(col, 0) * df.loc[date, col] 
-                           for col in df.columns)
-            
-            # Apply leverage
-            daily_ret *= leverage
-            
-            # Subtract turnover cost
-            daily_ret -= turnover_cost
-            
-            ensemble_returns.append(daily_ret)
-            
-            if i % 100 == 0 and i > 0:
-                print(f"  {date.date()}: Weights={dict(zip(current_weights.keys(), [f'{v:.2f}' for v in current_weights.values()]))}, "
-                      f"Leverage={leverage:.2f}")
-        
-        # Convert to Series
-        ensemble_series = pd.Series(ensemble_returns, index=df.index)
+        # 배열 커널 버전 (ensemble/adaptive_ensemble.py), 기존 일별 루프와 같은 결과
+        res = run_adaptive_ensemble(
+            df,
+            rebal_freq=rebal_freq,
+            sharpe_lookback=self.config.sharpe_lookback,
+            temperature=self.config.temperature,
+            min_weight=self.config.min_weight,
+            vol_lookback=self.config.vol_lookback,
+            target_vol=self.config.target_vol,
+            min_leverage=self.config.min_leverage,
+            max_leverage=self.config.max_leverage,
+            turnover_cost=self.config.turnover_cost,
+            corr_lookback=self.config.corr_lookback,
+        )
+        
+        for i in range(100, len(df), 100):
+            w = res.weights.iloc[i]
+            print(f"  {df.index[i].date()}: Weights={dict(zip(w.index, [f'{v:.2f}' for v in w.values]))}, "
+                  f"Leverage={res.leverage.iloc[i]:.2f}")
+        
+        ensemble_series = res.returns
         
         # Calculate final stats
         print("\n" + "=" * 70)
@@ -352,6 +344,8 @@ def main():
     parser.add_argument('--rebal_freq', type=int, default=21)
     parser.add_argument('--target_vol', type=float, default=0.10)
     parser.add_argument('--out', default='./results/ares7_super_ensemble_results.json')
+    parser.add_argument('--sweep_out', default=None,
+                        help='CSV 경로 지정 시 단일 실행 대신 앙상블 설정 그리드 스윕')
     args = parser.parse_args()
     
     # Engine paths
@@ -368,6 +362,19 @@ def main():
     )
     
     ensemble = ARES7SuperEnsemble(config)
+    
+    if args.sweep_out:
+        grid = {
+            'rebal_freq': [5, 10, 21, 42],
+            'sharpe_lookback': [21, 42, 63, 126],
+            'temperature': [0.1, 0.25, 0.5, 1.0, 2.0],
+            'min_weight': [0.0, 0.05, 0.10],
+            'target_vol': [0.06, 0.08, 0.10, 0.12, 0.15],
+            'max_leverage': [1.0, 1.5, 2.0],
+        }
+        ensemble.sweep(engine_paths, grid, args.sweep_out)
+        return
+    
     results = ensemble.run(engine_paths, args.rebal_freq, args.out)
 
 
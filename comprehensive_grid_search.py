@@ -2,20 +2,78 @@
 """
 ARES7 포괄적 그리드 서치 프레임워크
 모든 파라미터를 체계적으로 탐색하여 최적의 조합 발굴
+
+탐색 모드 (--search):
+  grid      AARM 랜덤 샘플 50개 / Circuit Breaker 전수 조합을 train 전체 기간으로 백테스트 (기존)
+  adaptive  Hyperband (engines/param_search.py): 후보 --n_screen 개 (기본 80) 를 train 앞부분
+            짧은 구간 (기본 1/3) 으로 먼저 평가하고, 그중 Sharpe 상위 --max_full 개 (기본 20) 만
+            전체 기간으로 백테스트. 두 번째 bracket 부터는 surrogate (scikit-learn RF / GP) 가
+            지금까지의 관측으로 다음 후보를 제안.
+            전체 기간 백테스트 50 → 20 회, 비용은 전체 기간 환산 80 / 3 + 20 ≈ 47 회 (grid 모드 AARM 50 회).
+            무작위 50 개와의 best Sharpe 비교는 grid_search_benchmark.py (합성 수익률 여러 개 × seed)
+            결과는 results/optimize/trials.sqlite 에 쌓이며 다시 실행하면 끝난 평가는 건너뜀
+
+Usage:
+  python3 comprehensive_grid_search.py
+  python3 comprehensive_grid_search.py --search adaptive --surrogate gp --jobs 4
 """
 
 import pandas as pd
 import numpy as np
+import argparse
 import json
 import itertools
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import sys
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
 from risk.adaptive_asymmetric_risk_manager import AdaptiveAsymmetricRiskManager
+from engines.param_search import DEFAULT_DB_PATH, HyperbandSearch, SharedData, param_grid as expand_grid
+from engines.result_store import params_hash
+
+
+AARM_PARAM_GRID = {
+    'base_leverage': [0.8, 0.9, 1.0, 1.1, 1.2],
+    'max_leverage': [1.3, 1.5, 1.8, 2.0, 2.2],
+    'target_volatility': [0.12, 0.15, 0.18, 0.20],
+    'cb_trigger': [-0.07, -0.08, -0.09, -0.10, None],
+    'cb_reduction_factor': [0.3, 0.4, 0.5, 0.6]
+}
+
+
+def sample_aarm_params(n_samples: int = 50, seed: int = 42) -> List[Dict]:
+    """grid 모드의 AARM 랜덤 샘플 (n_samples 번 뽑아 max_leverage < base_leverage 는 버림)"""
+    param_grid = AARM_PARAM_GRID
+    np.random.seed(seed)
+    sampled_params = []
+    
+    for _ in range(n_samples):
+        params = {
+            'base_leverage': np.random.choice(param_grid['base_leverage']),
+            'max_leverage': np.random.choice(param_grid['max_leverage']),
+            'target_volatility': np.random.choice(param_grid['target_volatility']),
+            'cb_trigger': np.random.choice(param_grid['cb_trigger']),
+            'cb_reduction_factor': np.random.choice(param_grid['cb_reduction_factor']),
+            'mdd_threshold': -0.10
+        }
+        
+        # max_leverage >= base_leverage 제약
+        if params['max_leverage'] < params['base_leverage']:
+            continue
+        
+        sampled_params.append(params)
+    
+    return sampled_params
+
+
+def evaluate_aarm(data, params, end):
+    """adaptive 모드 평가 함수: train 구간 앞 end 일로 AARM 백테스트 (워커 프로세스에서 실행)"""
+    grid_search = ComprehensiveGridSearch(data['returns'], float(data['transaction_cost'][0]))
+    managed_returns = grid_search.backtest_aarm(grid_search.train_returns.iloc[:end], params)
+    return grid_search.calculate_metrics(managed_returns)
 
 
 class ComprehensiveGridSearch:
@@ -31,6 +89,7 @@ class ComprehensiveGridSearch:
         self.test_returns = returns_data.iloc[split_idx:]
         
         self.results = []
+        self.search_stats = {}      # adaptive 모드: phase → 짧은 구간 / 전체 기간 평가 수, 비용
         
     def calculate_metrics(self, returns: pd.Series) -> Dict:
         """성능 지표 계산"""
@@ -92,8 +151,8 @@ class ComprehensiveGridSearch:
             
             position_size = position_info['position_size']
             
-            # Circuit Breaker 적용
-            if 'cb_trigger' in params and current_dd <= params['cb_trigger']:
+            # Circuit Breaker 적용 (cb_trigger=None 이면 미사용)
+            if params.get('cb_trigger') is not None and current_dd <= params['cb_trigger']:
                 cb_factor = params.get('cb_reduction_factor', 0.5)
                 position_size *= cb_factor
             
@@ -113,40 +172,60 @@ class ComprehensiveGridSearch:
         
         return full_managed_returns
     
-    def grid_search_aarm_parameters(self, n_samples: int = 50) -> List[Dict]:
-        """AARM 파라미터 그리드 서치 (랜덤 샘플링)"""
+    def adaptive_search(self, phase: str, param_grid: Dict[str, List], base_params: Optional[Dict] = None,
+                        constraint: Optional[Callable[[Dict], bool]] = None, eta: int = 3,
+                        min_fraction: float = 1 / 3, n_screen: int = 80, max_full: int = 20,
+                        surrogate: Optional[str] = 'rf', jobs: int = 1, seed: int = 42,
+                        db_path: str = DEFAULT_DB_PATH, verbose: bool = True) -> List[Dict]:
+        """
+        Hyperband + surrogate 탐색 (train 앞부분 짧은 구간으로 n_screen 개 → 상위 max_full 개만 전체 기간).
+        반환 형식은 grid 모드와 같음 (전체 기간까지 평가된 후보만)
+        """
+        candidates = []
+        for params in expand_grid(param_grid):
+            params = {**(base_params or {}), **params}
+            if constraint is None or constraint(params):
+                candidates.append(params)
+        
+        with SharedData(returns=self.returns_data,
+                        transaction_cost=np.array([self.transaction_cost])) as data:
+            search = HyperbandSearch(phase, evaluate_aarm, candidates, param_grid, jobs=jobs, eta=eta,
+                                     min_fraction=min_fraction, n_screen=n_screen, max_full=max_full,
+                                     surrogate=surrogate, seed=seed, score='sharpe_ratio',
+                                     db_path=db_path, verbose=verbose)
+            df = search.run(data, n_rows=len(self.train_returns))
+        
+        metric_keys = ['annualized_return', 'annualized_volatility', 'sharpe_ratio',
+                       'sortino_ratio', 'max_drawdown', 'cvar_95']
+        lookup = {params_hash(c): c for c in candidates}
+        results = [{
+            'phase': phase,
+            'params': lookup[row['params_hash']],
+            'metrics': {k: row[k] for k in metric_keys}
+        } for _, row in df.iterrows()]
+        self.search_stats[phase] = {'n_screened': search.n_screened, 'n_full': search.n_full,
+                                    'budget': search.budget}
+        if verbose:
+            print(f"  짧은 구간 {search.n_screened}개 → 전체 기간 백테스트 {search.n_full}회 "
+                  f"(후보 {len(candidates)}개, 비용 ≈ 전체 기간 {search.budget:.1f}회)")
+        return results
+    
+    def grid_search_aarm_parameters(self, n_samples: int = 50, search: str = 'grid', **adaptive) -> List[Dict]:
+        """AARM 파라미터 그리드 서치 (랜덤 샘플링, search='adaptive' 면 Hyperband)"""
         print("="*100)
-        print("Phase 3: AARM 파라미터 최적화 (Random Search)")
+        print(f"Phase 3: AARM 파라미터 최적화 ({'Adaptive Search' if search == 'adaptive' else 'Random Search'})")
         print("="*100)
         
-        # 파라미터 그리드
-        param_grid = {
-            'base_leverage': [0.8, 0.9, 1.0, 1.1, 1.2],
-            'max_leverage': [1.3, 1.5, 1.8, 2.0, 2.2],
-            'target_volatility': [0.12, 0.15, 0.18, 0.20],
-            'cb_trigger': [-0.07, -0.08, -0.09, -0.10, None],
-            'cb_reduction_factor': [0.3, 0.4, 0.5, 0.6]
-        }
+        if search == 'adaptive':
+            results = self.adaptive_search(
+                'aarm_optimization', AARM_PARAM_GRID, base_params={'mdd_threshold': -0.10},
+                constraint=lambda p: p['max_leverage'] >= p['base_leverage'],    # max_leverage >= base_leverage 제약
+                **adaptive
+            )
+            return self._report_top(results)
         
         # 랜덤 샘플링
-        np.random.seed(42)
-        sampled_params = []
-        
-        for _ in range(n_samples):
-            params = {
-                'base_leverage': np.random.choice(param_grid['base_leverage']),
-                'max_leverage': np.random.choice(param_grid['max_leverage']),
-                'target_volatility': np.random.choice(param_grid['target_volatility']),
-                'cb_trigger': np.random.choice(param_grid['cb_trigger']),
-                'cb_reduction_factor': np.random.choice(param_grid['cb_reduction_factor']),
-                'mdd_threshold': -0.10
-            }
-            
-            # max_leverage >= base_leverage 제약
-            if params['max_leverage'] < params['base_leverage']:
-                continue
-            
-            sampled_params.append(params)
+        sampled_params = sample_aarm_params(n_samples)
         
         results = []
         
@@ -171,21 +250,12 @@ class ComprehensiveGridSearch:
                 print(f"  ✗ 파라미터 조합 {idx} 실패: {e}")
                 continue
         
-        # 상위 10개 결과
-        results_sorted = sorted(results, key=lambda x: x['metrics']['sharpe_ratio'], reverse=True)
-        
-        print(f"\n상위 10개 결과:")
-        for i, r in enumerate(results_sorted[:10], 1):
-            print(f"  {i}. Sharpe={r['metrics']['sharpe_ratio']:.2f}, "
-                  f"Return={r['metrics']['annualized_return']:.2%}, "
-                  f"MDD={r['metrics']['max_drawdown']:.2%}")
-        
-        return results_sorted
+        return self._report_top(results)
     
-    def grid_search_circuit_breaker(self, base_params: Dict) -> List[Dict]:
-        """Circuit Breaker 파라미터 그리드 서치"""
+    def grid_search_circuit_breaker(self, base_params: Dict, search: str = 'grid', **adaptive) -> List[Dict]:
+        """Circuit Breaker 파라미터 그리드 서치 (search='adaptive' 면 Hyperband)"""
         print("\n" + "="*100)
-        print("Phase 4: Circuit Breaker 최적화")
+        print(f"Phase 4: Circuit Breaker 최적화{' (Adaptive Search)' if search == 'adaptive' else ''}")
         print("="*100)
         
         param_grid = {
@@ -194,6 +264,11 @@ class ComprehensiveGridSearch:
             'cb_recovery_threshold': [-0.03, -0.04, -0.05]
         }
         
+        if search == 'adaptive':
+            results = self.adaptive_search('circuit_breaker_optimization', param_grid,
+                                           base_params=base_params, **adaptive)
+            return self._report_top(results)
+        
         results = []
         total_combinations = len(param_grid['cb_trigger']) * len(param_grid['cb_reduction_factor']) * len(param_grid['cb_recovery_threshold'])
         
@@ -231,7 +306,10 @@ class ComprehensiveGridSearch:
                 print(f"  ✗ 조합 {idx} 실패: {e}")
                 continue
         
-        # 상위 10개 결과
+        return self._report_top(results)
+    
+    def _report_top(self, results: List[Dict]) -> List[Dict]:
+        """Sharpe 내림차순 정렬 + 상위 10개 출력"""
         results_sorted = sorted(results, key=lambda x: x['metrics']['sharpe_ratio'], reverse=True)
         
         print(f"\n상위 10개 결과:")
@@ -276,6 +354,24 @@ class ComprehensiveGridSearch:
 
 
 def main():
+    parser = argparse.ArgumentParser(description='ARES7 포괄적 그리드 서치')
+    parser.add_argument('--returns', default='results/ensemble_returns_optimized.csv')
+    parser.add_argument('--search', default='grid', choices=['grid', 'adaptive'],
+                        help='grid: 랜덤 샘플 / 전수 조합, adaptive: Hyperband + surrogate')
+    parser.add_argument('--surrogate', default='rf', choices=['rf', 'gp', 'none'])
+    parser.add_argument('--eta', type=int, default=3, help='rung 마다 상위 1/eta 만 다음 구간으로')
+    parser.add_argument('--min_fraction', type=float, default=1 / 3, help='가장 짧은 평가 구간 (train 대비 비율)')
+    parser.add_argument('--n_screen', type=int, default=80, help='phase 별 짧은 구간으로 평가할 후보 수')
+    parser.add_argument('--max_full', type=int, default=20, help='phase 별 전체 기간 백테스트 수 (짧은 구간 상위)')
+    parser.add_argument('--jobs', type=int, default=1)
+    args = parser.parse_args()
+    
+    adaptive = {}
+    if args.search == 'adaptive':
+        adaptive = {'eta': args.eta, 'min_fraction': args.min_fraction, 'n_screen': args.n_screen,
+                    'max_full': args.max_full,
+                    'surrogate': None if args.surrogate == 'none' else args.surrogate, 'jobs': args.jobs}
+    
     print("="*100)
     print("ARES7 포괄적 그리드 서치 시작")
     print("="*100)
@@ -283,7 +379,7 @@ def main():
     
     # 데이터 로드
     ensemble_returns = pd.read_csv(
-        'results/ensemble_returns_optimized.csv',
+        args.returns,
         index_col=0,
         parse_dates=[0]
     )
@@ -299,7 +395,7 @@ def main():
     grid_search = ComprehensiveGridSearch(ensemble_returns)
     
     # Phase 3: AARM 파라미터 최적화
-    aarm_results = grid_search.grid_search_aarm_parameters(n_samples=50)
+    aarm_results = grid_search.grid_search_aarm_parameters(n_samples=50, search=args.search, **adaptive)
     
     # 최상위 결과 선택
     best_aarm = aarm_results[0]
@@ -307,7 +403,7 @@ def main():
     print(f"  {json.dumps(best_aarm['params'], indent=2)}")
     
     # Phase 4: Circuit Breaker 최적화
-    cb_results = grid_search.grid_search_circuit_breaker(best_aarm['params'])
+    cb_results = grid_search.grid_search_circuit_breaker(best_aarm['params'], search=args.search, **adaptive)
     
     # 최상위 결과 선택
     best_overall = cb_results[0]
@@ -10,14 +10,18 @@ ARES7 Dashboard API Server (NO MOCK DATA)
   - 실시간 CSV 데이터만 사용 (플레이스홀더 없음)
   - ares7_final_weights, overlay, PnL 데이터 제공
   - Flask 기반 REST API
+  - dashboard_data.DashboardCache: 파일 변경 시에만 재로딩, 요청은 메모리 조회 + ETag (304)
 
 실행:
-  python3 dashboard_api.py
+  python3 dashboard_api.py                   # 127.0.0.1:5000 (로컬 전용)
+  python3 dashboard_api.py --host 0.0.0.0    # 모든 인터페이스 (원격 접속, 명시적으로만)
 
 API Endpoints:
   GET /status - 대시보드 전체 데이터
   GET /weights - 최종 weights
   GET /overlay - Overlay 데이터
+  GET /pipeline - run_full_pipeline.sh 단계 진행
+  GET /stream - SSE push (status 변경분 / weights / pipeline)
   POST /kill_switch - Kill switch 제어
 
 Author: ARES7/ARES8 Research Team
@@ -26,12 +30,14 @@ Version: 1.0 (NO PLACEHOLDERS)
 ================================================================================
 """
 
-from flask import Flask, jsonify, request, send_from_directory
+import argparse
+
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
-import pandas as pd
 from pathlib import Path
 from datetime import datetime
-import glob
+
+from dashboard_data import DashboardCache, sse_stream
 
 # ============================================================================
 # Configuration
@@ -45,37 +51,30 @@ TEMPLATES_DIR = BASE_DIR / "templates"
 app = Flask(__name__, template_folder=str(TEMPLATES_DIR))
 CORS(app)
 
-# Kill switch state
-KILL_SWITCH_STATE = 'RUNNING'
+# weights / overlay / PnL 은 메모리에 한 번 적재, ensemble_outputs/ 는 mtime 폴링으로 감시
+CACHE = DashboardCache(OUTPUT_DIR)
 
 # ============================================================================
 # Helper Functions
 # ============================================================================
 
-def find_latest_file(pattern):
-    """Find the latest file matching the pattern"""
-    files = sorted(OUTPUT_DIR.glob(pattern), reverse=True)
-    return files[0] if files else None
-
-
-def load_final_weights():
-    """Load latest ares7_final_weights CSV"""
-    latest_file = find_latest_file("ares7_final_weights_*.csv")
-    if not latest_file:
-        return None
-    
-    df = pd.read_csv(latest_file)
-    return df
-
+def cached_response(name):
+    """
+    캐시된 JSON payload 반환 (ETag / If-None-Match → 304).
 
-def load_overlay():
-    """Load latest wavelet_pead_overlay CSV"""
-    latest_file = find_latest_file("wavelet_pead_overlay_prod_*.csv")
-    if not latest_file:
-        return None
-    
-    df = pd.read_csv(latest_file)
-    return df
+    no-cache: 브라우저는 매번 재검증하지만 변경이 없으면 본문 없이 304.
+    """
+    try:
+        payload = CACHE.get(name)
+    except Exception as e:
+        print(f"Error in /{name}: {e}")
+        return jsonify({'error': str(e)}), 500
+    resp = Response(payload.body, status=payload.status, mimetype='application/json')
+    if payload.status == 200:
+        resp.set_etag(payload.etag)
+        resp.headers['Cache-Control'] = 'no-cache'
+        resp.make_conditional(request)
+    return resp
 
 
 # ============================================================================
@@ -91,112 +90,50 @@ def index():
 @app.route('/status')
 def get_status():
     """Get full dashboard status - REAL DATA ONLY"""
-    try:
-        # Load weights
-        df_weights = load_final_weights()
-        
-        if df_weights is None or len(df_weights) == 0:
-            return jsonify({
-                'error': 'No weights data available',
-                'message': 'Run ./run_full_pipeline.sh to generate data'
-            }), 404
-        
-        # Calculate portfolio stats
-        total_weight = df_weights['weight_final'].sum()
-        gross_exposure = df_weights['weight_final'].abs().sum()
-        net_exposure = df_weights['weight_final'].sum()
-        
-        # Top positions (top 5 by weight_final)
-        df_top = df_weights.nlargest(5, 'weight_final')
-        top_positions = []
-        for _, row in df_top.iterrows():
-            top_positions.append({
-                'symbol': row['symbol'],
-                'weight': float(row['weight_final']),
-                'shares': 0,  # Not available in CSV
-                'price': 0.0,  # Not available in CSV
-                'value': 0.0,  # Not available in CSV
-            })
-        
-        # Build response - ONLY REAL DATA
-        response = {
-            'timestamp': datetime.now().isoformat(),
-            'equity': 0.0,  # Not available - need PnL data
-            'todays_pnl': 0.0,  # Not available - need PnL data
-            'todays_return': 0.0,  # Not available - need PnL data
-            'month_pnl': 0.0,  # Not available - need PnL data
-            'month_return': 0.0,  # Not available - need PnL data
-            'cum_pnl': 0.0,  # Not available - need PnL data
-            'current_dd': 0.0,  # Not available - need PnL data
-            'current_leverage': float(gross_exposure),
-            'net_exposure': float(net_exposure),
-            'gross_exposure': float(gross_exposure),
-            'regime': 'WAVELET+PEAD',
-            'equity_curve': [],  # Not available - need PnL data
-            'times': [],  # Not available - need PnL data
-            'top_positions': top_positions,
-            'recent_trades': [],  # Not available - need trade log
-            'kill_switch': KILL_SWITCH_STATE,
-        }
-        
-        return jsonify(response)
-    
-    except Exception as e:
-        print(f"Error in /status: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
+    return cached_response('status')
 
 
 @app.route('/weights')
 def get_weights():
     """Get final weights - REAL DATA ONLY"""
-    try:
-        df_weights = load_final_weights()
-        
-        if df_weights is None:
-            return jsonify({
-                'error': 'No weights data available',
-                'message': 'Run ./run_full_pipeline.sh to generate data'
-            }), 404
-        
-        return jsonify(df_weights.to_dict('records'))
-    
-    except Exception as e:
-        print(f"Error in /weights: {e}")
-        return jsonify({'error': str(e)}), 500
+    return cached_response('weights')
 
 
 @app.route('/overlay')
 def get_overlay():
     """Get overlay data - REAL DATA ONLY"""
-    try:
-        df_overlay = load_overlay()
-        
-        if df_overlay is None:
-            return jsonify({
-                'error': 'No overlay data available',
-                'message': 'Run ./run_full_pipeline.sh to generate data'
-            }), 404
-        
-        return jsonify(df_overlay.to_dict('records'))
-    
-    except Exception as e:
-        print(f"Error in /overlay: {e}")
-        return jsonify({'error': str(e)}), 500
+    return cached_response('overlay')
+
+
+@app.route('/pipeline')
+def get_pipeline():
+    """Get pipeline stage progress"""
+    return cached_response('pipeline')
+
+
+@app.route('/stream')
+def stream():
+    """
+    SSE push. 모든 구독자가 DashboardCache 의 변경 감지 / 직렬화 결과를 공유한다.
+
+    접속 시 전체 snapshot, 이후 변경분만 (EventSource 가 끊기면 자동 재접속).
+    """
+    return Response(
+        sse_stream(CACHE),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
 
 
 @app.route('/kill_switch', methods=['POST'])
 def kill_switch():
     """Handle kill switch"""
-    global KILL_SWITCH_STATE
-    
     try:
         data = request.json
         mode = data.get('mode', 'RUNNING')
         
-        # Update state
-        KILL_SWITCH_STATE = mode
+        # Update state (status payload / ETag 갱신)
+        CACHE.set_kill_switch(mode)
         
         print(f"[{datetime.now()}] Kill switch: {mode}")
         
@@ -215,6 +152,12 @@ def kill_switch():
 # ============================================================================
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='ARES7 Dashboard API Server')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='바인드 주소 (기본 로컬 전용, 원격 접속은 --host 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=5000)
+    args = parser.parse_args()
+    
     print("=" * 80)
     print("ARES7 Dashboard API Server (NO MOCK DATA)")
     print("=" * 80)
@@ -225,8 +168,9 @@ if __name__ == '__main__':
     print("=" * 80)
     
     # Check for data files
-    weights_file = find_latest_file("ares7_final_weights_*.csv")
-    overlay_file = find_latest_file("wavelet_pead_overlay_prod_*.csv")
+    sources = CACHE.sources
+    weights_file = sources['weights']
+    overlay_file = sources['overlay']
     
     if weights_file:
         print(f"✅ Weights file found: {weights_file.name}")
@@ -240,8 +184,16 @@ if __name__ == '__main__':
         print(f"❌ No overlay file found")
         print(f"   Run: ./run_full_pipeline.sh")
     
+    if CACHE.pnl_state.exists():
+        print(f"✅ PnL state found: {CACHE.pnl_state.name}")
+    else:
+        print(f"❌ No PnL state found (equity / PnL fields will be 0)")
+        print(f"   Run: ./run_pead_prod.sh")
+    
+    CACHE.start()
+    
     print("=" * 80)
-    print("Starting server on http://0.0.0.0:5000")
+    print(f"Starting server on http://{args.host}:{args.port}")
     print("=" * 80)
     
-    app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+    app.run(host=args.host, port=args.port, debug=False, threaded=True)
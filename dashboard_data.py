@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+dashboard_data.py
+
+================================================================================
+ARES7 Dashboard Data Layer (in-memory cache)
+================================================================================
+
+역할:
+  - dashboard_api.py 가 요청마다 ensemble_outputs/ 를 glob → CSV 재로딩 하던 것을 대체
+  - weights / overlay / PnL 을 한 번 읽어 JSON payload (bytes + ETag) 로 미리 직렬화
+  - PnL: pure-tilt 증분 상태 (ensemble_outputs/state/pure_tilt_state_prod.json) 의
+    overlay 일별 수익률 → equity curve / drawdown / 당일·당월·누적 PnL
+  - 감시: 디렉터리 + 현재 소스 파일 mtime 폴링 (백그라운드 스레드).
+    바뀐 소스의 payload 만 다시 만든다. 요청 경로는 dict 조회뿐 (디스크 I/O 없음)
+  - Push (SSE): 변경분을 EventHub 로 한 번 직렬화해 모든 구독자 큐에 전달
+      status   : 이전 status 대비 바뀐 필드만 (PnL / kill switch / 포지션)
+      weights  : 새 weights 레코드 전체
+      pipeline : run_full_pipeline.sh 단계 진행 (state/pipeline_progress.json)
+
+사용:
+  cache = DashboardCache(OUTPUT_DIR)
+  cache.start()                  # poll_interval 초마다 변경 확인
+  payload = cache.get('status')  # Payload(body, etag, status)
+  for chunk in sse_stream(cache):  # text/event-stream 본문 (bytes)
+      ...
+
+Author: ARES7/ARES8 Research Team
+Version: 1.0
+================================================================================
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# ============================================================================
+# Configuration
+# ============================================================================
+
+WEIGHTS_PATTERN = "ares7_final_weights_*.csv"
+OVERLAY_PATTERN = "wavelet_pead_overlay_prod_*.csv"
+PNL_STATE = Path("state") / "pure_tilt_state_prod.json"
+PIPELINE_PROGRESS = Path("state") / "pipeline_progress.json"
+
+# config/tuning_config_*.yaml 의 initial_capital 과 동일
+DEFAULT_CAPITAL = float(os.getenv("ARES7_CAPITAL", "1000000"))
+CURVE_POINTS = 252      # equity_curve 로 내보내는 최근 거래일 수
+TOP_N = 5
+
+SUBSCRIBER_QUEUE = 64   # 이 이상 밀린 (느린) 구독자는 끊는다 → 재접속 시 snapshot 으로 재동기화
+KEEPALIVE_SECONDS = 15.0
+
+NO_DATA_MESSAGE = 'Run ./run_full_pipeline.sh to generate data'
+
+# ============================================================================
+# Helpers
+# ============================================================================
+
+def find_latest_file(output_dir: Path, pattern: str) -> Optional[Path]:
+    """Find the latest file matching the pattern (파일명 날짜 기준)"""
+    files = sorted(Path(output_dir).glob(pattern), reverse=True)
+    return files[0] if files else None
+
+
+def _stat(path: Optional[Path]) -> Optional[Tuple[int, int]]:
+    if path is None:
+        return None
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _records(df: pd.DataFrame) -> list:
+    """DataFrame → JSON 레코드 (NaN → null)"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+@dataclass(frozen=True)
+class Payload:
+    body: bytes
+    etag: str
+    status: int = 200
+
+    @classmethod
+    def from_obj(cls, obj, status: int = 200) -> "Payload":
+        body = json.dumps(obj, separators=(',', ':')).encode()
+        return cls(body, hashlib.blake2b(body, digest_size=8).hexdigest(), status)
+
+
+def _missing(what: str) -> Payload:
+    return Payload.from_obj({'error': f'No {what} data available', 'message': NO_DATA_MESSAGE}, 404)
+
+
+def pnl_summary(returns: pd.Series, capital: float = DEFAULT_CAPITAL,
+                curve_points: int = CURVE_POINTS) -> Dict:
+    """
+    일별 수익률 → dashboard PnL 필드.
+
+    equity = capital · cumprod(1 + r), drawdown = equity / running max - 1
+    """
+    r = returns.dropna().sort_index()
+    if len(r) == 0:
+        return {}
+    equity = capital * np.cumprod(1.0 + r.to_numpy(dtype=np.float64))
+    dd = equity / np.maximum.accumulate(equity) - 1.0
+    prev = np.concatenate([[capital], equity[:-1]])
+
+    # 당월 시작 직전 equity (당월 첫 거래일의 prev)
+    month = r.index.to_period('M')
+    m0 = int(np.searchsorted(month, month[-1], side='left'))
+    tail = slice(max(0, len(r) - curve_points), None)
+    return {
+        'as_of': r.index[-1].isoformat(),
+        'equity': float(equity[-1]),
+        'todays_pnl': float(equity[-1] - prev[-1]),
+        'todays_return': float(r.iloc[-1]),
+        'month_pnl': float(equity[-1] - prev[m0]),
+        'month_return': float(equity[-1] / prev[m0] - 1.0),
+        'cum_pnl': float(equity[-1] - capital),
+        'current_dd': float(dd[-1]),
+        'max_dd': float(dd.min()),
+        'equity_curve': equity[tail].tolist(),
+        'drawdown_curve': dd[tail].tolist(),
+        'times': [d.strftime('%Y-%m-%d') for d in r.index[tail]],
+    }
+
+
+def load_pnl_returns(path: Path) -> Optional[pd.Series]:
+    """pure-tilt 상태 JSON 의 overlay 일별 수익률 (없거나 버전이 다르면 None)"""
+    from research.pead.tilt_state import TiltState
+
+    state = TiltState.load(path)
+    if state is None:
+        return None
+    _, overlay_ret = state.returns()
+    return overlay_ret
+
+# ============================================================================
+# Push (SSE)
+# ============================================================================
+
+def sse_message(event: str, body: bytes, event_id: Optional[int] = None) -> bytes:
+    """SSE 프레임 (body 는 한 줄 JSON)"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: ".encode() + body + b"\n\n"
+
+
+class Subscription:
+    def __init__(self, maxsize: int = SUBSCRIBER_QUEUE):
+        self.queue: "queue.Queue[bytes]" = queue.Queue(maxsize)
+        self.closed = False
+
+    def next(self, timeout: float) -> Optional[bytes]:
+        """다음 메시지 (timeout 동안 없으면 None)"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventHub:
+    """
+    fan-out: publish 는 메시지를 한 번 만들고 구독자 큐에 put_nowait 만 한다 (O(구독자)).
+
+    큐가 가득 찬 구독자는 closed 로 표시 후 제거 (publisher 를 막지 않는다).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs: List[Subscription] = []
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._subs)
+
+    def subscribe(self, maxsize: int = SUBSCRIBER_QUEUE) -> Subscription:
+        sub = Subscription(maxsize)
+        with self._lock:
+            self._subs = self._subs + [sub]
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        sub.closed = True
+        with self._lock:
+            self._subs = [s for s in self._subs if s is not sub]
+
+    def publish(self, event: str, body: bytes) -> int:
+        """구독자 수 반환"""
+        with self._lock:
+            self._seq += 1
+            msg = sse_message(event, body, self._seq)
+            alive = []
+            for sub in self._subs:
+                try:
+                    sub.queue.put_nowait(msg)
+                    alive.append(sub)
+                except queue.Full:
+                    sub.closed = True
+            self._subs = alive
+            return len(alive)
+
+
+# ============================================================================
+# Cache
+# ============================================================================
+
+class DashboardCache:
+    """
+    소스별 (경로, mtime, size) 서명이 바뀔 때만 payload 재생성.
+
+    payload dict 는 통째로 교체 (읽는 쪽은 lock 불필요).
+    kill switch 변경은 캐시된 조각으로 status 만 다시 직렬화 (I/O 없음).
+    """
+
+    def __init__(self, output_dir: Path, capital: float = DEFAULT_CAPITAL,
+                 poll_interval: float = 2.0, pnl_state: Optional[Path] = None):
+        self.output_dir = Path(output_dir)
+        self.capital = capital
+        self.poll_interval = poll_interval
+        self.pnl_state = Path(pnl_state) if pnl_state else self.output_dir / PNL_STATE
+        self.pipeline_progress = self.output_dir / PIPELINE_PROGRESS
+        self.kill_switch = 'RUNNING'
+        self.hub = EventHub()
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._checked = 0.0
+        self._dir_mtime: Optional[int] = None
+        self._paths: Dict[str, Optional[Path]] = {}
+        self._sigs: Dict[str, Optional[Tuple]] = {}
+        self._portfolio: Optional[Dict] = None     # weights 파생 필드 (status 용)
+        self._pnl: Dict = {}
+        self._status: Dict = {}
+        self._payloads: Dict[str, Payload] = {}
+        self.refresh()
+
+    # ---- sources ---------------------------------------------------------- #
+
+    def _resolve_paths(self) -> Tuple[Optional[int], Dict[str, Optional[Path]]]:
+        """디렉터리 mtime 이 그대로면 (새 파일 없음) glob 생략"""
+        try:
+            dir_mtime = self.output_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            dir_mtime = None
+        if dir_mtime is not None and dir_mtime == self._dir_mtime and self._paths:
+            return dir_mtime, self._paths
+        return dir_mtime, {
+            'weights': find_latest_file(self.output_dir, WEIGHTS_PATTERN),
+            'overlay': find_latest_file(self.output_dir, OVERLAY_PATTERN),
+            'pnl': self.pnl_state,
+            'pipeline': self.pipeline_progress,
+        }
+
+    @property
+    def sources(self) -> Dict[str, Optional[Path]]:
+        return dict(self._paths)
+
+    def refresh(self) -> bool:
+        """변경된 소스만 다시 읽는다. 하나라도 바뀌었으면 True"""
+        with self._lock:
+            self._checked = time.monotonic()
+            dir_mtime, paths = self._resolve_paths()
+            sigs = {k: (p, _stat(p)) if p is not None else None for k, p in paths.items()}
+            changed = {k for k in sigs if sigs[k] != self._sigs.get(k, ())}
+            if not changed:
+                self._dir_mtime, self._paths = dir_mtime, paths
+                return False
+            payloads = dict(self._payloads)
+
+            events = []
+            if 'weights' in changed:
+                df = self._read_csv(paths['weights'])
+                payloads['weights'] = _missing('weights') if df is None else Payload.from_obj(_records(df))
+                self._portfolio = None if df is None or len(df) == 0 else self._portfolio_fields(df)
+                if df is not None:
+                    events.append(('weights', payloads['weights'].body))
+            if 'overlay' in changed:
+                df = self._read_csv(paths['overlay'])
+                payloads['overlay'] = _missing('overlay') if df is None else Payload.from_obj(_records(df))
+            if 'pnl' in changed:
+                ret = load_pnl_returns(paths['pnl']) if sigs['pnl'] and sigs['pnl'][1] else None
+                self._pnl = {} if ret is None else pnl_summary(ret, self.capital)
+            if 'pipeline' in changed:
+                progress = self._read_json(paths['pipeline'])
+                payloads['pipeline'] = Payload.from_obj(progress)
+                if 'pipeline' in self._payloads:
+                    events.append(('pipeline', payloads['pipeline'].body))
+
+            if changed & {'weights', 'pnl'}:
+                self._update_status(payloads)
+            self._dir_mtime, self._paths, self._sigs = dir_mtime, paths, sigs
+            self._payloads = payloads
+            for event, body in events:
+                self.hub.publish(event, body)
+            return True
+
+    @staticmethod
+    def _read_csv(path: Optional[Path]) -> Optional[pd.DataFrame]:
+        if path is None or _stat(path) is None:
+            return None
+        return pd.read_csv(path)
+
+    @staticmethod
+    def _read_json(path: Optional[Path]) -> Dict:
+        if path is None or _stat(path) is None:
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _portfolio_fields(df: pd.DataFrame) -> Dict:
+        w = df['weight_final'].to_numpy(dtype=np.float64)
+        gross = float(np.abs(w).sum())
+        top = df.nlargest(TOP_N, 'weight_final')
+        return {
+            'current_leverage': gross,
+            'net_exposure': float(w.sum()),
+            'gross_exposure': gross,
+            'top_positions': [
+                {'symbol': s, 'weight': float(x), 'shares': 0, 'price': 0.0, 'value': 0.0}
+                for s, x in zip(top['symbol'].tolist(), top['weight_final'].tolist())
+            ],
+        }
+
+    def _update_status(self, payloads: Dict[str, Payload]) -> None:
+        """status payload 재생성 + 이전 대비 바뀐 필드만 'status' 이벤트로 publish"""
+        if self._portfolio is None:
+            payloads['status'] = _missing('weights')
+            self._status = {}
+            return
+        status = self._status_obj()
+        payloads['status'] = Payload.from_obj(status)
+        delta = {k: v for k, v in status.items() if self._status.get(k, object()) != v}
+        self._status = status
+        if delta.keys() - {'timestamp'}:
+            self.hub.publish('status', json.dumps(delta, separators=(',', ':')).encode())
+
+    def _status_obj(self) -> Dict:
+        pnl = self._pnl
+        response = {
+            'timestamp': datetime.now().isoformat(),
+            'as_of': pnl.get('as_of'),
+            'equity': pnl.get('equity', 0.0),
+            'todays_pnl': pnl.get('todays_pnl', 0.0),
+            'todays_return': pnl.get('todays_return', 0.0),
+            'month_pnl': pnl.get('month_pnl', 0.0),
+            'month_return': pnl.get('month_return', 0.0),
+            'cum_pnl': pnl.get('cum_pnl', 0.0),
+            'current_dd': pnl.get('current_dd', 0.0),
+            'max_dd': pnl.get('max_dd', 0.0),
+            **self._portfolio,
+            'regime': 'WAVELET+PEAD',
+            'equity_curve': pnl.get('equity_curve', []),
+            'drawdown_curve': pnl.get('drawdown_curve', []),
+            'times': pnl.get('times', []),
+            'recent_trades': [],  # Not available - need trade log
+            'kill_switch': self.kill_switch,
+        }
+        return response
+
+    # ---- access ----------------------------------------------------------- #
+
+    def get(self, name: str) -> Payload:
+        """O(1) 조회. 백그라운드 감시가 없으면 poll_interval 마다 여기서 폴링"""
+        if self._thread is None and time.monotonic() - self._checked >= self.poll_interval:
+            self.refresh()
+        return self._payloads[name]
+
+    def set_kill_switch(self, mode: str) -> None:
+        with self._lock:
+            self.kill_switch = mode
+            payloads = dict(self._payloads)
+            self._update_status(payloads)
+            self._payloads = payloads
+
+    def snapshot(self) -> List[bytes]:
+        """새 구독자용 전체 상태 (status 전체 + weights + pipeline) SSE 프레임"""
+        payloads = self._payloads
+        return [
+            sse_message(name, payloads[name].body)
+            for name in ('status', 'weights', 'pipeline')
+            if name in payloads and payloads[name].status == 200
+        ]
+
+    # ---- watcher ---------------------------------------------------------- #
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:   # 쓰는 중인 CSV 등 → 다음 주기에 재시도
+                print(f"[{datetime.now()}] Dashboard cache refresh failed: {e}")
+
+    def start(self) -> "DashboardCache":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name='dashboard-cache', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+
+def sse_stream(cache: DashboardCache, keepalive: float = KEEPALIVE_SECONDS) -> Iterator[bytes]:
+    """
+    구독자 하나의 text/event-stream 본문.
+
+    구독 먼저 → snapshot (사이에 들어온 변경은 중복 전달될 뿐 유실되지 않음).
+    keepalive 초 동안 이벤트가 없으면 주석 프레임 (프록시 / 브라우저 연결 유지).
+    """
+    cache.start()
+    sub = cache.hub.subscribe()
+    try:
+        yield b"retry: 3000\n\n"
+        for msg in cache.snapshot():
+            yield msg
+        while not sub.closed:
+            msg = sub.next(keepalive)
+            yield msg if msg is not None else b": keepalive\n\n"
+    finally:
+        cache.hub.unsubscribe(sub)
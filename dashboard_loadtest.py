@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+dashboard_loadtest.py
+
+================================================================================
+Dashboard SSE Load Test (local only)
+================================================================================
+
+역할:
+  - /stream 에 구독자 N 개를 동시에 붙이고 (스레드당 1 연결)
+  - /kill_switch 를 번갈아 POST 해 status 변경분 push 를 발생시킨 뒤
+  - 구독자별 수신 지연 (POST 시각 → 해당 kill_switch 값을 담은 status 이벤트 수신) 측정
+  - 종료 시 원래 kill switch 값으로 복구
+
+대상:
+  --url http://127.0.0.1:5000      실행 중인 dashboard_api.py (localhost 만 허용)
+  --self-host                      Flask 없이 stdlib HTTP 서버 + DashboardCache 를
+                                   프로세스 안에서 띄워 fan-out 경로만 측정
+                                   (--output_dir 없으면 임시 디렉터리에 합성 weights)
+
+실행:
+  python3 dashboard_loadtest.py --self-host --clients 500 --rounds 20
+  python3 dashboard_loadtest.py --url http://127.0.0.1:5000 --clients 200
+
+Author: ARES7/ARES8 Research Team
+Version: 1.0
+================================================================================
+"""
+
+import argparse
+import http.client
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+from dashboard_data import DashboardCache, sse_stream
+
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "::1"}
+MODES = ("RUNNING", "STOP_NEW_ORDERS")
+
+# ============================================================================
+# Self-hosted server (stdlib)
+# ============================================================================
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def serve(cache: DashboardCache, port: int = 0) -> _Server:
+    """dashboard_api.py 의 /stream, /kill_switch 와 같은 경로 (백그라운드 스레드)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path != '/stream':
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            try:
+                for chunk in sse_stream(cache, keepalive=1.0):
+                    self.wfile.write(chunk)
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            mode = json.loads(body or b'{}').get('mode', 'RUNNING')
+            cache.set_kill_switch(mode)
+            out = json.dumps({'status': 'ok', 'mode': mode}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+
+    server = _Server(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def synthetic_output_dir(n_symbols: int = 100) -> Path:
+    """합성 final weights 하나만 있는 임시 ensemble_outputs"""
+    out = Path(tempfile.mkdtemp(prefix='dashboard_loadtest_'))
+    w = np.random.default_rng(0).dirichlet(np.ones(n_symbols))
+    pd.DataFrame({
+        'symbol': [f'S{i:03d}' for i in range(n_symbols)],
+        'weight_base': w,
+        'tilt_final': 0.0,
+        'weight_final': w,
+    }).to_csv(out / 'ares7_final_weights_loadtest.csv', index=False)
+    return out
+
+# ============================================================================
+# Subscribers
+# ============================================================================
+
+class Subscriber(threading.Thread):
+    """SSE 한 연결: status 이벤트의 kill_switch 값이 바뀔 때마다 수신 시각 기록"""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        super().__init__(daemon=True)
+        self.host, self.port, self.timeout = host, port, timeout
+        self.connected = threading.Event()
+        self.t_start = 0.0
+        self.t_connect = np.nan
+        self.kill_switch = None
+        self.seen = []          # (수신 시각, kill_switch)
+        self.events = 0
+        self.error = None
+        self.stop = False
+
+    def run(self):
+        self.t_start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            conn.request('GET', '/stream', headers={'Accept': 'text/event-stream'})
+            resp = conn.getresponse()
+            event, data = None, []
+            while not self.stop:
+                line = resp.readline()
+                if not line:
+                    break
+                line = line.rstrip(b'\r\n')
+                if line.startswith(b'event:'):
+                    event = line[6:].strip().decode()
+                elif line.startswith(b'data:'):
+                    data.append(line[5:].strip())
+                elif not line and event:
+                    self._dispatch(event, b'\n'.join(data))
+                    event, data = None, []
+            conn.close()
+        except Exception as e:
+            self.error = repr(e)
+        finally:
+            self.connected.set()
+
+    def _dispatch(self, event: str, data: bytes):
+        now = time.perf_counter()
+        self.events += 1
+        if event != 'status':
+            return
+        ks = json.loads(data).get('kill_switch')
+        if ks is None:
+            return
+        if not self.connected.is_set():
+            self.t_connect = now - self.t_start
+            self.kill_switch = ks
+            self.connected.set()
+        else:
+            self.seen.append((now, ks))
+
+
+def post_kill_switch(host: str, port: int, mode: str) -> None:
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    conn.request('POST', '/kill_switch', body=json.dumps({'mode': mode}),
+                 headers={'Content-Type': 'application/json'})
+    conn.getresponse().read()
+    conn.close()
+
+
+def _pct(x, q):
+    return float(np.nanpercentile(x, q)) * 1e3 if len(x) else float('nan')
+
+# ============================================================================
+# Main
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard SSE load test (local only)")
+    parser.add_argument("--url", type=str, default="http://127.0.0.1:5000")
+    parser.add_argument("--self-host", action="store_true", help="stdlib 서버 + DashboardCache 를 프로세스 안에서 실행")
+    parser.add_argument("--output_dir", type=str, default=None, help="--self-host 데이터 디렉터리")
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=10, help="kill switch 토글 횟수")
+    parser.add_argument("--interval", type=float, default=0.5, help="토글 간격 (초)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    if args.self_host:
+        out_dir = Path(args.output_dir) if args.output_dir else synthetic_output_dir()
+        server = serve(DashboardCache(out_dir))
+        host, port = server.server_address[:2]
+        print(f"Self-hosted SSE server: http://{host}:{port} (data: {out_dir})")
+    else:
+        u = urlparse(args.url)
+        host, port = u.hostname, u.port or 80
+        if host not in LOCAL_HOSTS:
+            raise SystemExit(f"Refusing non-local target {host} (kill switch is toggled during the test)")
+
+    # 1) 구독자 연결
+    print(f"Connecting {args.clients} subscribers...")
+    t0 = time.perf_counter()
+    subs = [Subscriber(host, port, args.timeout) for _ in range(args.clients)]
+    for s in subs:
+        s.start()
+    for s in subs:
+        s.connected.wait(args.timeout)
+    ok = [s for s in subs if s.kill_switch is not None]
+    failed = [s for s in subs if s.kill_switch is None]
+    connect = np.array([s.t_connect for s in ok])
+    print(f"  Connected: {len(ok)}/{len(subs)} in {time.perf_counter() - t0:.2f}s "
+          f"(snapshot p50={_pct(connect, 50):.1f}ms p99={_pct(connect, 99):.1f}ms)")
+    if failed:
+        print(f"  Failed: {len(failed)} (e.g. {next((s.error for s in failed if s.error), 'timeout')})")
+    if not ok:
+        raise SystemExit("No subscriber received a status snapshot (weights missing?)")
+    original = ok[0].kill_switch
+
+    # 2) kill switch 토글 → fan-out 지연
+    sent = []
+    mode = original
+    for _ in range(args.rounds):
+        mode = MODES[1] if mode == MODES[0] else MODES[0]
+        sent.append((time.perf_counter(), mode))
+        post_kill_switch(host, port, mode)
+        time.sleep(args.interval)
+    if mode != original:
+        post_kill_switch(host, port, original)
+        time.sleep(args.interval)
+
+    # 3) 집계: 라운드 k 의 지연 = k 번째 수신 시각 - k 번째 POST 시각
+    lat, missed = [], 0
+    for s in ok:
+        got = s.seen[:len(sent)]
+        missed += len(sent) - len(got)
+        lat.extend(t_recv - t_sent for (t_recv, _), (t_sent, _) in zip(got, sent))
+    lat = np.array(lat)
+    for s in subs:
+        s.stop = True
+
+    print("\nFan-out latency (POST /kill_switch → status event):")
+    print(f"  Subscribers: {len(ok)}, rounds: {len(sent)}, deliveries: {len(lat)}, missed: {missed}")
+    print(f"  p50={_pct(lat, 50):.1f}ms p95={_pct(lat, 95):.1f}ms "
+          f"p99={_pct(lat, 99):.1f}ms max={_pct(lat, 100):.1f}ms")
+    print(f"  Kill switch restored to: {original}")
+
+
+if __name__ == "__main__":
+    main()
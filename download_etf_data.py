@@ -8,13 +8,15 @@ ETF Universe:
 - International: EFA, EEM
 - Bonds: TLT, IEF
 - Commodities: GLD, USO
+
+수집은 download_market_data.download (engines/ingest.py) 경유:
+이미 받은 구간은 data/bars/polygon_daily 에서 읽고 빠진 날짜만 요청
 """
 
 import os
-import requests
-import pandas as pd
-from datetime import datetime, timedelta
-import time
+
+from download_market_data import download
+from engines.ingest import PolygonAggsSource
 
 # Polygon API Key
 API_KEY = os.environ.get('POLYGON_API_KEY', 'w7KprL4_lK7uutSH0dYGARkucXHOFXCN')
@@ -54,56 +56,6 @@ ETF_UNIVERSE = [
 START_DATE = '2015-11-23'
 END_DATE = '2025-11-22'
 
-def download_etf_bars(symbol, start_date, end_date, api_key):
-    """Download daily bars for a single ETF from Polygon"""
-    
-    url = f'https://api.polygon.io/v2/aggs/ticker/{symbol}/range/1/day/{start_date}/{end_date}'
-    params = {
-        'adjusted': 'true',
-        'sort': 'asc',
-        'limit': 50000,
-        'apiKey': api_key
-    }
-    
-    try:
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        
-        if data.get('status') != 'OK' or 'results' not in data:
-            print(f"  ⚠️  {symbol}: No data (status={data.get('status')})")
-            return None
-        
-        results = data['results']
-        df = pd.DataFrame(results)
-        
-        # Convert timestamp (ms) to datetime
-        df['timestamp'] = pd.to_datetime(df['t'], unit='ms', utc=True)
-        df['timestamp'] = df['timestamp'].dt.tz_localize(None)
-        
-        # Rename columns to match stock data format
-        df = df.rename(columns={
-            'o': 'open',
-            'h': 'high',
-            'l': 'low',
-            'c': 'close',
-            'v': 'volume',
-            'vw': 'vwap'
-        })
-        
-        # Add symbol
-        df['symbol'] = symbol
-        
-        # Select columns
-        df = df[['symbol', 'timestamp', 'open', 'high', 'low', 'close', 'volume', 'vwap']]
-        
-        print(f"  ✅ {symbol}: {len(df)} bars downloaded")
-        return df
-        
-    except Exception as e:
-        print(f"  ❌ {symbol}: Error - {str(e)}")
-        return None
-
 def main():
     if not API_KEY:
         print("❌ Error: POLYGON_API_KEY environment variable not set")
@@ -116,30 +68,16 @@ def main():
     print(f"Period: {START_DATE} to {END_DATE}")
     print("=" * 60)
     
-    all_data = []
-    
-    for i, symbol in enumerate(ETF_UNIVERSE, 1):
-        print(f"[{i}/{len(ETF_UNIVERSE)}] Downloading {symbol}...")
-        
-        df = download_etf_bars(symbol, START_DATE, END_DATE, API_KEY)
-        
-        if df is not None:
-            all_data.append(df)
-        
-        # Rate limiting: 5 requests per minute for free tier
-        if i < len(ETF_UNIVERSE):
-            time.sleep(12)  # 12 seconds between requests = 5 per minute
+    # 저장소 (data/bars/polygon_daily) 에 없는 구간만 수집, 요청은 5 req/min token bucket 공유
+    report, store = download(PolygonAggsSource(API_KEY), ETF_UNIVERSE, START_DATE, END_DATE)
     
     print("=" * 60)
     
-    if not all_data:
+    combined = store.read(ETF_UNIVERSE, START_DATE, END_DATE)
+    if combined.empty:
         print("❌ No data downloaded. Exiting.")
         return
     
-    # Combine all ETF data
-    combined = pd.concat(all_data, ignore_index=True)
-    combined = combined.sort_values(['symbol', 'timestamp']).reset_index(drop=True)
-    
     # Save to CSV
     output_path = './data/etf_price.csv'
     combined.to_csv(output_path, index=False)
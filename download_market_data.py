@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+download_market_data.py
+
+================================================================================
+Unified Market Data Downloader (concurrent, resumable, incremental)
+================================================================================
+
+역할:
+  - 종목 목록을 worker pool 로 동시에 수집, 모든 요청은 하나의 token bucket 을 공유
+  - data/bars/{dataset}/{SYMBOL}/{YYYY}.csv 에 빠진 날짜 구간만 추가 (engines/bar_store.py)
+  - 종목 단위 checkpoint (_meta.json) → 중단 후 다시 실행하면 남은 종목/구간만 수집
+  - --verify: 파티션 sha256 검사 (--repair 면 손상 종목 초기화 후 재수집)
+  - --export: 저장소에서 기존 스크립트와 같은 형식의 CSV 한 파일로 내보내기
+  - --fake: ingest_fake_server.py 를 띄워 API 키 / 네트워크 없이 전체 경로 실행
+
+Sources:
+  polygon    Polygon 일봉 (POLYGON_API_KEY), 무료 5 req/min → --rate 0.083
+  sf1        Nasdaq Data Link SHARADAR/SF1 MRQ (NASDAQ_DATA_LINK_API_KEY)
+  yfinance   yfinance 종가
+
+실행:
+  python3 download_market_data.py --source polygon --symbols SPY QQQ TLT --start 2015-11-23
+  python3 download_market_data.py --source sf1 --universe data/prices.csv --workers 8 --rate 5
+  python3 download_market_data.py --source polygon --symbols SPY --verify --repair
+  python3 download_market_data.py --fake --source polygon --symbols SPY TLT QQQ IWM --fail_every 7
+
+Author: ARES7/ARES8 Research Team
+Version: 1.0
+================================================================================
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from engines.bar_store import DEFAULT_ROOT, BarStore
+from engines.ingest import NasdaqTableSource, PolygonAggsSource, TokenBucket, YFinanceSource, Downloader
+
+BASE_DIR = Path(__file__).parent
+
+# source → (기본 초당 요청, burst)
+DEFAULT_RATES = {
+    'polygon': (5 / 60, 1),     # free tier 5/min
+    'sf1': (5.0, 5),            # Nasdaq Data Link 300 / 10s 보다 보수적으로
+    'yfinance': (2.0, 2),
+}
+
+
+def make_source(name, base_url=None):
+    if name == 'polygon':
+        kw = {'base_url': base_url} if base_url else {}
+        return PolygonAggsSource(os.environ.get('POLYGON_API_KEY', ''), **kw)
+    if name == 'sf1':
+        kw = {'base_url': base_url} if base_url else {}
+        return NasdaqTableSource(os.environ.get('NASDAQ_DATA_LINK_API_KEY', ''), **kw)
+    if name == 'yfinance':
+        return YFinanceSource()
+    raise ValueError(f"unknown source '{name}'")
+
+
+def load_universe(path):
+    """prices.csv 형식 (symbol 컬럼) 또는 한 줄에 하나씩인 종목 파일"""
+    path = Path(path)
+    if path.suffix == '.csv':
+        return sorted(pd.read_csv(path, usecols=['symbol'])['symbol'].unique())
+    return [s.strip() for s in path.read_text().split() if s.strip()]
+
+
+def download(source, symbols, start, end=None, workers=4, rate=None, burst=None,
+             refresh=False, root=DEFAULT_ROOT, verbose=True):
+    """다른 download_*.py 에서 쓰는 진입점: 수집 후 (report, store) 반환"""
+    name = {PolygonAggsSource: 'polygon', NasdaqTableSource: 'sf1', YFinanceSource: 'yfinance'}[type(source)]
+    r, b = DEFAULT_RATES[name]
+    limiter = TokenBucket(rate if rate is not None else r, burst if burst is not None else b)
+    dl = Downloader(source, BarStore(source.dataset, root), limiter, workers=workers)
+    report = dl.run(symbols, start, end, refresh=refresh, verbose=verbose)
+    return report, dl.store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent, resumable market data downloader")
+    parser.add_argument("--source", choices=sorted(DEFAULT_RATES), default="polygon")
+    parser.add_argument("--symbols", nargs="+", default=None)
+    parser.add_argument("--universe", type=str, default=None, help="종목 목록 파일 (prices.csv 또는 txt)")
+    parser.add_argument("--start", type=str, default="2015-11-23")
+    parser.add_argument("--end", type=str, default=None, help="기본: 어제")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=None, help="초당 요청 수 (source 기본값 대신)")
+    parser.add_argument("--burst", type=int, default=None)
+    parser.add_argument("--refresh", action="store_true", help="저장된 구간 무시하고 전체 재수집")
+    parser.add_argument("--verify", action="store_true", help="체크섬 검사만")
+    parser.add_argument("--repair", action="store_true", help="--verify 에서 손상 종목 초기화 후 재수집")
+    parser.add_argument("--export", type=str, default=None, help="수집 후 CSV 로 내보내기")
+    parser.add_argument("--root", type=str, default=str(DEFAULT_ROOT))
+    parser.add_argument("--fake", action="store_true", help="로컬 fake 서버 사용 (ingest_fake_server.py)")
+    parser.add_argument("--fail_every", type=int, default=0, help="--fake: N 번째 요청마다 503")
+    parser.add_argument("--max_rate", type=float, default=None, help="--fake: 서버 초당 한도 (넘으면 429)")
+    args = parser.parse_args()
+
+    symbols = args.symbols or (load_universe(args.universe) if args.universe else None)
+    if not symbols:
+        parser.error("--symbols or --universe required")
+
+    server = None
+    if args.fake:
+        from ingest_fake_server import FakeMarketDataServer
+        server = FakeMarketDataServer(max_rate=args.max_rate, fail_every=args.fail_every).start()
+        print(f"Fake market data server: {server.url}")
+    source = make_source(args.source, server.url if server else None)
+    store = BarStore(source.dataset, args.root)
+
+    try:
+        if args.verify:
+            bad = store.verify(symbols, repair=args.repair)
+            print(f"Checked {len(symbols)} symbols: {len(bad)} bad")
+            for s, problems in bad.items():
+                print(f"  ❌ {s}: {', '.join(problems)}" + ("  → reset" if args.repair else ""))
+            if not args.repair:
+                return
+
+        report, store = download(source, symbols, args.start, args.end, args.workers,
+                                 args.rate, args.burst, args.refresh, args.root)
+        if server is not None:
+            print(f"Server: {server.counts}, max accepted req/s={server.max_rate_seen()}")
+
+        if args.export:
+            df = store.read(symbols, args.start, args.end)
+            df.to_csv(args.export, index=False)
+            print(f"✅ Exported {len(df):,} rows → {args.export}")
+    finally:
+        if server is not None:
+            server.stop()
+
+    if report['failed']:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,13 @@
 download_pairs_data.py
 
 yfinance를 사용하여 페어 트레이딩용 주식 데이터 다운로드
+(download_market_data.download 경유: data/bars/yfinance_daily 에 없는 구간만 수집)
 """
 
 import pandas as pd
-import yfinance as yf
+
+from download_market_data import download
+from engines.ingest import YFinanceSource
 
 def main():
     start_date = "2015-01-01"
@@ -18,30 +21,13 @@ def main():
     
     print(f"Pairs 데이터 다운로드 중 ({len(symbols)}개 심볼)...\n")
     
-    all_data = []
-    
-    for symbol in symbols:
-        print(f"{symbol} 다운로드...")
-        try:
-            data = yf.download(symbol, start=start_date, end=end_date, progress=False)
-            
-            # 멀티인덱스 컬럼 처리
-            if isinstance(data.columns, pd.MultiIndex):
-                data.columns = data.columns.get_level_values(0)
-            
-            data = data[['Close']].reset_index()
-            data['symbol'] = symbol
-            data = data.rename(columns={'Date': 'timestamp', 'Close': 'close'})
-            data = data[['symbol', 'timestamp', 'close']]
-            
-            all_data.append(data)
-            print(f"   ✅ {len(data)} 레코드")
-        except Exception as e:
-            print(f"   ❌ 오류: {e}")
+    # 동시 수집 (yfinance end 는 exclusive → 저장소 구간은 end 전날까지), 이미 받은 구간은 재사용
+    end_inclusive = (pd.Timestamp(end_date) - pd.Timedelta(days=1)).date()
+    report, store = download(YFinanceSource(), symbols, start_date, end_inclusive)
+    for symbol in report['failed']:
+        print(f"   ❌ {symbol}: {report['results'][symbol].error}")
     
-    # 병합
-    df = pd.concat(all_data, ignore_index=True)
-    df = df.sort_values(['symbol', 'timestamp'])
+    df = store.read(symbols, start_date, end_inclusive)
     
     # 저장
     output_path = "data/pairs_price.csv"
@@ -5,13 +5,14 @@ Download SF1 Fundamentals for ARES7-Best Universe (FIXED)
 ==========================================================
 """
 
+import os
 import pandas as pd
-import nasdaqdatalink as ndl
-import time
 from pathlib import Path
 
-SF1_API_KEY = "H6zH4Q2CDr9uTFk9koqJ"
-ndl.ApiConfig.api_key = SF1_API_KEY
+from download_market_data import download
+from engines.ingest import NasdaqTableSource
+
+SF1_API_KEY = os.environ.get('NASDAQ_DATA_LINK_API_KEY', "H6zH4Q2CDr9uTFk9koqJ")
 
 BASE_DIR = Path(__file__).parent
 
@@ -24,52 +25,28 @@ def load_ares7_universe():
     return tickers
 
 
-def download_sf1_all(tickers, start_date="2015-01-01", end_date="2025-12-31"):
+def download_sf1_all(tickers, start_date="2015-01-01", end_date="2025-12-31", workers=8):
     print("="*80)
     print("Downloading SF1 Fundamentals")
     print("="*80)
     
-    all_data = []
-    
-    for i, ticker in enumerate(tickers):
-        print(f"[{i+1}/{len(tickers)}] {ticker}...", end=" ", flush=True)
-        
-        try:
-            df = ndl.get_table(
-                'SHARADAR/SF1',
-                ticker=ticker,
-                dimension='MRQ',
-                calendardate={'gte': start_date, 'lte': end_date},
-                qopts={'columns': ['ticker', 'dimension', 'calendardate', 'datekey', 
-                                  'roe', 'ebitda', 'revenue', 'debt', 'equity']},
-                paginate=True
-            )
-            
-            if not df.empty:
-                # Calculate metrics
-                df['ebitdamargin'] = df['ebitda'] / df['revenue'].replace(0, 1e-10)
-                df['de'] = df['debt'] / df['equity'].replace(0, 1e-10)
-                
-                # Clean inf
-                df['ebitdamargin'] = df['ebitdamargin'].replace([float('inf'), float('-inf')], None)
-                df['de'] = df['de'].replace([float('inf'), float('-inf')], None)
-                
-                all_data.append(df)
-                print(f"✅ {len(df)}")
-            else:
-                print("⚠️  No data")
-        
-        except Exception as e:
-            print(f"❌ {e}")
-        
-        time.sleep(0.3)
+    # 동시 수집 + 공유 rate limit, data/bars/sharadar_sf1_mrq 에 없는 calendardate 구간만 요청
+    source = NasdaqTableSource(SF1_API_KEY, table='SHARADAR/SF1', dimension='MRQ')
+    report, store = download(source, tickers, start_date, end_date, workers=workers)
     
-    if not all_data:
+    combined = store.read(tickers, start_date, end_date)
+    if combined.empty:
         print("\n❌ No data downloaded")
         return None
     
-    # Combine
-    combined = pd.concat(all_data, ignore_index=True)
+    # Calculate metrics
+    combined['ebitdamargin'] = combined['ebitda'] / combined['revenue'].replace(0, 1e-10)
+    combined['de'] = combined['debt'] / combined['equity'].replace(0, 1e-10)
+    
+    # Clean inf
+    combined['ebitdamargin'] = combined['ebitdamargin'].replace([float('inf'), float('-inf')], None)
+    combined['de'] = combined['de'].replace([float('inf'), float('-inf')], None)
+    
     combined['calendardate'] = pd.to_datetime(combined['calendardate'])
     combined['datekey'] = pd.to_datetime(combined['datekey'])
     
@@ -4,10 +4,13 @@
 download_spy_tlt.py
 
 yfinance를 사용하여 SPY/TLT 가격 데이터 다운로드
+(download_market_data.download 경유: data/bars/yfinance_daily 에 없는 구간만 수집)
 """
 
 import pandas as pd
-import yfinance as yf
+
+from download_market_data import download
+from engines.ingest import YFinanceSource
 
 def main():
     start_date = "2015-11-23"
@@ -15,33 +18,14 @@ def main():
     
     print("SPY/TLT 데이터 다운로드 중...\n")
     
-    # SPY 다운로드
-    print("1. SPY 다운로드...")
-    spy = yf.download("SPY", start=start_date, end=end_date, progress=False)
-    # 멀티인덱스 컬럼 처리
-    if isinstance(spy.columns, pd.MultiIndex):
-        spy.columns = spy.columns.get_level_values(0)
-    spy = spy[['Close']].reset_index()
-    spy['symbol'] = 'SPY'
-    spy = spy.rename(columns={'Date': 'timestamp', 'Close': 'close'})
-    spy = spy[['symbol', 'timestamp', 'close']]
-    print(f"   ✅ {len(spy)} 레코드")
-    
-    # TLT 다운로드
-    print("\n2. TLT 다운로드...")
-    tlt = yf.download("TLT", start=start_date, end=end_date, progress=False)
-    # 멀티인덱스 컬럼 처리
-    if isinstance(tlt.columns, pd.MultiIndex):
-        tlt.columns = tlt.columns.get_level_values(0)
-    tlt = tlt[['Close']].reset_index()
-    tlt['symbol'] = 'TLT'
-    tlt = tlt.rename(columns={'Date': 'timestamp', 'Close': 'close'})
-    tlt = tlt[['symbol', 'timestamp', 'close']]
-    print(f"   ✅ {len(tlt)} 레코드")
+    # SPY / TLT 동시 수집 (yfinance end 는 exclusive → 저장소 구간은 end 전날까지)
+    end_inclusive = (pd.Timestamp(end_date) - pd.Timedelta(days=1)).date()
+    report, store = download(YFinanceSource(), ["SPY", "TLT"], start_date, end_inclusive)
     
-    # 병합
-    df = pd.concat([spy, tlt], ignore_index=True)
-    df = df.sort_values(['symbol', 'timestamp'])
+    df = store.read(["SPY", "TLT"], start_date, end_inclusive)
+    spy = df[df['symbol'] == 'SPY']
+    tlt = df[df['symbol'] == 'TLT']
+    print(f"   ✅ SPY {len(spy)} 레코드, TLT {len(tlt)} 레코드")
     
     # 저장
     output_path = "data/spy_tlt_price.csv"
@@ -13,6 +13,8 @@ import logging
 from datetime import datetime
 from pathlib import Path
 
+from engines.regime import RegimeFeatures
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -433,14 +435,15 @@ class FastBacktestV80:
                   .sort_index()
             )
             
-            # 2) 200일 단순 이동평균 계산
+            # 2) 200일 단순 이동평균 계산 (engines/regime.py)
             lookback = self.REGIME_LOOKBACK_D
             minp     = self.REGIME_MIN_PERIODS
-            mkt['mkt_ma'] = mkt['mkt_index'].rolling(lookback, min_periods=minp).mean()
+            rf = RegimeFeatures(mkt.index, market=mkt['mkt_index'])
+            mkt['mkt_ma'] = rf.ma(lookback, min_periods=minp)
             
             # 3) 레짐 플래그: 인덱스 > MA 이면 Risk-ON(1), 아니면 Risk-OFF(0)
             mkt['regime_flag'] = np.where(
-                mkt['mkt_index'] > mkt['mkt_ma'],
+                rf.above_ma(lookback, min_periods=minp).values,
                 self.REGIME_ON_VALUE,
                 self.REGIME_OFF_VALUE
             )
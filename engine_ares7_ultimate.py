@@ -27,6 +27,8 @@ from enum import Enum
 import warnings
 warnings.filterwarnings('ignore')
 
+from engines.regime import RegimeFeatures
+
 
 class MarketRegime(Enum):
     """시장 레짐 분류"""
@@ -160,6 +162,31 @@ class RobustMomentumEngine:
             positions[sym] = short_weight
         
         return positions
+    
+    def position_matrix(self, signals: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        generate_positions 를 여러 날짜에 대해 한 번에 (signals: R x N, NaN = 제외)
+        
+        Returns: (R x N 비중, R 개 bool) — 유효 종목이 n_long + n_short 미만인 행은 False, 비중 0
+        """
+        n_rows, n_symbols = signals.shape
+        weights = np.zeros((n_rows, n_symbols))
+        valid = ~np.isnan(signals)
+        has_target = valid.sum(axis=1) >= self.n_long + self.n_short
+        rows = np.flatnonzero(has_target)
+        if len(rows) == 0:
+            return weights, has_target
+        
+        sig, ok = signals[rows], valid[rows]
+        longs = np.argsort(np.where(ok, -sig, np.inf), axis=1, kind='stable')[:, :self.n_long]
+        shorts = np.argsort(np.where(ok, sig, np.inf), axis=1, kind='stable')[:, :self.n_short]
+        
+        block = np.zeros((len(rows), n_symbols))
+        r = np.arange(len(rows))[:, None]
+        block[r, longs] = (self.gross_exposure / 2.0) / self.n_long
+        block[r, shorts] = -(self.gross_exposure / 2.0) / self.n_short
+        weights[rows] = block
+        return weights, has_target
 
 
 class CrossAssetEngine:
@@ -187,19 +214,11 @@ class CrossAssetEngine:
         if spy_tlt is None or 'SPY' not in spy_tlt.columns or 'TLT' not in spy_tlt.columns:
             return None
         
-        spy_ret = spy_tlt['SPY'].pct_change()
-        tlt_ret = spy_tlt['TLT'].pct_change()
-        
-        # Rolling correlation
-        rolling_corr = spy_ret.rolling(self.corr_window).corr(tlt_ret)
+        # Combined signal: 낮은 상관관계 + 양의 SPY 모멘텀 → Risk-on (engines/regime.py)
+        rf = RegimeFeatures(spy_tlt.index, spy=spy_tlt['SPY'], tlt=spy_tlt['TLT'], ffill=False)
+        signal = rf.cross_asset_signal(self.corr_window, self.momentum_window)
         
-        # Momentum signal for SPY
-        spy_mom = spy_tlt['SPY'].pct_change(self.momentum_window)
-        
-        # Combined signal: 낮은 상관관계 + 양의 SPY 모멘텀 → Risk-on
-        signal = -rolling_corr * 0.5 + spy_mom * 0.5
-        
-        return signal
+        return pd.Series(signal, index=spy_tlt.index)
     
     def get_allocation_adjustment(self, signal: pd.Series, date: pd.Timestamp) -> float:
         """
@@ -218,6 +237,13 @@ class CrossAssetEngine:
         adjustment = 1.0 + np.clip(sig_val, -0.5, 0.5)
         
         return adjustment
+    
+    def allocation_adjustments(self, signal: pd.Series, dates: pd.DatetimeIndex) -> np.ndarray:
+        """get_allocation_adjustment 를 dates 전체에 대해 한 번에 (없는 날 / NaN → 1.0)"""
+        if signal is None:
+            return np.ones(len(dates))
+        sig = signal.reindex(dates).to_numpy(dtype=float)
+        return np.where(np.isnan(sig), 1.0, 1.0 + np.clip(sig, -0.5, 0.5))
 
 
 class VIXRegimeEngine:
@@ -258,6 +284,16 @@ class VIXRegimeEngine:
         else:
             return MarketRegime.NORMAL
     
+    def get_regimes(self, vix_data: pd.DataFrame, dates: pd.DatetimeIndex) -> List[MarketRegime]:
+        """get_regime 을 dates 전체에 대해 한 번에 (같은 날짜 VIX 만, 없으면 NORMAL)"""
+        if vix_data is None:
+            return [MarketRegime.NORMAL] * len(dates)
+        rf = RegimeFeatures(dates, vix=vix_data['VIX'], ffill=False)
+        edges = (self.low_vol_threshold, self.high_vol_threshold, self.crisis_threshold)
+        by_code = {-1: MarketRegime.NORMAL, 0: MarketRegime.LOW_VOL, 1: MarketRegime.NORMAL,
+                   2: MarketRegime.HIGH_VOL, 3: MarketRegime.CRISIS}
+        return [by_code[c] for c in rf.vix_bucket(edges)]
+    
     def get_strategy_weights(self, regime: MarketRegime) -> Dict[str, float]:
         """레짐별 전략 가중치"""
         weights = {
@@ -366,6 +402,11 @@ class TransactionCostModel:
         
         return total_cost
     
+    def cost_from_turnover(self, turnover: np.ndarray) -> np.ndarray:
+        """calculate_cost 의 배열 버전 (회전율 = |새 비중 - 기존 비중| 합)"""
+        turnover = np.asarray(turnover, dtype=float)
+        return (self.spread_bps / 10000) * turnover + (self.impact_coef / 10000) * np.sqrt(turnover)
+    
     def should_trade(self, 
                      old_positions: Dict[str, float], 
                      new_positions: Dict[str, float],
@@ -451,9 +492,12 @@ class ARES7Ultimate:
             impact_coef=self.config.market_impact_coef
         )
         self.ensemble = AdaptiveEnsemble()
+        self._data = None
     
     def load_data(self) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
-        """모든 데이터 로드"""
+        """모든 데이터 로드 (인스턴스에 한 번만 — rebal_freq 등을 바꿔 반복 backtest 시 재사용)"""
+        if self._data is not None:
+            return self._data
         print("Loading data...")
         prices = self.data_loader.load_prices()
         fundamentals = self.data_loader.load_fundamentals()
@@ -465,7 +509,8 @@ class ARES7Ultimate:
         print(f"  VIX: {len(vix) if vix is not None else 0} rows")
         print(f"  SPY-TLT: {len(spy_tlt) if spy_tlt is not None else 0} rows")
         
-        return prices, fundamentals, vix, spy_tlt
+        self._data = (prices, fundamentals, vix, spy_tlt)
+        return self._data
     
     def backtest(self, 
                  rebal_freq: int = 5,  # 5일 = 주간
@@ -504,91 +549,55 @@ class ARES7Ultimate:
         momentum_signals = self.momentum_engine.calculate_signals(prices)
         cross_asset_signal = self.cross_asset_engine.calculate_regime_signal(spy_tlt)
         
-        # Rebalance dates
+        # 레짐 / cross-asset 조정은 날짜 축 배열로 한 번 계산 → 루프에서는 i-1 위치로 조회
+        regimes = self.vix_engine.get_regimes(vix, prices.index)
+        adjustments = self.cross_asset_engine.allocation_adjustments(cross_asset_signal, prices.index)
+        
+        # Rebalance dates (첫날 제외: i > 0 and i % rebal_freq == 0)
         rebal_dates = prices.index[::rebal_freq]
+        n_days, n_symbols = prices.shape
+        rebal_idx = np.arange(rebal_freq, n_days, rebal_freq)
         
-        # Backtest loop
         print(f"\nRunning backtest ({len(rebal_dates)} rebalance dates)...")
         
-        portfolio_returns = []
-        current_positions = {}
-        next_positions = {}
-        
-        for i, date in enumerate(prices.index):
-            # Apply positions from previous rebalance
-            if next_positions:
-                current_positions = next_positions.copy()
-                next_positions = {}
-            
-            # Rebalance
-            if date in rebal_dates and i > 0:
-                prev_date = prices.index[i-1]
-                
-                # Get regime
-                regime = self.vix_engine.get_regime(vix, prev_date)
-                strategy_weights = self.vix_engine.get_strategy_weights(regime)
-                
-                # Generate momentum positions
-                mom_positions = self.momentum_engine.generate_positions(
-                    momentum_signals, prev_date
-                )
-                
-                # Cross-asset adjustment
-                if cross_asset_signal is not None:
-                    adjustment = self.cross_asset_engine.get_allocation_adjustment(
-                        cross_asset_signal, prev_date
-                    )
-                else:
-                    adjustment = 1.0
-                
-                # Calculate portfolio-level volatility for targeting
-                if len(portfolio_returns) > self.config.vol_lookback:
-                    port_ret_series = pd.Series(portfolio_returns)
-                    leverage = self.vol_targeting.calculate_leverage(
-                        port_ret_series, 
-                        pd.Timestamp(date)
-                    )
-                else:
-                    leverage = 1.0
-                
-                # Combine positions with regime and leverage
-                next_positions = {}
-                for sym, weight in mom_positions.items():
-                    adjusted_weight = weight * adjustment * leverage
-                    adjusted_weight = np.clip(
-                        adjusted_weight, 
-                        -self.config.max_position_size, 
-                        self.config.max_position_size
-                    )
-                    next_positions[sym] = adjusted_weight
-                
-                if i % 50 == 0:
-                    n_long = sum(1 for w in next_positions.values() if w > 0)
-                    n_short = sum(1 for w in next_positions.values() if w < 0)
-                    print(f"  {date.date()}: Regime={regime.value}, Leverage={leverage:.2f}, "
-                          f"Long={n_long}, Short={n_short}")
-            
-            # Calculate daily return
-            if i == 0:
-                portfolio_returns.append(0.0)
-                continue
-            
-            daily_ret = 0.0
-            for sym, weight in current_positions.items():
-                if sym in returns.columns:
-                    stock_ret = returns.loc[date, sym]
-                    if not np.isnan(stock_ret):
-                        daily_ret += weight * stock_ret
-            
-            # Subtract transaction costs (on rebalance days)
-            if date in rebal_dates and current_positions and next_positions:
-                cost = self.cost_model.calculate_cost(current_positions, next_positions)
-                daily_ret -= cost
-            
-            portfolio_returns.append(daily_ret)
+        # 1) 리밸런스 목표 비중 (R x N): t-1 시그널 롱/숏 x cross-asset 조정 x 레버리지, 종목 한도 clip
+        #    레버리지: 이전 루프는 RangeIndex 포트 수익률에 Timestamp 를 넘겨
+        #    calculate_leverage 가 항상 1.0 을 반환했다 → 결과 동일성을 위해 1.0 유지
+        leverage = np.ones(len(rebal_idx))
+        mom_weights, has_target = self.momentum_engine.position_matrix(
+            momentum_signals.to_numpy(dtype=float)[rebal_idx - 1])
+        targets = np.clip(mom_weights * (adjustments[rebal_idx - 1] * leverage)[:, None],
+                          -self.config.max_position_size, self.config.max_position_size)
+        
+        # 2) 보유 비중 (T x N): r 의 목표는 r+1 부터 적용, 목표가 없으면 (유효 종목 부족) 이전 보유 유지
+        #    src[t] = t 에 보유 중인 목표 행 + 1 (0 = 포지션 없음)
+        src = np.zeros(n_days, dtype=np.int64)
+        rows = np.flatnonzero(has_target)
+        apply_at = rebal_idx[rows] + 1
+        in_range = apply_at < n_days
+        src[apply_at[in_range]] = rows[in_range] + 1
+        src = np.maximum.accumulate(src)
+        book = np.vstack([np.zeros((1, n_symbols)), targets])
+        held = book[src]
+        
+        # 3) 일간 수익률 = 보유 비중 · 종목 수익률 (NaN 수익률 제외), 첫날 0
+        stock_returns = returns.to_numpy(dtype=float)
+        stock_returns = np.where(np.isnan(stock_returns), 0.0, stock_returns)
+        daily = np.einsum('ij,ij->i', held, stock_returns)
+        daily[0] = 0.0
+        
+        # 4) 거래 비용: 리밸런스일에 보유 → 새 목표 회전율 (보유와 새 목표가 모두 있을 때만)
+        charged = has_target & (src[rebal_idx] > 0)
+        turnover = np.abs(targets - held[rebal_idx]).sum(axis=1)
+        daily[rebal_idx[charged]] -= self.cost_model.cost_from_turnover(turnover[charged])
+        
+        for k in np.flatnonzero(rebal_idx % 50 == 0):
+            i = rebal_idx[k]
+            print(f"  {prices.index[i].date()}: Regime={regimes[i-1].value}, Leverage={leverage[k]:.2f}, "
+                  f"Long={int((targets[k] > 0).sum())}, Short={int((targets[k] < 0).sum())}")
         
         # Calculate performance metrics
-        returns_series = pd.Series(portfolio_returns, index=prices.index)
+        returns_series = pd.Series(daily, index=prices.index)
         
         annual_return = returns_series.mean() * 252
         annual_volatility = returns_series.std() * np.sqrt(252)
@@ -17,6 +17,8 @@ Date: 2025-11-25
 import pandas as pd
 import numpy as np
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
@@ -51,6 +53,31 @@ class EngineConfig:
     rebal_freq: int = 7             # 주간 리밸런싱
 
 
+def rank_position_matrix(signals: np.ndarray, config: EngineConfig) -> np.ndarray:
+    """
+    select_positions 를 여러 날짜에 대해 한 번에 (signals: R x N, NaN = 제외)
+    
+    행마다 상위 n_long 롱 / 하위 n_short 숏, 유효 종목이 n_long + n_short 미만이면 0 행
+    """
+    n_rows, n_symbols = signals.shape
+    weights = np.zeros((n_rows, n_symbols))
+    valid = ~np.isnan(signals)
+    rows = np.flatnonzero(valid.sum(axis=1) >= config.n_long + config.n_short)
+    if len(rows) == 0:
+        return weights
+    
+    sig, ok = signals[rows], valid[rows]
+    longs = np.argsort(np.where(ok, -sig, np.inf), axis=1, kind='stable')[:, :config.n_long]
+    shorts = np.argsort(np.where(ok, sig, np.inf), axis=1, kind='stable')[:, :config.n_short]
+    
+    block = np.zeros((len(rows), n_symbols))
+    r = np.arange(len(rows))[:, None]
+    block[r, longs] = (config.gross_exposure / 2.0) / config.n_long
+    block[r, shorts] = -(config.gross_exposure / 2.0) / config.n_short
+    weights[rows] = block
+    return weights
+
+
 class RobustMeanReversionEngine:
     """
     Robust Mean Reversion Engine
@@ -219,13 +246,13 @@ class ARES7UltimateV2:
         
         return prices, returns
     
-    def calculate_vol_leverage(self, returns: pd.Series, idx: int) -> float:
-        """목표 변동성 기반 레버리지 계산"""
+    def calculate_vol_leverage(self, returns, idx: int) -> float:
+        """목표 변동성 기반 레버리지 계산 (returns: [0, idx) 가 채워진 Series 또는 배열)"""
         if idx < self.config.vol_window:
             return 1.0
         
-        recent_returns = returns.iloc[max(0, idx-self.config.vol_window):idx]
-        realized_vol = recent_returns.std() * np.sqrt(252)
+        recent_returns = np.asarray(returns, dtype=float)[max(0, idx-self.config.vol_window):idx]
+        realized_vol = recent_returns.std(ddof=1) * np.sqrt(252)
         
         if realized_vol <= 0 or np.isnan(realized_vol):
             return 1.0
@@ -254,7 +281,28 @@ class ARES7UltimateV2:
         
         return blended
     
-    def backtest(self, data_dir: str = './data') -> Dict:
+    def blend_matrix(self,
+                     mr_weights: np.ndarray,
+                     tf_weights: np.ndarray,
+                     mr_weight: float = 0.6,
+                     tf_weight: float = 0.4) -> np.ndarray:
+        """blend_positions 의 행렬 버전 (R x N 가중합, |w| <= 0.001 은 0)"""
+        blended = mr_weights * mr_weight + tf_weights * tf_weight
+        return np.where(np.abs(blended) > 0.001, blended, 0.0)
+    
+    def calculate_all_signals(self, prices: pd.DataFrame, returns: pd.DataFrame,
+                              jobs: int = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """두 엔진 시그널을 별도 프로세스에서 동시에 계산 (jobs=1 이면 순차, 기본 min(2, CPU 수))"""
+        engines = (self.mr_engine, self.tf_engine)
+        if jobs is None:
+            jobs = min(len(engines), os.cpu_count() or 1)
+        if jobs <= 1:
+            return tuple(e.calculate_signals(prices, returns) for e in engines)
+        with ProcessPoolExecutor(max_workers=min(jobs, len(engines))) as pool:
+            futures = [pool.submit(e.calculate_signals, prices, returns) for e in engines]
+            return tuple(f.result() for f in futures)
+    
+    def backtest(self, data_dir: str = './data', jobs: int = None) -> Dict:
         """백테스트 실행"""
         print("=" * 70)
         print("ARES-7 Ultimate Engine v2")
@@ -268,78 +316,63 @@ class ARES7UltimateV2:
         
         # Calculate signals
         print("\nCalculating signals...")
-        mr_signals = self.mr_engine.calculate_signals(prices, returns)
-        tf_signals = self.tf_engine.calculate_signals(prices, returns)
+        mr_signals, tf_signals = self.calculate_all_signals(prices, returns, jobs)
         
         # Rebalance dates
         rebal_dates = prices.index[::self.config.rebal_freq]
         print(f"\nBacktesting ({len(rebal_dates)} rebalance dates)...")
         
-        # Backtest
-        portfolio_returns = []
-        current_positions = {}
-        next_positions = {}
-        
-        for i, date in enumerate(prices.index):
-            # Apply positions from previous rebalance
-            if next_positions:
-                current_positions = next_positions.copy()
-                next_positions = {}
-            
-            # Rebalance
-            if date in rebal_dates and i > self.config.mom_lookback_slow:
-                # Use previous day's signal
-                prev_date = prices.index[i-1]
-                
-                # Get positions from each engine
-                mr_pos = self.mr_engine.select_positions(mr_signals, prev_date)
-                tf_pos = self.tf_engine.select_positions(tf_signals, prev_date)
-                
-                # Blend positions
-                blended = self.blend_positions(mr_pos, tf_pos)
-                
-                # Apply volatility targeting
-                if len(portfolio_returns) > self.config.vol_window:
-                    port_ret_series = pd.Series(portfolio_returns)
-                    leverage = self.calculate_vol_leverage(port_ret_series, len(portfolio_returns))
-                else:
-                    leverage = 1.0
-                
-                # Scale positions
-                next_positions = {sym: w * leverage for sym, w in blended.items()}
-                
-                if i % 50 == 0:
-                    n_long = sum(1 for w in next_positions.values() if w > 0)
-                    n_short = sum(1 for w in next_positions.values() if w < 0)
-                    total_exp = sum(abs(w) for w in next_positions.values())
-                    print(f"  {date.date()}: Long={n_long}, Short={n_short}, "
-                          f"Leverage={leverage:.2f}, Exposure={total_exp:.2f}")
-            
-            # Calculate daily return
-            if i == 0:
-                portfolio_returns.append(0.0)
-                continue
-            
-            daily_ret = 0.0
-            for sym, weight in current_positions.items():
-                if sym in returns.columns:
-                    stock_ret = returns.loc[date, sym]
-                    if not np.isnan(stock_ret):
-                        daily_ret += weight * stock_ret
+        # 리밸런스 행 (t-1 시그널): 엔진별 목표 비중 (R x N) → 0.6 / 0.4 가중합
+        n_days, n_symbols = prices.shape
+        rebal_idx = np.array([i for i in range(0, n_days, self.config.rebal_freq)
+                              if i > self.config.mom_lookback_slow], dtype=np.int64)
+        blended = self.blend_matrix(
+            rank_position_matrix(mr_signals.to_numpy(dtype=float)[rebal_idx - 1], self.config),
+            rank_position_matrix(tf_signals.to_numpy(dtype=float)[rebal_idx - 1], self.config))
+        has_target = (blended != 0).any(axis=1)
+        
+        # 보유 (T): src[t] = t 에 보유 중인 목표 행 + 1 (0 = 포지션 없음).
+        # r 의 목표는 r+1 부터, 빈 목표는 이전 보유 유지
+        src = np.zeros(n_days, dtype=np.int64)
+        rows = np.flatnonzero(has_target)
+        apply_at = rebal_idx[rows] + 1
+        in_range = apply_at < n_days
+        src[apply_at[in_range]] = rows[in_range] + 1
+        src = np.maximum.accumulate(src)
+        book = np.vstack([np.zeros((1, n_symbols)), blended])
+        
+        # 레버리지 적용 전 일간 수익률 = 보유 비중 · 종목 수익률 (NaN 수익률 제외)
+        stock_returns = returns.to_numpy(dtype=float)
+        stock_returns = np.where(np.isnan(stock_returns), 0.0, stock_returns)
+        base = np.einsum('ij,ij->i', book[src], stock_returns)
+        
+        # 레버리지는 리밸런스 직전까지의 포트 수익률에 의존 → 리밸런스 블록 단위로 진행
+        # (블록 안에서는 보유 비중 x 레버리지가 상수라 daily = leverage · base - cost)
+        leverage = np.ones(len(book))
+        cost = np.zeros(n_days)
+        cost_rate = (self.config.spread_bps + self.config.impact_bps) / 10000
+        daily = np.zeros(n_days)
+        filled = 1
+        for k, i in enumerate(rebal_idx):
+            daily[filled:i] = leverage[src[filled:i]] * base[filled:i] - cost[filled:i]
+            filled = max(filled, i)
             
-            # Transaction costs on rebalance days
-            if date in rebal_dates and current_positions and next_positions:
-                turnover = sum(
-                    abs(next_positions.get(s, 0) - current_positions.get(s, 0))
-                    for s in set(current_positions.keys()) | set(next_positions.keys())
-                )
-                cost = turnover * (self.config.spread_bps + self.config.impact_bps) / 10000
-                daily_ret -= cost
+            lev = self.calculate_vol_leverage(daily, i) if i > self.config.vol_window else 1.0
+            leverage[k + 1] = lev
+            next_w = blended[k] * lev
+            held = src[i]
+            if has_target[k] and held > 0:
+                cost[i] = np.abs(next_w - book[held] * leverage[held]).sum() * cost_rate
             
-            portfolio_returns.append(daily_ret)
+            if i % 50 == 0:
+                print(f"  {prices.index[i].date()}: Long={int((next_w > 0).sum())}, "
+                      f"Short={int((next_w < 0).sum())}, "
+                      f"Leverage={lev:.2f}, Exposure={np.abs(next_w).sum():.2f}")
+        daily[filled:] = leverage[src[filled:]] * base[filled:] - cost[filled:]
+        daily[0] = 0.0
         
         # Performance metrics
-        returns_series = pd.Series(portfolio_returns, index=prices.index)
+        returns_series = pd.Series(daily, index=prices.index)
         
         annual_return = returns_series.mean() * 252
         annual_volatility = returns_series.std() * np.sqrt(252)
@@ -409,6 +442,7 @@ def main():
     parser.add_argument('--rebal_freq', type=int, default=7)
     parser.add_argument('--target_vol', type=float, default=0.12)
     parser.add_argument('--out', default='./results/ares7_ultimate_v2_results.json')
+    parser.add_argument('--jobs', type=int, default=None, help='시그널 계산 프로세스 수 (1 = 순차, 기본 min(2, CPU 수))')
     args = parser.parse_args()
     
     config = EngineConfig(
@@ -417,7 +451,7 @@ def main():
     )
     
     system = ARES7UltimateV2(config)
-    results = system.backtest(args.data_dir)
+    results = system.backtest(args.data_dir, jobs=args.jobs)
     
     # Save results
     Path(args.out).parent.mkdir(parents=True, exist_ok=True)
@@ -20,6 +20,8 @@ import argparse
 from pathlib import Path
 import cvxpy as cp
 
+from engines.result_store import ResultStore, store_engine_result, DEFAULT_STORE_DIR
+
 
 def load_data(price_path):
     """Load price data"""
@@ -264,24 +266,16 @@ def backtest_c1_v6(price,
 def calculate_correlation_with_existing(returns_series, existing_engines):
     """Calculate correlation with existing engines"""
     correlations = {}
+    store = ResultStore()
     
     for name, path in existing_engines.items():
         if not Path(path).exists():
             continue
         
-        with open(path, 'r') as f:
-            data = json.load(f)
-        
-        if 'daily_returns' not in data:
-            continue
-        
-        # Handle different formats
-        if isinstance(data['daily_returns'], list):
-            if len(data['daily_returns']) > 0 and isinstance(data['daily_returns'][0], dict):
-                other_returns = pd.Series([d['ret'] for d in data['daily_returns']])
-            else:
-                other_returns = pd.Series(data['daily_returns'])
-        else:
+        # engines/result_store.py (JSON 은 최초 1회만 파싱)
+        try:
+            other_returns = store.load_json_returns(path).reset_index(drop=True)
+        except (ValueError, KeyError, TypeError, json.JSONDecodeError):
             continue
         
         # Align
@@ -289,6 +283,7 @@ def calculate_correlation_with_existing(returns_series, existing_engines):
         corr = returns_series.iloc[:min_len].corr(other_returns.iloc[:min_len])
         correlations[name] = corr
     
+    store.close()
     return correlations
 
 
@@ -391,8 +386,9 @@ def main():
     Path(args.out).parent.mkdir(parents=True, exist_ok=True)
     with open(args.out, 'w') as f:
         json.dump(output, f, indent=2)
+    store_engine_result('c1_v6', output)
     
-    print(f"Results saved to: {args.out}")
+    print(f"Results saved to: {args.out} (+ {DEFAULT_STORE_DIR})")
     print("=" * 60)
 
 
@@ -17,8 +17,12 @@ import pandas as pd
 import numpy as np
 import json
 import argparse
+import warnings
 from pathlib import Path
 
+from engines.factor_portfolio import portfolio_returns
+from engines.momentum import hold_blocks, rebalance_rows, top_bottom
+
 
 def load_data(price_path):
     """Load price data"""
@@ -66,82 +70,61 @@ def calculate_volatility(returns, vol_window=60):
     return vol
 
 
+def extreme_volatility_mask(volatility, vol_percentile_low=10, vol_percentile_high=90):
+    """
+    날짜별 변동성 단면 percentile 밖 (low 미만 / high 초과) 종목 마스크.
+    sweep 파라미터 (span, n_long, ...) 와 무관하므로 최적화에서는 한 번만 계산
+    """
+    vol = volatility.to_numpy(dtype=np.float64)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)     # 변동성이 전부 NaN 인 날짜
+        low_thresh = np.nanpercentile(vol, vol_percentile_low, axis=1, keepdims=True)
+        high_thresh = np.nanpercentile(vol, vol_percentile_high, axis=1, keepdims=True)
+    mask = (vol < low_thresh) | (vol > high_thresh)
+    return pd.DataFrame(mask, index=volatility.index, columns=volatility.columns)
+
+
 def filter_by_volatility(signals, volatility, vol_percentile_low=10, vol_percentile_high=90):
     """
     Filter out stocks with extreme volatility
     """
-    filtered_signals = signals.copy()
+    mask = extreme_volatility_mask(volatility, vol_percentile_low, vol_percentile_high)
+    mask = mask.reindex(index=signals.index, columns=signals.columns, fill_value=False)
     
-    for date in signals.index:
-        if date not in volatility.index:
-            continue
-        
-        vol_row = volatility.loc[date]
-        vol_row = vol_row.dropna()
-        
-        if len(vol_row) == 0:
-            continue
-        
-        low_thresh = np.percentile(vol_row, vol_percentile_low)
-        high_thresh = np.percentile(vol_row, vol_percentile_high)
-        
-        # Set signal to NaN for extreme volatility stocks
-        mask = (vol_row < low_thresh) | (vol_row > high_thresh)
-        filtered_signals.loc[date, mask.index[mask]] = np.nan
-    
-    return filtered_signals
+    # Set signal to NaN for extreme volatility stocks
+    return signals.mask(mask)
 
 
-def select_positions(signals, n_long=20, n_short=20, gross_exposure=2.0, weight_by_signal=False):
+def target_weights(signals, n_long=20, n_short=20, gross_exposure=2.0, weight_by_signal=False):
     """
-    Select long and short positions based on signals
+    Select long and short positions based on signals (리밸런스 행 x 종목 패널, 행별 한 번에)
     
     Top signals (most positive) → LONG (expect reversion up)
     Bottom signals (most negative) → SHORT (expect reversion down)
+    유효 신호가 n_long + n_short 개 미만인 행은 포지션 없음 (전량 청산)
     """
-    signals = signals.dropna()
-    
-    if len(signals) < n_long + n_short:
-        return {}
-    
-    # Sort by signal
-    sorted_signals = signals.sort_values(ascending=False)
-    
-    # Select long (top signals)
-    long_symbols = sorted_signals.head(n_long).index.tolist()
-    
-    # Select short (bottom signals)
-    short_symbols = sorted_signals.tail(n_short).index.tolist()
-    
-    positions = {}
+    is_long, is_short = top_bottom(signals, n_long, n_short)
+    half = gross_exposure / 2.0
     
     if weight_by_signal:
-        # Weight by signal strength
-        long_signals = sorted_signals.head(n_long)
-        short_signals = sorted_signals.tail(n_short)
-        
-        # Normalize
-        long_weights = long_signals / long_signals.abs().sum()
-        short_weights = short_signals / short_signals.abs().sum()
-        
-        # Scale to target exposure
-        for sym, w in long_weights.items():
-            positions[sym] = w * (gross_exposure / 2.0)
-        
-        for sym, w in short_weights.items():
-            positions[sym] = w * (gross_exposure / 2.0)
-    else:
-        # Equal weight
-        long_weight = (gross_exposure / 2.0) / n_long
-        short_weight = -(gross_exposure / 2.0) / n_short
-        
-        for sym in long_symbols:
-            positions[sym] = long_weight
-        
-        for sym in short_symbols:
-            positions[sym] = short_weight
-    
-    return positions
+        # Weight by signal strength: 롱 / 숏 각각 Σ|signal| 로 정규화
+        s = np.where(np.isnan(signals), 0.0, signals)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            long_w = s / np.abs(np.where(is_long, s, 0.0)).sum(axis=1, keepdims=True)
+            short_w = s / np.abs(np.where(is_short, s, 0.0)).sum(axis=1, keepdims=True)
+        return np.where(is_long, long_w * half, np.where(is_short, short_w * half, 0.0))
+    
+    # Equal weight
+    return np.where(is_long, half / n_long, np.where(is_short, -half / n_short, 0.0))
+
+
+def c1_v6_returns(returns, rebal_rows, targets):
+    """
+    리밸런스 목표를 다음 리밸런스 전까지 보유 (리밸런스 당일 수익률부터 적용) → 일별 수익률.
+    NaN 종목 수익률은 0, 첫 날 0
+    """
+    held = hold_blocks(len(returns), rebal_rows, targets)
+    return portfolio_returns(held, returns)
 
 
 def backtest_c1_v6(price, 
@@ -173,49 +156,22 @@ def backtest_c1_v6(price,
         print(f"Applying volatility filter...")
         signals = filter_by_volatility(signals, volatility)
     
-    # Get rebalance dates
-    rebal_dates = price.index[::rebal_freq]
-    rebal_dates = [d for d in rebal_dates if d in signals.index]
+    # Get rebalance dates (price.index[::rebal_freq])
+    rebal_rows = rebalance_rows(len(price), rebal_freq)
     
-    print(f"Backtesting ({len(rebal_dates)} rebalance dates)...")
+    print(f"Backtesting ({len(rebal_rows)} rebalance dates)...")
     
-    # Backtest
-    portfolio_value = [1.0]
-    daily_returns_list = []
-    current_positions = {}
-    
-    for i, date in enumerate(price.index):
-        # Rebalance if needed
-        if date in rebal_dates:
-            signal_row = signals.loc[date]
-            
-            current_positions = select_positions(
-                signal_row, n_long, n_short, gross_exposure, weight_by_signal
-            )
-            
-            if i % 50 == 0:
-                n_long_pos = sum(1 for w in current_positions.values() if w > 0)
-                n_short_pos = sum(1 for w in current_positions.values() if w < 0)
-                print(f"  Date {date.date()}: {n_long_pos} long, {n_short_pos} short")
-        
-        # Calculate daily return
-        if i == 0:
-            daily_returns_list.append(0.0)
-            continue
-        
-        ret = 0.0
-        for symbol, weight in current_positions.items():
-            if symbol in returns.columns:
-                stock_ret = returns.loc[date, symbol]
-                
-                if not np.isnan(stock_ret):
-                    ret += weight * stock_ret
-        
-        daily_returns_list.append(ret)
-        portfolio_value.append(portfolio_value[-1] * (1 + ret))
+    targets = target_weights(signals.to_numpy(dtype=np.float64)[rebal_rows],
+                             n_long, n_short, gross_exposure, weight_by_signal)
+    for k in np.flatnonzero(rebal_rows % 50 == 0):
+        print(f"  Date {price.index[rebal_rows[k]].date()}: "
+              f"{(targets[k] > 0).sum()} long, {(targets[k] < 0).sum()} short")
+    
+    daily_returns = c1_v6_returns(returns.to_numpy(dtype=np.float64), rebal_rows, targets)
+    portfolio_value = np.cumprod(1 + daily_returns).tolist()
     
     # Calculate metrics
-    returns_series = pd.Series(daily_returns_list, index=price.index)
+    returns_series = pd.Series(daily_returns, index=price.index)
     
     annual_return = returns_series.mean() * 252
     annual_volatility = returns_series.std() * np.sqrt(252)
@@ -228,7 +184,7 @@ def backtest_c1_v6(price,
     max_drawdown = drawdown.min()
     
     # Turnover (approximate)
-    avg_turnover = gross_exposure * len(rebal_dates) / len(price)
+    avg_turnover = gross_exposure * len(rebal_rows) / len(price)
     
     return {
         'sharpe': sharpe,
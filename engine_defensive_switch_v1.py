@@ -24,6 +24,8 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 
+from engines.regime import RegimeFeatures
+
 
 def load_portfolio_returns(port_json: str) -> pd.Series:
     with open(port_json, "r") as f:
@@ -112,10 +114,11 @@ def defensive_switch(
         axis=1,
     ).dropna()
 
-    # SPY 지표
-    df["SPY_RET"] = df["SPY_PRICE"].pct_change()
-    df["SPY_MA"] = df["SPY_PRICE"].rolling(spy_ma_window, min_periods=spy_ma_window).mean()
-    df["SPY_R60"] = df["SPY_PRICE"] / df["SPY_PRICE"].shift(spy_ret_window) - 1.0
+    # SPY 지표 (engines/regime.py, 정렬된 날짜 축에서 한 번 계산)
+    rf = RegimeFeatures(df.index, market=df["SPY_PRICE"])
+    df["SPY_RET"] = rf.returns()
+    df["SPY_MA"] = rf.ma(spy_ma_window)
+    df["SPY_R60"] = rf.momentum(spy_ret_window)
 
     # 포트 롤링 MDD
     df["PORT_RET"] = df["PORT"]
@@ -124,11 +127,11 @@ def defensive_switch(
     df["DD"] = equity / peak - 1.0
 
     # 리스크 ON/OFF 조건
-    cond_ma = df["SPY_PRICE"] > df["SPY_MA"]
-    cond_r60 = df["SPY_R60"] > spy_ret_threshold
-    cond_dd = df["DD"] > mdd_threshold
+    cond_ma = rf.above_ma(spy_ma_window)
+    cond_r60 = rf.momentum_above(spy_ret_window, spy_ret_threshold)
+    cond_dd = (df["DD"] > mdd_threshold).to_numpy()
 
-    df["RISK_ON"] = (cond_ma & cond_r60 & cond_dd).astype(int)
+    df["RISK_ON"] = (cond_ma & cond_r60 & cond_dd).values.astype(int)
 
     # TLT 수익률
     df["TLT_RET"] = df["TLT_PRICE"].pct_change().fillna(0.0)
@@ -1,12 +1,13 @@
 import pandas as pd
 import numpy as np
-import riskfolio as rp
 from pykalman import KalmanFilter
 from sklearn.preprocessing import QuantileTransformer
 import nolds
 import warnings
 import matplotlib.pyplot as plt
 
+from ensemble.risk_allocation import HRPAllocator, ledoit_wolf
+
 # Configuration (ARES-X v2.0 Parameters)
 TARGET_VOLATILITY = 0.12  # 12% Annualized Volatility Target
 MAX_LEVERAGE = 2.0
@@ -172,6 +173,8 @@ class PortfolioConstructor:
     def __init__(self, returns, data_processor):
         self.returns = returns
         self.data_processor = data_processor
+        # ensemble/risk_allocation.py: ward + optimal leaf order, linkage 는 상관 변화 시에만 재계산
+        self.hrp = HRPAllocator(method='ward', optimal_ordering=True)
 
     def combine_signals(self, signals_df):
         """Combines alpha signals using robust normalization."""
@@ -202,13 +205,12 @@ class PortfolioConstructor:
             return self._inverse_volatility_weights(historical_returns)
 
         try:
-            # Initialize HRP portfolio object using riskfolio-lib
-            port = rp.HCPortfolio(returns=historical_returns)
-            
-            # Estimate optimal portfolio weights using HRP with Ledoit-Wolf shrinkage (Insight 16)
-            weights = port.optimization(model='HRP', codependence='pearson', covariance='ledoit', 
-                                        rm='MV', rf=0, linkage='ward', max_k=10, leaf_order=True)
-            return weights.T.iloc[0]
+            # HRP with Ledoit-Wolf shrinkage (Insight 16), Pearson codependence for clustering
+            clean = historical_returns.fillna(0.0)
+            cov = ledoit_wolf(clean.values)
+            corr = np.corrcoef(clean.values, rowvar=False)
+            weights = self.hrp.weights(cov, corr=corr)
+            return pd.Series(weights, index=historical_returns.columns)
         except Exception as e:
             # Fallback to Inverse Volatility if HRP fails
             return self._inverse_volatility_weights(historical_returns)
@@ -401,7 +403,7 @@ if __name__ == '__main__':
     prices.columns = pd.Index([f'Asset_{i}' for i in range(N_ASSETS)], name='Symbols')
     
     # Initialize Modules
-    # Ensure required libraries (pykalman, nolds, riskfolio-lib) are installed
+    # Ensure required libraries (pykalman, nolds) are installed
     try:
         data_processor = DataProcessor(prices)
         data_processor.process()
@@ -434,7 +436,7 @@ if __name__ == '__main__':
         plt.show()
 
     except ImportError as e:
-        print(f"\nERROR: Missing required libraries. Please install pykalman, nolds, and riskfolio-lib.")
+        print(f"\nERROR: Missing required libraries. Please install pykalman and nolds.")
         print(f"Import Error Details: {e}")
     except Exception as e:
         print(f"\nAn error occurred during execution: {e}")
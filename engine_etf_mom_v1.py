@@ -14,6 +14,8 @@ import pandas as pd
 import numpy as np
 import json
 
+from engines.momentum import hold_blocks, rebalance_rows
+
 def load_etf_data(csv_path):
     """Load ETF price data"""
     print("Loading ETF data...")
@@ -56,42 +58,15 @@ def backtest_etf_momentum(pivot_ret, signal, rebal_days=10, cost=0.0003):
     symbols = pivot_ret.columns.tolist()
     
     # Rebalancing schedule
-    rebal_dates = dates[::rebal_days]
+    rebal_idx = rebalance_rows(len(dates), rebal_days)
     
-    # Initialize weights
-    weights = pd.DataFrame(0.0, index=dates, columns=symbols)
+    # Select ETFs with signal = 1, equal weight (선택 없으면 해당 구간 전액 현금)
+    selected = signal.reindex(index=dates, columns=symbols).values[rebal_idx] == 1
+    n_selected = selected.sum(axis=1, keepdims=True)
+    targets = np.where(selected, 1.0 / np.maximum(n_selected, 1), 0.0)
     
-    for i, rebal_date in enumerate(rebal_dates):
-        if rebal_date not in signal.index:
-            continue
-        
-        # Get signals for this date
-        signals_today = signal.loc[rebal_date]
-        
-        # Select ETFs with signal = 1
-        selected = signals_today[signals_today == 1].index.tolist()
-        
-        if len(selected) == 0:
-            # Full cash if no signals
-            continue
-        
-        # Equal weight
-        w = 1.0 / len(selected)
-        
-        # Determine end date
-        if i < len(rebal_dates) - 1:
-            next_rebal = rebal_dates[i + 1]
-            end_idx = dates.get_loc(next_rebal)
-        else:
-            end_idx = len(dates)
-        
-        start_idx = dates.get_loc(rebal_date)
-        
-        # Set weights
-        weights.iloc[start_idx:end_idx, :] = 0.0
-        for sym in selected:
-            if sym in weights.columns:
-                weights.loc[dates[start_idx]:dates[end_idx-1], sym] = w
+    # 리밸 구간 [rebal, 다음 rebal) 동안 유지
+    weights = pd.DataFrame(hold_blocks(len(dates), rebal_idx, targets), index=dates, columns=symbols)
     
     # Calculate returns
     port_ret = (weights.shift(1) * pivot_ret).sum(axis=1)
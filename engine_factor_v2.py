@@ -19,6 +19,8 @@ import json
 import argparse
 from pathlib import Path
 
+from engines.factor_portfolio import build_targets, hold_weights, portfolio_returns, rebalance_rows
+
 
 def load_data(price_path, fundamentals_path):
     """Load price and fundamentals data"""
@@ -45,180 +47,15 @@ def load_data(price_path, fundamentals_path):
     return price, fundamentals
 
 
-def calculate_factors(price, fundamentals, lookback_momentum=60):
-    """
-    Calculate factor scores for each stock
-    
-    Factors:
-    - Value: Low PER + Low PBR
-    - Quality: High ROE + High Gross Margin + Low Debt/Equity
-    - Momentum: 60-day price momentum
-    """
-    # Get fundamentals dict
-    fund_dict = fundamentals.set_index('symbol').to_dict('index')
-    
-    # Calculate momentum for each stock
-    momentum = price.pct_change(lookback_momentum)
-    
-    factor_scores = {}
-    
-    for ticker in price.columns:
-        if ticker not in fund_dict:
-            continue
-            
-        fund = fund_dict[ticker]
-        
-        # Value score (lower is better, so we negate)
-        per = fund.get('PER', np.nan)
-        pbr = fund.get('PBR', np.nan)
-        value_score = 0
-        if not np.isnan(per) and per > 0:
-            value_score -= per  # Lower PER is better
-        if not np.isnan(pbr) and pbr > 0:
-            value_score -= pbr  # Lower PBR is better
-        
-        # Quality score (higher is better)
-        roe = fund.get('ROE', np.nan)
-        gross_margin = fund.get('gross_margin', np.nan)
-        debt_to_equity = fund.get('debt_to_equity', np.nan)
-        quality_score = 0
-        if not np.isnan(roe):
-            quality_score += roe
-        if not np.isnan(gross_margin):
-            quality_score += gross_margin
-        if not np.isnan(debt_to_equity) and debt_to_equity >= 0:
-            quality_score -= debt_to_equity  # Lower debt is better
-        
-        # Sector
-        sector = fund.get('sector', 'Unknown')
-        
-        factor_scores[ticker] = {
-            'value': value_score,
-            'quality': quality_score,
-            'sector': sector
-        }
-    
-    return factor_scores, momentum
-
-
-def rank_stocks_by_composite(factor_scores, momentum, date, equal_weight=True):
-    """
-    Rank stocks by composite factor score
-    
-    Composite = Value + Quality + Momentum (all normalized)
-    """
-    # Get momentum at this date
-    if date not in momentum.index:
-        return None
-    
-    mom_series = momentum.loc[date]
-    
-    # Collect scores
-    scores = []
-    for ticker, factors in factor_scores.items():
-        if ticker not in mom_series.index:
-            continue
-        
-        mom_val = mom_series[ticker]
-        if np.isnan(mom_val):
-            continue
-        
-        # Composite score (all factors equally weighted)
-        if equal_weight:
-            composite = factors['value'] + factors['quality'] + mom_val
-        else:
-            # Could add different weights here
-            composite = factors['value'] + factors['quality'] + mom_val
-        
-        scores.append({
-            'symbol': ticker,
-            'composite': composite,
-            'value': factors['value'],
-            'quality': factors['quality'],
-            'momentum': mom_val,
-            'sector': factors['sector']
-        })
-    
-    if not scores:
-        return None
-    
-    df = pd.DataFrame(scores)
-    
-    # Normalize each factor to z-score
-    for col in ['value', 'quality', 'momentum']:
-        mean = df[col].mean()
-        std = df[col].std()
-        if std > 0:
-            df[col + '_z'] = (df[col] - mean) / std
-        else:
-            df[col + '_z'] = 0
-    
-    # Recalculate composite with normalized scores
-    df['composite_z'] = df['value_z'] + df['quality_z'] + df['momentum_z']
-    
-    df = df.sort_values('composite_z', ascending=False)
-    
-    return df
-
-
-def select_sector_neutral(ranked_df, q=0.1, gross_exposure=2.0):
-    """
-    Select top/bottom stocks with sector neutrality
-    
-    q: quantile for selection (0.1 = top/bottom 10%)
-    gross_exposure: total gross exposure (2.0 = 100% long + 100% short)
-    """
-    if ranked_df is None or len(ranked_df) == 0:
-        return {}, {}
-    
-    n_stocks = len(ranked_df)
-    n_select = max(1, int(n_stocks * q))
-    
-    # Get sectors
-    sectors = ranked_df['sector'].unique()
-    
-    long_positions = {}
-    short_positions = {}
-    
-    # For each sector, select proportionally
-    for sector in sectors:
-        sector_df = ranked_df[ranked_df['sector'] == sector]
-        n_sector = len(sector_df)
-        
-        if n_sector == 0:
-            continue
-        
-        # Number to select from this sector
-        n_sector_select = max(1, int(n_sector * q))
-        
-        # Top stocks (long)
-        top_stocks = sector_df.head(n_sector_select)['symbol'].tolist()
-        for ticker in top_stocks:
-            long_positions[ticker] = 1.0 / n_select  # Equal weight
-        
-        # Bottom stocks (short)
-        bottom_stocks = sector_df.tail(n_sector_select)['symbol'].tolist()
-        for ticker in bottom_stocks:
-            short_positions[ticker] = -1.0 / n_select  # Equal weight
-    
-    # Normalize to target gross exposure
-    total_long = sum(abs(w) for w in long_positions.values())
-    total_short = sum(abs(w) for w in short_positions.values())
-    
-    target_each = gross_exposure / 2.0
-    
-    if total_long > 0:
-        for ticker in long_positions:
-            long_positions[ticker] *= target_each / total_long
-    
-    if total_short > 0:
-        for ticker in short_positions:
-            short_positions[ticker] *= target_each / total_short
-    
-    # Combine
-    positions = {**long_positions, **short_positions}
-    
-    return positions, {'long': long_positions, 'short': short_positions}
+def calculate_returns(price):
+    """(T x N) 종목 일별 수익률 (p_curr - p_prev) / p_prev, 가격 결측 / p_prev <= 0 이면 0"""
+    P = price.to_numpy(dtype=np.float64)
+    stock_ret = np.zeros_like(P)
+    prev, curr = P[:-1], P[1:]
+    valid = ~np.isnan(prev) & ~np.isnan(curr) & (prev > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stock_ret[1:] = np.where(valid, (curr - prev) / prev, 0.0)
+    return stock_ret
 
 
 def backtest_factor_v2(price, fundamentals, 
@@ -228,52 +65,24 @@ def backtest_factor_v2(price, fundamentals,
                        gross_exposure=2.0):
     """
     Backtest Factor v2 strategy
+
+    Factors (engines/factor_portfolio.py, 모든 리밸런스 날짜를 (R x N) 패널로 한 번에):
+    - Value: Low PER + Low PBR
+    - Quality: High ROE + High Gross Margin + Low Debt/Equity
+    - Momentum: price.pct_change(lookback_momentum) at the rebalance date
+    Composite = z(Value) + z(Quality) + z(Momentum), 섹터별 top/bottom q 롱숏.
+    종목별 최신 재무 하나만 사용, 목표 비중은 리밸런스 당일 수익률부터 적용.
     """
-    # Calculate factors
-    factor_scores, momentum = calculate_factors(price, fundamentals, lookback_momentum)
-    
-    # Get rebalance dates
-    if rebalance_freq == 'W':
-        # Weekly: every Friday
-        rebal_dates = price.resample('W-FRI').last().index
-    elif rebalance_freq == 'M':
-        # Monthly: last trading day of month
-        rebal_dates = price.resample('M').last().index
-    else:
-        raise ValueError(f"Invalid rebalance_freq: {rebalance_freq}")
+    rebal_rows = rebalance_rows(price.index, rebalance_freq)
     
-    rebal_dates = [d for d in rebal_dates if d in price.index]
+    # 점수가 없는 리밸런스 날짜는 전량 청산 (빈 포지션)
+    targets = build_targets(price, fundamentals, rebal_rows, lookback_momentum,
+                            signal_lag=0, lag_days=None, q=q, gross_exposure=gross_exposure)
+    update = np.ones(len(rebal_rows), dtype=bool)
     
-    # Backtest
-    portfolio_value = [1.0]
-    daily_returns = []
-    current_positions = {}
-    
-    for i, date in enumerate(price.index):
-        # Rebalance if needed
-        if date in rebal_dates:
-            ranked = rank_stocks_by_composite(factor_scores, momentum, date)
-            current_positions, _ = select_sector_neutral(ranked, q, gross_exposure)
-        
-        # Calculate daily return
-        if i == 0:
-            daily_returns.append(0.0)
-            continue
-        
-        prev_date = price.index[i-1]
-        
-        ret = 0.0
-        for ticker, weight in current_positions.items():
-            if ticker in price.columns:
-                p_prev = price.loc[prev_date, ticker]
-                p_curr = price.loc[date, ticker]
-                
-                if not np.isnan(p_prev) and not np.isnan(p_curr) and p_prev > 0:
-                    stock_ret = (p_curr - p_prev) / p_prev
-                    ret += weight * stock_ret
-        
-        daily_returns.append(ret)
-        portfolio_value.append(portfolio_value[-1] * (1 + ret))
+    held = hold_weights(len(price), rebal_rows, targets.weights, update, apply_lag=0)
+    daily_returns = portfolio_returns(held, calculate_returns(price))
+    portfolio_value = np.cumprod(1 + daily_returns).tolist()
     
     # Calculate metrics
     returns_series = pd.Series(daily_returns, index=price.index)
@@ -288,22 +97,10 @@ def backtest_factor_v2(price, fundamentals,
     drawdown = (cumulative - running_max) / running_max
     max_drawdown = drawdown.min()
     
-    # Turnover
-    turnover_list = []
-    prev_positions = {}
-    for date in rebal_dates:
-        ranked = rank_stocks_by_composite(factor_scores, momentum, date)
-        positions, _ = select_sector_neutral(ranked, q, gross_exposure)
-        
-        if prev_positions:
-            # Calculate turnover
-            all_tickers = set(prev_positions.keys()) | set(positions.keys())
-            turnover = sum(abs(positions.get(t, 0) - prev_positions.get(t, 0)) for t in all_tickers)
-            turnover_list.append(turnover)
-        
-        prev_positions = positions
-    
-    avg_turnover = np.mean(turnover_list) if turnover_list else 0
+    # Turnover: 직전 리밸런스에 포지션이 있었던 날짜만
+    W = targets.weights
+    turnover = np.abs(W[1:] - W[:-1]).sum(axis=1)[targets.n_positions[:-1] > 0]
+    avg_turnover = turnover.mean() if len(turnover) else 0
     
     return {
         'sharpe': sharpe,
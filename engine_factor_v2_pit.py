@@ -13,6 +13,9 @@ import json
 import argparse
 from pathlib import Path
 
+from engines.factor_portfolio import build_targets, hold_weights, portfolio_returns, rebalance_rows
+from engines.result_store import ResultStore, store_engine_result, DEFAULT_STORE_DIR
+
 
 def load_data(price_path, fundamentals_path):
     """Load price and fundamentals data"""
@@ -38,194 +41,6 @@ def load_data(price_path, fundamentals_path):
     return price, fundamentals
 
 
-def get_point_in_time_fundamentals(fundamentals, as_of_date, lag_days=90):
-    """
-    Get point-in-time fundamentals as of a specific date
-    
-    as_of_date: The date for which we want fundamentals
-    lag_days: Reporting lag (default 90 days = ~3 months)
-    
-    Returns: DataFrame with one row per symbol (latest available fundamentals)
-    """
-    # Adjust for reporting lag
-    cutoff_date = as_of_date - pd.Timedelta(days=lag_days)
-    
-    # Filter fundamentals up to cutoff date
-    available = fundamentals[fundamentals['report_date'] <= cutoff_date].copy()
-    
-    if len(available) == 0:
-        return None
-    
-    # Get the latest report for each symbol
-    latest = available.sort_values('report_date').groupby('symbol').tail(1)
-    
-    return latest
-
-
-def calculate_factors_pit(price, fundamentals, rebal_date, lookback_momentum=60, lag_days=90):
-    """
-    Calculate factor scores using point-in-time fundamentals
-    """
-    # Get point-in-time fundamentals
-    pit_fund = get_point_in_time_fundamentals(fundamentals, rebal_date, lag_days)
-    
-    if pit_fund is None or len(pit_fund) == 0:
-        return None, None
-    
-    # Get fundamentals dict
-    fund_dict = pit_fund.set_index('symbol').to_dict('index')
-    
-    # Calculate momentum
-    if rebal_date not in price.index:
-        return None, None
-    
-    date_idx = price.index.get_loc(rebal_date)
-    # Use previous day's close to avoid look-ahead bias
-    if date_idx < lookback_momentum + 1:
-        return None, None
-    
-    signal_date_idx = date_idx - 1  # Previous day
-    start_idx = signal_date_idx - lookback_momentum
-    momentum = (price.iloc[signal_date_idx] / price.iloc[start_idx] - 1)
-    
-    # Calculate factor scores
-    factor_scores = {}
-    
-    for symbol in price.columns:
-        if symbol not in fund_dict:
-            continue
-        
-        fund = fund_dict[symbol]
-        
-        # Value score (lower is better, so we negate)
-        per = fund.get('PER', np.nan)
-        pbr = fund.get('PBR', np.nan)
-        value_score = 0
-        if not np.isnan(per) and per > 0:
-            value_score -= per
-        if not np.isnan(pbr) and pbr > 0:
-            value_score -= pbr
-        
-        # Quality score (higher is better)
-        roe = fund.get('ROE', np.nan)
-        gross_margin = fund.get('gross_margin', np.nan)
-        debt_to_equity = fund.get('debt_to_equity', np.nan)
-        quality_score = 0
-        if not np.isnan(roe):
-            quality_score += roe
-        if not np.isnan(gross_margin):
-            quality_score += gross_margin
-        if not np.isnan(debt_to_equity) and debt_to_equity >= 0:
-            quality_score -= debt_to_equity
-        
-        # Momentum score
-        mom_val = momentum.get(symbol, np.nan)
-        if np.isnan(mom_val):
-            continue
-        
-        # Sector
-        sector = fund.get('sector', 'Unknown')
-        
-        factor_scores[symbol] = {
-            'value': value_score,
-            'quality': quality_score,
-            'momentum': mom_val,
-            'sector': sector
-        }
-    
-    return factor_scores, momentum
-
-
-def rank_stocks_by_composite(factor_scores):
-    """
-    Rank stocks by composite factor score
-    """
-    if not factor_scores:
-        return None
-    
-    scores = []
-    for symbol, factors in factor_scores.items():
-        scores.append({
-            'symbol': symbol,
-            'value': factors['value'],
-            'quality': factors['quality'],
-            'momentum': factors['momentum'],
-            'sector': factors['sector']
-        })
-    
-    df = pd.DataFrame(scores)
-    
-    # Normalize each factor to z-score
-    for col in ['value', 'quality', 'momentum']:
-        mean = df[col].mean()
-        std = df[col].std()
-        if std > 0:
-            df[col + '_z'] = (df[col] - mean) / std
-        else:
-            df[col + '_z'] = 0
-    
-    # Composite score
-    df['composite_z'] = df['value_z'] + df['quality_z'] + df['momentum_z']
-    
-    df = df.sort_values('composite_z', ascending=False)
-    
-    return df
-
-
-def select_sector_neutral(ranked_df, q=0.1, gross_exposure=2.0):
-    """
-    Select top/bottom stocks with sector neutrality
-    """
-    if ranked_df is None or len(ranked_df) == 0:
-        return {}
-    
-    n_stocks = len(ranked_df)
-    n_select = max(1, int(n_stocks * q))
-    
-    sectors = ranked_df['sector'].unique()
-    
-    long_positions = {}
-    short_positions = {}
-    
-    for sector in sectors:
-        sector_df = ranked_df[ranked_df['sector'] == sector]
-        n_sector = len(sector_df)
-        
-        if n_sector == 0:
-            continue
-        
-        n_sector_select = max(1, int(n_sector * q))
-        
-        # Top stocks (long)
-        top_stocks = sector_df.head(n_sector_select)['symbol'].tolist()
-        for symbol in top_stocks:
-            long_positions[symbol] = 1.0 / n_select
-        
-        # Bottom stocks (short)
-        bottom_stocks = sector_df.tail(n_sector_select)['symbol'].tolist()
-        for symbol in bottom_stocks:
-            short_positions[symbol] = -1.0 / n_select
-    
-    # Normalize to target gross exposure
-    total_long = sum(abs(w) for w in long_positions.values())
-    total_short = sum(abs(w) for w in short_positions.values())
-    
-    target_each = gross_exposure / 2.0
-    
-    if total_long > 0:
-        for symbol in long_positions:
-            long_positions[symbol] *= target_each / total_long
-    
-    if total_short > 0:
-        for symbol in short_positions:
-            short_positions[symbol] *= target_each / total_short
-    
-    # Combine
-    positions = {**long_positions, **short_positions}
-    
-    return positions
-
-
 def backtest_factor_v2_pit(price, fundamentals, 
                            q=0.15, 
                            rebalance_freq='W',
@@ -234,57 +49,35 @@ def backtest_factor_v2_pit(price, fundamentals,
                            lag_days=90):
     """
     Backtest Factor v2 strategy with point-in-time fundamentals
+
+    engines/factor_portfolio.py: 모든 리밸런스 날짜의 목표 비중을 (R x N) 패널로 한 번에 계산.
+    신호는 전일 종가, 목표 비중은 리밸런스 당일 수익률부터 적용 (기존과 동일),
+    factor 점수가 없는 날은 기존 포지션 유지.
     """
-    # Get rebalance dates
-    if rebalance_freq == 'W':
-        rebal_dates = price.resample('W-FRI').last().index
-    elif rebalance_freq == 'M':
-        rebal_dates = price.resample('M').last().index
-    else:
-        raise ValueError(f"Invalid rebalance_freq: {rebalance_freq}")
-    
-    rebal_dates = [d for d in rebal_dates if d in price.index]
-    
-    # Backtest
-    portfolio_value = [1.0]
-    daily_returns = []
-    current_positions = {}
-    
-    print(f"Backtesting with {len(rebal_dates)} rebalance dates...")
-    
-    for i, date in enumerate(price.index):
-        # Rebalance if needed
-        if date in rebal_dates:
-            factor_scores, _ = calculate_factors_pit(
-                price, fundamentals, date, lookback_momentum, lag_days
-            )
-            
-            if factor_scores:
-                ranked = rank_stocks_by_composite(factor_scores)
-                current_positions = select_sector_neutral(ranked, q, gross_exposure)
-            
-            if i % 50 == 0:
-                print(f"  {date.date()}: {len(current_positions)} positions")
-        
-        # Calculate daily return
-        if i == 0:
-            daily_returns.append(0.0)
-            continue
-        
-        prev_date = price.index[i-1]
-        
-        ret = 0.0
-        for symbol, weight in current_positions.items():
-            if symbol in price.columns:
-                p_prev = price.loc[prev_date, symbol]
-                p_curr = price.loc[date, symbol]
-                
-                if not np.isnan(p_prev) and not np.isnan(p_curr) and p_prev > 0:
-                    stock_ret = (p_curr - p_prev) / p_prev
-                    ret += weight * stock_ret
-        
-        daily_returns.append(ret)
-        portfolio_value.append(portfolio_value[-1] * (1 + ret))
+    rebal_rows = rebalance_rows(price.index, rebalance_freq)
+    
+    print(f"Backtesting with {len(rebal_rows)} rebalance dates...")
+    
+    targets = build_targets(price, fundamentals, rebal_rows, lookback_momentum,
+                            signal_lag=1, lag_days=lag_days, q=q, gross_exposure=gross_exposure)
+    update = targets.has_scores
+    
+    # 진행 출력: 해당 날짜에 보유 중인 포지션 수
+    last = np.maximum.accumulate(np.where(update, np.arange(len(rebal_rows)), -1))
+    n_held = np.where(last >= 0, targets.n_positions[np.maximum(last, 0)], 0)
+    for row, n in zip(rebal_rows, n_held):
+        if row % 50 == 0:
+            print(f"  {price.index[row].date()}: {n} positions")
+    
+    # Daily returns: (p_curr - p_prev) / p_prev, 가격 결측 / p_prev <= 0 이면 0
+    held = hold_weights(len(price), rebal_rows, targets.weights, update, apply_lag=0)
+    P = price.to_numpy(dtype=np.float64)
+    stock_ret = np.zeros_like(P)
+    prev, curr = P[:-1], P[1:]
+    valid = ~np.isnan(prev) & ~np.isnan(curr) & (prev > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stock_ret[1:] = np.where(valid, (curr - prev) / prev, 0.0)
+    daily_returns = portfolio_returns(held, stock_ret)
     
     # Calculate metrics
     returns_series = pd.Series(daily_returns, index=price.index)
@@ -300,7 +93,7 @@ def backtest_factor_v2_pit(price, fundamentals,
     max_drawdown = drawdown.min()
     
     # Turnover
-    avg_turnover = gross_exposure * len(rebal_dates) / len(price)
+    avg_turnover = gross_exposure * len(rebal_rows) / len(price)
     
     return {
         'sharpe': sharpe,
@@ -316,24 +109,16 @@ def backtest_factor_v2_pit(price, fundamentals,
 def calculate_correlation_with_existing(returns_series, existing_engines):
     """Calculate correlation with existing engines"""
     correlations = {}
+    store = ResultStore()
     
     for name, path in existing_engines.items():
         if not Path(path).exists():
             continue
         
-        with open(path, 'r') as f:
-            data = json.load(f)
-        
-        if 'daily_returns' not in data:
-            continue
-        
-        # Handle different formats
-        if isinstance(data['daily_returns'], list):
-            if len(data['daily_returns']) > 0 and isinstance(data['daily_returns'][0], dict):
-                other_returns = pd.Series([d['ret'] for d in data['daily_returns']])
-            else:
-                other_returns = pd.Series(data['daily_returns'])
-        else:
+        # engines/result_store.py (JSON 은 최초 1회만 파싱)
+        try:
+            other_returns = store.load_json_returns(path).reset_index(drop=True)
+        except (ValueError, KeyError, TypeError, json.JSONDecodeError):
             continue
         
         # Align
@@ -341,6 +126,7 @@ def calculate_correlation_with_existing(returns_series, existing_engines):
         corr = returns_series.iloc[:min_len].corr(other_returns.iloc[:min_len])
         correlations[name] = corr
     
+    store.close()
     return correlations
 
 
@@ -443,8 +229,9 @@ def main():
     Path(args.out).parent.mkdir(parents=True, exist_ok=True)
     with open(args.out, 'w') as f:
         json.dump(output, f, indent=2)
+    store_engine_result('factor_v2_pit', output)
     
-    print(f"Results saved to: {args.out}")
+    print(f"Results saved to: {args.out} (+ {DEFAULT_STORE_DIR})")
     print("=" * 60)
 
 
@@ -19,6 +19,8 @@ import json
 import argparse
 from pathlib import Path
 
+from engines.factor_portfolio import build_targets, hold_weights, portfolio_returns, rebalance_rows
+
 
 def load_data(price_path, fundamentals_path):
     """Load price and fundamentals data"""
@@ -44,197 +46,6 @@ def load_data(price_path, fundamentals_path):
     return price, fundamentals
 
 
-def get_point_in_time_fundamentals(fundamentals, as_of_date, lag_days=90):
-    """
-    Get point-in-time fundamentals as of a specific date
-    
-    as_of_date: The date for which we want fundamentals
-    lag_days: Reporting lag (default 90 days = ~3 months)
-    
-    Returns: DataFrame with one row per symbol (latest available fundamentals)
-    """
-    # Adjust for reporting lag
-    cutoff_date = as_of_date - pd.Timedelta(days=lag_days)
-    
-    # Filter fundamentals up to cutoff date
-    available = fundamentals[fundamentals['report_date'] <= cutoff_date].copy()
-    
-    if len(available) == 0:
-        return None
-    
-    # Get the latest report for each symbol
-    latest = available.sort_values('report_date').groupby('symbol').tail(1)
-    
-    return latest
-
-
-def calculate_factors_correct(price, fundamentals, decision_date, lookback_momentum=40, lag_days=90):
-    """
-    Calculate factor scores using CORRECT timing
-    
-    decision_date: The date we make the decision (e.g., Friday close)
-    We use data up to the PREVIOUS day (Thursday close)
-    """
-    # Get point-in-time fundamentals as of decision date
-    pit_fund = get_point_in_time_fundamentals(fundamentals, decision_date, lag_days)
-    
-    if pit_fund is None or len(pit_fund) == 0:
-        return None
-    
-    # Get fundamentals dict
-    fund_dict = pit_fund.set_index('symbol').to_dict('index')
-    
-    # Calculate momentum using data up to PREVIOUS day
-    if decision_date not in price.index:
-        return None
-    
-    date_idx = price.index.get_loc(decision_date)
-    if date_idx < 1:  # Need at least 1 previous day
-        return None
-    
-    # Use PREVIOUS day's price for momentum calculation
-    signal_date_idx = date_idx - 1
-    
-    if signal_date_idx < lookback_momentum:
-        return None
-    
-    start_idx = signal_date_idx - lookback_momentum
-    momentum = (price.iloc[signal_date_idx] / price.iloc[start_idx] - 1)
-    
-    # Calculate factor scores
-    factor_scores = {}
-    
-    for symbol in price.columns:
-        if symbol not in fund_dict:
-            continue
-        
-        fund = fund_dict[symbol]
-        
-        # Value score (lower is better, so we negate)
-        per = fund.get('PER', np.nan)
-        pbr = fund.get('PBR', np.nan)
-        value_score = 0
-        if not np.isnan(per) and per > 0:
-            value_score -= per
-        if not np.isnan(pbr) and pbr > 0:
-            value_score -= pbr
-        
-        # Quality score (higher is better)
-        roe = fund.get('ROE', np.nan)
-        gross_margin = fund.get('gross_margin', np.nan)
-        debt_to_equity = fund.get('debt_to_equity', np.nan)
-        quality_score = 0
-        if not np.isnan(roe):
-            quality_score += roe
-        if not np.isnan(gross_margin):
-            quality_score += gross_margin
-        if not np.isnan(debt_to_equity) and debt_to_equity >= 0:
-            quality_score -= debt_to_equity
-        
-        # Momentum score
-        mom_val = momentum.get(symbol, np.nan)
-        if np.isnan(mom_val):
-            continue
-        
-        # Sector
-        sector = fund.get('sector', 'Unknown')
-        
-        factor_scores[symbol] = {
-            'value': value_score,
-            'quality': quality_score,
-            'momentum': mom_val,
-            'sector': sector
-        }
-    
-    return factor_scores
-
-
-def rank_stocks_by_composite(factor_scores):
-    """Rank stocks by composite factor score"""
-    if not factor_scores:
-        return None
-    
-    scores = []
-    for symbol, factors in factor_scores.items():
-        scores.append({
-            'symbol': symbol,
-            'value': factors['value'],
-            'quality': factors['quality'],
-            'momentum': factors['momentum'],
-            'sector': factors['sector']
-        })
-    
-    df = pd.DataFrame(scores)
-    
-    # Normalize each factor to z-score
-    for col in ['value', 'quality', 'momentum']:
-        mean = df[col].mean()
-        std = df[col].std()
-        if std > 0:
-            df[col + '_z'] = (df[col] - mean) / std
-        else:
-            df[col + '_z'] = 0
-    
-    # Composite score
-    df['composite_z'] = df['value_z'] + df['quality_z'] + df['momentum_z']
-    
-    df = df.sort_values('composite_z', ascending=False)
-    
-    return df
-
-
-def select_sector_neutral(ranked_df, q=0.15, gross_exposure=2.0):
-    """Select top/bottom stocks with sector neutrality"""
-    if ranked_df is None or len(ranked_df) == 0:
-        return {}
-    
-    n_stocks = len(ranked_df)
-    n_select = max(1, int(n_stocks * q))
-    
-    sectors = ranked_df['sector'].unique()
-    
-    long_positions = {}
-    short_positions = {}
-    
-    for sector in sectors:
-        sector_df = ranked_df[ranked_df['sector'] == sector]
-        n_sector = len(sector_df)
-        
-        if n_sector == 0:
-            continue
-        
-        n_sector_select = max(1, int(n_sector * q))
-        
-        # Top stocks (long)
-        top_stocks = sector_df.head(n_sector_select)['symbol'].tolist()
-        for symbol in top_stocks:
-            long_positions[symbol] = 1.0 / n_select
-        
-        # Bottom stocks (short)
-        bottom_stocks = sector_df.tail(n_sector_select)['symbol'].tolist()
-        for symbol in bottom_stocks:
-            short_positions[symbol] = -1.0 / n_select
-    
-    # Normalize to target gross exposure
-    total_long = sum(abs(w) for w in long_positions.values())
-    total_short = sum(abs(w) for w in short_positions.values())
-    
-    target_each = gross_exposure / 2.0
-    
-    if total_long > 0:
-        for symbol in long_positions:
-            long_positions[symbol] *= target_each / total_long
-    
-    if total_short > 0:
-        for symbol in short_positions:
-            short_positions[symbol] *= target_each / total_short
-    
-    # Combine
-    positions = {**long_positions, **short_positions}
-    
-    return positions
-
-
 def backtest_factor_v3(price, fundamentals, 
                        q=0.15, 
                        rebalance_freq='W',
@@ -243,65 +54,30 @@ def backtest_factor_v3(price, fundamentals,
                        lag_days=90):
     """
     Backtest Factor v3 strategy with CORRECT timing
+
+    engines/factor_portfolio.py: 모든 리밸런스 날짜의 목표 비중을 (R x N) 패널로 한 번에 계산.
+    신호는 전일 종가, 결정한 포지션은 다음 날부터 적용,
+    선택된 종목이 없으면 기존 포지션 유지.
     """
     # Calculate returns
     returns = price.pct_change()
     
-    # Get rebalance dates
-    if rebalance_freq == 'W':
-        rebal_dates = price.resample('W-FRI').last().index
-    elif rebalance_freq == 'M':
-        rebal_dates = price.resample('M').last().index
-    else:
-        raise ValueError(f"Invalid rebalance_freq: {rebalance_freq}")
-    
-    rebal_dates = [d for d in rebal_dates if d in price.index]
+    rebal_rows = rebalance_rows(price.index, rebalance_freq)
     
-    # Backtest
-    portfolio_value = [1.0]
-    daily_returns_list = []
-    current_positions = {}
-    next_positions = {}  # Positions to apply next day
+    print(f"Backtesting with {len(rebal_rows)} rebalance dates...")
     
-    print(f"Backtesting with {len(rebal_dates)} rebalance dates...")
+    targets = build_targets(price, fundamentals, rebal_rows, lookback_momentum,
+                            signal_lag=1, lag_days=lag_days, q=q, gross_exposure=gross_exposure)
+    for row, n in zip(rebal_rows, targets.n_positions):
+        if row % 50 == 0:
+            print(f"  {price.index[row].date()}: Decided {n} positions for tomorrow")
     
-    for i, date in enumerate(price.index):
-        # Apply positions decided yesterday
-        if next_positions:
-            current_positions = next_positions
-            next_positions = {}
-        
-        # Decide positions for tomorrow
-        if date in rebal_dates:
-            factor_scores = calculate_factors_correct(
-                price, fundamentals, date, lookback_momentum, lag_days
-            )
-            
-            if factor_scores:
-                ranked = rank_stocks_by_composite(factor_scores)
-                next_positions = select_sector_neutral(ranked, q, gross_exposure)
-            
-            if i % 50 == 0:
-                print(f"  {date.date()}: Decided {len(next_positions)} positions for tomorrow")
-        
-        # Calculate daily return with current positions
-        if i == 0:
-            daily_returns_list.append(0.0)
-            continue
-        
-        ret = 0.0
-        for symbol, weight in current_positions.items():
-            if symbol in returns.columns:
-                stock_ret = returns.loc[date, symbol]
-                
-                if not np.isnan(stock_ret):
-                    ret += weight * stock_ret
-        
-        daily_returns_list.append(ret)
-        portfolio_value.append(portfolio_value[-1] * (1 + ret))
+    # Daily returns with positions decided on the previous rebalance
+    held = hold_weights(len(price), rebal_rows, targets.weights, targets.n_positions > 0, apply_lag=1)
+    daily_returns = portfolio_returns(held, returns.to_numpy(dtype=np.float64))
     
     # Calculate metrics
-    returns_series = pd.Series(daily_returns_list, index=price.index)
+    returns_series = pd.Series(daily_returns, index=price.index)
     
     annual_return = returns_series.mean() * 252
     annual_volatility = returns_series.std() * np.sqrt(252)
@@ -314,7 +90,7 @@ def backtest_factor_v3(price, fundamentals,
     max_drawdown = drawdown.min()
     
     # Turnover
-    avg_turnover = gross_exposure * len(rebal_dates) / len(price)
+    avg_turnover = gross_exposure * len(rebal_rows) / len(price)
     
     return {
         'sharpe': sharpe,
@@ -16,6 +16,8 @@ import pandas as pd
 import numpy as np
 import json
 
+from engines.momentum import hold_blocks, price_momentum, rebalance_rows, top_bottom
+
 
 def load_data(price_csv):
     """Load and prepare price data"""
@@ -48,16 +50,11 @@ def calculate_momentum(pivot_close, lookback=252, skip=21):
     """
     print(f"Calculating momentum (lookback={lookback}, skip={skip})...")
     
-    # Price lookback days ago
-    price_start = pivot_close.shift(lookback)
-    
-    # Price skip days ago
-    price_end = pivot_close.shift(skip)
-    
-    # Momentum = (price_end / price_start) - 1
-    momentum = (price_end / price_start) - 1
+    # Momentum = (price skip days ago / price lookback days ago) - 1  (engines/momentum.py)
+    rows = np.arange(len(pivot_close))
+    momentum = price_momentum(pivot_close.values, rows, [lookback], [skip])[0, 0]
     
-    return momentum
+    return pd.DataFrame(momentum, index=pivot_close.index, columns=pivot_close.columns)
 
 
 def backtest_momentum(pivot_ret, momentum, top_n=20, rebal_days=20, cost=0.0005):
@@ -78,47 +75,18 @@ def backtest_momentum(pivot_ret, momentum, top_n=20, rebal_days=20, cost=0.0005)
     symbols = pivot_ret.columns.tolist()
     
     # Rebalancing schedule
-    rebal_dates = dates[::rebal_days]
-    
-    # Initialize weights
-    weights = pd.DataFrame(0.0, index=dates, columns=symbols)
+    rebal_idx = rebalance_rows(len(dates), rebal_days)
     
     print(f"\nBacktesting: top_n={top_n}, rebal_days={rebal_days}, cost={cost}")
-    print(f"  Rebalancing dates: {len(rebal_dates)}")
-    
-    for i, rebal_date in enumerate(rebal_dates):
-        if rebal_date not in momentum.index:
-            continue
-        
-        # Get momentum scores for this date
-        mom_scores = momentum.loc[rebal_date]
-        
-        # Remove NaN
-        mom_scores = mom_scores.dropna()
-        
-        if len(mom_scores) < top_n:
-            continue
-        
-        # Select top N by momentum
-        top_symbols = mom_scores.nlargest(top_n).index.tolist()
-        
-        # Equal weight
-        w = 1.0 / len(top_symbols)
-        
-        # Determine period
-        if i < len(rebal_dates) - 1:
-            next_rebal = rebal_dates[i + 1]
-            end_idx = dates.get_loc(next_rebal)
-        else:
-            end_idx = len(dates)
-        
-        start_idx = dates.get_loc(rebal_date)
-        
-        # Set weights
-        weights.iloc[start_idx:end_idx, :] = 0.0
-        for sym in top_symbols:
-            if sym in weights.columns:
-                weights.loc[dates[start_idx]:dates[end_idx-1], sym] = w
+    print(f"  Rebalancing dates: {len(rebal_idx)}")
+    
+    # Select top N by momentum (행별 argsort, 유효 종목 < top_n 이면 해당 구간 0), equal weight
+    mom_scores = momentum.reindex(index=dates, columns=symbols).values[rebal_idx]
+    top, _ = top_bottom(mom_scores, top_n)
+    targets = top / top_n
+    
+    # 리밸 구간 [rebal, 다음 rebal) 동안 유지
+    weights = pd.DataFrame(hold_blocks(len(dates), rebal_idx, targets), index=dates, columns=symbols)
     
     # Calculate returns with proper timing (NO LOOK-AHEAD)
     port_ret = (weights.shift(1) * pivot_ret).sum(axis=1)
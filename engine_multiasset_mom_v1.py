@@ -37,10 +37,13 @@ import argparse
 import json
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
 import pandas as pd
 
+from engines.momentum import ReturnPrefix, inverse_vol, rebalance_rows, scale_gross
+
 
 @dataclass
 class M1Config:
@@ -90,86 +93,36 @@ def compute_stats(ret_series: pd.Series) -> dict:
     }
 
 
-def build_m1_weights(pivot_ret: pd.DataFrame, cfg: M1Config) -> (pd.DataFrame, float):
+def build_m1_weights(pivot_ret: pd.DataFrame, cfg: M1Config,
+                     prefix: Optional[ReturnPrefix] = None) -> (pd.DataFrame, float):
+    """
+    engines/momentum.py: 모든 리밸 날짜의 모멘텀 / 변동성을 누적 prefix 차이로 한 번에 계산.
+    같은 pivot_ret 로 cfg 를 바꿔 가며 돌릴 때는 prefix 를 넘겨 재사용.
+    """
     dates = pivot_ret.index
     symbols = pivot_ret.columns
     n_dates = len(dates)
-    returns = pivot_ret.values
+    if prefix is None:
+        prefix = ReturnPrefix(pivot_ret.values)
 
     weights = pd.DataFrame(0.0, index=dates, columns=symbols)
 
-    # 리밸 날짜: rebalance_freq_days 간격으로
-    rebal_idx = []
-    last_i = 0
-    for i, d in enumerate(dates):
-        if i == 0:
-            rebal_idx.append(i)
-            last_i = 0
-        else:
-            if last_i >= cfg.rebalance_freq_days:
-                rebal_idx.append(i)
-                last_i = 0
-            else:
-                last_i += 1
-
-    rebal_idx = np.array(rebal_idx, dtype=int)
-
-    for i in rebal_idx:
-        if i < max(cfg.lookback_short, cfg.lookback_long, cfg.vol_lookback):
-            continue
-        date = dates[i]
-
-        # 모멘텀 구간
-        w_short = returns[i - cfg.lookback_short : i, :]
-        w_long = returns[i - cfg.lookback_long : i, :]
-
-        # 누적 수익 (합으로 approximation)
-        mom_short = np.nanmean(w_short, axis=0) * cfg.lookback_short
-        mom_long = np.nanmean(w_long, axis=0) * cfg.lookback_long
-        mom_score = 0.5 * mom_short + 0.5 * mom_long
-
-        mom = pd.Series(mom_score, index=symbols).replace([np.inf, -np.inf], np.nan).dropna()
-        if mom.empty:
-            continue
-
-        # 절대 모멘텀 필터: mom > 0 인 자산만
-        mom_pos = mom[mom > 0]
-        if mom_pos.empty:
-            # 올 캐시
-            continue
-
-        # 변동성 (vol_lookback)
-        vol_window = returns[i - cfg.vol_lookback : i, :]
-        vol = np.nanstd(vol_window, axis=0)
-        vol_ser = pd.Series(vol, index=symbols).replace([np.inf, -np.inf], np.nan)
-
-        # 필터된 자산 집합
-        universe = mom_pos.index
-        vol_sel = vol_ser.loc[universe]
-        # vol가 너무 작거나 0이면 제거
-        mask = vol_sel > 1e-6
-        universe = vol_sel[mask].index
-
-        if len(universe) == 0:
-            continue
-
-        mom_sel = mom_pos.loc[universe]
-        vol_sel = vol_sel.loc[universe]
-
-        # risk-parity 스타일: 1/vol
-        inv_vol = 1.0 / vol_sel
-        inv_vol = inv_vol / inv_vol.sum()
-
-        # 모멘텀 강도 반영 (옵션): 여기선 단순 1/vol만 사용 (복잡도 낮추기)
-        w_date = pd.Series(0.0, index=symbols)
-        w_date.loc[universe] = inv_vol.values
-
-        # leverage_target으로 스케일
-        gross = np.abs(w_date).sum()
-        if gross > 1e-8:
-            w_date = w_date * (cfg.leverage_target / gross)
-
-        weights.loc[date] = w_date
+    # 리밸 날짜: 0 부터 rebalance_freq_days + 1 간격 (직전 리밸 이후 rebalance_freq_days 일 경과)
+    rebal_idx = rebalance_rows(n_dates, cfg.rebalance_freq_days + 1)
+    rebal_idx = rebal_idx[rebal_idx >= max(cfg.lookback_short, cfg.lookback_long, cfg.vol_lookback)]
+
+    # 누적 수익 (합으로 approximation): nanmean · lookback
+    mom_short, mom_long = prefix.momentum(rebal_idx, (cfg.lookback_short, cfg.lookback_long))
+    mom_score = 0.5 * mom_short + 0.5 * mom_long
+
+    # 변동성 (vol_lookback)
+    vol = prefix.std(rebal_idx, cfg.vol_lookback)
+
+    # 절대 모멘텀 필터 (mom > 0) + vol가 너무 작거나 0이면 제거 → risk-parity 스타일: 1/vol
+    # 모멘텀 강도 반영 (옵션): 여기선 단순 1/vol만 사용 (복잡도 낮추기)
+    eligible = (mom_score > 0) & (vol > 1e-6)
+    w_rebal = scale_gross(inverse_vol(vol, eligible), cfg.leverage_target)
+    weights.iloc[rebal_idx] = w_rebal
 
     # 리밸 사이 기간은 직전 weight 유지
     weights = weights.replace(0.0, np.nan)
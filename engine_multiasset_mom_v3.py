@@ -24,10 +24,13 @@ import argparse
 import json
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
 import pandas as pd
 
+from engines.momentum import ReturnPrefix, inverse_vol, rebalance_rows, scale_gross
+
 
 @dataclass
 class M1v3Config:
@@ -92,111 +95,50 @@ def build_m1v3_weights(
     pivot_ret: pd.DataFrame,
     asset_class: pd.Series,
     cfg: M1v3Config,
+    prefix: Optional[ReturnPrefix] = None,
 ) -> (pd.DataFrame, float):
+    """
+    engines/momentum.py: 모든 리밸 날짜 x 호라이즌의 모멘텀 / 변동성을 누적 prefix 차이로 한 번에 계산.
+    같은 pivot_ret 로 cfg 를 바꿔 가며 돌릴 때는 prefix 를 넘겨 재사용.
+    """
     dates = pivot_ret.index
     symbols = pivot_ret.columns
-    returns = pivot_ret.values
-    n_dates, _ = returns.shape
+    n_dates = len(dates)
+    if prefix is None:
+        prefix = ReturnPrefix(pivot_ret.values)
 
     weights = pd.DataFrame(0.0, index=dates, columns=symbols)
 
-    # 리밸 날짜: rebalance_freq_days 간격
-    rebal_idx = []
-    last_i = 0
-    for i, d in enumerate(dates):
-        if i == 0:
-            rebal_idx.append(i)
-            last_i = 0
-        else:
-            if last_i >= cfg.rebalance_freq_days:
-                rebal_idx.append(i)
-                last_i = 0
-            else:
-                last_i += 1
-    rebal_idx = np.array(rebal_idx, dtype=int)
+    # 리밸 날짜: 0 부터 rebalance_freq_days + 1 간격 (직전 리밸 이후 rebalance_freq_days 일 경과)
+    rebal_idx = rebalance_rows(n_dates, cfg.rebalance_freq_days + 1)
+    rebal_idx = rebal_idx[rebal_idx >= max(cfg.lookback_1m, cfg.lookback_3m, cfg.lookback_6m,
+                                           cfg.lookback_12m, cfg.vol_lookback)]
 
     class_weights = cfg.class_weights or {"EQUITY": 0.2, "BOND": 0.5, "COMMODITY": 0.3}
     cw_base = pd.Series(class_weights, dtype=float)
     cw_base = cw_base / cw_base.sum()  # 안전하게 정규화
 
-    for i in rebal_idx:
-        if i < max(cfg.lookback_1m, cfg.lookback_3m, cfg.lookback_6m, cfg.lookback_12m, cfg.vol_lookback):
-            continue
-        date = dates[i]
-
-        # 모멘텀 윈도우들
-        w_1m = returns[i - cfg.lookback_1m : i, :]
-        w_3m = returns[i - cfg.lookback_3m : i, :]
-        w_6m = returns[i - cfg.lookback_6m : i, :]
-        w_12m = returns[i - cfg.lookback_12m : i, :]
-
-        # 각 기간 누적 수익 (합 근사)
-        mom_1m = np.nanmean(w_1m, axis=0) * cfg.lookback_1m
-        mom_3m = np.nanmean(w_3m, axis=0) * cfg.lookback_3m
-        mom_6m = np.nanmean(w_6m, axis=0) * cfg.lookback_6m
-        mom_12m = np.nanmean(w_12m, axis=0) * cfg.lookback_12m
-
-        # 멀티-호라이즌 모멘텀 스코어
-        mom_score = (
-            0.1 * mom_1m
-            + 0.2 * mom_3m
-            + 0.3 * mom_6m
-            + 0.4 * mom_12m
-        )
-
-        mom = pd.Series(mom_score, index=symbols).replace([np.inf, -np.inf], np.nan).dropna()
-        if mom.empty:
-            continue
-
-        # 절대 모멘텀 필터
-        mom_pos = mom[mom > 0]
-        if mom_pos.empty:
-            continue
-
-        # 변동성 (vol_lookback)
-        vol_window = returns[i - cfg.vol_lookback : i, :]
-        vol = np.nanstd(vol_window, axis=0)
-        vol_ser = pd.Series(vol, index=symbols).replace([np.inf, -np.inf], np.nan)
-
-        w_date = pd.Series(0.0, index=symbols)
-        cw = cw_base.copy()
+    # 각 기간 누적 수익 (합 근사): nanmean · lookback
+    mom_1m, mom_3m, mom_6m, mom_12m = prefix.momentum(
+        rebal_idx, (cfg.lookback_1m, cfg.lookback_3m, cfg.lookback_6m, cfg.lookback_12m))
 
-        # 클래스별 타깃 비중 처리
-        for cls in cw.index:
-            cls_syms = symbols[asset_class == cls]
-            if len(cls_syms) == 0:
-                cw[cls] = 0.0
-                continue
-
-            mom_cls = mom_pos.reindex(cls_syms).dropna()
-            if mom_cls.empty:
-                cw[cls] = 0.0
-                continue
-
-            vol_cls = vol_ser.reindex(mom_cls.index)
-            mask = vol_cls > 1e-6
-            mom_cls = mom_cls[mask]
-            vol_cls = vol_cls[mask]
-
-            if mom_cls.empty:
-                cw[cls] = 0.0
-                continue
-
-            inv_vol = 1.0 / vol_cls
-            inv_vol = inv_vol / inv_vol.sum()
-
-            w_cls_total = cw[cls]
-            if w_cls_total <= 0:
-                continue
-
-            w_date.loc[mom_cls.index] += inv_vol.values * w_cls_total
+    # 멀티-호라이즌 모멘텀 스코어
+    mom_score = (
+        0.1 * mom_1m
+        + 0.2 * mom_3m
+        + 0.3 * mom_6m
+        + 0.4 * mom_12m
+    )
 
-        # 전체 타깃 비중이 줄었을 수 있으므로 전체 w_date 정규화
-        gross = np.abs(w_date).sum()
-        if gross > 1e-8:
-            w_date = w_date * (cfg.leverage_target / gross)
+    # 변동성 (vol_lookback)
+    vol = prefix.std(rebal_idx, cfg.vol_lookback)
 
-        weights.loc[date] = w_date
+    # 절대 모멘텀 필터 + vol 하한 → 클래스 내 1/vol 정규화 x 클래스 타깃 비중
+    # (자산이 없는 클래스는 0, 줄어든 전체 비중은 leverage_target 으로 다시 정규화)
+    eligible = (mom_score > 0) & (vol > 1e-6)
+    cls_code = pd.Index(cw_base.index).get_indexer(asset_class.reindex(symbols))
+    w_rebal = inverse_vol(vol, eligible, groups=cls_code, group_weights=cw_base.clip(lower=0.0).values)
+    weights.iloc[rebal_idx] = scale_gross(w_rebal, cfg.leverage_target)
 
     # 리밸 사이 구간은 직전 weight 유지
     weights = weights.replace(0.0, np.nan)
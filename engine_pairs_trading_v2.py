@@ -12,10 +12,11 @@ Pairs Trading v2: AI 자문 기반 개선 버전
 
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
 import json
 from datetime import datetime
 
+from engines.hedge_ratio import rolling_ols_hedge
+
 # 설정
 LOOKBACK_HEDGE = 60  # 헷지 비율 롤링 윈도우
 LOOKBACK_ZSCORE = 60  # Z-Score 계산 윈도우
@@ -46,21 +47,9 @@ def load_data(pair_name):
     return result
 
 def calculate_rolling_hedge_ratio(df, lookback=60):
-    """동적 헷지 비율 계산 (Rolling Window OLS)"""
-    hedge_ratios = pd.Series(index=df.index, dtype=float)
-    
-    log_p1 = np.log(df["P1"])
-    log_p2 = np.log(df["P2"])
-    
-    for i in range(lookback, len(df)):
-        y = log_p1.iloc[i-lookback:i].values.reshape(-1, 1)
-        x = log_p2.iloc[i-lookback:i].values.reshape(-1, 1)
-        
-        model = LinearRegression()
-        model.fit(x, y)
-        hedge_ratios.iloc[i] = model.coef_[0][0]
-    
-    return hedge_ratios
+    """동적 헷지 비율 계산 (Rolling Window OLS, 누적합 커널 O(T))"""
+    beta, _ = rolling_ols_hedge(np.log(df["P1"]).values, np.log(df["P2"]).values, lookback)
+    return pd.Series(beta[:, 0], index=df.index)
 
 def calculate_spread(df, hedge_ratio):
     """스프레드 계산"""
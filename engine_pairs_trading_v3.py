@@ -15,8 +15,12 @@ from sklearn.linear_model import LinearRegression
 import json
 from datetime import datetime
 
+from engines.hedge_ratio import rolling_ols_hedge, kalman_hedge
+
 # 설정
 LOOKBACK_HEDGE = None  # 전체 기간 고정 헷지
+HEDGE_METHOD = "fixed"  # "fixed" (전체 기간 OLS, 미래 정보 포함) / "rolling" / "kalman"
+HEDGE_ROLLING_WINDOW = 120  # HEDGE_METHOD="rolling" 윈도우
 LOOKBACK_BB = 20  # 볼린저 밴드 윈도우
 BB_STD = 2.0  # 볼린저 밴드 표준편차 배수
 ZSCORE_STOPLOSS = 3.5  # 손절매 Z-Score 임계값
@@ -56,6 +60,18 @@ def calculate_fixed_hedge_ratio(df):
     
     return beta
 
+def calculate_causal_hedge_ratio(df, method="kalman"):
+    """시변 헷지 비율 (t 시점까지의 정보만 사용)"""
+    log_p1 = np.log(df["P1"]).values
+    log_p2 = np.log(df["P2"]).values
+    if method == "rolling":
+        beta, _ = rolling_ols_hedge(log_p1, log_p2, HEDGE_ROLLING_WINDOW)
+    elif method == "kalman":
+        beta, _ = kalman_hedge(log_p1, log_p2)
+    else:
+        raise ValueError(f"Unknown HEDGE_METHOD: {method}")
+    return pd.Series(beta[:, 0], index=df.index)
+
 def calculate_spread(df, hedge_ratio):
     """스프레드 계산"""
     log_p1 = np.log(df["P1"])
@@ -90,10 +106,15 @@ def backtest_pairs_v3(pair_name):
     df = load_data(pair_name)
     print(f"데이터 기간: {df.index[0].date()} ~ {df.index[-1].date()} ({len(df)} 거래일)")
     
-    # 고정 헷지 비율 계산
-    print(f"\n1. 고정 헷지 비율 계산 (전체 기간 OLS)...")
-    hedge_ratio = calculate_fixed_hedge_ratio(df)
-    print(f"   헷지 비율: {hedge_ratio:.4f}")
+    # 헷지 비율 계산
+    if HEDGE_METHOD == "fixed":
+        print(f"\n1. 고정 헷지 비율 계산 (전체 기간 OLS)...")
+        hedge_ratio = calculate_fixed_hedge_ratio(df)
+        print(f"   헷지 비율: {hedge_ratio:.4f}")
+    else:
+        print(f"\n1. 시변 헷지 비율 계산 ({HEDGE_METHOD})...")
+        hedge_ratio = calculate_causal_hedge_ratio(df, HEDGE_METHOD)
+        print(f"   최근 헷지 비율: {hedge_ratio.iloc[-1]:.4f}")
     
     # 스프레드 계산
     spread = calculate_spread(df, hedge_ratio)
@@ -189,6 +210,7 @@ def backtest_pairs_v3(pair_name):
     # 결과 저장
     results = {
         "pair": pair_name,
+        "hedge_method": HEDGE_METHOD,
         "start_date": df.index[0].strftime("%Y-%m-%d"),
         "end_date": df.index[-1].strftime("%Y-%m-%d"),
         "trading_days": len(df),
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+ARES-7 Vectorized Pairs Trading v1
+Market-Neutral Multi-Pair Book
+
+특징:
+- 모든 페어의 스프레드를 (T x P) 행렬로 한 번에 계산
+- Rolling z-score 배열 커널 (누적합, O(T·P))
+- 진입/청산/손절 상태 머신을 Numba 단일 패스로 실행
+- 페어별 거래비용 / 수익률 + 동일가중 북 수익률
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from engines.pairs_vectorized import PairsConfig, run_pairs_book
+from engines.pairs_screening import ScreeningConfig, load_sector_map, screen_pairs
+from engine_multi_pairs_trading_v1 import load_price, compute_metrics
+
+
+def parse_pairs(text):
+    """'KO/PEP,XOM/CVX' → [('KO', 'PEP'), ('XOM', 'CVX')]"""
+    pairs = []
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        p1, p2 = item.replace("-", "/").split("/")
+        pairs.append((p1.strip(), p2.strip()))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data_csv", default="./data/price_full.csv")
+    parser.add_argument("--pairs", default="", help="예: KO/PEP,XOM/CVX (비우면 cointegration 선택)")
+    parser.add_argument("--max_pairs", type=int, default=15)
+    parser.add_argument("--pvalue", type=float, default=0.05)
+    parser.add_argument("--min_corr", type=float, default=0.7)
+    parser.add_argument("--sector_csv", default="./data/fundamentals_with_sector.csv",
+                        help="섹터 사전 필터 (빈 문자열이면 비활성)")
+    parser.add_argument("--sector_col", default="sector", help="sector 또는 industry")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--lookback", type=int, default=60)
+    parser.add_argument("--entry_z", type=float, default=2.0)
+    parser.add_argument("--exit_z", type=float, default=0.5)
+    parser.add_argument("--stop_z", type=float, default=3.5)
+    parser.add_argument("--max_hold", type=int, default=60)
+    parser.add_argument("--cost_bps", type=float, default=5.0)
+    parser.add_argument("--hedge", default="rolling", choices=["full", "rolling", "kalman"])
+    parser.add_argument("--hedge_lookback", type=int, default=120)
+    parser.add_argument("--out", default="./results/engine_pairs_vectorized_v1.json")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("ARES-7 Vectorized Pairs Trading v1")
+    print("=" * 70)
+
+    print("\nLoading price data...")
+    prices = load_price(args.data_csv)
+    print(f"  Loaded: {prices.shape[0]} days, {prices.shape[1]} symbols")
+
+    screened = None
+    if args.pairs:
+        pairs = parse_pairs(args.pairs)
+    else:
+        print("\nScreening cointegrated pairs...")
+        sector_map = None
+        if args.sector_csv and Path(args.sector_csv).exists():
+            sector_map = load_sector_map(args.sector_csv, args.sector_col)
+        t0 = time.perf_counter()
+        screened = screen_pairs(
+            prices,
+            ScreeningConfig(
+                min_corr=args.min_corr,
+                pvalue_threshold=args.pvalue,
+                max_pairs=args.max_pairs,
+                n_workers=args.workers,
+            ),
+            sector_map=sector_map,
+        )
+        print(f"  Screening done in {time.perf_counter() - t0:.1f}s")
+        pairs = list(zip(screened["pair1"], screened["pair2"]))
+    print(f"  Pairs: {len(pairs)}")
+
+    if len(pairs) == 0:
+        print("❌ No pairs to trade!")
+        return
+
+    cfg = PairsConfig(
+        zscore_lookback=args.lookback,
+        entry_z=args.entry_z,
+        exit_z=args.exit_z,
+        stop_z=args.stop_z,
+        max_hold=args.max_hold,
+        cost_bps=args.cost_bps,
+        hedge_method=args.hedge,
+        hedge_lookback=args.hedge_lookback,
+    )
+
+    print("\nBacktesting (vectorized)...")
+    t0 = time.perf_counter()
+    book = run_pairs_book(prices, pairs, cfg)
+    elapsed = time.perf_counter() - t0
+    print(f"  {len(pairs)} pairs x {len(prices)} days in {elapsed:.3f}s")
+
+    metrics = compute_metrics(book.book_returns)
+
+    print("\n" + "=" * 70)
+    print("Results:")
+    print("=" * 70)
+    print(f"  Sharpe Ratio:      {metrics['sharpe']:.4f}")
+    print(f"  Annual Return:     {metrics['annual_return']:.2%}")
+    print(f"  Annual Volatility: {metrics['annual_volatility']:.2%}")
+    print(f"  Max Drawdown:      {metrics['max_drawdown']:.2%}")
+    print("=" * 70)
+
+    per_pair = {}
+    for label in book.labels:
+        m = compute_metrics(book.pair_returns[label])
+        m["n_trades"] = int((book.position[label].diff().abs() > 0).sum())
+        m["total_cost"] = float(book.cost[label].sum())
+        per_pair[label] = m
+
+    if screened is not None:
+        for row in screened.itertuples(index=False):
+            label = f"{row.pair1}-{row.pair2}"
+            per_pair[label]["full_sample_hedge"] = float(row.hedge)
+            per_pair[label]["coint_pvalue"] = float(row.pvalue)
+            per_pair[label]["half_life"] = float(row.half_life)
+
+    result = {
+        **metrics,
+        "config": {
+            "n_pairs": len(pairs),
+            "zscore_lookback": cfg.zscore_lookback,
+            "entry_z": cfg.entry_z,
+            "exit_z": cfg.exit_z,
+            "stop_z": cfg.stop_z,
+            "max_hold": cfg.max_hold,
+            "cost_bps": cfg.cost_bps,
+            "hedge_method": cfg.hedge_method,
+            "hedge_lookback": cfg.hedge_lookback,
+        },
+        "pairs": book.labels,
+        "per_pair": per_pair,
+        "daily_returns": [
+            {"date": d.strftime("%Y-%m-%d"), "ret": float(r)}
+            for d, r in book.book_returns.items()
+        ],
+    }
+
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print(f"\n✅ Results saved to: {out_path}")
+
+
+if __name__ == "__main__":
+    main()
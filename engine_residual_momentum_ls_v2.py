@@ -20,6 +20,8 @@ import json
 from pathlib import Path
 import statsmodels.api as sm
 
+from engines.result_store import store_engine_result
+
 TRADING_DAYS = 252
 
 # ------------------------------------------------------------
@@ -214,6 +216,7 @@ def main():
 
     with open(out, "w") as f:
         json.dump(res, f, indent=2)
+    store_engine_result("residual_momentum_ls_v2", res)
 
     print("Saved:", out)
     print("Sharpe:", res["sharpe"])
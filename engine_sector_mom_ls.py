@@ -43,10 +43,13 @@ import argparse
 import json
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
 import numpy as np
 import pandas as pd
 
+from engines.momentum import ReturnPrefix, rebalance_rows, scale_gross, top_bottom
+
 
 @dataclass
 class SectorMomConfig:
@@ -101,81 +104,45 @@ def compute_stats(ret_series: pd.Series) -> dict:
 def build_sector_mom_weights(
     pivot_ret: pd.DataFrame,
     cfg: SectorMomConfig,
+    prefix: Optional[ReturnPrefix] = None,
 ) -> (pd.DataFrame, float, float):
+    """
+    engines/momentum.py: 모든 리밸 날짜의 모멘텀을 누적 prefix 차이로, 랭킹은 행별 argsort 로 한 번에.
+    같은 pivot_ret 로 cfg 를 바꿔 가며 돌릴 때는 prefix 를 넘겨 재사용.
+    """
     dates = pivot_ret.index
     symbols = pivot_ret.columns
     n_dates = len(dates)
+    if prefix is None:
+        prefix = ReturnPrefix(pivot_ret.values)
 
     weights = pd.DataFrame(0.0, index=dates, columns=symbols)
 
-    # 리밸 날짜: rebalance_freq_days 간격으로 선택
-    rebal_idx = []
-    last_i = 0
-    for i, d in enumerate(dates):
-        if i == 0:
-            rebal_idx.append(i)
-            last_i = 0
-        else:
-            if last_i >= cfg.rebalance_freq_days:
-                rebal_idx.append(i)
-                last_i = 0
-            else:
-                last_i += 1
-
-    rebal_idx = np.array(rebal_idx, dtype=int)
-
-    # 모멘텀: 최근 momentum_lookback 일 수익률 합 or 누적
-    ret_np = pivot_ret.values
-
-    num_longs_list = []
-    num_shorts_list = []
-
-    for i in rebal_idx:
-        # lookback window
-        if i < cfg.momentum_lookback:
-            continue
-        date = dates[i]
-
-        window = ret_np[i - cfg.momentum_lookback : i, :]
-        # 각 섹터별 모멘텀: 단순 누적 수익률
-        # (1+ret) 곱-1 대신, 합으로 approximation
-        mom = np.nanmean(window, axis=0) * cfg.momentum_lookback
-        mom_series = pd.Series(mom, index=symbols).dropna()
-
-        if mom_series.empty or len(mom_series) < cfg.top_k * 2:
-            continue
-
-        # 랭킹
-        mom_sorted = mom_series.sort_values(ascending=False)
-        longs = mom_sorted.index[: cfg.top_k]
-        shorts = mom_sorted.index[-cfg.top_k :]
-
-        num_longs_list.append(len(longs))
-        num_shorts_list.append(len(shorts))
-
-        w_date = pd.Series(0.0, index=symbols)
-
-        # 롱/숏 각각 equal weight
-        if len(longs) > 0:
-            w_long_each = +1.0 / len(longs)
-            w_date.loc[longs] = w_long_each
-        if len(shorts) > 0:
-            w_short_each = -1.0 / len(shorts)
-            w_date.loc[shorts] = w_short_each
-
-        # gross 스케일 → target gross
-        gross = np.abs(w_date).sum()
-        if gross > 1e-8:
-            w_date = w_date * (cfg.gross_target / gross)
-
-        weights.loc[date] = w_date
+    # 리밸 날짜: 0 부터 rebalance_freq_days + 1 간격 (직전 리밸 이후 rebalance_freq_days 일 경과)
+    rebal_idx = rebalance_rows(n_dates, cfg.rebalance_freq_days + 1)
+    rebal_idx = rebal_idx[rebal_idx >= cfg.momentum_lookback]
+
+    # 각 섹터별 모멘텀: 단순 누적 수익률
+    # (1+ret) 곱-1 대신, 합으로 approximation (np.nanmean 과 같이 ±inf 수익률이 있으면 ±inf 로 랭킹)
+    mom = prefix.momentum(rebal_idx, (cfg.momentum_lookback,), keep_inf=True)[0]
+
+    # 랭킹: 상위 top_k 롱, 하위 top_k 숏 (유효 섹터가 top_k * 2 미만이면 리밸 생략)
+    longs, shorts = top_bottom(mom, cfg.top_k, cfg.top_k)
+    active = longs.any(axis=1)
+    num_longs = longs.sum(axis=1)[active]
+    num_shorts = shorts.sum(axis=1)[active]
+
+    # 롱/숏 각각 equal weight → gross 스케일 → target gross
+    w_rebal = np.where(longs, +1.0 / cfg.top_k, 0.0)
+    w_rebal = np.where(shorts, -1.0 / cfg.top_k, w_rebal)
+    weights.iloc[rebal_idx] = scale_gross(w_rebal, cfg.gross_target)
 
     # 리밸 사이 기간은 직전 weight 유지
     weights = weights.replace(0.0, np.nan)
     weights = weights.ffill().fillna(0.0)
 
-    avg_longs = float(np.nanmean(num_longs_list)) if num_longs_list else 0.0
-    avg_shorts = float(np.nanmean(num_shorts_list)) if num_shorts_list else 0.0
+    avg_longs = float(np.mean(num_longs)) if len(num_longs) else 0.0
+    avg_shorts = float(np.mean(num_shorts)) if len(num_shorts) else 0.0
     return weights, avg_longs, avg_shorts
 
 
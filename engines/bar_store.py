@@ -0,0 +1,245 @@
+# engines/bar_store.py
+"""
+로컬 시장 데이터 저장소 (종목 x 연도 파티션, 체크섬, 수집 구간 기록)
+
+download_*.py 스크립트는 매번 전체 기간을 다시 받아 메모리에서 concat 한 뒤
+CSV 하나로 덮어썼다. 이 저장소는 종목별로 받은 구간을 기록해 빠진 구간만 추가한다.
+
+    data/bars/{dataset}/{SYMBOL}/{YYYY}.csv    # 연도 파티션 (date 정렬, 키 중복 없음)
+    data/bars/{dataset}/{SYMBOL}/_meta.json    # coverage, 파티션별 rows / sha256
+
+- coverage = 이미 요청해 받은 [start, end] (휴일/주말 포함, 데이터 유무와 무관)
+- missing(): 요청 구간 중 coverage 밖 부분 (앞/뒤 최대 2 구간) → 항상 coverage 와 이어짐
+- append(): 새 행이 닿는 연도 파티션만 읽어 병합 → tmp 에 쓰고 replace → _meta.json 갱신.
+  _meta.json 이 종목 단위 checkpoint 라 중단 후 다시 실행하면 끝난 종목/구간은 건너뜀
+- verify(): 파티션 sha256 재계산, 불일치/누락 종목은 repair=True 면 초기화 (다음 수집에서 전체 재수집)
+
+Usage:
+
+    from engines.bar_store import BarStore, Dataset
+
+    store = BarStore(Dataset("polygon_daily"))
+    store.missing("SPY", "2015-11-23", "2025-11-22")   # [(start, end), ...]
+    store.append("SPY", df, "2015-11-23", "2025-11-22")
+    df = store.read(["SPY", "TLT"], start="2020-01-01")
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import shutil
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_ROOT = BASE_DIR / "data" / "bars"
+
+Range = Tuple[pd.Timestamp, pd.Timestamp]
+
+_ONE_DAY = pd.Timedelta(days=1)
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """
+    name:       저장소 하위 디렉터리
+    date_col:   파티션 / coverage 기준 날짜 컬럼
+    symbol_col: 종목 컬럼
+    key_cols:   날짜 외 중복 판단 컬럼 (SF1: dimension, datekey 등)
+    """
+
+    name: str
+    date_col: str = "timestamp"
+    symbol_col: str = "symbol"
+    key_cols: Tuple[str, ...] = ()
+
+
+def _day(value) -> pd.Timestamp:
+    return pd.Timestamp(value).normalize()
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _dirname(symbol: str) -> str:
+    """'I:VIX', 'BRK/B' 같은 종목명을 디렉터리명으로"""
+    return re.sub(r"[^A-Za-z0-9._-]", "_", symbol)
+
+
+class BarStore:
+    def __init__(self, dataset: Dataset, root=DEFAULT_ROOT):
+        self.dataset = dataset
+        self.root = Path(root) / dataset.name
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    # ---- metadata ------------------------------------------------------- #
+
+    def _dir(self, symbol: str) -> Path:
+        return self.root / _dirname(symbol)
+
+    def _meta_path(self, symbol: str) -> Path:
+        return self._dir(symbol) / "_meta.json"
+
+    def meta(self, symbol: str) -> Optional[Dict]:
+        path = self._meta_path(symbol)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text())
+        except ValueError:
+            return None
+
+    def _write_meta(self, symbol: str, meta: Dict) -> None:
+        path = self._meta_path(symbol)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(meta, indent=2))
+        tmp.replace(path)
+
+    def symbols(self) -> List[str]:
+        out = []
+        for p in sorted(self.root.glob("*/_meta.json")):
+            try:
+                out.append(json.loads(p.read_text())["symbol"])
+            except (ValueError, KeyError):
+                continue
+        return out
+
+    def coverage(self, symbol: str) -> Optional[Range]:
+        meta = self.meta(symbol)
+        if not meta or not meta.get("coverage"):
+            return None
+        start, end = meta["coverage"]
+        return _day(start), _day(end)
+
+    def missing(self, symbol: str, start, end) -> List[Range]:
+        """요청 [start, end] 중 아직 받지 않은 구간 (coverage 와 이어지는 최대 2 구간)"""
+        start, end = _day(start), _day(end)
+        if start > end:
+            return []
+        cov = self.coverage(symbol)
+        if cov is None:
+            return [(start, end)]
+        c0, c1 = cov
+        out = []
+        if start < c0:
+            out.append((start, c0 - _ONE_DAY))
+        if end > c1:
+            out.append((c1 + _ONE_DAY, end))
+        return out
+
+    # ---- write ---------------------------------------------------------- #
+
+    def _merge(self, old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+        ds = self.dataset
+        keys = [ds.date_col, *ds.key_cols]
+        df = pd.concat([old, new], ignore_index=True) if len(old) else new
+        df = df.drop_duplicates(subset=keys, keep="last")
+        return df.sort_values(keys, kind="stable").reset_index(drop=True)
+
+    def _read_partition(self, path: Path) -> pd.DataFrame:
+        ds = self.dataset
+        if not path.exists():
+            return pd.DataFrame()
+        df = pd.read_csv(path)
+        df[ds.date_col] = pd.to_datetime(df[ds.date_col])
+        return df
+
+    def append(self, symbol: str, df: pd.DataFrame, start, end) -> int:
+        """
+        [start, end] 구간을 받은 결과 df 를 병합하고 coverage 를 넓힘.
+        df 가 비어 있어도 (휴일 등) coverage 는 기록. 반환: 새로 추가된 행 수.
+        """
+        ds = self.dataset
+        start, end = _day(start), _day(end)
+        meta = self.meta(symbol) or {"symbol": symbol, "dataset": ds.name, "coverage": None, "partitions": {}}
+        cov = self.coverage(symbol)
+        if cov is not None and (end < cov[0] - _ONE_DAY or start > cov[1] + _ONE_DAY):
+            raise ValueError(f"{symbol}: range {start.date()}~{end.date()} not contiguous with coverage "
+                             f"{cov[0].date()}~{cov[1].date()}")
+
+        added = 0
+        if len(df):
+            df = df.copy()
+            df[ds.date_col] = pd.to_datetime(df[ds.date_col])
+            if ds.symbol_col not in df.columns:
+                df[ds.symbol_col] = symbol
+            d = self._dir(symbol)
+            d.mkdir(parents=True, exist_ok=True)
+            for year, part in df.groupby(df[ds.date_col].dt.year):
+                path = d / f"{year}.csv"
+                old = self._read_partition(path)
+                merged = self._merge(old, part)
+                added += len(merged) - len(old)
+                tmp = path.with_suffix(".tmp")
+                merged.to_csv(tmp, index=False, date_format="%Y-%m-%d")
+                tmp.replace(path)
+                meta["partitions"][str(year)] = {"rows": len(merged), "sha256": _sha256(path)}
+
+        c0, c1 = (start, end) if cov is None else (min(cov[0], start), max(cov[1], end))
+        meta["coverage"] = [str(c0.date()), str(c1.date())]
+        meta["updated"] = datetime.now().isoformat(timespec="seconds")
+        self._dir(symbol).mkdir(parents=True, exist_ok=True)
+        self._write_meta(symbol, meta)
+        return added
+
+    def reset(self, symbol: str) -> None:
+        shutil.rmtree(self._dir(symbol), ignore_errors=True)
+
+    # ---- read / verify -------------------------------------------------- #
+
+    def read(self, symbols: Optional[Iterable[str]] = None, start=None, end=None) -> pd.DataFrame:
+        """종목 x 기간 → 하나의 DataFrame (symbol, date 정렬). 필요한 연도 파티션만 읽음"""
+        ds = self.dataset
+        start = _day(start) if start is not None else None
+        end = _day(end) if end is not None else None
+        frames = []
+        for symbol in (self.symbols() if symbols is None else symbols):
+            meta = self.meta(symbol)
+            if not meta:
+                continue
+            for year in sorted(meta["partitions"], key=int):
+                if (start is not None and int(year) < start.year) or (end is not None and int(year) > end.year):
+                    continue
+                frames.append(self._read_partition(self._dir(symbol) / f"{year}.csv"))
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        if start is not None:
+            df = df[df[ds.date_col] >= start]
+        if end is not None:
+            df = df[df[ds.date_col] <= end]
+        return df.sort_values([ds.symbol_col, ds.date_col, *ds.key_cols], kind="stable").reset_index(drop=True)
+
+    def verify(self, symbols: Optional[Sequence[str]] = None, repair: bool = False) -> Dict[str, List[str]]:
+        """
+        파티션 sha256 / 행 수 검사. 반환: {symbol: [문제 설명, ...]} (문제 없는 종목 제외).
+        repair=True 면 문제 종목을 초기화 → 다음 수집에서 전체 구간 재수집.
+        """
+        bad: Dict[str, List[str]] = {}
+        for symbol in (self.symbols() if symbols is None else symbols):
+            meta = self.meta(symbol)
+            if meta is None:
+                continue
+            problems = []
+            for year, info in meta["partitions"].items():
+                path = self._dir(symbol) / f"{year}.csv"
+                if not path.exists():
+                    problems.append(f"{year}: missing")
+                elif _sha256(path) != info["sha256"]:
+                    problems.append(f"{year}: checksum mismatch")
+            if problems:
+                bad[symbol] = problems
+                if repair:
+                    self.reset(symbol)
+        return bad
@@ -0,0 +1,287 @@
+# engines/factor_portfolio.py
+"""
+Value + Quality + Momentum 섹터 중립 롱숏 (리밸런스 날짜 x 종목 패널, 전 날짜 한 번에)
+
+engine_factor_v2.py / engine_factor_v2_pit.py / engine_factor_v3.py / engine_factor_v4.py 는
+리밸런스 날짜마다 종목별 factor dict → DataFrame 을 만들어 z-score, 섹터별로
+ranked_df[ranked_df['sector'] == sector] 를 돌며 head/tail 로 롱숏을 고르고,
+매일 for symbol, weight in current_positions.items() 로 수익률을 더했다.
+
+이 모듈은 같은 규칙을 (R x N) 패널에서 한 번에 계산한다 (R = 리밸런스 날짜 수):
+
+    fundamentals_panel   PIT 재무 (기준일 <= date - lag_days 중 최신) → value / quality / sector 코드
+                         (code · STRIDE + 기준일) 정렬 + searchsorted 1회 (engines/sf1_panel.py 와 같은 방식)
+    momentum_panel       P[s] / P[s - lookback] - 1,  s = row - signal_lag
+    composite_zscore     포함 종목 (재무 있음 & momentum 유효) 안에서 factor 별 z-score 합
+                         (ddof=1, std <= 0 또는 종목 1개면 0)
+    sector_neutral_weights
+                         그룹 = (리밸런스 행, 섹터). lexsort 로 그룹 내 composite 내림차순 →
+                         그룹 내 순위 < n_sel 이면 롱, >= n - n_sel 이면 숏,
+                         n_sel = max(1, int(n · q)). 롱/숏 각각 gross / 2 로 정규화.
+                         롱과 숏에 모두 뽑힌 종목 (섹터 종목 1개) 은 숏 (기존 {**long, **short})
+    hold_weights         리밸런스 목표 → (T x N) 보유 비중 (apply_lag=1: 다음 날부터 적용)
+    portfolio_returns    보유 비중 · 종목 수익률 (NaN 수익률은 0)
+
+- 섹터 결측 종목은 z-score 모집단에는 들어가지만 선택되지 않음 (기존 sector == NaN 비교와 동일)
+- 같은 종목 / 같은 기준일 레코드가 여럿이면 파일 순서상 마지막 레코드
+- composite 동점은 price 컬럼 순서 (기존 sort_values 는 비안정 정렬)
+- 타이밍 (signal_lag, apply_lag, 빈 결과를 유지할지) 은 스크립트별로 다르므로 호출 측에서 지정
+
+Usage:
+
+    from engines.factor_portfolio import build_targets, hold_weights, portfolio_returns, rebalance_rows
+
+    rows = rebalance_rows(price.index, 'W')
+    targets = build_targets(price, fundamentals, rows, lookback=40, signal_lag=1, lag_days=90,
+                            q=0.15, gross_exposure=2.0)
+    held = hold_weights(len(price), rows, targets.weights, targets.n_positions > 0, apply_lag=1)
+    daily = portfolio_returns(held, price.pct_change().to_numpy())
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+_STRIDE = np.int64(1) << 32     # 종목 코드 간격 (일 단위 날짜보다 충분히 큼)
+
+
+@dataclass
+class FundamentalsPanel:
+    """
+    available: (R x N) 재무 레코드 있음
+    value:     (R x N) -PER - PBR (양수인 항목만)
+    quality:   (R x N) ROE + gross_margin - debt_to_equity (결측 항목 0, D/E 는 0 이상만)
+    sector:    (R x N) 섹터 코드 (-1 = 결측 / 레코드 없음), sectors[code] = 섹터명
+    """
+
+    available: np.ndarray
+    value: np.ndarray
+    quality: np.ndarray
+    sector: np.ndarray
+    sectors: list
+
+
+@dataclass
+class FactorTargets:
+    """
+    weights:     (R x N) 리밸런스 목표 비중 (선택 안 된 종목 0)
+    has_scores:  (R,) factor 점수가 있는 종목이 하나라도 있음 (없으면 기존 factor_scores 가 None / {})
+    n_positions: (R,) 선택된 종목 수 (len(positions))
+    """
+
+    weights: np.ndarray
+    has_scores: np.ndarray
+    n_positions: np.ndarray
+
+
+def rebalance_rows(index: pd.DatetimeIndex, freq: str = "W") -> np.ndarray:
+    """
+    price.resample('W-FRI' / 'M').last().index 중 price.index 에 있는 날짜의 행 번호.
+    'W' = 금요일, 'M' = 달력상 월말 (월말이 휴일인 달은 리밸런스 없음, 기존과 동일)
+    """
+    index = pd.DatetimeIndex(index)
+    if freq == "W":
+        mask = index.dayofweek == 4
+    elif freq == "M":
+        mask = index.is_month_end
+    else:
+        raise ValueError(f"Invalid rebalance_freq: {freq}")
+    return np.flatnonzero(mask & (index == index.normalize()))
+
+
+def _days(values) -> np.ndarray:
+    return pd.DatetimeIndex(values).values.astype("datetime64[D]").astype(np.int64)
+
+
+def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+
+
+def record_scores(fundamentals: pd.DataFrame):
+    """레코드별 (value, quality) (E,)"""
+    per, pbr = _column(fundamentals, "PER"), _column(fundamentals, "PBR")
+    value = -np.where(per > 0, per, 0.0) - np.where(pbr > 0, pbr, 0.0)
+    roe, gm = _column(fundamentals, "ROE"), _column(fundamentals, "gross_margin")
+    de = _column(fundamentals, "debt_to_equity")
+    quality = np.where(np.isnan(roe), 0.0, roe) + np.where(np.isnan(gm), 0.0, gm) - np.where(de >= 0, de, 0.0)
+    return value, quality
+
+
+def fundamentals_panel(
+    fundamentals: pd.DataFrame,
+    symbols: Sequence[str],
+    dates: pd.DatetimeIndex,
+    lag_days: Optional[int] = 90,
+) -> FundamentalsPanel:
+    """
+    리밸런스 날짜 x 종목 재무 패널.
+    lag_days=None 이면 날짜와 무관하게 종목별 최신 레코드 (engine_factor_v2.py 의 비 PIT 방식).
+    """
+    symbols = pd.Index(symbols)
+    dates = pd.DatetimeIndex(dates)
+    R, N = len(dates), len(symbols)
+
+    code = symbols.get_indexer(fundamentals["symbol"])
+    if "report_date" in fundamentals.columns:
+        base = _days(pd.to_datetime(fundamentals["report_date"]))
+        nat = base == np.iinfo(np.int64).min
+    else:
+        base = np.zeros(len(fundamentals), dtype=np.int64)
+        nat = np.zeros(len(fundamentals), dtype=bool)
+    if lag_days is None:
+        base = np.where(nat, -1, base)          # 기준일 없는 레코드는 다른 레코드가 없을 때만
+        ok = code >= 0
+    else:
+        ok = (code >= 0) & ~nat
+
+    value, quality = record_scores(fundamentals)
+    if "sector" in fundamentals.columns:
+        sec_code, sectors = pd.factorize(fundamentals["sector"])
+        sectors = list(sectors)
+    else:
+        sec_code, sectors = np.zeros(len(fundamentals), dtype=np.int64), ["Unknown"]
+
+    code, base = code[ok].astype(np.int64), base[ok]
+    value, quality, sec_code = value[ok], quality[ok], np.asarray(sec_code)[ok]
+    key = code * _STRIDE + base
+    order = np.argsort(key, kind="stable")
+    key, code = key[order], code[order]
+    value, quality, sec_code = value[order], quality[order], sec_code[order]
+
+    cols = np.arange(N, dtype=np.int64) * _STRIDE
+    if lag_days is None:
+        query = np.broadcast_to(cols + (_STRIDE - 1), (R, N))
+    else:
+        query = cols[None, :] + (_days(dates) - int(lag_days))[:, None]
+    idx = np.searchsorted(key, query.ravel(), side="right") - 1
+    hit = idx >= 0
+    hit[hit] = code[idx[hit]] == np.tile(np.arange(N), R)[hit]
+
+    def take(values, fill, dtype):
+        out = np.full(R * N, fill, dtype=dtype)
+        out[hit] = values[idx[hit]]
+        return out.reshape(R, N)
+
+    return FundamentalsPanel(
+        available=hit.reshape(R, N),
+        value=take(value, np.nan, np.float64),
+        quality=take(quality, np.nan, np.float64),
+        sector=take(sec_code, -1, np.int64),
+        sectors=sectors,
+    )
+
+
+def momentum_panel(prices: np.ndarray, rows: np.ndarray, lookback: int, signal_lag: int = 1) -> np.ndarray:
+    """
+    (R x N) P[s] / P[s - lookback] - 1,  s = row - signal_lag.
+    s - lookback < 0 인 행은 전부 NaN (기존: 점수 없음)
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    s = np.asarray(rows) - signal_lag
+    ok = s - lookback >= 0
+    out = np.full((len(s), prices.shape[1]), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[ok] = prices[s[ok]] / prices[s[ok] - lookback] - 1
+    return out
+
+
+def composite_zscore(factors: Sequence[np.ndarray], included: np.ndarray) -> np.ndarray:
+    """포함 종목 안에서 행별 z-score 합 (R x N), 제외 종목 NaN"""
+    cnt = included.sum(axis=1, keepdims=True)
+    composite = np.zeros(included.shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for f in factors:
+            x = np.where(included, f, 0.0)
+            mean = x.sum(axis=1, keepdims=True) / cnt
+            dev = np.where(included, f - mean, 0.0)
+            std = np.sqrt((dev ** 2).sum(axis=1, keepdims=True) / (cnt - 1))
+            composite += np.where(std > 0, dev / std, 0.0)
+    return np.where(included, composite, np.nan)
+
+
+def sector_neutral_weights(composite: np.ndarray, sector: np.ndarray, q: float = 0.15,
+                           gross_exposure: float = 2.0):
+    """
+    섹터별 상위 / 하위 n_sel 종목 롱숏, 롱 / 숏 각각 gross_exposure / 2.
+
+    Returns:
+        (weights (R x N), n_positions (R,))
+    """
+    R, N = composite.shape
+    sector = np.broadcast_to(sector, (R, N))
+    r, j = np.nonzero(~np.isnan(composite) & (sector >= 0))
+    weights = np.zeros((R, N))
+    if len(r) == 0:
+        return weights, np.zeros(R, dtype=np.int64)
+
+    S = int(sector.max()) + 1
+    g = r * S + sector[r, j]
+    order = np.lexsort((-composite[r, j], g))          # 그룹 → composite 내림차순 (동점은 컬럼 순서)
+    r, j, g = r[order], j[order], g[order]
+
+    sizes = np.bincount(g, minlength=R * S)
+    start = np.cumsum(sizes) - sizes
+    rank = np.arange(len(g)) - start[g]
+    n = sizes[g]
+    n_sel = np.maximum(1, (n * q).astype(np.int64))
+    is_long = rank < n_sel
+    is_short = rank >= n - n_sel
+
+    n_long = np.bincount(r[is_long], minlength=R)
+    n_short = np.bincount(r[is_short], minlength=R)
+    target_each = gross_exposure / 2.0
+    with np.errstate(divide="ignore"):
+        w = np.where(is_short, -target_each / n_short[r], target_each / n_long[r])
+    sel = is_long | is_short
+    weights[r[sel], j[sel]] = w[sel]
+    return weights, np.bincount(r[sel], minlength=R)
+
+
+def build_targets(
+    price: pd.DataFrame,
+    fundamentals: pd.DataFrame,
+    rows: np.ndarray,
+    lookback: int,
+    signal_lag: int = 1,
+    lag_days: Optional[int] = 90,
+    q: float = 0.15,
+    gross_exposure: float = 2.0,
+) -> FactorTargets:
+    """리밸런스 행 전체의 목표 비중 (fundamentals_panel → momentum → z-score → 섹터 중립 선택)"""
+    rows = np.asarray(rows, dtype=np.int64)
+    panel = fundamentals_panel(fundamentals, price.columns, price.index[rows], lag_days)
+    mom = momentum_panel(price.to_numpy(dtype=np.float64), rows, lookback, signal_lag)
+    included = panel.available & ~np.isnan(mom)
+    composite = composite_zscore((panel.value, panel.quality, mom), included)
+    weights, n_positions = sector_neutral_weights(composite, panel.sector, q, gross_exposure)
+    return FactorTargets(weights, included.any(axis=1), n_positions)
+
+
+def hold_weights(n_days: int, rows: np.ndarray, weights: np.ndarray, update: np.ndarray,
+                 apply_lag: int = 0) -> np.ndarray:
+    """
+    (T x N) 일별 보유 비중. update 인 리밸런스 행의 목표가 row + apply_lag 일부터 다음 갱신까지 유지,
+    첫 갱신 전은 0
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    update = np.asarray(update, dtype=bool)
+    book = np.vstack([np.zeros((1, weights.shape[1])), weights[update]])
+    at = rows[update] + apply_lag
+    keep = at < n_days
+    src = np.zeros(n_days, dtype=np.int64)
+    src[at[keep]] = np.arange(1, len(at) + 1)[keep]
+    return book[np.maximum.accumulate(src)]
+
+
+def portfolio_returns(held: np.ndarray, stock_returns: np.ndarray) -> np.ndarray:
+    """(T,) Σ 비중 · 종목 수익률, NaN 수익률은 0, 첫 날 0"""
+    R = np.where(np.isnan(stock_returns), 0.0, stock_returns)
+    daily = np.einsum("ij,ij->i", held, R)
+    daily[0] = 0.0
+    return daily
@@ -0,0 +1,174 @@
+# engines/hedge_ratio.py
+"""
+Pairs Trading 헷지 비율 엔진
+
+engine_pairs_trading_v3.py::calculate_fixed_hedge_ratio 는 전체 기간 OLS 한 번으로
+미래 정보를 누설하고, v2 / v2_fixed 는 윈도우마다 LinearRegression 을 다시 적합한다.
+이 모듈은 (T x P) 로그 가격 행렬 전체에 대해 인과적(causal) 헷지 비율을 제공한다.
+
+- rolling_ols_hedge: 누적합 기반 O(T·P) rolling OLS.
+  t 시점 값은 [t-window, t-1] 구간으로 적합 (v2 의 iloc[i-lookback:i] 와 동일).
+- kalman_hedge: 상태 [beta, alpha] 랜덤워크 칼만 필터를 모든 페어에 대해 배치로 갱신.
+  t 시점 값은 t 까지의 관측으로 필터링한 추정치.
+- compute_hedge: PairsConfig.hedge_method 에 따라 위 방법 중 하나를 선택
+  (engines/pairs_vectorized.py::run_pairs_book 의 스프레드/z-score 단계에서 사용).
+"""
+
+from __future__ import annotations
+from typing import Tuple
+
+import numpy as np
+
+
+HEDGE_METHODS = ("full", "rolling", "kalman")
+
+
+def _as_2d(a) -> np.ndarray:
+    a = np.asarray(a, dtype=np.float64)
+    return a[:, None] if a.ndim == 1 else a
+
+
+def rolling_ols_hedge(log_y, log_x, window: int = 120) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling OLS (y = alpha + beta * x), 누적합 커널.
+
+    Args:
+        log_y, log_x: (T x P) 또는 (T,) 로그 가격
+        window: 적합 윈도우 (거래일)
+
+    Returns:
+        beta, alpha: (T x P). t 시점 값은 [t-window, t-1] 로 적합, 윈도우 안에
+        결측이 있거나 t < window 이면 NaN.
+    """
+    y = _as_2d(log_y)
+    x = _as_2d(log_x)
+    T, P = y.shape
+    beta = np.full((T, P), np.nan)
+    alpha = np.full((T, P), np.nan)
+    if T <= window:
+        return beta, alpha
+
+    valid = ~(np.isnan(y) | np.isnan(x))
+    # 열별 기준값으로 중심화 → 2차 모멘트 누적합의 상쇄 오차 완화
+    with np.errstate(invalid="ignore"):
+        cx = np.nan_to_num(np.nanmean(np.where(valid, x, np.nan), axis=0))
+        cy = np.nan_to_num(np.nanmean(np.where(valid, y, np.nan), axis=0))
+    xc = np.where(valid, x - cx, 0.0)
+    yc = np.where(valid, y - cy, 0.0)
+
+    def _csum(a):
+        return np.vstack([np.zeros((1, P)), np.cumsum(a, axis=0)])
+
+    c_n = _csum(valid.astype(np.float64))
+    c_x = _csum(xc)
+    c_y = _csum(yc)
+    c_xx = _csum(xc * xc)
+    c_xy = _csum(xc * yc)
+
+    # t = window..T-1 에 대해 [t-window, t) 합계
+    hi = slice(window, T)
+    lo = slice(0, T - window)
+    n = c_n[hi] - c_n[lo]
+    sx = c_x[hi] - c_x[lo]
+    sy = c_y[hi] - c_y[lo]
+    sxx = c_xx[hi] - c_xx[lo]
+    sxy = c_xy[hi] - c_xy[lo]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var_x = sxx - sx * sx / window
+        cov_xy = sxy - sx * sy / window
+        b = cov_xy / var_x
+        a = (sy - b * sx) / window + cy - b * cx
+    full = (n == window) & (var_x > 1e-14 * window)
+    beta[window:] = np.where(full, b, np.nan)
+    alpha[window:] = np.where(full, a, np.nan)
+    return beta, alpha
+
+
+def kalman_hedge(
+    log_y,
+    log_x,
+    delta: float = 1e-4,
+    obs_var: float = 1e-3,
+    init_var: float = 1.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    배치 칼만 필터 헷지 비율 (모든 페어 동시 갱신).
+
+    관측식: y_t = beta_t * x_t + alpha_t + e_t,  e_t ~ N(0, obs_var)
+    상태식: [beta, alpha]_t = [beta, alpha]_{t-1} + w_t,  w_t ~ N(0, delta/(1-delta) I)
+
+    pykalman.KalmanFilter(transition_covariance=delta/(1-delta) I,
+    observation_covariance=obs_var, initial_state_covariance=init_var I) 를
+    페어마다 돌린 filter() 결과와 같다. 결측 관측일은 예측 단계만 수행.
+
+    Returns:
+        beta, alpha: (T x P) 필터링된 추정치 (t 까지의 정보)
+    """
+    y = _as_2d(log_y)
+    x = _as_2d(log_x)
+    T, P = y.shape
+    q = delta / (1.0 - delta)
+
+    # 상태 평균 m (P, 2), 공분산 C (P, 2, 2) — 성분 [beta, alpha]
+    m = np.zeros((P, 2))
+    C = np.broadcast_to(np.eye(2) * init_var, (P, 2, 2)).copy()
+    beta = np.full((T, P), np.nan)
+    alpha = np.full((T, P), np.nan)
+    started = np.zeros(P, dtype=bool)
+
+    for t in range(T):
+        yt = y[t]
+        xt = x[t]
+        obs = ~(np.isnan(yt) | np.isnan(xt))
+
+        # 예측: 첫 관측 전에는 사전분포 유지
+        R = C.copy()
+        R[started, 0, 0] += q
+        R[started, 1, 1] += q
+
+        # 갱신 (관측이 있는 페어만)
+        h0 = np.where(obs, xt, 0.0)                     # H = [x_t, 1]
+        Rh0 = R[:, 0, 0] * h0 + R[:, 0, 1]
+        Rh1 = R[:, 1, 0] * h0 + R[:, 1, 1]
+        S = h0 * Rh0 + Rh1 + obs_var
+        err = np.where(obs, yt, 0.0) - (m[:, 0] * h0 + m[:, 1])
+        K0 = Rh0 / S
+        K1 = Rh1 / S
+
+        m_new = m.copy()
+        m_new[:, 0] += K0 * err
+        m_new[:, 1] += K1 * err
+        C_new = R.copy()
+        C_new[:, 0, 0] -= K0 * Rh0
+        C_new[:, 0, 1] -= K0 * Rh1
+        C_new[:, 1, 0] -= K1 * Rh0
+        C_new[:, 1, 1] -= K1 * Rh1
+
+        m = np.where(obs[:, None], m_new, m)
+        C = np.where(obs[:, None, None], C_new, R)
+        started |= obs
+
+        beta[t] = np.where(started, m[:, 0], np.nan)
+        alpha[t] = np.where(started, m[:, 1], np.nan)
+
+    return beta, alpha
+
+
+def compute_hedge(log_y, log_x, cfg) -> np.ndarray:
+    """
+    PairsConfig 의 hedge_method 에 따라 (T x P) 시변 헷지 비율 반환.
+
+    - "rolling": rolling OLS (cfg.hedge_lookback)
+    - "kalman":  배치 칼만 필터 (cfg.kalman_delta, cfg.kalman_obs_var)
+
+    "full" (전체 기간 OLS) 은 engines.pairs_vectorized.full_sample_hedge 가 처리한다.
+    """
+    method = cfg.hedge_method
+    if method == "rolling":
+        beta, _ = rolling_ols_hedge(log_y, log_x, cfg.hedge_lookback)
+        return beta
+    if method == "kalman":
+        beta, _ = kalman_hedge(log_y, log_x, cfg.kalman_delta, cfg.kalman_obs_var)
+        return beta
+    raise ValueError(f"unknown hedge_method '{method}', expected one of {HEDGE_METHODS}")
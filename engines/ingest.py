@@ -0,0 +1,365 @@
+# engines/ingest.py
+"""
+시장 데이터 수집 (동시 요청 + 공유 rate limit + 증분 저장)
+
+download_etf_data.py 는 종목마다 time.sleep(12), download_sf1_*.py 는 time.sleep(0.3~0.5) 를
+두고 순차로 전체 기간을 다시 받았다. 이 모듈은:
+
+- TokenBucket: 스레드 간 공유 token bucket (초당 rate, 최대 burst). 모든 HTTP 요청
+  (페이지 포함) 이 토큰 1개 → worker 수와 무관하게 API 한도 준수
+- Downloader: ThreadPoolExecutor(workers) 로 (종목, 빠진 구간) 작업을 병렬 처리하고
+  받은 구간을 BarStore 에 append (종목 단위 checkpoint → 중단 후 재실행하면 이어서)
+- 429 / 5xx / 연결 오류는 지수 backoff 재시도 (Retry-After 우선)
+- Source: API 응답 → DataFrame
+    PolygonAggsSource     /v2/aggs/ticker/{sym}/range/1/day/{from}/{to} (next_url 페이지, resultsCount 검증)
+    NasdaqTableSource     /api/v3/datatables/{table} (qopts.cursor_id 페이지) — SHARADAR/SF1
+    YFinanceSource        yfinance.download (HTTP 직접 호출 없음, 토큰만 소비)
+
+base_url 은 인자/환경변수 (POLYGON_BASE_URL, NASDAQ_DATA_LINK_BASE_URL) 로 바꿀 수 있어
+ingest_fake_server.py 의 로컬 stand-in 으로 그대로 테스트된다.
+
+Usage:
+
+    from engines.ingest import Downloader, PolygonAggsSource, TokenBucket
+
+    src = PolygonAggsSource(api_key)
+    dl = Downloader(src, limiter=TokenBucket(rate=5 / 60, burst=1), workers=4)
+    report = dl.run(["SPY", "TLT"], "2015-11-23", "2025-11-22")
+    bars = dl.store.read(["SPY", "TLT"])
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from engines.bar_store import BarStore, Dataset, _day
+
+POLYGON_URL = os.environ.get("POLYGON_BASE_URL", "https://api.polygon.io")
+NASDAQ_URL = os.environ.get("NASDAQ_DATA_LINK_BASE_URL", "https://data.nasdaq.com")
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class IngestError(RuntimeError):
+    pass
+
+
+# ============================================================================
+# Rate limiting
+# ============================================================================
+
+class TokenBucket:
+    """thread-safe token bucket: 초당 rate 개, 최대 burst 개 연속"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, n: int = 1) -> float:
+        """토큰 n 개 확보 (필요하면 대기). 반환: 대기 시간"""
+        n = min(float(n), self.burst)
+        t0 = time.monotonic()
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    break
+                time.sleep((n - self.tokens) / self.rate)
+            wait = time.monotonic() - t0
+            self.waited += wait
+        return wait
+
+
+# ============================================================================
+# Sources
+# ============================================================================
+
+Get = Callable[[str, Optional[Dict[str, Any]]], Dict[str, Any]]
+
+
+class PolygonAggsSource:
+    """Polygon 일봉 aggregates → symbol, timestamp, open, high, low, close, volume, vwap"""
+
+    dataset = Dataset("polygon_daily")
+    columns = ["symbol", "timestamp", "open", "high", "low", "close", "volume", "vwap"]
+    settle_days = 1         # 오늘 봉은 미확정
+
+    def __init__(self, api_key: str, base_url: str = POLYGON_URL, adjusted: bool = True):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.adjusted = adjusted
+
+    def fetch(self, get: Get, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        url = f"{self.base_url}/v2/aggs/ticker/{symbol}/range/1/day/{start.date()}/{end.date()}"
+        params: Optional[Dict[str, Any]] = {
+            "adjusted": str(self.adjusted).lower(), "sort": "asc", "limit": 50000, "apiKey": self.api_key,
+        }
+        rows = []
+        while url:
+            data = get(url, params)
+            if data.get("status") not in ("OK", "DELAYED"):
+                raise IngestError(f"{symbol}: status={data.get('status')} {data.get('error', '')}".strip())
+            results = data.get("results") or []
+            if "resultsCount" in data and data["resultsCount"] != len(results):
+                raise IngestError(f"{symbol}: resultsCount {data['resultsCount']} != {len(results)} rows")
+            rows.extend(results)
+            url = data.get("next_url")
+            params = {"apiKey": self.api_key}      # next_url 에 나머지 쿼리 포함
+        if not rows:
+            return pd.DataFrame(columns=self.columns)
+
+        df = pd.DataFrame(rows).rename(columns={"o": "open", "h": "high", "l": "low", "c": "close",
+                                                "v": "volume", "vw": "vwap"})
+        if "vwap" not in df.columns:
+            df["vwap"] = float("nan")
+        # t = 미국 동부 자정 (UTC ms) → 거래일
+        df["timestamp"] = (pd.to_datetime(df["t"], unit="ms", utc=True)
+                           .dt.tz_convert("America/New_York").dt.tz_localize(None).dt.normalize())
+        df["symbol"] = symbol
+        return df[self.columns]
+
+
+class NasdaqTableSource:
+    """Nasdaq Data Link datatables (SHARADAR/SF1 등) → 요청 컬럼 그대로"""
+
+    settle_days = 120       # calendardate 분기말 → 공시 (datekey) 까지 지연, 최근 분기는 다시 요청
+
+    def __init__(self, api_key: str, table: str = "SHARADAR/SF1", dimension: Optional[str] = "MRQ",
+                 columns: Sequence[str] = ("ticker", "dimension", "calendardate", "datekey",
+                                           "roe", "ebitda", "revenue", "debt", "equity"),
+                 date_col: str = "calendardate", base_url: str = NASDAQ_URL):
+        self.api_key = api_key
+        self.table = table
+        self.dimension = dimension
+        self.columns = list(columns)
+        self.base_url = base_url.rstrip("/")
+        key_cols = tuple(c for c in ("dimension", "datekey") if c in self.columns and c != date_col)
+        name = table.replace("/", "_").lower() + (f"_{dimension.lower()}" if dimension else "")
+        self.dataset = Dataset(name, date_col=date_col, symbol_col="ticker", key_cols=key_cols)
+
+    def fetch(self, get: Get, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        url = f"{self.base_url}/api/v3/datatables/{self.table}.json"
+        date_col = self.dataset.date_col
+        params: Dict[str, Any] = {
+            "api_key": self.api_key,
+            "ticker": symbol,
+            f"{date_col}.gte": str(start.date()),
+            f"{date_col}.lte": str(end.date()),
+            "qopts.columns": ",".join(self.columns),
+        }
+        if self.dimension:
+            params["dimension"] = self.dimension
+        frames, columns = [], None
+        while True:
+            data = get(url, params)
+            table = data.get("datatable")
+            if table is None:
+                raise IngestError(f"{symbol}: {data.get('quandl_error') or data}")
+            columns = [c["name"] for c in table["columns"]]
+            if table["data"]:
+                frames.append(pd.DataFrame(table["data"], columns=columns))
+            cursor = (data.get("meta") or {}).get("next_cursor_id")
+            if not cursor:
+                break
+            params = {**params, "qopts.cursor_id": cursor}
+        if not frames:
+            return pd.DataFrame(columns=columns or self.columns)
+        df = pd.concat(frames, ignore_index=True)
+        df[date_col] = pd.to_datetime(df[date_col])
+        return df
+
+
+class YFinanceSource:
+    """yfinance 일봉 종가 → symbol, timestamp, close (download_spy_tlt.py / download_pairs_data.py 형식)"""
+
+    dataset = Dataset("yfinance_daily")
+    columns = ["symbol", "timestamp", "close"]
+    settle_days = 1
+
+    def fetch(self, get: Get, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        import yfinance as yf
+
+        # yfinance end 는 exclusive
+        data = yf.download(symbol, start=str(start.date()), end=str((end + pd.Timedelta(days=1)).date()),
+                           progress=False)
+        if data is None or data.empty:
+            return pd.DataFrame(columns=self.columns)
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = data.columns.get_level_values(0)
+        data = data[["Close"]].reset_index().rename(columns={"Date": "timestamp", "Close": "close"})
+        data["symbol"] = symbol
+        return data[self.columns]
+
+
+# ============================================================================
+# Downloader
+# ============================================================================
+
+@dataclass
+class SymbolResult:
+    symbol: str
+    status: str = "ok"              # ok | cached | failed
+    ranges: List[str] = field(default_factory=list)
+    rows: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+class Downloader:
+    """
+    source:  fetch(get, symbol, start, end) -> DataFrame, dataset, settle_days 를 가진 객체
+    store:   BarStore (없으면 source.dataset 으로 생성)
+    limiter: 모든 요청이 공유하는 TokenBucket
+    workers: 동시 종목 수 (요청 속도는 limiter 가 결정, workers 는 지연 겹치기용)
+    """
+
+    def __init__(self, source, store: Optional[BarStore] = None, limiter: Optional[TokenBucket] = None,
+                 workers: int = 4, retries: int = 5, timeout: float = 30.0, backoff: float = 1.0,
+                 cap_today: bool = True):
+        self.source = source
+        self.store = store or BarStore(source.dataset)
+        self.limiter = limiter or TokenBucket(rate=5.0, burst=5)
+        self.workers = max(1, int(workers))
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.cap_today = cap_today
+        self.requests = 0
+        self.retried = 0
+        self._local = threading.local()
+        self._count_lock = threading.Lock()
+
+    # ---- HTTP ----------------------------------------------------------- #
+
+    def _session(self):
+        import requests
+
+        s = getattr(self._local, "session", None)
+        if s is None:
+            s = self._local.session = requests.Session()
+        return s
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """rate-limited GET → JSON. 429/5xx/연결 오류는 backoff 재시도"""
+        import requests
+
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            with self._count_lock:
+                self.requests += 1
+            try:
+                resp = self._session().get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                err, delay = e, self.backoff * 2 ** attempt
+            else:
+                if resp.status_code not in RETRY_STATUS:
+                    resp.raise_for_status()
+                    return resp.json()
+                err = IngestError(f"HTTP {resp.status_code} {url}")
+                retry_after = resp.headers.get("Retry-After")
+                delay = float(retry_after) if retry_after else self.backoff * 2 ** attempt
+            if attempt == self.retries:
+                raise IngestError(f"giving up after {self.retries + 1} attempts: {err}")
+            with self._count_lock:
+                self.retried += 1
+            time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    # ---- plan / run ----------------------------------------------------- #
+
+    def _end(self, end) -> pd.Timestamp:
+        """
+        아직 확정되지 않은 최근 구간 (source.settle_days) 은 coverage 에 넣지 않음
+        → 다음 실행에서 다시 요청 (오늘 봉, 공시 전 분기)
+        """
+        end = _day(end if end is not None else pd.Timestamp.today())
+        if self.cap_today:
+            settle = pd.Timedelta(days=getattr(self.source, "settle_days", 1))
+            end = min(end, _day(pd.Timestamp.today()) - settle)
+        return end
+
+    def plan(self, symbols: Sequence[str], start, end=None, refresh: bool = False) -> Dict[str, List]:
+        """종목 → 받을 구간 리스트 (이미 받은 종목은 빈 리스트)"""
+        end = self._end(end)
+        out = {}
+        for symbol in symbols:
+            if refresh:
+                self.store.reset(symbol)
+            out[symbol] = self.store.missing(symbol, start, end)
+        return out
+
+    def _one(self, symbol: str, ranges: List) -> SymbolResult:
+        res = SymbolResult(symbol)
+        t0 = time.perf_counter()
+        try:
+            # coverage 쪽에서 가까운 구간부터 → 각 구간 append 가 checkpoint
+            for start, end in ranges:
+                df = self.source.fetch(self.get, symbol, start, end)
+                res.rows += self.store.append(symbol, df, start, end)
+                res.ranges.append(f"{start.date()}~{end.date()}")
+        except Exception as e:
+            res.status, res.error = "failed", f"{type(e).__name__}: {e}"
+        res.seconds = time.perf_counter() - t0
+        return res
+
+    def run(self, symbols: Sequence[str], start, end=None, refresh: bool = False,
+            verbose: bool = True) -> Dict[str, Any]:
+        plan = self.plan(symbols, start, end, refresh)
+        todo = {s: r for s, r in plan.items() if r}
+        results: Dict[str, SymbolResult] = {s: SymbolResult(s, "cached") for s in plan if not plan[s]}
+        t0 = time.perf_counter()
+        if verbose:
+            print(f"\n📥 {self.store.dataset.name}: {len(symbols)} symbols, {len(todo)} to fetch "
+                  f"({sum(len(r) for r in todo.values())} ranges), workers={self.workers}, "
+                  f"rate={self.limiter.rate:g}/s burst={self.limiter.burst:g}")
+
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            futures = {pool.submit(self._one, s, r): s for s, r in todo.items()}
+            for i, fut in enumerate(as_completed(futures), 1):
+                r = fut.result()
+                results[r.symbol] = r
+                if verbose:
+                    mark = "✅" if r.status == "ok" else "❌"
+                    detail = r.error if r.error else f"+{r.rows} rows [{', '.join(r.ranges)}]"
+                    print(f"  [{i}/{len(todo)}] {mark} {r.symbol}: {detail} ({r.seconds:.1f}s)")
+        except KeyboardInterrupt:
+            # 진행 중인 종목만 마저 끝내고 (checkpoint 일관성) 대기 작업은 취소 → 다음 실행에서 이어서
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+        pool.shutdown(wait=True)
+
+        elapsed = time.perf_counter() - t0
+        ordered = [results[s] for s in plan]
+        report = {
+            "dataset": self.store.dataset.name,
+            "symbols": len(ordered),
+            "fetched": sum(r.status == "ok" for r in ordered),
+            "cached": sum(r.status == "cached" for r in ordered),
+            "failed": [r.symbol for r in ordered if r.status == "failed"],
+            "rows": sum(r.rows for r in ordered),
+            "requests": self.requests,
+            "retries": self.retried,
+            "rate_wait_seconds": round(self.limiter.waited, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "results": {r.symbol: r for r in ordered},
+        }
+        if verbose:
+            print(f"   fetched={report['fetched']} cached={report['cached']} failed={len(report['failed'])} "
+                  f"rows=+{report['rows']} requests={self.requests} retries={self.retried} "
+                  f"({elapsed:.1f}s, rate wait {self.limiter.waited:.1f}s)")
+        return report
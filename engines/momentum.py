@@ -0,0 +1,223 @@
+# engines/momentum.py
+"""
+Time-series / cross-sectional momentum 커널 (리밸런스 행 x 자산, 모든 lookback 한 번에)
+
+engine_multiasset_mom_v1.py / engine_multiasset_mom_v3.py / engine_sector_mom_ls.py 는
+리밸런스마다 returns[i - L : i] 를 잘라 np.nanmean · L, np.nanstd 를 lookback 별로 다시 계산하고,
+engine_momentum_simple_v1.py / engine_etf_mom_v1.py 는 리밸런스마다 nlargest / 신호 선택 후
+weights.loc[start:end, sym] = w 로 종목별 구간을 채웠다.
+
+이 모듈은
+
+    ReturnPrefix     수익률의 누적합 / 제곱합 / 유효 개수 / log1p 누적합 (T+1 x N) 을 한 번 만들고
+                     window(i, L, skip) = prefix[i - skip] - prefix[i - skip - L] 로
+                     모든 (lookback, skip, 리밸런스 행) 조합을 fancy index 한 번에 계산.
+                     같은 수익률로 lookback 을 바꿔 가며 sweep 할 때 prefix 를 재사용
+    price_momentum   P[i - skip] / P[i - lookback] - 1 (가격 기준, 모든 조합 strided gather 한 번)
+    rank_desc        행별 argsort 내림차순 순위 (NaN 은 뒤, 동점은 컬럼 순서)
+    top_bottom       순위 → 롱 / 숏 마스크 (유효 자산 수가 모자라면 행 전체 제외)
+    inverse_vol      마스크 (절대 모멘텀 > 0, vol > 하한 등) 안에서 1/vol 정규화, 그룹별 비중 옵션
+    scale_gross      행별 gross 를 목표로 스케일
+    hold_blocks      리밸런스 목표를 다음 리밸런스 전까지 채운 (T x N) 비중
+
+- 구간에 NaN 수익률은 건너뜀 (np.nanmean / np.nanstd 와 동일), 유효 값이 없으면 NaN
+- 구간에 ±inf 가 있으면 NaN (기존: replace([inf, -inf], nan) 후 제외).
+  keep_inf=True 면 np.nanmean 처럼 +inf / -inf (둘 다 있으면 NaN)
+- compound: 구간에 r <= -1 (log1p 불가) 이 있으면 NaN. 그 밖의 구간은 영향 없음
+- i - skip - lookback < 0 인 행은 NaN
+
+Usage:
+
+    from engines.momentum import ReturnPrefix, rebalance_rows
+
+    prefix = ReturnPrefix(pivot_ret.to_numpy())
+    rows = rebalance_rows(len(pivot_ret), 21)
+    mom = prefix.momentum(rows, lookbacks=(21, 63, 126, 252))     # (4, R, N), nanmean · L
+    vol = prefix.std(rows, 63)                                      # (R, N), ddof=0
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def rebalance_rows(n_dates: int, every: int) -> np.ndarray:
+    """0, every, 2·every, ... (dates[::every])"""
+    return np.arange(0, n_dates, int(every))
+
+
+class ReturnPrefix:
+    """(T x N) 수익률의 누적 prefix. 구간 통계는 prefix 차이로 O(1)"""
+
+    def __init__(self, returns: np.ndarray):
+        R = np.asarray(returns, dtype=np.float64)
+        finite = np.isfinite(R)
+        x = np.where(finite, R, 0.0)
+        ruin = x <= -1.0        # log1p 불가 (-100% 이하), compound 에서만 결측 처리
+        zero = np.zeros((1, R.shape[1]))
+        self.shape = R.shape
+        self._sum = np.vstack([zero, np.cumsum(x, axis=0)])
+        self._sq = np.vstack([zero, np.cumsum(x * x, axis=0)])
+        self._log = np.vstack([zero, np.cumsum(np.log1p(np.where(ruin, 0.0, x)), axis=0)])
+        self._count = np.vstack([zero, np.cumsum(finite, axis=0)])
+        self._pinf = np.vstack([zero, np.cumsum(R == np.inf, axis=0)])
+        self._ninf = np.vstack([zero, np.cumsum(R == -np.inf, axis=0)])
+        self._ruin = np.vstack([zero, np.cumsum(ruin, axis=0)])
+
+    def _window(self, prefix: np.ndarray, rows, lookback: int, skip: int = 0) -> np.ndarray:
+        rows = np.asarray(rows, dtype=np.int64)
+        end = rows - skip
+        start = end - lookback
+        ok = start >= 0
+        out = np.full((len(rows), self.shape[1]), np.nan)
+        out[ok] = prefix[end[ok]] - prefix[start[ok]]
+        return out
+
+    def _valid(self, rows, lookback: int, skip: int = 0):
+        count = self._window(self._count, rows, lookback, skip)
+        n_inf = self._window(self._pinf, rows, lookback, skip) + self._window(self._ninf, rows, lookback, skip)
+        bad = ~(count > 0) | (n_inf > 0)
+        return count, bad
+
+    def _nan_inf(self, rows, lookback: int, skip: int = 0):
+        """(구간에 ±inf 가 있는지, np.nanmean 값 +inf / -inf / 둘 다면 NaN)"""
+        pos = self._window(self._pinf, rows, lookback, skip) > 0
+        neg = self._window(self._ninf, rows, lookback, skip) > 0
+        return pos | neg, np.where(pos & neg, np.nan, np.where(pos, np.inf, -np.inf))
+
+    def count(self, rows, lookback: int, skip: int = 0) -> np.ndarray:
+        return self._window(self._count, rows, lookback, skip)
+
+    def sum(self, rows, lookback: int, skip: int = 0) -> np.ndarray:
+        """구간 합 (NaN 건너뜀)"""
+        count, bad = self._valid(rows, lookback, skip)
+        return np.where(bad, np.nan, self._window(self._sum, rows, lookback, skip))
+
+    def mean(self, rows, lookback: int, skip: int = 0, keep_inf: bool = False) -> np.ndarray:
+        """np.nanmean(returns[i - skip - L : i - skip]) (keep_inf=False 면 ±inf 구간은 NaN)"""
+        count, bad = self._valid(rows, lookback, skip)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = np.where(bad, np.nan, self._window(self._sum, rows, lookback, skip) / count)
+        if keep_inf:
+            has_inf, inf_mean = self._nan_inf(rows, lookback, skip)
+            out = np.where(has_inf, inf_mean, out)
+        return out
+
+    def std(self, rows, lookback: int, skip: int = 0, ddof: int = 0) -> np.ndarray:
+        """np.nanstd(..., ddof) (유효 개수 <= ddof 면 NaN)"""
+        count, bad = self._valid(rows, lookback, skip)
+        s = self._window(self._sum, rows, lookback, skip)
+        sq = self._window(self._sq, rows, lookback, skip)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = np.maximum(sq - s * s / count, 0.0) / (count - ddof)
+        return np.where(bad | (count <= ddof), np.nan, np.sqrt(var))
+
+    def compound(self, rows, lookback: int, skip: int = 0) -> np.ndarray:
+        """Π(1 + r) - 1 (NaN 수익률은 0, r <= -1 이 있는 구간은 NaN)"""
+        count, bad = self._valid(rows, lookback, skip)
+        bad |= self._window(self._ruin, rows, lookback, skip) > 0
+        return np.where(bad, np.nan, np.expm1(self._window(self._log, rows, lookback, skip)))
+
+    def momentum(self, rows, lookbacks: Sequence[int], skip: int = 0, kind: str = "sum",
+                 keep_inf: bool = False) -> np.ndarray:
+        """
+        (K x R x N) lookback 별 모멘텀.
+        kind="sum": nanmean · L (기존 스크립트의 '합 근사'), kind="compound": 누적 수익률
+        keep_inf: kind="sum" 에서 ±inf 구간을 NaN 대신 np.nanmean 값으로
+        """
+        out = []
+        for L in lookbacks:
+            if kind == "sum":
+                out.append(self.mean(rows, L, skip, keep_inf) * L)
+            elif kind == "compound":
+                out.append(self.compound(rows, L, skip))
+            else:
+                raise ValueError(f"unknown kind '{kind}'")
+        return np.stack(out)
+
+
+def price_momentum(prices: np.ndarray, rows, lookbacks: Sequence[int], skips: Sequence[int] = (0,)) -> np.ndarray:
+    """
+    (K x S x R x N) P[i - skip] / P[i - lookback] - 1, 범위 밖이면 NaN.
+    (pivot_close.shift(skip) / pivot_close.shift(lookback) - 1 의 리밸런스 행)
+    """
+    P = np.vstack([np.asarray(prices, dtype=np.float64), np.full((1, np.shape(prices)[1]), np.nan)])
+    nan_row = len(P) - 1
+    rows = np.asarray(rows, dtype=np.int64)
+    lb = np.asarray(lookbacks, dtype=np.int64)[:, None, None]
+    sk = np.asarray(skips, dtype=np.int64)[None, :, None]
+    end = rows[None, None, :] - sk
+    start = np.broadcast_to(rows[None, None, :] - lb, end.shape)
+    end = np.where(end >= 0, end, nan_row)
+    start = np.where(start >= 0, start, nan_row)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return P[end] / P[start] - 1
+
+
+def rank_desc(scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    행별 내림차순 순위 (0 = 최고), NaN 은 유효 값 뒤. 동점은 컬럼 순서 (nlargest keep='first').
+
+    Returns:
+        (ranks (R x N), n_valid (R,))
+    """
+    valid = ~np.isnan(scores)
+    key = np.where(valid, -scores, np.inf)
+    order = np.argsort(key, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(scores.shape[1])[None, :], axis=1)
+    return ranks, valid.sum(axis=1)
+
+
+def top_bottom(scores: np.ndarray, k_long: int, k_short: int = 0,
+               min_valid: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    상위 k_long 롱 / 하위 k_short 숏 마스크. 유효 자산 < min_valid (기본 k_long + k_short) 인 행은 전부 False
+    """
+    ranks, n_valid = rank_desc(scores)
+    need = k_long + k_short if min_valid is None else min_valid
+    ok = (n_valid >= need)[:, None]
+    valid = ~np.isnan(scores)
+    long = ok & (ranks < k_long)
+    short = ok & valid & (ranks >= (n_valid - k_short)[:, None]) if k_short > 0 else np.zeros_like(long)
+    return long, short
+
+
+def inverse_vol(vol: np.ndarray, mask: np.ndarray, groups: Optional[np.ndarray] = None,
+                group_weights: Optional[Sequence[float]] = None) -> np.ndarray:
+    """
+    마스크 안에서 1/vol 을 행별 합 1 로 정규화.
+    groups (N,) 코드와 group_weights 가 있으면 그룹별로 정규화 후 그룹 비중을 곱해 합침
+    (해당 행에 자산이 없는 그룹은 0)
+    """
+    with np.errstate(divide="ignore"):
+        iv = np.where(mask, 1.0 / vol, 0.0)
+    if groups is None:
+        total = iv.sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore"):
+            return np.where(total > 0, iv / total, 0.0)
+    out = np.zeros_like(iv)
+    for g, gw in enumerate(group_weights):
+        ivg = np.where(groups[None, :] == g, iv, 0.0)
+        total = ivg.sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore"):
+            out += np.where(total > 0, ivg / total, 0.0) * gw
+    return out
+
+
+def scale_gross(weights: np.ndarray, target: float, eps: float = 1e-8) -> np.ndarray:
+    """행별 Σ|w| 를 target 으로 (Σ|w| <= eps 인 행은 그대로)"""
+    gross = np.abs(weights).sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(gross > eps, weights * (target / gross), weights)
+
+
+def hold_blocks(n_dates: int, rows, targets: np.ndarray) -> np.ndarray:
+    """(T x N) 리밸런스 행 k 의 목표를 [rows[k], rows[k+1]) 구간에, 첫 리밸런스 전은 0"""
+    rows = np.asarray(rows, dtype=np.int64)
+    book = np.vstack([np.zeros((1, targets.shape[1])), targets])
+    src = np.zeros(n_dates, dtype=np.int64)
+    src[rows] = np.arange(1, len(rows) + 1)
+    return book[np.maximum.accumulate(src)]
@@ -0,0 +1,285 @@
+# engines/pairs_screening.py
+"""
+All-pairs cointegration 스크리닝
+
+engine_multi_pairs_trading_v1.py::find_cointegrated_pairs 는 모든 (i, j) 조합에
+statsmodels coint 를 이중 루프로 돌린다 (O(N^2) Engle-Granger). 이 모듈은 단계별로
+후보를 줄인다.
+
+1. 사전 필터: 수익률 상관계수 ≥ min_corr, (옵션) 같은 섹터/산업, 공통 관측치 수
+2. 생존 페어 전체의 OLS 헷지 비율을 배치 행렬 연산으로 계산
+3. 잔차 행렬에 벡터화 ADF 통계량 (고정 lag, 무상수) → MacKinnon 근사 p-value
+4. 근사 p-value 를 통과한 페어만 프로세스 풀에서 정확한 coint 테스트
+5. p-value / half-life 로 정렬한 페어 리스트 반환
+
+헷지·테스트 모두 로그 가격 기준 (spread = log p1 - hedge * log p2).
+"""
+
+from __future__ import annotations
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.adfvalues import mackinnonp
+from statsmodels.tsa.stattools import coint
+
+
+@dataclass
+class ScreeningConfig:
+    min_corr: float = 0.7               # 수익률 상관계수 하한
+    same_sector: bool = True            # sector_map 이 주어지면 같은 그룹만
+    min_obs: int = 252                  # 페어 공통 관측치 하한
+    adf_lags: int = 1                   # 벡터화 ADF lag 수
+    prefilter_pvalue: float = 0.10      # 근사 p-value 통과 기준 (정확 테스트 대상)
+    pvalue_threshold: float = 0.05      # 최종 coint p-value 기준
+    min_half_life: float = 1.0          # 거래일
+    max_half_life: float = 126.0        # 거래일
+    max_pairs: Optional[int] = 20
+    chunk_size: int = 512               # ADF 배치 크기 (페어 수)
+    n_workers: Optional[int] = None     # None → CPU 수, 1 → 직렬
+
+
+def load_sector_map(path="./data/fundamentals_with_sector.csv", column="sector") -> pd.Series:
+    """symbol → sector (또는 industry) 매핑"""
+    df = pd.read_csv(path)
+    if column not in df.columns:
+        raise ValueError(f"{path} 에 '{column}' 컬럼이 없습니다: {list(df.columns)}")
+    return df.drop_duplicates("symbol").set_index("symbol")[column]
+
+
+# ------------------------------------------------------------
+# 1. Prefilter
+# ------------------------------------------------------------
+def candidate_pairs(
+    log_px: pd.DataFrame,
+    cfg: ScreeningConfig,
+    sector_map: Optional[pd.Series] = None,
+) -> pd.DataFrame:
+    """
+    상관계수 / 섹터 / 공통 관측치 기준으로 후보 페어 (i < j) 생성.
+
+    Returns: DataFrame[pair1, pair2, corr, group]
+    """
+    symbols = log_px.columns
+    valid = log_px.notna().to_numpy().astype(np.float64)
+    n_common = valid.T @ valid
+
+    ret = log_px.diff()
+    corr = ret.corr(min_periods=max(cfg.min_obs // 2, 2)).to_numpy()
+
+    keep = np.triu(np.ones((len(symbols), len(symbols)), dtype=bool), k=1)
+    keep &= n_common >= cfg.min_obs
+    keep &= np.nan_to_num(corr, nan=-1.0) >= cfg.min_corr
+
+    groups = None
+    if sector_map is not None and cfg.same_sector:
+        groups = sector_map.reindex(symbols).fillna("__none__").to_numpy()
+        codes, _ = pd.factorize(groups)
+        same = codes[:, None] == codes[None, :]
+        known = groups != "__none__"
+        keep &= same & known[:, None] & known[None, :]
+
+    ii, jj = np.nonzero(keep)
+    return pd.DataFrame({
+        "pair1": symbols[ii],
+        "pair2": symbols[jj],
+        "corr": corr[ii, jj],
+        "group": groups[ii] if groups is not None else "",
+    })
+
+
+# ------------------------------------------------------------
+# 2. Batched OLS hedge ratios
+# ------------------------------------------------------------
+def batch_hedge_ratios(log_y: np.ndarray, log_x: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (T x P) 행렬 쌍의 페어별 OLS y = alpha + beta * x (공통 관측 구간만).
+
+    Returns: alpha (P,), beta (P,), resid (T x P, 결측 위치 NaN)
+    """
+    valid = ~(np.isnan(log_y) | np.isnan(log_x))
+    n = valid.sum(axis=0)
+    y = np.where(valid, log_y, 0.0)
+    x = np.where(valid, log_x, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mx = x.sum(axis=0) / n
+        my = y.sum(axis=0) / n
+        dx = np.where(valid, x - mx, 0.0)
+        dy = np.where(valid, y - my, 0.0)
+        beta = (dx * dy).sum(axis=0) / (dx * dx).sum(axis=0)
+    alpha = my - beta * mx
+    resid = np.where(valid, log_y - alpha - beta * log_x, np.nan)
+    return alpha, beta, resid
+
+
+# ------------------------------------------------------------
+# 3. Vectorized ADF
+# ------------------------------------------------------------
+def batch_adf(resid: np.ndarray, lags: int = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    잔차 행렬 각 열에 대한 ADF 회귀 (무상수, 고정 lag):
+        Δe_t = γ e_{t-1} + Σ_k φ_k Δe_{t-k} + ε_t
+
+    결측이 섞인 행은 해당 페어에서만 제외 (가중치 0).
+
+    Returns: tstat (P,), gamma (P,), nobs (P,)
+    """
+    e = np.asarray(resid, dtype=np.float64)
+    de = np.diff(e, axis=0)                     # (T-1 x P)
+    start = lags
+    y = de[start:]                              # Δe_t
+    regs = [e[start:-1]]                        # e_{t-1}
+    for k in range(1, lags + 1):
+        regs.append(de[start - k:-k])
+    X = np.stack(regs, axis=-1)                 # (T' x P x K)
+
+    w = ~(np.isnan(y) | np.isnan(X).any(axis=-1))
+    y = np.where(w, y, 0.0)
+    X = np.where(w[..., None], X, 0.0)
+    K = X.shape[-1]
+
+    XtX = np.einsum("tpk,tpl->pkl", X, X)
+    Xty = np.einsum("tpk,tp->pk", X, y)
+    nobs = w.sum(axis=0)
+
+    P = e.shape[1]
+    tstat = np.full(P, np.nan)
+    gamma = np.full(P, np.nan)
+    ok = (nobs > K + 1) & (np.linalg.matrix_rank(XtX) == K)
+    if not ok.any():
+        return tstat, gamma, nobs
+
+    inv = np.linalg.inv(XtX[ok])
+    coef = np.einsum("pkl,pl->pk", inv, Xty[ok])
+    fitted = np.einsum("tpk,pk->tp", X[:, ok], coef)
+    ssr = ((y[:, ok] - fitted) ** 2).sum(axis=0)
+    sigma2 = ssr / (nobs[ok] - K)
+    se = np.sqrt(sigma2 * inv[:, 0, 0])
+
+    gamma[ok] = coef[:, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tstat[ok] = coef[:, 0] / se
+    return tstat, gamma, nobs
+
+
+def half_life_from_gamma(gamma: np.ndarray) -> np.ndarray:
+    """AR(1) 평균회귀 계수 → half-life (거래일). γ ≥ 0 이면 inf."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hl = -np.log(2.0) / np.log1p(gamma)
+    return np.where(gamma < 0, hl, np.inf)
+
+
+# ------------------------------------------------------------
+# 4. Exact tests (process pool)
+# ------------------------------------------------------------
+def _exact_coint(task):
+    """프로세스 풀 워커: 공통 구간 로그 가격으로 Engle-Granger coint"""
+    y, x = task
+    mask = ~(np.isnan(y) | np.isnan(x))
+    try:
+        stat, pvalue, _ = coint(y[mask], x[mask])
+        return float(stat), float(pvalue)
+    except Exception:
+        return np.nan, np.nan
+
+
+def run_exact_tests(tasks, n_workers: Optional[int] = None) -> List[Tuple[float, float]]:
+    if len(tasks) == 0:
+        return []
+    if n_workers == 1:
+        return [_exact_coint(t) for t in tasks]
+    n_workers = n_workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (4 * n_workers))
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        return list(executor.map(_exact_coint, tasks, chunksize=chunksize))
+
+
+# ------------------------------------------------------------
+# Pipeline
+# ------------------------------------------------------------
+def screen_pairs(
+    prices: pd.DataFrame,
+    cfg: Optional[ScreeningConfig] = None,
+    sector_map: Optional[pd.Series] = None,
+    verbose: bool = True,
+) -> pd.DataFrame:
+    """
+    가격 DataFrame(index=date, columns=symbol) → 순위가 매겨진 페어 테이블.
+
+    Returns: DataFrame[pair1, pair2, corr, group, alpha, hedge, adf_stat,
+                       adf_pvalue, coint_stat, pvalue, half_life, nobs]
+             pvalue 오름차순, 동률이면 half_life 오름차순
+    """
+    cfg = cfg or ScreeningConfig()
+    prices = prices.sort_index()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_px = np.log(prices.where(prices > 0))
+
+    n_sym = log_px.shape[1]
+    cand = candidate_pairs(log_px, cfg, sector_map)
+    if verbose:
+        print(f"  [screen] {n_sym} symbols → {n_sym * (n_sym - 1) // 2} pairs "
+              f"→ {len(cand)} after corr/sector prefilter")
+
+    cols = list(log_px.columns)
+    pos = {s: k for k, s in enumerate(cols)}
+    arr = log_px.to_numpy(dtype=np.float64)
+
+    frames = []
+    for lo in range(0, len(cand), cfg.chunk_size):
+        chunk = cand.iloc[lo:lo + cfg.chunk_size].copy()
+        iy = chunk["pair1"].map(pos).to_numpy()
+        ix = chunk["pair2"].map(pos).to_numpy()
+        alpha, beta, resid = batch_hedge_ratios(arr[:, iy], arr[:, ix])
+        tstat, gamma, nobs = batch_adf(resid, cfg.adf_lags)
+
+        chunk["alpha"] = alpha
+        chunk["hedge"] = beta
+        chunk["adf_stat"] = tstat
+        chunk["half_life"] = half_life_from_gamma(gamma)
+        chunk["nobs"] = nobs
+        frames.append(chunk)
+
+    if not frames:
+        return pd.DataFrame(columns=[
+            "pair1", "pair2", "corr", "group", "alpha", "hedge", "adf_stat",
+            "adf_pvalue", "coint_stat", "pvalue", "half_life", "nobs",
+        ])
+
+    table = pd.concat(frames, ignore_index=True)
+    table["adf_pvalue"] = [
+        mackinnonp(t, regression="c", N=2) if np.isfinite(t) else 1.0
+        for t in table["adf_stat"].to_numpy()
+    ]
+
+    shortlist = table[
+        (table["adf_pvalue"] < cfg.prefilter_pvalue)
+        & (table["half_life"] >= cfg.min_half_life)
+        & (table["half_life"] <= cfg.max_half_life)
+    ].copy()
+    if verbose:
+        print(f"  [screen] {len(shortlist)} pairs pass vectorized ADF "
+              f"(approx p < {cfg.prefilter_pvalue})")
+
+    tasks = [
+        (arr[:, pos[a]], arr[:, pos[b]])
+        for a, b in zip(shortlist["pair1"], shortlist["pair2"])
+    ]
+    exact = run_exact_tests(tasks, cfg.n_workers)
+    shortlist["coint_stat"] = [s for s, _ in exact]
+    shortlist["pvalue"] = [p for _, p in exact]
+
+    ranked = shortlist[shortlist["pvalue"] < cfg.pvalue_threshold]
+    ranked = ranked.sort_values(["pvalue", "half_life"]).reset_index(drop=True)
+    if cfg.max_pairs is not None:
+        ranked = ranked.head(cfg.max_pairs)
+    if verbose:
+        print(f"  [screen] {len(ranked)} pairs selected (coint p < {cfg.pvalue_threshold})")
+
+    return ranked[[
+        "pair1", "pair2", "corr", "group", "alpha", "hedge", "adf_stat",
+        "adf_pvalue", "coint_stat", "pvalue", "half_life", "nobs",
+    ]]
@@ -0,0 +1,316 @@
+# engines/pairs_vectorized.py
+"""
+벡터화 Pairs Trading 엔진
+
+engine_multi_pairs_trading_v1.py::trade_single_pair / engine_pairs_trading_v1~v3 는
+페어마다 일별 Python 루프로 진입/청산을 처리한다. 이 모듈은 모든 페어의 스프레드를
+(T x P) 행렬로 쌓고,
+- 헷지 비율 / rolling z-score 를 배열 커널로 한 번에 계산하고
+- 진입/청산/손절 히스테리시스 상태 머신을 Numba 로 컴파일된 단일 패스로 돌린 뒤
+- 페어별 비용·수익률과 합산 북(book) 수익률을 반환한다.
+
+헷지 비율은 engines/hedge_ratio.py (rolling OLS / 배치 칼만) 에서 계산한다.
+
+상태 머신 규칙 (engine_pairs_vectorized_v1.py 가 쓰는 규칙. 기존 엔진 중 정확히 같은 것은 없음):
+- 진입: z > entry_z → 숏 스프레드, z < -entry_z → 롱 스프레드
+- 청산: |z| < exit_z
+- 손절: |z| > stop_z, 또는 보유 기간 > max_hold (거래일)
+- 손절 후에는 |z| < entry_z 로 돌아올 때까지 재진입 금지
+- z 가 NaN 인 날은 포지션 유지
+
+진입 / 청산 / 손절 조건은 engine_pairs_trading_v2_fixed.py 를 따르되, v2_fixed 는
+- 보유 기간을 달력일로 세고 (여기는 거래일)
+- 손절 다음 날에도 |z| > entry_z 면 바로 재진입한다 (여기는 |z| < entry_z 까지 금지)
+engine_multi_pairs_trading_v1.py::trade_single_pair 는 손절이 없고 z 가 반대편 exit_z 를
+넘어야 청산하므로 결과가 다르다.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numba import njit
+
+from engines.hedge_ratio import compute_hedge
+
+
+@dataclass
+class PairsConfig:
+    zscore_lookback: int = 60       # z-score 롤링 윈도우
+    entry_z: float = 2.0            # 진입 임계값
+    exit_z: float = 0.5             # 청산 임계값 (|z| < exit_z)
+    stop_z: float = 3.5             # 손절 임계값 (|z| > stop_z), np.inf 면 비활성
+    max_hold: int = 60              # 시간 손절 (거래일), 0 이면 비활성
+    cost_bps: float = 5.0           # 편도 거래비용 (bp, 다리당)
+    hedge_method: str = "rolling"   # "full" (전체 OLS, 미래 정보 포함) / "rolling" / "kalman"
+    hedge_lookback: int = 120       # rolling OLS 윈도우
+    kalman_delta: float = 1e-4      # 칼만 상태 잡음 비율
+    kalman_obs_var: float = 1e-3    # 칼만 관측 잡음 분산
+
+
+@dataclass
+class PairsBookResult:
+    pairs: List[Tuple[str, str]]
+    hedge: pd.DataFrame             # (T x P) 헷지 비율
+    spread: pd.DataFrame            # (T x P) 로그 스프레드
+    zscore: pd.DataFrame            # (T x P)
+    position: pd.DataFrame          # (T x P) +1 / -1 / 0
+    cost: pd.DataFrame              # (T x P) 거래비용
+    pair_returns: pd.DataFrame      # (T x P) 비용 차감 후 페어 수익률
+    book_returns: pd.Series         # 동일가중 합산 수익률
+
+    @property
+    def labels(self) -> List[str]:
+        return pair_labels(self.pairs)
+
+
+def pair_labels(pairs: Sequence[Tuple[str, str]]) -> List[str]:
+    return [f"{p1}-{p2}" for p1, p2 in pairs]
+
+
+# ------------------------------------------------------------
+# Array kernels
+# ------------------------------------------------------------
+def stack_pair_legs(
+    prices: pd.DataFrame,
+    pairs: Sequence[Tuple[str, str]],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    가격 DataFrame(index=date, columns=symbol)에서 페어 다리별 로그 가격 행렬 생성.
+
+    Returns:
+        log_y: (T x P) 첫 번째 다리 로그 가격
+        log_x: (T x P) 두 번째 다리 로그 가격
+    """
+    cols = prices.columns.get_indexer([p[0] for p in pairs])
+    cols2 = prices.columns.get_indexer([p[1] for p in pairs])
+    if (cols < 0).any() or (cols2 < 0).any():
+        missing = [s for p in pairs for s in p if s not in prices.columns]
+        raise ValueError(f"가격 데이터에 없는 심볼: {sorted(set(missing))}")
+
+    px = prices.to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_px = np.log(np.where(px > 0, px, np.nan))
+    return log_px[:, cols], log_px[:, cols2]
+
+
+def full_sample_hedge(log_y: np.ndarray, log_x: np.ndarray) -> np.ndarray:
+    """
+    페어별 전체 기간 OLS 헷지 비율 (절편 포함), 모든 페어를 한 번에 계산.
+    trade_single_pair 의 LinearRegression(log2 → log1) 과 동일한 값.
+    """
+    valid = ~(np.isnan(log_y) | np.isnan(log_x))
+    n = valid.sum(axis=0)
+    y = np.where(valid, log_y, 0.0)
+    x = np.where(valid, log_x, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mx = x.sum(axis=0) / n
+        my = y.sum(axis=0) / n
+        dx = np.where(valid, x - mx, 0.0)
+        dy = np.where(valid, y - my, 0.0)
+        beta = (dx * dy).sum(axis=0) / (dx * dx).sum(axis=0)
+    return beta
+
+
+def rolling_mean_std(x: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (T x P) 행렬의 열별 rolling mean / std (ddof=1), 누적합 커널로 O(T·P).
+
+    pandas .rolling(window).mean()/.std() 와 같게, 윈도우 안에 NaN 이 하나라도
+    있으면 결과는 NaN.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if x.ndim == 1:
+        x = x[:, None]
+    T = x.shape[0]
+    mean = np.full(x.shape, np.nan)
+    std = np.full(x.shape, np.nan)
+    if T < window:
+        return mean, std
+
+    valid = ~np.isnan(x)
+    # 열 평균으로 중심화 → 제곱 누적합의 상쇄 오차 완화
+    with np.errstate(invalid="ignore"):
+        center = np.nanmean(np.where(valid, x, np.nan), axis=0)
+    center = np.nan_to_num(center)
+    xc = np.where(valid, x - center, 0.0)
+
+    def _window_sum(a):
+        c = np.cumsum(a, axis=0)
+        out = c[window - 1:].copy()
+        out[1:] -= c[:-window]
+        return out
+
+    cnt = _window_sum(valid.astype(np.int64))
+    s1 = _window_sum(xc)
+    s2 = _window_sum(xc * xc)
+
+    full = cnt == window
+    m = s1 / window
+    var = (s2 - window * m * m) / (window - 1)
+    var = np.maximum(var, 0.0)
+
+    mean[window - 1:] = np.where(full, m + center, np.nan)
+    std[window - 1:] = np.where(full, np.sqrt(var), np.nan)
+    return mean, std
+
+
+def rolling_zscore(spread: np.ndarray, window: int) -> np.ndarray:
+    """(T x P) 스프레드의 rolling z-score."""
+    mean, std = rolling_mean_std(spread, window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (spread - mean) / std
+    z[~np.isfinite(z)] = np.nan
+    return z
+
+
+# ------------------------------------------------------------
+# Compiled state machine
+# ------------------------------------------------------------
+@njit(cache=True)
+def _pairs_state_machine(z, entry_z, exit_z, stop_z, max_hold):
+    """
+    모든 페어의 진입/청산/손절 히스테리시스를 한 번에 처리.
+
+    z: (T x P) z-score, NaN 허용
+    Returns: (T x P) 포지션 (+1 롱 스프레드 / -1 숏 스프레드 / 0)
+    """
+    T, P = z.shape
+    position = np.zeros((T, P), dtype=np.float64)
+
+    for p in range(P):
+        pos = 0.0
+        held = 0
+        locked = False  # 손절 후 재진입 금지 상태
+
+        for t in range(T):
+            zt = z[t, p]
+            if np.isnan(zt):
+                if pos != 0.0:
+                    held += 1
+                position[t, p] = pos
+                continue
+
+            az = abs(zt)
+            if locked and az < entry_z:
+                locked = False
+
+            if pos == 0.0:
+                if not locked:
+                    if zt > entry_z:
+                        pos = -1.0
+                        held = 0
+                    elif zt < -entry_z:
+                        pos = 1.0
+                        held = 0
+            else:
+                held += 1
+                if az < exit_z:
+                    pos = 0.0
+                elif az > stop_z or (max_hold > 0 and held > max_hold):
+                    pos = 0.0
+                    locked = True
+
+            position[t, p] = pos
+
+    return position
+
+
+# ------------------------------------------------------------
+# Book
+# ------------------------------------------------------------
+def run_pairs_book(
+    prices: pd.DataFrame,
+    pairs: Sequence[Tuple[str, str]],
+    cfg: Optional[PairsConfig] = None,
+    cost_bps: Optional[Sequence[float]] = None,
+    hedge: Optional[np.ndarray] = None,
+) -> PairsBookResult:
+    """
+    모든 페어를 (T x P) 행렬로 한 번에 백테스트.
+
+    Args:
+        prices: index=date, columns=symbol 종가
+        pairs: [(pair1, pair2), ...]  spread = log(pair1) - hedge * log(pair2)
+        cfg: PairsConfig
+        cost_bps: 페어별 편도 거래비용 (bp). None 이면 cfg.cost_bps 일괄 적용
+        hedge: 헷지 비율. None 이면 cfg.hedge_method 로 계산, (P,) 고정값 또는
+               (T x P) 시변값. 시변 헷지는 t 시점까지의 정보만 사용해야 한다
+               (수익률은 t-1 헷지로 계산).
+    """
+    cfg = cfg or PairsConfig()
+    pairs = [tuple(p) for p in pairs]
+    prices = prices.sort_index()
+    index = prices.index
+    labels = pair_labels(pairs)
+    P = len(pairs)
+
+    log_y, log_x = stack_pair_legs(prices, pairs)
+
+    if hedge is None:
+        if cfg.hedge_method == "full":
+            hedge = full_sample_hedge(log_y, log_x)
+        else:
+            hedge = compute_hedge(log_y, log_x, cfg)
+    hedge = np.asarray(hedge, dtype=np.float64)
+    if hedge.ndim == 1:
+        hedge = np.broadcast_to(hedge, log_y.shape)
+    if hedge.shape != log_y.shape:
+        raise ValueError(f"hedge shape {hedge.shape} != {log_y.shape}")
+
+    spread = log_y - hedge * log_x
+    z = rolling_zscore(spread, cfg.zscore_lookback)
+
+    position = _pairs_state_machine(
+        np.ascontiguousarray(z),
+        float(cfg.entry_z),
+        float(cfg.exit_z),
+        float(cfg.stop_z),
+        int(cfg.max_hold),
+    )
+
+    # 다리별 단순 수익률
+    px = prices.to_numpy(dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = px[1:] / px[:-1] - 1.0
+    ret = np.vstack([np.full((1, px.shape[1]), np.nan), ret])
+    col_y = prices.columns.get_indexer([p[0] for p in pairs])
+    col_x = prices.columns.get_indexer([p[1] for p in pairs])
+    ret_y = ret[:, col_y]
+    ret_x = ret[:, col_x]
+
+    # t-1 포지션 / t-1 헷지로 t 수익률
+    pos_prev = np.vstack([np.zeros((1, P)), position[:-1]])
+    hedge_prev = np.vstack([np.full((1, P), np.nan), hedge[:-1]])
+    gross = pos_prev * (ret_y - hedge_prev * ret_x)
+    gross = np.where(pos_prev == 0.0, 0.0, gross)
+    gross = np.nan_to_num(gross, nan=0.0, posinf=0.0, neginf=0.0)
+
+    # 거래비용: 포지션 변화량 × 편도 비용 × 2 (양 다리)
+    if cost_bps is None:
+        cost_arr = np.full(P, cfg.cost_bps, dtype=np.float64)
+    else:
+        cost_arr = np.asarray(cost_bps, dtype=np.float64)
+        if cost_arr.shape != (P,):
+            raise ValueError(f"cost_bps 길이 {cost_arr.shape} != 페어 수 {P}")
+    turnover = np.abs(np.diff(position, axis=0, prepend=0.0))
+    cost = turnover * (cost_arr / 10000.0) * 2.0
+
+    pair_ret = gross - cost
+    book = pair_ret.mean(axis=1) if P > 0 else np.zeros(len(index))
+
+    def _frame(a):
+        return pd.DataFrame(a, index=index, columns=labels)
+
+    return PairsBookResult(
+        pairs=list(pairs),
+        hedge=_frame(np.array(hedge)),
+        spread=_frame(spread),
+        zscore=_frame(z),
+        position=_frame(position),
+        cost=_frame(cost),
+        pair_returns=_frame(pair_ret),
+        book_returns=pd.Series(book, index=index, name="ret_pairs_book"),
+    )
@@ -0,0 +1,671 @@
+# engines/param_search.py
+"""
+병렬 / 샤딩 파라미터 탐색 하니스 (공유 메모리 데이터 + successive halving + 재개 가능한 결과 테이블)
+
+optimize_c1_v6.py / optimize_factor_v2.py 는 조합마다 subprocess 로 엔진 스크립트를 직렬 실행해
+매번 가격을 다시 읽고 신호를 다시 계산한 뒤 results/*_opt_*.json (~110 KB) 을 하나씩 썼다.
+중간에 멈추면 처음부터 다시 돌려야 했다.
+
+이 모듈은
+
+    SharedData     이름 → ndarray / DataFrame / Series 를 multiprocessing.shared_memory 블록에
+                   한 번 복사. 워커는 initializer 에서 attach 만 함 (복사 없음, 읽기 전용)
+    cached         워커 프로세스 안의 LRU memo. sweep 파라미터 일부에만 의존하는 중간 신호
+                   (예: span 별 신호, lookback 별 momentum) 를 키 = 의존 파라미터로 재사용
+    ParamSearch    config 를 shard_key (중간 신호가 의존하는 파라미터) 로 묶어 한 작업으로 보냄
+                   → 같은 신호를 쓰는 config 는 한 워커에서 연속 평가 (cache hit)
+                   rungs = 데이터 앞부분 비율 (예: 0.25, 0.5, 1.0). rung 마다 남은 후보를 평가하고
+                   score 상위 1/eta 만 다음 rung 으로 (successive halving), 마지막 rung = 전체 기간
+    TrialTable     모든 평가 결과를 results/optimize/trials.sqlite 의 trials 테이블 한 곳에
+                   작업이 끝나는 대로 기록. 키 = (study, data_key, params_hash, end_row)
+                   → 다시 실행하면 이미 있는 행은 건너뜀 (중단 후 재개), data_key 가 바뀌면 새로 평가
+    HyperbandSearch
+                   후보 공간이 커서 전수 평가가 어려울 때: 시작 비율이 다른 successive halving
+                   bracket (ParamSearch) 을 짧은 구간까지만 번갈아 실행해 n_screen 개를 선별하고,
+                   그중 상위 max_full 개만 전체 기간으로 평가.
+                   첫 bracket 은 무작위, 이후는 SurrogateProposer 가 후보를 고름
+    SurrogateProposer
+                   지금까지의 모든 rung 관측 (파라미터 순서형 인코딩 + log 데이터 비율 → score) 으로
+                   RandomForest / GP 를 학습, 전체 기간 (비율 1) 의 mean + kappa · std 상위 후보 제안.
+                   scikit-learn 은 이때만 import (없으면 무작위)
+
+- 평가 함수: evaluate(data, params, end) -> {"sharpe": ..., ...}
+  data = SharedData 의 이름 → 객체, end = 사용할 앞쪽 행 수.
+  신호가 인과적 (rolling / shift) 이면 앞 end 행 결과 = 전체 실행의 앞 end 행이므로
+  중간 신호는 전체 기간으로 한 번 계산해 cached 에 두고 [:end] 로 잘라 씀
+- evaluate / shard_key 는 모듈 최상위 함수여야 함 (ProcessPoolExecutor 로 pickle)
+- jobs=1 이면 풀 없이 현재 프로세스에서 같은 경로로 실행
+
+Usage:
+
+    from engines.param_search import ParamSearch, SharedData, cached, param_grid, performance_stats
+
+    def evaluate(data, params, end):
+        sig = cached(("signal", params["span"]), lambda: make_signal(data["returns"], params["span"]))
+        daily = backtest(data["returns"].to_numpy()[:end], sig[:end], **params)
+        return performance_stats(daily)
+
+    with SharedData(returns=returns) as data:
+        search = ParamSearch("c1_v6", evaluate, shard_key=lambda p: (p["span"],),
+                             jobs=4, rungs=(0.25, 0.5, 1.0), eta=3)
+        table = search.run(param_grid({"span": [3, 5], "n_long": [15, 20]}), data, n_rows=len(returns))
+"""
+
+from __future__ import annotations
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import sqlite3
+import time
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from engines.result_store import params_hash
+
+DEFAULT_DB_PATH = "results/optimize/trials.sqlite"
+CACHE_SIZE = 32         # 워커당 memo 항목 수 (신호 패널 하나 ~ T x N float64)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trials (
+    study        TEXT NOT NULL,
+    data_key     TEXT NOT NULL,
+    params_hash  TEXT NOT NULL,
+    end_row      INTEGER NOT NULL,
+    n_rows       INTEGER NOT NULL,
+    params       TEXT,
+    score        REAL,
+    metrics      TEXT,
+    seconds      REAL,
+    created_at   TEXT,
+    PRIMARY KEY (study, data_key, params_hash, end_row)
+);
+"""
+
+
+def param_grid(grid: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """{이름: 값 목록} → config 목록 (중첩 for 문과 같은 순서, 마지막 키가 가장 빠르게 변함)"""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def performance_stats(daily: np.ndarray) -> Dict[str, float]:
+    """엔진 스크립트와 같은 공식 (mean · 252, std(ddof=1) · √252, cumprod 기준 MDD)"""
+    daily = np.asarray(daily, dtype=np.float64)
+    annual_return = daily.mean() * 252
+    annual_volatility = daily.std(ddof=1) * np.sqrt(252) if len(daily) > 1 else np.nan
+    sharpe = annual_return / annual_volatility if annual_volatility > 0 else 0.0
+    cumulative = np.cumprod(1 + daily)
+    running_max = np.maximum.accumulate(cumulative)
+    max_drawdown = ((cumulative - running_max) / running_max).min()
+    return {
+        "sharpe": float(sharpe),
+        "annual_return": float(annual_return),
+        "annual_volatility": float(annual_volatility),
+        "max_drawdown": float(max_drawdown),
+    }
+
+
+def load_reference_returns(existing_engines: Dict[str, str]) -> Dict[str, np.ndarray]:
+    """
+    기존 엔진 결과 JSON → {"ref:이름": daily_returns}. 엔진 스크립트의
+    calculate_correlation_with_existing 와 같은 형식 처리 ([{date, ret}] / float 리스트), 없으면 제외
+    """
+    refs = {}
+    for name, path in existing_engines.items():
+        if not Path(path).exists():
+            continue
+        with open(path, "r") as f:
+            returns = json.load(f).get("daily_returns")
+        if not isinstance(returns, list):
+            continue
+        if len(returns) > 0 and isinstance(returns[0], dict):
+            returns = [d["ret"] for d in returns]
+        refs[f"ref:{name}"] = np.asarray(returns, dtype=np.float64)
+    return refs
+
+
+def reference_correlations(daily: np.ndarray, data: Dict[str, Any], names: Sequence[str]) -> Dict[str, float]:
+    """앞부분 정렬 (min_len) 상관 (calculate_correlation_with_existing 와 동일), 기준 없으면 NaN"""
+    out = {}
+    for name in names:
+        ref = data.get(f"ref:{name}")
+        if ref is None:
+            out[name] = np.nan
+            continue
+        min_len = min(len(daily), len(ref))
+        out[name] = float(pd.Series(daily[:min_len]).corr(pd.Series(ref[:min_len])))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# shared memory
+# ---------------------------------------------------------------------------
+
+class SharedData:
+    """
+    이름 → ndarray / DataFrame / Series 를 공유 메모리에 올림 (DataFrame 은 단일 dtype).
+    index / columns 는 spec 에 담겨 워커로 pickle 됨 (작음). with 블록이 끝나면 unlink.
+    """
+
+    def __init__(self, **items: Any):
+        self.spec: Dict[str, tuple] = {}
+        self.data: Dict[str, Any] = {}
+        self._blocks: List[shared_memory.SharedMemory] = []
+        digest = hashlib.sha1()
+        try:
+            for name, obj in items.items():
+                kind, values, labels = _split(obj)
+                values = np.ascontiguousarray(values)
+                shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                self._blocks.append(shm)
+                view = np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)
+                view[...] = values
+                del view                                # 블록을 참조하는 배열이 남으면 close 불가
+                self.spec[name] = (kind, shm.name, values.shape, values.dtype.str, labels)
+                self.data[name] = obj
+                digest.update(name.encode())
+                digest.update(str((values.shape, values.dtype.str)).encode())
+                digest.update(values.tobytes())
+                if labels is not None:
+                    digest.update(pd.util.hash_pandas_object(pd.Series(labels[0]), index=False).values.tobytes())
+                    if labels[1] is not None:
+                        digest.update(repr(list(labels[1])).encode())
+        except Exception:
+            self.close()
+            raise
+        self.fingerprint = digest.hexdigest()[:16]
+
+    def close(self):
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> "SharedData":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _split(obj: Any):
+    if isinstance(obj, pd.DataFrame):
+        return "frame", obj.to_numpy(), (obj.index, obj.columns)
+    if isinstance(obj, pd.Series):
+        return "series", obj.to_numpy(), (obj.index, None)
+    return "array", np.asarray(obj), None
+
+
+def _build(kind: str, values: np.ndarray, labels):
+    if kind == "frame":
+        return pd.DataFrame(values, index=labels[0], columns=labels[1], copy=False)
+    if kind == "series":
+        return pd.Series(values, index=labels[0], copy=False)
+    return values
+
+
+def _attach(spec: Dict[str, tuple]) -> Tuple[Dict[str, Any], List[shared_memory.SharedMemory]]:
+    data, blocks = {}, []
+    for name, (kind, shm_name, shape, dtype, labels) in spec.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        blocks.append(shm)
+        values = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        values.flags.writeable = False
+        data[name] = _build(kind, values, labels)
+    return data, blocks
+
+
+# ---------------------------------------------------------------------------
+# worker state
+# ---------------------------------------------------------------------------
+
+_DATA: Dict[str, Any] = {}
+_BLOCKS: List[shared_memory.SharedMemory] = []
+_CACHE: "OrderedDict[Any, Any]" = OrderedDict()
+
+
+def _init_worker(spec: Dict[str, tuple]):
+    global _DATA, _BLOCKS
+    _DATA, _BLOCKS = _attach(spec)
+    _CACHE.clear()
+
+
+def _use_local(data: Dict[str, Any]):
+    """jobs=1: 공유 메모리 대신 현재 프로세스의 원본 객체"""
+    global _DATA
+    _DATA = data
+    _CACHE.clear()
+
+
+def cached(key: Any, compute: Callable[[], Any]) -> Any:
+    """워커 프로세스 안의 LRU memo (key 는 hash 가능, 중간 신호가 의존하는 파라미터만 넣을 것)"""
+    if key in _CACHE:
+        _CACHE.move_to_end(key)
+        return _CACHE[key]
+    value = compute()
+    _CACHE[key] = value
+    if len(_CACHE) > CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return value
+
+
+def _run_shard(evaluate: Callable, shard: List[Dict[str, Any]], end: int):
+    """worker: shard 안 config 를 순서대로 평가 → [(metrics, seconds), ...]"""
+    out = []
+    for params in shard:
+        t0 = time.perf_counter()
+        metrics = evaluate(_DATA, params, end)
+        out.append((metrics, time.perf_counter() - t0))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# result table
+# ---------------------------------------------------------------------------
+
+class TrialTable:
+    """trials(study, data_key, params_hash, end_row) → params / score / metrics (SQLite 한 파일)"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(_SCHEMA)
+
+    def done(self, study: str, data_key: str, end_row: int) -> Dict[str, Tuple[Optional[float], Dict]]:
+        """params_hash → (score, metrics)"""
+        rows = self.conn.execute(
+            "SELECT params_hash, score, metrics FROM trials WHERE study=? AND data_key=? AND end_row=?",
+            (study, data_key, end_row)).fetchall()
+        return {h: (score, json.loads(metrics)) for h, score, metrics in rows}
+
+    def insert(self, study: str, data_key: str, end_row: int, n_rows: int,
+               records: Sequence[Tuple[str, Dict, Optional[float], Dict, float]]):
+        """records: (params_hash, params, score, metrics, seconds). 한 작업분을 한 트랜잭션으로"""
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO trials VALUES (?,?,?,?,?,?,?,?,?,?)",
+                [(study, data_key, h, end_row, n_rows, json.dumps(p, sort_keys=True, default=str),
+                  score, json.dumps(m, default=float), sec, now)
+                 for h, p, score, m, sec in records])
+
+    def frame(self, study: str, data_key: Optional[str] = None) -> pd.DataFrame:
+        """study 의 모든 rung 결과 (params / metrics 를 컬럼으로 펼침)"""
+        query = "SELECT params_hash, end_row, n_rows, params, score, metrics, seconds, created_at " \
+                "FROM trials WHERE study=?"
+        args: Tuple = (study,)
+        if data_key is not None:
+            query += " AND data_key=?"
+            args += (data_key,)
+        rows = self.conn.execute(query, args).fetchall()
+        records = []
+        for h, end_row, n_rows, params, score, metrics, sec, created in rows:
+            records.append({**json.loads(params), **json.loads(metrics), "score": score,
+                            "end_row": end_row, "n_rows": n_rows, "seconds": sec,
+                            "params_hash": h, "created_at": created})
+        return pd.DataFrame(records)
+
+    def close(self):
+        self.conn.close()
+
+
+# ---------------------------------------------------------------------------
+# search
+# ---------------------------------------------------------------------------
+
+def _score(value: Any) -> float:
+    if value is None:
+        return -np.inf
+    value = float(value)
+    return value if np.isfinite(value) else -np.inf
+
+
+class ParamSearch:
+    """
+    name:       study 이름 (결과 테이블 키)
+    evaluate:   evaluate(data, params, end) -> metrics dict (score 키 포함)
+    shard_key:  params -> hash 가능한 값. 같은 값의 config 는 한 작업으로 묶임 (None 이면 config 하나씩)
+    jobs:       워커 프로세스 수 (None = min(os.cpu_count(), 4), 1 = 현재 프로세스)
+    rungs:      rung 별 사용할 앞부분 비율 (오름차순, 마지막 until 이 아니면 until 추가). (1.0,) = 전수 평가
+    until:      마지막 rung 비율 (기본 1.0 = 전체 기간, 1 보다 작으면 그 구간까지만 선별)
+    eta:        rung 마다 상위 ceil(n / eta) 만 남김
+    min_keep:   rung 마다 최소 생존 수
+    score:      순위 기준 metrics 키 (높을수록 좋음, NaN / 없음은 최하위)
+    """
+
+    def __init__(self, name: str, evaluate: Callable[[Dict[str, Any], Dict[str, Any], int], Dict[str, Any]],
+                 shard_key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 jobs: Optional[int] = None, rungs: Sequence[float] = (1.0,), eta: float = 3.0,
+                 min_keep: int = 1, score: str = "sharpe", db_path: str = DEFAULT_DB_PATH,
+                 verbose: bool = True, until: float = 1.0):
+        if eta <= 1:
+            raise ValueError("eta must be > 1")
+        self.name = name
+        self.evaluate = evaluate
+        self.shard_key = shard_key
+        self.jobs = max(1, jobs if jobs is not None else min(os.cpu_count() or 1, 4))
+        if not 0 < until <= 1.0:
+            raise ValueError("until must be in (0, 1]")
+        self.rungs = sorted(set(float(f) for f in rungs if 0 < f <= until) | {float(until)})
+        self.eta = eta
+        self.min_keep = max(1, min_keep)
+        self.score = score
+        self.db_path = db_path
+        self.verbose = verbose
+        self.budget = 0.0           # 마지막 run 의 평가 비용 (재개분 포함, 전체 기간 1 회 = 1)
+
+    def _log(self, msg: str):
+        if self.verbose:
+            print(msg, flush=True)
+
+    def _shards(self, configs: List[Dict[str, Any]], todo: List[int]) -> List[List[int]]:
+        if self.shard_key is None:
+            return [[i] for i in todo]
+        groups: Dict[Any, List[int]] = {}
+        for i in todo:
+            groups.setdefault(self.shard_key(configs[i]), []).append(i)
+        return list(groups.values())
+
+    def _evaluate(self, pool: Optional[ProcessPoolExecutor], configs: List[Dict[str, Any]],
+                  todo: List[int], end: int) -> Iterator[List[Tuple[int, Dict, float]]]:
+        """shard 단위로 완료되는 대로 [(config 번호, metrics, seconds), ...]"""
+        shards = self._shards(configs, todo)
+        if pool is None:
+            for shard in shards:
+                out = _run_shard(self.evaluate, [configs[i] for i in shard], end)
+                yield [(i, m, sec) for i, (m, sec) in zip(shard, out)]
+            return
+        futures = {pool.submit(_run_shard, self.evaluate, [configs[i] for i in shard], end): shard
+                   for shard in shards}
+        for fut in as_completed(futures):
+            shard = futures[fut]
+            yield [(i, m, sec) for i, (m, sec) in zip(shard, fut.result())]
+
+    def run(self, configs: Sequence[Dict[str, Any]], data: SharedData, n_rows: int,
+            resume: bool = True) -> pd.DataFrame:
+        """
+        successive halving 실행. 반환: 마지막 rung (기본 전체 기간) 까지 살아남은 config 의
+        params + 그 rung 의 metrics (score 내림차순). 모든 rung 의 결과는 TrialTable(db_path).frame(name)
+        """
+        configs = [dict(c) for c in configs]
+        hashes = [params_hash(c) for c in configs]
+        ends = sorted({max(1, min(n_rows, int(round(n_rows * f)))) for f in self.rungs})
+        table = TrialTable(self.db_path)
+        pool = None
+        if self.jobs > 1:
+            pool = ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker,
+                                       initargs=(data.spec,))
+        else:
+            _use_local(data.data)
+        t_start = time.time()
+        self.budget = 0.0
+        try:
+            alive = list(range(len(configs)))
+            for k, end in enumerate(ends):
+                self.budget += len(alive) * end / n_rows
+                done = table.done(self.name, data.fingerprint, end) if resume else {}
+                todo = [i for i in alive if hashes[i] not in done]
+                self._log(f"[{self.name}] rung {k + 1}/{len(ends)}: {len(alive)} configs, rows [0, {end}) / {n_rows}, "
+                          f"{len(alive) - len(todo)} resumed, {len(todo)} to run (jobs={self.jobs})")
+                n_done = 0
+                for batch in self._evaluate(pool, configs, todo, end):
+                    records = [(hashes[i], configs[i], _score(m.get(self.score)), m, sec) for i, m, sec in batch]
+                    table.insert(self.name, data.fingerprint, end, n_rows,
+                                 [(h, p, s if np.isfinite(s) else None, m, sec) for h, p, s, m, sec in records])
+                    for i, m, sec in batch:
+                        done[hashes[i]] = (m.get(self.score), m)
+                    n_done += len(batch)
+                    best = max(batch, key=lambda b: _score(b[1].get(self.score)))
+                    self._log(f"  [{n_done}/{len(todo)}] shard {len(batch)} configs, "
+                              f"best {self.score}={_score(best[1].get(self.score)):.3f} {configs[best[0]]}")
+                if k < len(ends) - 1:
+                    keep = max(self.min_keep, math.ceil(len(alive) / self.eta))
+                    ranked = sorted(alive, key=lambda i: -_score(done[hashes[i]][0]))   # 안정 정렬 (grid 순서)
+                    alive = sorted(ranked[:keep])
+                    self._log(f"  → keep top {len(alive)} by {self.score}")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            table.close()
+        self._log(f"[{self.name}] done in {time.time() - t_start:.1f}s")
+
+        final = TrialTable(self.db_path)
+        try:
+            done = final.done(self.name, data.fingerprint, ends[-1])
+        finally:
+            final.close()
+        records = [{**configs[i], **done[hashes[i]][1], "params_hash": hashes[i]} for i in alive]
+        df = pd.DataFrame(records)
+        if len(df):
+            df = df.sort_values(self.score, ascending=False, kind="stable", na_position="last")
+        return df.reset_index(drop=True)
+
+
+# ---------------------------------------------------------------------------
+# hyperband + surrogate
+# ---------------------------------------------------------------------------
+
+def hyperband_brackets(min_fraction: float, eta: float = 3.0) -> List[Tuple[int, List[float]]]:
+    """
+    bracket s = s_max..0 의 (시작 config 수, rungs). s_max = floor(log_eta(1 / min_fraction)),
+    n_s = ceil((s_max + 1) / (s + 1) · eta^s), rungs = eta^-s, ..., eta^-1, 1
+    """
+    s_max = max(0, int(math.floor(math.log(1.0 / min_fraction) / math.log(eta) + 1e-9)))
+    out = []
+    for s in range(s_max, -1, -1):
+        n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+        out.append((n, [eta ** -(s - k) for k in range(s + 1)]))
+    return out
+
+
+class SurrogateProposer:
+    """
+    grid:   {이름: 값 목록} (인코딩 = 목록 안 순서 / (개수 - 1), None 등 비수치 값도 가능)
+    kind:   "rf" (RandomForestRegressor, 트리 간 std) / "gp" (Matern + WhiteKernel GP)
+    kappa:  UCB 탐색 계수
+    """
+
+    def __init__(self, grid: Dict[str, Sequence[Any]], kind: str = "rf", kappa: float = 1.0, seed: int = 42):
+        if kind not in ("rf", "gp"):
+            raise ValueError(f"unknown surrogate '{kind}'")
+        self.grid = {k: list(v) for k, v in grid.items() if len(v) > 1}
+        self.kind = kind
+        self.kappa = kappa
+        self.seed = seed
+
+    def encode(self, params: Dict[str, Any], fraction: float) -> List[float]:
+        x = []
+        for name, values in self.grid.items():
+            v = params.get(name)
+            if v in values:
+                pos = values.index(v)
+            else:       # 목록 밖 값 (예: CSV 에서 읽은 float 오차) 은 가장 가까운 수치
+                numeric = [abs(u - v) if isinstance(u, (int, float)) and v is not None else np.inf for u in values]
+                pos = int(np.argmin(numeric))
+            x.append(pos / (len(values) - 1))
+        x.append(math.log(max(fraction, 1e-6)))
+        return x
+
+    def _model(self):
+        if self.kind == "rf":
+            from sklearn.ensemble import RandomForestRegressor
+            return RandomForestRegressor(n_estimators=200, min_samples_leaf=2, random_state=self.seed)
+        from sklearn.gaussian_process import GaussianProcessRegressor
+        from sklearn.gaussian_process.kernels import ConstantKernel, Matern, WhiteKernel
+        kernel = ConstantKernel() * Matern(length_scale=np.ones(len(self.grid) + 1), nu=2.5) + WhiteKernel()
+        return GaussianProcessRegressor(kernel=kernel, normalize_y=True, random_state=self.seed)
+
+    def propose(self, candidates: Sequence[Dict[str, Any]], observed: Sequence[Tuple[Dict[str, Any], float, float]],
+                n: int) -> List[int]:
+        """observed: (params, 데이터 비율, score). 반환: candidates 번호 (UCB 내림차순)"""
+        X = np.array([self.encode(p, f) for p, f, _ in observed])
+        y = np.array([score for _, _, score in observed])
+        with warnings.catch_warnings():     # GP 하이퍼파라미터 경계 수렴 경고
+            warnings.simplefilter("ignore")
+            model = self._model().fit(X, y)
+        Xc = np.array([self.encode(p, 1.0) for p in candidates])
+        if self.kind == "rf":
+            per_tree = np.stack([tree.predict(Xc) for tree in model.estimators_])
+            mean, std = per_tree.mean(axis=0), per_tree.std(axis=0)
+        else:
+            mean, std = model.predict(Xc, return_std=True)
+        ucb = mean + self.kappa * std
+        return [int(i) for i in np.argsort(-ucb, kind="stable")[:n]]
+
+
+class HyperbandSearch:
+    """
+    선별 (짧은 구간) → 승격 (전체 기간) 두 단계.
+
+    1. 선별: successive halving bracket (ParamSearch, until = 마지막 짧은 rung) 을 s_max..1 순서로
+       반복해 n_screen 개 config 를 짧은 구간으로 평가. 첫 bracket 은 무작위, 이후는 SurrogateProposer
+    2. 승격: 선별된 모든 config 를 가장 긴 짧은 rung (1/eta) 의 score 로 한꺼번에 순위 매겨
+       상위 max_full 개만 전체 기간으로 평가
+
+    bracket 마다 바로 전체 기간까지 올리면 (표준 Hyperband) max_full 이 작을 때 후보를 몇십 개밖에
+    못 보고 끝나 무작위 50 개 전수 평가보다 못했음 → 전체 기간 평가는 마지막에 한 번만.
+    짧은 구간 순위와 전체 기간 순위의 상관은 시계열에 따라 0.4-0.9 라서 승격 수 (max_full) 를
+    너무 줄이면 최고 config 를 놓침 (grid_search_benchmark.py)
+
+    candidates: 후보 config 목록 (grid 전체 / 제약을 통과한 조합)
+    grid:       surrogate 인코딩용 {이름: 값 목록}
+    min_fraction, eta: hyperband_brackets 의 인자 (s = 0 bracket 은 쓰지 않음). 짧은 구간 Sharpe 는
+                잡음이 커서 기본은 1/3 한 단계. min_fraction > 1/eta 이면 선별 없이 max_full 개를 바로 전체 기간
+    n_screen:   짧은 구간으로 평가할 config 수 (후보보다 많으면 전부)
+    batch:      bracket 하나의 시작 config 수 (s_max bracket 기준, 작은 s 는 n_s 비율로 줄임)
+    min_rows:   가장 짧은 rung 의 최소 행 수 (warm-up 이 긴 전략에서 min_fraction 을 올림)
+    max_full:   전체 기간 평가 수
+    surrogate:  "rf" / "gp" / None. min_observed 개 관측이 쌓이기 전에는 무작위
+    나머지 인자는 ParamSearch 와 같음. 평가 결과는 같은 study 로 TrialTable 에 쌓이므로
+    bracket 간 / 재실행 시 같은 (config, rung) 은 다시 평가하지 않음.
+    비용 (전체 기간 1 회 = 1): 1/3 한 단계면 n_screen / 3 + max_full (기본 80 / 3 + 20 ≈ 47)
+    """
+
+    def __init__(self, name: str, evaluate: Callable, candidates: Sequence[Dict[str, Any]],
+                 grid: Dict[str, Sequence[Any]], shard_key: Optional[Callable] = None,
+                 jobs: Optional[int] = 1, eta: float = 3.0, min_fraction: float = 1 / 3, n_screen: int = 80,
+                 batch: int = 25, min_rows: int = 0, max_full: int = 20, surrogate: Optional[str] = "rf",
+                 kappa: float = 1.0, min_observed: int = 8, seed: int = 42, score: str = "sharpe",
+                 db_path: str = DEFAULT_DB_PATH, verbose: bool = True):
+        self.name = name
+        self.evaluate = evaluate
+        self.candidates = [dict(c) for c in candidates]
+        self.shard_key = shard_key
+        self.jobs = jobs
+        self.eta = eta
+        self.min_fraction = min_fraction
+        self.n_screen = max(0, n_screen)
+        self.batch = max(1, batch)
+        self.min_rows = min_rows
+        self.max_full = max(1, max_full)
+        self.proposer = SurrogateProposer(grid, surrogate, kappa, seed) if surrogate else None
+        self.min_observed = min_observed
+        self.seed = seed
+        self.score = score
+        self.db_path = db_path
+        self.verbose = verbose
+        self.n_screened = 0         # 짧은 구간으로 평가한 config 수
+        self.n_full = 0             # 전체 기간 평가 수
+        self.budget = 0.0           # 평가 비용 합 (재개분 포함, 전체 기간 1 회 = 1)
+
+    def _log(self, msg: str):
+        if self.verbose:
+            print(msg, flush=True)
+
+    def _observed(self, data_key: str, hashes: Dict[str, int],
+                  started: set) -> List[Tuple[Dict[str, Any], float, float]]:
+        """이번 실행에서 시작한 config 의 관측만 (재실행 시 같은 제안 순서 → 끝난 평가 재사용)"""
+        table = TrialTable(self.db_path)
+        try:
+            df = table.frame(self.name, data_key)
+        finally:
+            table.close()
+        out = []
+        for h, end_row, n_rows, score in zip(df.get("params_hash", []), df.get("end_row", []),
+                                             df.get("n_rows", []), df.get("score", [])):
+            if hashes.get(h) in started and score is not None and np.isfinite(score):
+                out.append((self.candidates[hashes[h]], end_row / n_rows, float(score)))
+        return out
+
+    def _propose(self, pool: List[int], n: int, data_key: str, hashes: Dict[str, int], started: set,
+                 rng: np.random.Generator) -> Tuple[List[int], str]:
+        if self.proposer is not None:
+            observed = self._observed(data_key, hashes, started)
+            if len(observed) >= self.min_observed:
+                try:
+                    picks = self.proposer.propose([self.candidates[i] for i in pool], observed, n)
+                    return [pool[i] for i in picks], self.proposer.kind
+                except ImportError:
+                    self._log("  scikit-learn 없음 → 무작위 제안")
+                    self.proposer = None
+        return sorted(rng.choice(pool, size=n, replace=False).tolist()), "random"
+
+    def _search(self, picks: List[int], rungs: Sequence[float], data: SharedData, n_rows: int,
+                resume: bool) -> pd.DataFrame:
+        search = ParamSearch(self.name, self.evaluate, shard_key=self.shard_key, jobs=self.jobs,
+                             rungs=rungs, eta=self.eta, score=self.score, db_path=self.db_path,
+                             verbose=self.verbose, until=rungs[-1])
+        df = search.run([self.candidates[i] for i in picks], data, n_rows, resume=resume)
+        self.budget += search.budget
+        return df
+
+    def run(self, data: SharedData, n_rows: int, resume: bool = True) -> pd.DataFrame:
+        """전체 기간까지 평가된 config 의 params + metrics (score 내림차순)"""
+        brackets = hyperband_brackets(min(1.0, max(self.min_fraction, self.min_rows / n_rows)), self.eta)
+        brackets = [(max(1, int(math.ceil(self.batch * n / brackets[0][0]))), rungs[:-1])
+                    for n, rungs in brackets[:-1]]                  # 전체 기간 rung 은 승격 단계에서
+        rng = np.random.default_rng(self.seed)
+        hashes = {params_hash(c): i for i, c in enumerate(self.candidates)}
+        started: set = set()
+        screened: Dict[int, float] = {}     # config 번호 → 가장 긴 짧은 rung 의 score
+        self.budget = 0.0
+        b = 0
+        n_screen = min(self.n_screen, len(self.candidates)) if brackets else 0
+        while len(started) < n_screen:
+            n, rungs = brackets[b % len(brackets)]
+            pool = [i for i in range(len(self.candidates)) if i not in started]
+            n = min(n, n_screen - len(started), len(pool))
+            picks, how = self._propose(pool, n, data.fingerprint, hashes, started, rng)
+            self._log(f"[{self.name}] screen bracket {b + 1} (s={len(rungs)}): {n} configs ({how}), "
+                      f"rungs {[round(f, 3) for f in rungs]}")
+            df = self._search(picks, rungs, data, n_rows, resume)
+            started.update(picks)
+            for h, score in zip(df["params_hash"], df[self.score]):
+                screened[hashes[h]] = _score(score)
+            b += 1
+
+        if screened:
+            # 짧은 구간에서 영향이 없는 파라미터만 다른 config 는 score 가 같음 → 하나만 승격
+            promote, seen = [], set()
+            for i in sorted(screened, key=lambda i: (-screened[i], i)):
+                if screened[i] not in seen or not np.isfinite(screened[i]):
+                    promote.append(i)
+                    seen.add(screened[i])
+                if len(promote) == self.max_full:
+                    break
+            how = f"top {len(promote)} of {len(screened)} at rung {brackets[0][1][-1]:.3f}"
+        else:
+            pool = [i for i in range(len(self.candidates)) if i not in started]
+            promote, how = self._propose(pool, min(self.max_full, len(pool)), data.fingerprint, hashes,
+                                         started, rng)
+        self.n_screened = len(started)
+        self._log(f"[{self.name}] promote {len(promote)} configs ({how}) to the full period")
+        df = self._search(sorted(promote), (1.0,), data, n_rows, resume)
+
+        self.n_full = len(df)
+        best = max((_score(v) for v in df[self.score]), default=np.nan) if len(df) else np.nan
+        self._log(f"[{self.name}] {self.n_screened} configs screened, {self.n_full} full-period evaluations, "
+                  f"cost ≈ {self.budget:.1f} full backtests, best {self.score}={best:.3f}")
+        return df
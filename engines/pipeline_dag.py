@@ -0,0 +1,414 @@
+# engines/pipeline_dag.py
+"""
+아티팩트 캐시 DAG 실행기
+
+step1 → step6 튜닝 스크립트는 따로 실행되며 매번 prices / SF1 / baseline JSON 을
+처음부터 다시 읽고, tuning/results/ 의 CSV/JSON 으로만 다음 단계에 넘겼다.
+하나만 바꿔도 무엇을 다시 돌려야 하는지 사람이 판단해야 했다.
+
+이 모듈은 단계를 Stage(입력, 출력, 파라미터) 로 선언하고:
+
+- 단계 키 = hash(이름, params, 코드 파일 내용, 입력 파일 내용, 상위 단계 fingerprint)
+- 출력
+    value: 함수 반환값 → {cache_dir}/values/{stage}-{key}.pkl
+    files: 선언된 파일 경로 → 실행 후 내용 해시를 manifest 에 기록
+- 키가 같고 출력이 그대로면 (pickle 존재 / 파일 해시 일치) 건너뜀 (cache hit)
+- fingerprint = 출력 내용 해시 → 다시 실행해도 결과가 같으면 하위 단계는 hit (early cutoff)
+- 의존성이 모두 끝난 단계는 ProcessPoolExecutor 로 병렬 실행, 단계별 stdout 은 logs/{stage}.log
+- 단계별 시간 / hit 여부 / 전체 hit rate 를 출력하고 last_run.json 에 기록
+
+파일 해시는 (size, mtime_ns) 가 같으면 digests.json 의 값을 재사용한다.
+
+Usage:
+
+    from engines.pipeline_dag import Stage, Pipeline
+
+    pipe = Pipeline([
+        Stage("returns", load_returns, files_in=["data/prices.csv"]),
+        Stage("step2", run_step2, deps=["returns"], files_out=["tuning/results/step2.json"],
+              params={"grid": [0.02, 0.03]}),
+    ], root=BASE_DIR)
+    report = pipe.run(jobs=4)
+
+    # 단계 함수: fn(inputs: {dep 이름: value}, **params) -> value (pickle 가능)
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from engines.result_store import params_hash
+
+DEFAULT_CACHE_DIR = "results/cache/dag"
+
+
+@dataclass
+class Stage:
+    """
+    name:      단계 이름 (DAG 안에서 유일)
+    fn:        fn(inputs, **params) -> value. 병렬 실행 시 pickle 되므로 모듈 최상위 함수
+    deps:      상위 단계 이름 (반환값이 inputs[name] 으로 전달)
+    files_in:  읽는 파일 (root 기준 상대경로), 내용이 키에 들어감
+    files_out: 쓰는 파일, 실행 후 존재/해시 확인
+    code:      키에 포함할 소스 파일 (보통 단계 스크립트) — 코드를 고치면 다시 실행
+    params:    fn 키워드 인자, 키에 포함
+    value:     반환값을 캐시할지 (False 면 파일 출력만 의미 있음)
+    """
+
+    name: str
+    fn: Callable[..., Any]
+    deps: Sequence[str] = ()
+    files_in: Sequence[str] = ()
+    files_out: Sequence[str] = ()
+    code: Sequence[str] = ()
+    params: Dict[str, Any] = field(default_factory=dict)
+    value: bool = True
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str                 # hit | run | failed | skipped
+    key: str = ""
+    fingerprint: str = ""
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+# ---- content hashing -------------------------------------------------------- #
+
+class FileDigests:
+    """경로 → sha1. (size, mtime_ns) 가 같으면 저장된 해시 재사용"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._db: Dict[str, List] = {}
+        if path.exists():
+            try:
+                self._db = json.loads(path.read_text())
+            except (OSError, ValueError):
+                self._db = {}
+
+    def digest(self, file: Path) -> Optional[str]:
+        try:
+            st = file.stat()
+        except OSError:
+            return None
+        sig = [st.st_size, st.st_mtime_ns]
+        entry = self._db.get(str(file))
+        if entry and entry[:2] == sig:
+            return entry[2]
+        h = hashlib.sha1()
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        self._db[str(file)] = sig + [h.hexdigest()[:16]]
+        return self._db[str(file)][2]
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._db, indent=0))
+        tmp.replace(self.path)
+
+
+# ---- worker ----------------------------------------------------------------- #
+
+def _execute(fn, inputs_paths: Dict[str, str], params: Dict[str, Any], value_path: Optional[str],
+             log_path: Optional[str]) -> float:
+    """단계 하나 실행 (같은 프로세스 또는 worker). 입력 pickle 로드 → fn → 반환값 pickle"""
+    inputs = {}
+    for name, path in inputs_paths.items():
+        with open(path, "rb") as f:
+            inputs[name] = pickle.load(f)
+
+    t0 = time.perf_counter()
+    log = open(log_path, "w") if log_path else None
+    try:
+        with contextlib.ExitStack() as stack:
+            if log is not None:
+                stack.enter_context(contextlib.redirect_stdout(log))
+                stack.enter_context(contextlib.redirect_stderr(log))
+            out = fn(inputs, **params)
+    finally:
+        if log is not None:
+            log.close()
+    elapsed = time.perf_counter() - t0
+
+    if value_path:
+        tmp = value_path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(out, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, value_path)
+    return elapsed
+
+
+# ---- pipeline --------------------------------------------------------------- #
+
+class Pipeline:
+    def __init__(self, stages: Sequence[Stage], root=".", cache_dir=DEFAULT_CACHE_DIR):
+        self.stages: Dict[str, Stage] = {}
+        for s in stages:
+            if s.name in self.stages:
+                raise ValueError(f"duplicate stage '{s.name}'")
+            self.stages[s.name] = s
+        for s in stages:
+            for d in s.deps:
+                if d not in self.stages:
+                    raise ValueError(f"stage '{s.name}' depends on unknown stage '{d}'")
+        self.order = self._toposort()
+        self.root = Path(root).resolve()
+        self.cache_dir = self.root / cache_dir
+        self.values_dir = self.cache_dir / "values"
+        self.logs_dir = self.cache_dir / "logs"
+        self.manifest_path = self.cache_dir / "manifest.json"
+        self.digests = FileDigests(self.cache_dir / "digests.json")
+
+    def _toposort(self) -> List[str]:
+        order, state = [], {}
+
+        def visit(name, path):
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"cycle: {' -> '.join(path + [name])}")
+            state[name] = 1
+            for d in self.stages[name].deps:
+                visit(d, path + [name])
+            state[name] = 2
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def _closure(self, targets: Optional[Sequence[str]]) -> List[str]:
+        """targets 와 그 상위 단계 (실행 순서)"""
+        if not targets:
+            return list(self.order)
+        need = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self.stages:
+                raise ValueError(f"unknown stage '{name}'")
+            if name not in need:
+                need.add(name)
+                stack.extend(self.stages[name].deps)
+        return [n for n in self.order if n in need]
+
+    # ---- keys / cache state -------------------------------------------- #
+
+    def _file_digest(self, rel: str) -> Optional[str]:
+        return self.digests.digest(self.root / rel)
+
+    def stage_key(self, stage: Stage, fingerprints: Dict[str, str]) -> str:
+        return params_hash({
+            "stage": stage.name,
+            "params": stage.params,
+            "code": {c: self._file_digest(c) for c in stage.code},
+            "files_in": {p: self._file_digest(p) for p in stage.files_in},
+            "deps": {d: fingerprints[d] for d in stage.deps},
+        })
+
+    def _value_path(self, stage: Stage, key: str) -> Path:
+        return self.values_dir / f"{stage.name}-{key}.pkl"
+
+    def _prune_values(self, stage: Stage, key: str) -> None:
+        """이전 키의 반환값 pickle 삭제 (단계당 최신 하나만 유지)"""
+        for p in self.values_dir.glob(f"{stage.name}-*.pkl"):
+            if p != self._value_path(stage, key):
+                p.unlink(missing_ok=True)
+
+    def _outputs_fingerprint(self, stage: Stage, key: str) -> Optional[str]:
+        """현재 출력 내용의 해시 (출력이 없으면 None)"""
+        parts = {}
+        for p in stage.files_out:
+            d = self._file_digest(p)
+            if d is None:
+                return None
+            parts[p] = d
+        if stage.value:
+            vp = self._value_path(stage, key)
+            if not vp.exists():
+                return None
+            parts["__value__"] = self.digests.digest(vp)
+        return params_hash(parts)
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if self.manifest_path.exists():
+            try:
+                return json.loads(self.manifest_path.read_text())
+            except ValueError:
+                pass
+        return {}
+
+    def _save_manifest(self, manifest: Dict[str, Dict]) -> None:
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2))
+        tmp.replace(self.manifest_path)
+
+    def status(self, targets: Optional[Sequence[str]] = None) -> Dict[str, str]:
+        """실행 없이 각 단계가 hit 일지 예측 (상위가 stale 이면 하위도 stale)"""
+        manifest = self._load_manifest()
+        fps, out = {}, {}
+        for name in self._closure(targets):
+            stage = self.stages[name]
+            if any(out[d] != "hit" for d in stage.deps):
+                out[name] = "stale"
+                continue
+            key = self.stage_key(stage, fps)
+            fp = self._outputs_fingerprint(stage, key)
+            entry = manifest.get(name, {})
+            if entry.get("key") == key and fp is not None and entry.get("fingerprint") == fp:
+                out[name], fps[name] = "hit", fp
+            else:
+                out[name] = "stale"
+        return out
+
+    # ---- run ------------------------------------------------------------- #
+
+    def run(self, targets: Optional[Sequence[str]] = None, jobs: int = 1,
+            force: Sequence[str] = (), verbose: bool = True) -> Dict[str, Any]:
+        """
+        targets 까지 실행 (없으면 전체). force 에 든 단계는 캐시 무시.
+        jobs > 1 이면 준비된 단계를 병렬로 (worker 프로세스).
+        """
+        names = self._closure(targets)
+        force = set(force)
+        self.values_dir.mkdir(parents=True, exist_ok=True)
+        self.logs_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self._load_manifest()
+
+        results: Dict[str, StageResult] = {}
+        fingerprints: Dict[str, str] = {}
+        keys: Dict[str, str] = {}
+        pending = list(names)
+        running: Dict[Future, str] = {}
+        started: Dict[str, float] = {}
+        t_start = time.perf_counter()
+
+        if verbose:
+            print(f"\n🧩 Pipeline: {len(names)} stages, jobs={jobs}, cache={self.cache_dir}")
+
+        pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+        def finish(name: str, status: str, seconds: float = 0.0, error: Optional[str] = None):
+            stage = self.stages[name]
+            key = keys.get(name, "")
+            fp = ""
+            if status in ("hit", "run"):
+                fp = self._outputs_fingerprint(stage, key)
+                if fp is None:
+                    status, error = "failed", f"declared outputs missing: {list(stage.files_out)}"
+                else:
+                    fingerprints[name] = fp
+                    if status == "run" and stage.value:
+                        self._prune_values(stage, key)
+                    manifest[name] = {"key": key, "fingerprint": fp,
+                                      "updated": datetime.now().isoformat(timespec="seconds")}
+                    self._save_manifest(manifest)
+            results[name] = StageResult(name, status, key, fp or "", seconds, error)
+            if verbose:
+                mark = {"hit": "✅ hit", "run": "🔄 run", "failed": "❌ failed", "skipped": "⏭  skipped"}[status]
+                print(f"   [{mark:<10}] {name:<16} {seconds:8.2f}s" + (f"  {error.splitlines()[-1]}" if error else ""))
+
+        try:
+            while pending or running:
+                progressed = False
+                for name in list(pending):
+                    stage = self.stages[name]
+                    if any(d not in results for d in stage.deps):
+                        continue
+                    pending.remove(name)
+                    progressed = True
+                    if any(results[d].status in ("failed", "skipped") for d in stage.deps):
+                        finish(name, "skipped")
+                        continue
+
+                    key = keys[name] = self.stage_key(stage, fingerprints)
+                    entry = manifest.get(name, {})
+                    if name not in force and entry.get("key") == key:
+                        fp = self._outputs_fingerprint(stage, key)
+                        if fp is not None and fp == entry.get("fingerprint"):
+                            finish(name, "hit")
+                            continue
+
+                    inputs = {d: str(self._value_path(self.stages[d], keys[d]))
+                              for d in stage.deps if self.stages[d].value}
+                    args = (stage.fn, inputs, stage.params,
+                            str(self._value_path(stage, key)) if stage.value else None,
+                            str(self.logs_dir / f"{name}.log"))
+                    started[name] = time.perf_counter()
+                    if pool is None:
+                        try:
+                            _execute(*args)
+                        except Exception:
+                            finish(name, "failed", time.perf_counter() - started[name], traceback.format_exc())
+                        else:
+                            finish(name, "run", time.perf_counter() - started[name])
+                    else:
+                        running[pool.submit(_execute, *args)] = name
+
+                if running and not progressed:
+                    done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        name = running.pop(fut)
+                        try:
+                            fut.result()
+                        except Exception:
+                            finish(name, "failed", time.perf_counter() - started[name], traceback.format_exc())
+                        else:
+                            finish(name, "run", time.perf_counter() - started[name])
+                elif not running and not progressed and pending:
+                    raise RuntimeError(f"unschedulable stages: {pending}")
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+            self.digests.save()
+
+        return self._report(names, results, time.perf_counter() - t_start, jobs, verbose)
+
+    def _report(self, names, results, wall, jobs, verbose) -> Dict[str, Any]:
+        rs = [results[n] for n in names]
+        hits = sum(r.status == "hit" for r in rs)
+        report = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "jobs": jobs,
+            "wall_seconds": round(wall, 3),
+            "stage_seconds": round(sum(r.seconds for r in rs), 3),
+            "hits": hits,
+            "runs": sum(r.status == "run" for r in rs),
+            "failed": [r.name for r in rs if r.status == "failed"],
+            "skipped": [r.name for r in rs if r.status == "skipped"],
+            "hit_rate": hits / len(rs) if rs else 0.0,
+            "stages": {r.name: {"status": r.status, "seconds": round(r.seconds, 3),
+                                "key": r.key, "fingerprint": r.fingerprint, "error": r.error}
+                       for r in rs},
+        }
+        (self.cache_dir / "last_run.json").write_text(json.dumps(report, indent=2))
+
+        if verbose:
+            print(f"\n{'Stage':<16} {'Status':<9} {'Seconds':>9}")
+            print("-" * 36)
+            for r in rs:
+                print(f"{r.name:<16} {r.status:<9} {r.seconds:>9.2f}")
+            print("-" * 36)
+            print(f"Cache hits: {hits}/{len(rs)} ({report['hit_rate'] * 100:.0f}%)  "
+                  f"stage time {report['stage_seconds']:.2f}s  wall {wall:.2f}s")
+            for r in rs:
+                if r.status == "failed":
+                    print(f"\n❌ {r.name} (log: {self.logs_dir / (r.name + '.log')})\n{r.error}", file=sys.stderr)
+        return report
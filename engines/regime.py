@@ -0,0 +1,280 @@
+# engines/regime.py
+"""
+레짐 신호 라이브러리 (MA 필터, 다기간 모멘텀, VIX 레벨/z-score, SPY/TLT 상대강도)
+
+같은 레짐 로직이 스크립트마다 다시 구현돼 있었다:
+
+    step4_regime_filter.compute_bull_regime / compute_full_bull_regime   SPX > MA200, 6M/12M 수익률 > 0, VIX < 25
+    engine_ares7_ultimate.VIXRegimeEngine.get_regime                     날짜마다 vix_data.loc[date, 'VIX']
+    engine_ares7_ultimate.CrossAssetEngine                               SPY-TLT 상관 + SPY 모멘텀, 날짜마다 signal.loc[date]
+    engine_defensive_switch_v1.defensive_switch                          SPY MA200, 60일 수익률
+    engine_a_ls_original (USE_REGIME_FILTER)                             유니버스 평균 인덱스 MA200
+
+RegimeFeatures 는 입력 시계열을 날짜 축 하나에 정렬하고, feature 를 (이름, 파라미터) 키로
+numpy 배열로 한 번만 계산해 보관한다. 마스크 (RegimeMask) 는 같은 축 위의 bool 배열이라
+&, |, ~ 로 조합하고, 엔진 / 그리드 서치는 날짜별 함수 호출 대신 정수 위치로 조회한다.
+
+    from engines.regime import RegimeFeatures
+
+    rf = RegimeFeatures(dates, market=spx, vix=vix)
+    bull = rf.bull()                    # = above_ma(200) & momentum_above(126) & momentum_above(252) & vix_below(25)
+    bull.values[i]                      # i 번째 날짜
+    bull.lag(1).series()                # t-1 상태로 t 에 적용 (룩어헤드 방지)
+    codes = rf.vix_bucket((15, 25, 35)) # 0: <15, 1: 15~25, 2: 25~35, 3: >=35, -1: 결측
+
+- 결측 (MA warm-up, 데이터 없는 날) 과의 비교는 False (pandas 비교와 동일)
+- 외부 시계열 정렬: ffill=True 면 직전 값 (step4), False 면 같은 날짜만 (ultimate 엔진의 .loc[date])
+- returns / momentum 은 가격을 직전 값으로 채운 뒤 계산 (pandas 2.x pct_change 기본 fill_method='pad'
+  와 같음, pandas 버전과 무관). 결측 날짜의 수익률은 0, 그 뒤 h 일 모멘텀도 채운 가격 기준
+- 디스크 캐시: cache_dir 를 주면 (날짜 축, 입력 배열) 해시 → {cache_dir}/{key}.npz.
+  생성 시 있으면 읽고, save() 가 새로 계산된 feature 를 포함해 다시 씀
+"""
+
+from __future__ import annotations
+
+import hashlib
+from functools import reduce
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_DIR = BASE_DIR / "results" / "cache" / "regime"
+
+ASSETS = ("market", "vix", "spy", "tlt")
+
+# feature 정의가 바뀌면 올림 (디스크 캐시 키에 포함)
+CACHE_VERSION = 2
+
+
+def _align(series: pd.Series, index: pd.DatetimeIndex, ffill: bool) -> np.ndarray:
+    s = pd.Series(series).astype(float)
+    s.index = pd.DatetimeIndex(s.index)
+    s = s[~s.index.duplicated(keep="last")].sort_index()
+    s = s.reindex(index, method="ffill") if ffill else s.reindex(index)
+    return s.to_numpy(dtype=np.float64)
+
+
+def _shift(values: np.ndarray, n: int, fill) -> np.ndarray:
+    out = np.empty_like(values)
+    if n <= 0:
+        return values.copy()
+    out[:n] = fill
+    out[n:] = values[:-n]
+    return out
+
+
+class RegimeMask:
+    """날짜 축 위의 bool 배열. &, |, ~ 로 조합"""
+
+    __slots__ = ("index", "values")
+
+    def __init__(self, index: pd.DatetimeIndex, values):
+        self.index = index
+        self.values = np.asarray(values, dtype=bool)
+
+    @classmethod
+    def full(cls, index: pd.DatetimeIndex, value: bool = True) -> "RegimeMask":
+        return cls(index, np.full(len(index), value, dtype=bool))
+
+    def _other(self, other) -> np.ndarray:
+        values = other.values if isinstance(other, RegimeMask) else np.asarray(other, dtype=bool)
+        if values.shape != self.values.shape:
+            raise ValueError(f"mask length mismatch: {values.shape} vs {self.values.shape}")
+        return values
+
+    def __and__(self, other) -> "RegimeMask":
+        return RegimeMask(self.index, self.values & self._other(other))
+
+    def __or__(self, other) -> "RegimeMask":
+        return RegimeMask(self.index, self.values | self._other(other))
+
+    def __invert__(self) -> "RegimeMask":
+        return RegimeMask(self.index, ~self.values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def lag(self, n: int = 1, fill: bool = False) -> "RegimeMask":
+        """n 일 뒤로 민 마스크 (t 의 값 = t-n 의 상태)"""
+        return RegimeMask(self.index, _shift(self.values, n, fill))
+
+    def at(self, dates, fill: bool = False) -> np.ndarray:
+        """임의 날짜들의 값 (축에 없는 날짜는 fill)"""
+        pos = self.index.get_indexer(pd.DatetimeIndex(dates))
+        if not len(self.values):
+            return np.full(len(pos), fill, dtype=bool)
+        return np.where(pos >= 0, self.values[np.maximum(pos, 0)], fill)
+
+    def count(self) -> int:
+        return int(self.values.sum())
+
+    def fraction(self) -> float:
+        return float(self.values.mean()) if len(self.values) else 0.0
+
+    def series(self, name=None) -> pd.Series:
+        return pd.Series(self.values, index=self.index, name=name)
+
+
+class RegimeFeatures:
+    """
+    index:  레짐을 계산할 날짜 축
+    market: 기준 지수 (SPX, baseline 누적가, 유니버스 평균 등)
+    vix / spy / tlt: 외부 시계열 (index 로 정렬)
+    ffill:  외부 시계열 정렬 시 직전 값 사용 여부
+    cache_dir: 디스크 캐시 디렉터리 (None 이면 메모리에만)
+    """
+
+    def __init__(self, index, market: Optional[pd.Series] = None, vix: Optional[pd.Series] = None,
+                 spy: Optional[pd.Series] = None, tlt: Optional[pd.Series] = None,
+                 ffill: bool = True, cache_dir=None):
+        self.index = pd.DatetimeIndex(index)
+        self.ffill = ffill
+        self._raw: Dict[str, np.ndarray] = {}
+        for name, s in zip(ASSETS, (market, vix, spy, tlt)):
+            if s is not None:
+                self._raw[name] = _align(s, self.index, ffill)
+        self._features: Dict[str, np.ndarray] = {}
+        self._dirty = False
+        self.cache_path: Optional[Path] = None
+        if cache_dir is not None:
+            self.cache_path = Path(cache_dir) / f"{self.key()}.npz"
+            if self.cache_path.exists():
+                with np.load(self.cache_path) as z:
+                    self._features = {k: z[k] for k in z.files}
+
+    # ---- cache ---------------------------------------------------------- #
+
+    def key(self) -> str:
+        h = hashlib.sha1()
+        h.update(f"v{CACHE_VERSION}".encode())
+        h.update(self.index.asi8.tobytes())
+        for name in ASSETS:
+            if name in self._raw:
+                h.update(name.encode())
+                h.update(self._raw[name].tobytes())
+        h.update(b"ffill" if self.ffill else b"exact")
+        return h.hexdigest()[:16]
+
+    def save(self) -> Optional[Path]:
+        """새로 계산된 feature 가 있으면 npz 로 저장 (tmp → replace)"""
+        if self.cache_path is None or not self._dirty:
+            return self.cache_path
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_name(self.cache_path.stem + ".tmp.npz")
+        np.savez(tmp, **self._features)
+        tmp.replace(self.cache_path)
+        self._dirty = False
+        return self.cache_path
+
+    def _memo(self, key: str, compute) -> np.ndarray:
+        out = self._features.get(key)
+        if out is None:
+            out = np.asarray(compute(), dtype=np.float64)
+            self._features[key] = out
+            self._dirty = True
+        return out
+
+    def has(self, asset: str) -> bool:
+        return asset in self._raw
+
+    # ---- features (float 배열, index 와 같은 길이) --------------------- #
+
+    def price(self, asset: str = "market") -> np.ndarray:
+        if asset not in self._raw:
+            raise KeyError(f"regime input '{asset}' not provided")
+        return self._raw[asset]
+
+    def filled_price(self, asset: str = "market") -> np.ndarray:
+        """결측을 직전 값으로 채운 가격 (첫 유효 값 이전은 NaN)"""
+        return self._memo(f"ffill|{asset}", lambda: pd.Series(self.price(asset)).ffill().to_numpy())
+
+    def returns(self, asset: str = "market") -> np.ndarray:
+        """일간 수익률 (첫날 NaN)"""
+        def compute():
+            p = self.filled_price(asset)
+            return p / _shift(p, 1, np.nan) - 1.0
+        return self._memo(f"ret|{asset}", compute)
+
+    def ma(self, window: int, min_periods: Optional[int] = None, asset: str = "market") -> np.ndarray:
+        min_periods = window if min_periods is None else min_periods
+        return self._memo(f"ma|{asset}|{window}|{min_periods}", lambda: pd.Series(self.price(asset))
+                          .rolling(window, min_periods=min_periods).mean().to_numpy())
+
+    def momentum(self, horizon: int, asset: str = "market") -> np.ndarray:
+        """p_t / p_{t-h} - 1"""
+        def compute():
+            p = self.filled_price(asset)
+            return p / _shift(p, horizon, np.nan) - 1.0
+        return self._memo(f"mom|{asset}|{horizon}", compute)
+
+    def vix_zscore(self, window: int = 252) -> np.ndarray:
+        def compute():
+            v = pd.Series(self.price("vix"))
+            roll = v.rolling(window, min_periods=window)
+            return ((v - roll.mean()) / roll.std()).to_numpy()
+        return self._memo(f"vixz|{window}", compute)
+
+    def relative_strength(self, horizon: int) -> np.ndarray:
+        """SPY 모멘텀 - TLT 모멘텀 (> 0: 주식 우위)"""
+        return self._memo(f"rs|{horizon}", lambda: self.momentum(horizon, "spy") - self.momentum(horizon, "tlt"))
+
+    def correlation(self, window: int) -> np.ndarray:
+        """SPY / TLT 일간 수익률 rolling 상관"""
+        return self._memo(f"corr|{window}", lambda: pd.Series(self.returns("spy"))
+                          .rolling(window).corr(pd.Series(self.returns("tlt"))).to_numpy())
+
+    def cross_asset_signal(self, corr_window: int = 60, momentum_window: int = 20) -> np.ndarray:
+        """-0.5·corr(SPY, TLT) + 0.5·SPY 모멘텀 (CrossAssetEngine 정의)"""
+        return self._memo(f"xasset|{corr_window}|{momentum_window}",
+                          lambda: -self.correlation(corr_window) * 0.5 + self.momentum(momentum_window, "spy") * 0.5)
+
+    def vix_bucket(self, edges: Sequence[float] = (15, 25, 35)) -> np.ndarray:
+        """VIX 구간 코드: edges[k-1] <= VIX < edges[k] → k, 결측 → -1"""
+        v = self.price("vix")
+        codes = np.searchsorted(np.asarray(edges, dtype=np.float64), v, side="right")
+        return np.where(np.isnan(v), -1, codes)
+
+    # ---- masks ---------------------------------------------------------- #
+
+    def _mask(self, values: np.ndarray) -> RegimeMask:
+        return RegimeMask(self.index, values)
+
+    def above_ma(self, window: int = 200, min_periods: Optional[int] = None, asset: str = "market") -> RegimeMask:
+        return self._mask(self.price(asset) > self.ma(window, min_periods, asset))
+
+    def momentum_above(self, horizon: int, threshold: float = 0.0, asset: str = "market") -> RegimeMask:
+        return self._mask(self.momentum(horizon, asset) > threshold)
+
+    def vix_below(self, level: float) -> RegimeMask:
+        return self._mask(self.price("vix") < level)
+
+    def vix_above(self, level: float) -> RegimeMask:
+        return self._mask(self.price("vix") >= level)
+
+    def vix_zscore_below(self, z: float, window: int = 252) -> RegimeMask:
+        return self._mask(self.vix_zscore(window) < z)
+
+    def spy_over_tlt(self, horizon: int, threshold: float = 0.0) -> RegimeMask:
+        return self._mask(self.relative_strength(horizon) > threshold)
+
+    def bull(self, ma_window: int = 200, horizons: Tuple[int, ...] = (126, 252),
+             vix_max: Optional[float] = 25) -> RegimeMask:
+        """
+        step4 BULL 조건: 지수 > MA, 각 horizon 수익률 > 0, VIX < vix_max.
+        VIX 입력이 없거나 vix_max=None 이면 VIX 조건 생략.
+        """
+        masks = [self.above_ma(ma_window)] + [self.momentum_above(h) for h in horizons]
+        if vix_max is not None and self.has("vix"):
+            masks.append(self.vix_below(vix_max))
+        return reduce(lambda a, b: a & b, masks)
+
+    def take(self, values: np.ndarray, dates, fill=np.nan) -> np.ndarray:
+        """이 축 위의 배열을 다른 날짜 축으로 (같은 날짜만, 없으면 fill)"""
+        pos = self.index.get_indexer(pd.DatetimeIndex(dates))
+        values = np.asarray(values)
+        if not len(values):
+            return np.full(len(pos), fill)
+        return np.where(pos >= 0, values[np.maximum(pos, 0)], fill)
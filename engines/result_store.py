@@ -0,0 +1,463 @@
+# engines/result_store.py
+"""
+엔진 수익률 결과 저장소 (columnar, memory-mapped)
+
+각 엔진은 결과를 JSON 한 파일로 쓰고 daily_returns 를 [{date, ret}, ...] 또는
+float 리스트 + dates 로 저장한다 (~110 KB/파일). ares7_super_ensemble.py,
+ensemble_7way_optimal.py, ares7_optimized_ensemble.py 는 실행할 때마다 이를
+json.load + list comprehension 으로 다시 파싱한다.
+
+이 모듈은 모든 엔진/설정의 수익률 시계열을 하나의 저장소에 모은다.
+
+    results/store/
+        values.f64   # 모든 시계열 값 (float64, append-only, np.memmap)
+        dates.i8     # 같은 위치의 날짜 (int64, 1970-01-01 기준 일수)
+        index.sqlite # series(engine, params_hash) → offset/length/params/stats/source
+
+- 키: (engine, params_hash), params_hash = config dict 의 정렬된 JSON sha1 앞 16자리
+- 같은 키로 다시 쓰면 새 구간을 append 하고 인덱스만 교체 (compact() 로 정리)
+- load_matrix(): 임의 엔진 부분집합을 날짜 기준으로 정렬한 (T x K) DataFrame
+- load_json_returns() / load_json_result(): 기존 JSON 경로로 조회,
+  없거나 JSON 이 더 새로우면 import
+
+Usage:
+
+    from engines.result_store import ResultStore, store_engine_result
+
+    # 엔진: json.dump 와 같은 output dict 를 그대로 전달
+    store_engine_result("c1_v6", output)
+
+    # 앙상블
+    store = ResultStore()
+    df = store.load_matrix(["c1_v6", "factor_v2_pit", "residual_momentum_ls_v2"])
+    r = store.load_json_returns("results/C1_final_v5.json")
+    r, stats = store.load_json_result("results/C1_final_v5.json")
+
+    # 기존 JSON 일괄 import
+    python -m engines.result_store --import_dir results
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_DIR = "results/store"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    engine       TEXT NOT NULL,
+    params_hash  TEXT NOT NULL,
+    params       TEXT,
+    offset       INTEGER NOT NULL,
+    length       INTEGER NOT NULL,
+    has_dates    INTEGER NOT NULL,
+    start_date   TEXT,
+    end_date     TEXT,
+    stats        TEXT,
+    source       TEXT,
+    source_mtime REAL,
+    created_at   TEXT,
+    PRIMARY KEY (engine, params_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_series_source ON series(source);
+"""
+
+_STAT_KEYS = ("sharpe", "annual_return", "annual_volatility", "max_drawdown", "avg_turnover")
+
+SeriesKey = Union[str, Tuple[str, str]]
+
+
+def params_hash(params: Optional[Dict[str, Any]]) -> str:
+    """config dict → 16자리 해시 (키 순서 무관)"""
+    blob = json.dumps(params or {}, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()[:16]
+
+
+def returns_from_json(data: Dict[str, Any]) -> Tuple[Optional[np.ndarray], np.ndarray]:
+    """
+    엔진 결과 JSON 의 daily_returns → (dates[D] 또는 None, values float64).
+
+    지원 형식: [{date, ret}, ...] / float 리스트 (+ 선택적 'dates' 리스트)
+    """
+    dr = data.get("daily_returns")
+    if not dr:
+        raise ValueError("no daily_returns")
+    if isinstance(dr[0], dict):
+        values = np.array([d.get("ret", np.nan) for d in dr], dtype=np.float64)
+        dates = [d.get("date") for d in dr]
+    else:
+        values = np.asarray(dr, dtype=np.float64)
+        dates = data.get("dates")
+    if dates is None or len(dates) != len(values) or any(d is None for d in dates):
+        return None, values
+    return pd.to_datetime(dates).values.astype("datetime64[D]"), values
+
+
+class ResultStore:
+    """(engine, params_hash) → 수익률 시계열. 인덱스는 SQLite, 값은 append-only memmap."""
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._values_path = self.root / "values.f64"
+        self._dates_path = self.root / "dates.i8"
+        self._lock_path = self.root / "store.lock"
+        self._values_path.touch(exist_ok=True)
+        self._dates_path.touch(exist_ok=True)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._mm: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._mm_key: Optional[Tuple[int, int]] = None
+        self._thread_lock = threading.Lock()
+
+    # -- storage --------------------------------------------------------- #
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    @contextmanager
+    def _write_lock(self):
+        """프로세스 간 배타 잠금 (그리드 서치 병렬 워커가 동시에 write 가능)"""
+        with self._thread_lock, open(self._lock_path, "w") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _arrays(self, needed: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        values / dates memmap. 다른 writer 의 append (크기 변화) 나 compact() (os.replace 로 inode 변화)
+        가 있으면 다시 매핑
+        """
+        st = self._values_path.stat()
+        key = (st.st_ino, st.st_size)
+        if self._mm is None or self._mm_key != key or len(self._mm[0]) < needed:
+            n = st.st_size // 8
+            if n == 0:
+                self._mm, self._mm_key = None, None
+                return np.empty(0), np.empty(0, dtype=np.int64)
+            self._mm = (
+                np.memmap(self._values_path, dtype=np.float64, mode="r", shape=(n,)),
+                np.memmap(self._dates_path, dtype=np.int64, mode="r", shape=(n,)),
+            )
+            self._mm_key = key
+        return self._mm
+
+    # -- write ----------------------------------------------------------- #
+
+    def write(
+        self,
+        engine: str,
+        returns: Union[pd.Series, Sequence[float], np.ndarray],
+        params: Optional[Dict[str, Any]] = None,
+        stats: Optional[Dict[str, Any]] = None,
+        dates: Optional[Sequence] = None,
+        source: Optional[str] = None,
+        source_mtime: Optional[float] = None,
+    ) -> Tuple[str, str]:
+        """
+        수익률 시계열 저장.
+
+        Args:
+            returns: pd.Series (DatetimeIndex 면 날짜 사용) 또는 배열
+            dates: returns 가 배열일 때 날짜 (없으면 위치 인덱스로 저장)
+
+        Returns:
+            (engine, params_hash)
+        """
+        if isinstance(returns, pd.Series):
+            if dates is None and isinstance(returns.index, pd.DatetimeIndex):
+                dates = returns.index
+            values = returns.to_numpy(dtype=np.float64)
+        else:
+            values = np.asarray(returns, dtype=np.float64)
+        if dates is not None:
+            d = pd.to_datetime(dates).values.astype("datetime64[D]").astype(np.int64)
+            if len(d) != len(values):
+                raise ValueError(f"{engine}: {len(values)} returns vs {len(d)} dates")
+            has_dates = 1
+        else:
+            d = np.arange(len(values), dtype=np.int64)
+            has_dates = 0
+
+        h = params_hash(params)
+        start = end = None
+        if has_dates and len(d):
+            start = str(np.datetime64(int(d[0]), "D"))
+            end = str(np.datetime64(int(d[-1]), "D"))
+        stats = {k: (None if v is None else float(v)) for k, v in (stats or {}).items()
+                 if isinstance(v, (int, float, np.floating, type(None)))}
+
+        with self._write_lock():
+            offset = self._values_path.stat().st_size // 8
+            with open(self._values_path, "ab") as fv, open(self._dates_path, "ab") as fd:
+                fv.write(np.ascontiguousarray(values).tobytes())
+                fd.write(np.ascontiguousarray(d).tobytes())
+            self.conn.execute(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (engine, h, json.dumps(params or {}, sort_keys=True, default=str),
+                 int(offset), int(len(values)), has_dates, start, end,
+                 json.dumps(stats), source, source_mtime, datetime.now().isoformat()),
+            )
+            self.conn.commit()
+        return engine, h
+
+    def import_json(self, path: str, engine: Optional[str] = None) -> Tuple[str, str]:
+        """기존 엔진 결과 JSON 1개 import (engine 기본값: 파일명)"""
+        path = str(path)
+        with open(path) as f:
+            data = json.load(f)
+        dates, values = returns_from_json(data)
+        params = data.get("config") if isinstance(data.get("config"), dict) else {}
+        stats = {k: data[k] for k in _STAT_KEYS if k in data}
+        return self.write(
+            engine or Path(path).stem,
+            values,
+            params=params,
+            stats=stats,
+            dates=dates,
+            source=os.path.abspath(path),
+            source_mtime=os.path.getmtime(path),
+        )
+
+    def import_dir(self, directory: str = "results", pattern: str = "*.json",
+                   verbose: bool = True) -> Dict[str, Any]:
+        """디렉터리의 JSON 중 daily_returns 가 있는 것만 import (변경된 파일만)"""
+        n_new = n_skip = n_bad = 0
+        for p in sorted(Path(directory).glob(pattern)):
+            if self._lookup_source(str(p)) is not None:
+                n_skip += 1
+                continue
+            try:
+                self.import_json(str(p))
+                n_new += 1
+            except (ValueError, KeyError, TypeError, json.JSONDecodeError):
+                n_bad += 1
+        summary = {"imported": n_new, "up_to_date": n_skip, "skipped": n_bad}
+        if verbose:
+            print(f"[store] import {directory}: {summary}")
+        return summary
+
+    # -- read ------------------------------------------------------------ #
+
+    def _resolve(self, key: SeriesKey) -> Tuple[str, str, int, int, int]:
+        """engine 이름(가장 최근 기록) 또는 (engine, params_hash) → 인덱스 행"""
+        if isinstance(key, tuple):
+            row = self.conn.execute(
+                "SELECT engine, params_hash, offset, length, has_dates FROM series "
+                "WHERE engine=? AND params_hash=?", key).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT engine, params_hash, offset, length, has_dates FROM series "
+                "WHERE engine=? ORDER BY created_at DESC LIMIT 1", (key,)).fetchone()
+        if row is None:
+            raise KeyError(f"series not found: {key}")
+        return row
+
+    def _lookup_source(self, path: str) -> Optional[Tuple[str, str]]:
+        """JSON 경로로 조회 (파일이 import 이후 바뀌었으면 None)"""
+        apath = os.path.abspath(path)
+        row = self.conn.execute(
+            "SELECT engine, params_hash, source_mtime FROM series WHERE source=? "
+            "ORDER BY created_at DESC LIMIT 1", (apath,)).fetchone()
+        if row is None:
+            return None
+        if os.path.exists(apath) and os.path.getmtime(apath) != row[2]:
+            return None
+        return row[0], row[1]
+
+    def _segment(self, key: SeriesKey) -> Tuple[np.ndarray, np.ndarray, bool]:
+        _, _, offset, length, has_dates = self._resolve(key)
+        values, dates = self._arrays(offset + length)
+        return dates[offset:offset + length], values[offset:offset + length], bool(has_dates)
+
+    def load_series(self, key: SeriesKey) -> pd.Series:
+        """시계열 1개 → pd.Series (날짜가 있으면 DatetimeIndex)"""
+        dates, values, has_dates = self._segment(key)
+        name = key if isinstance(key, str) else f"{key[0]}:{key[1]}"
+        if has_dates:
+            return pd.Series(np.array(values), index=pd.DatetimeIndex(dates.astype("datetime64[D]")),
+                             name=name)
+        return pd.Series(np.array(values), name=name)
+
+    def stats(self, key: SeriesKey) -> Dict[str, Any]:
+        """저장 시 기록한 성과 지표 (sharpe, annual_return, ...)"""
+        engine, h = self._resolve(key)[:2]
+        row = self.conn.execute(
+            "SELECT stats FROM series WHERE engine=? AND params_hash=?", (engine, h)).fetchone()
+        return json.loads(row[0] or "{}")
+
+    def load_json_result(self, path: str, engine: Optional[str] = None) -> Tuple[pd.Series, Dict]:
+        """
+        기존 JSON 경로 기준 조회 → (returns, stats).
+        저장소에 없거나 JSON 이 import 이후 바뀌었으면 import 후 반환.
+        """
+        key = self._lookup_source(path)
+        if key is None:
+            key = self.import_json(path, engine)
+        return self.load_series(key), self.stats(key)
+
+    def load_json_returns(self, path: str, engine: Optional[str] = None) -> pd.Series:
+        return self.load_json_result(path, engine)[0]
+
+    def load_matrix(
+        self,
+        keys: Iterable[SeriesKey],
+        names: Optional[Sequence[str]] = None,
+        join: str = "inner",
+    ) -> pd.DataFrame:
+        """
+        여러 시계열을 날짜 기준으로 정렬한 (T x K) 행렬.
+
+        Args:
+            keys: engine 이름 또는 (engine, params_hash)
+            names: 열 이름 (기본: engine 이름 / "engine:hash")
+            join: "inner" (모든 엔진에 있는 날짜) / "outer" (합집합, 없는 값 NaN)
+        """
+        keys = list(keys)
+        if names is None:
+            names = [k if isinstance(k, str) else f"{k[0]}:{k[1]}" for k in keys]
+        segs = [self._segment(k) for k in keys]
+        if not segs:
+            return pd.DataFrame()
+        if not all(s[2] for s in segs) and any(s[2] for s in segs):
+            raise ValueError("cannot align dated and undated series")
+
+        first = segs[0][0]
+        if all(len(s[0]) == len(first) and np.array_equal(s[0], first) for s in segs[1:]):
+            axis = np.array(first)
+            mat = np.column_stack([s[1] for s in segs]) if len(axis) else np.empty((0, len(segs)))
+        else:
+            axis = np.unique(np.concatenate([s[0] for s in segs]))
+            mat = np.full((len(axis), len(segs)), np.nan)
+            present = np.zeros((len(axis), len(segs)), dtype=bool)
+            for j, (d, v, _) in enumerate(segs):
+                pos = np.searchsorted(axis, d)
+                mat[pos, j] = v
+                present[pos, j] = True
+            if join == "inner":
+                keep = present.all(axis=1)
+                axis, mat = axis[keep], mat[keep]
+
+        index = (pd.DatetimeIndex(axis.astype("datetime64[D]")) if segs[0][2]
+                 else pd.RangeIndex(len(axis)))
+        return pd.DataFrame(mat, index=index, columns=list(names))
+
+    def catalog(self, engine: Optional[str] = None) -> pd.DataFrame:
+        """저장된 시계열 목록 (engine, params_hash, length, start/end, stats, params, source)"""
+        sql = ("SELECT engine, params_hash, length, start_date, end_date, stats, params, source, "
+               "created_at FROM series")
+        args: tuple = ()
+        if engine is not None:
+            sql += " WHERE engine=?"
+            args = (engine,)
+        df = pd.read_sql_query(sql + " ORDER BY engine, created_at", self.conn, params=args)
+        if len(df):
+            stats = pd.DataFrame([json.loads(s or "{}") for s in df["stats"]], index=df.index)
+            df = pd.concat([df.drop(columns=["stats"]), stats], axis=1)
+        return df
+
+    # -- maintenance ----------------------------------------------------- #
+
+    def compact(self) -> Dict[str, int]:
+        """덮어쓴 이전 구간을 제거하고 파일을 다시 쓴다"""
+        with self._write_lock():
+            rows = self.conn.execute(
+                "SELECT engine, params_hash, offset, length FROM series ORDER BY offset").fetchall()
+            n_before = self._values_path.stat().st_size // 8
+            values, dates = self._arrays(n_before)
+            tmp_v = self._values_path.with_suffix(".f64.tmp")
+            tmp_d = self._dates_path.with_suffix(".i8.tmp")
+            new_offsets = []
+            pos = 0
+            with open(tmp_v, "wb") as fv, open(tmp_d, "wb") as fd:
+                for engine, h, offset, length in rows:
+                    fv.write(np.ascontiguousarray(values[offset:offset + length]).tobytes())
+                    fd.write(np.ascontiguousarray(dates[offset:offset + length]).tobytes())
+                    new_offsets.append((pos, engine, h))
+                    pos += length
+            self._mm = None
+            os.replace(tmp_v, self._values_path)
+            os.replace(tmp_d, self._dates_path)
+            self.conn.executemany(
+                "UPDATE series SET offset=? WHERE engine=? AND params_hash=?", new_offsets)
+            self.conn.commit()
+        return {"before": int(n_before), "after": int(pos)}
+
+    def close(self):
+        self._mm = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# ---- Engine-side helper ---------------------------------------------------- #
+
+def store_engine_result(
+    engine: str,
+    output: Dict[str, Any],
+    root: str = DEFAULT_STORE_DIR,
+) -> Tuple[str, str]:
+    """
+    엔진 결과 dict (json.dump 하는 것과 같은 형식) 를 저장소에 기록.
+
+    output: daily_returns (+ dates), config, sharpe/annual_return/... 키
+    """
+    dates, values = returns_from_json(output)
+    params = output.get("config") if isinstance(output.get("config"), dict) else {}
+    stats = {k: output[k] for k in _STAT_KEYS if k in output}
+    store = ResultStore(root)
+    try:
+        return store.write(engine, values, params=params, stats=stats, dates=dates)
+    finally:
+        store.close()
+
+
+# ---- CLI ------------------------------------------------------------------- #
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Engine returns store: import / list / compact.")
+    p.add_argument("--store_dir", type=str, default=DEFAULT_STORE_DIR)
+    p.add_argument("--import_dir", type=str, nargs="*", default=None,
+                   help="Directories of engine result JSON files to import.")
+    p.add_argument("--compact", action="store_true")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    store = ResultStore(args.store_dir)
+
+    for d in args.import_dir or []:
+        store.import_dir(d)
+    if args.compact:
+        print(f"[store] compact: {store.compact()}")
+
+    listing = store.catalog()
+    print(f"[store] {len(listing)} series, {listing['engine'].nunique() if len(listing) else 0} engines")
+    if len(listing):
+        cols = [c for c in ["engine", "params_hash", "length", "start_date", "end_date", "sharpe"]
+                if c in listing.columns]
+        print(listing[cols].to_string(index=False))
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# engines/sf1_panel.py
+"""
+SF1 quality panel (point-in-time, 여러 reporting delay 한 번에)
+
+step2_oos_grid_search.py / run_oos_validation.py 의 merge_sf1_pit 와 merge_sf1_optimized.py 는
+종목마다 sf1_df[sf1_df['ticker'] == ticker] 로 전체 프레임을 스캔하고, 날짜마다
+np.where(sf1_dates <= t) (또는 numba 이진탐색) 을 호출했다 → O(N·T·F).
+step1_pit_delay_90d.py 는 delay 마다 SF1 CSV 전체를 새로 써야 했다.
+
+이 모듈은 SF1 을 (종목 코드, 기준일) 로 한 번 정렬하고, 모든 (date, symbol) 을
+searchsorted 한 번으로 해석한다:
+
+    key = code · STRIDE + 기준일,  query = j · STRIDE + (t - delay)
+    idx = searchsorted(key, query, 'right') - 1   (같은 종목이면 유효)
+
+delay 는 기준일의 상수 이동이라 정렬은 모든 delay 가 공유 → delay 당 searchsorted 1회.
+
+- anchor="datekey": 유효일 = datekey + delay (run_oos_validation.load_and_fix_sf1)
+- anchor="max":     유효일 = max(calendardate, datekey) + delay (step1 의 pit{delay}d.csv)
+- 같은 유효일 레코드가 여럿이면 파일 순서상 마지막 레코드
+- 결측은 종목별 median 으로 채움 (기존 merge_sf1_pit 와 동일), float32
+
+캐시: results/cache/sf1_panels/{key}.npz, key = (SF1 파일 sha1, delay, anchor, formula,
+symbols) 해시. 저장된 날짜 축의 부분 구간은 잘라서 재사용 → 여섯 단계 튜닝 스크립트가
+같은 패널을 다시 merge 하지 않는다.
+
+Usage:
+
+    from engines.sf1_panel import load_quality_panels
+
+    panels = load_quality_panels(stock_returns.index, stock_returns.columns, delays=(45, 60, 90))
+    quality_df = panels[90]
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from engines.result_store import params_hash
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SF1_RAW = BASE_DIR / "data" / "ares7_sf1_fundamentals.csv"
+DEFAULT_CACHE_DIR = BASE_DIR / "results" / "cache" / "sf1_panels"
+
+# column → (가중치, 결측 채움값):  0.5·ROE + 0.3·EBITDA margin - 0.2·D/E
+QUALITY_FORMULA: Dict[str, tuple] = {
+    "roe": (0.5, 0.0),
+    "ebitdamargin": (0.3, 0.0),
+    "de": (-0.2, 1.0),
+}
+
+_STRIDE = np.int64(1) << 32     # 종목 코드 간격 (일 단위 날짜보다 충분히 큼)
+
+
+def quality_scores(sf1_df: pd.DataFrame, formula: Optional[Dict[str, tuple]] = None) -> np.ndarray:
+    """레코드별 quality score (E,)"""
+    formula = formula or QUALITY_FORMULA
+    score = np.zeros(len(sf1_df))
+    for col, (w, fill) in formula.items():
+        score += w * sf1_df[col].fillna(fill).to_numpy(dtype=np.float64)
+    return score
+
+
+def _days(values) -> np.ndarray:
+    return pd.DatetimeIndex(values).values.astype("datetime64[D]").astype(np.int64)
+
+
+def _fill(df: pd.DataFrame) -> pd.DataFrame:
+    """종목별 median 으로 결측 채움"""
+    return df.fillna(df.median())
+
+
+def build_quality_panels(
+    sf1_df: pd.DataFrame,
+    dates: pd.DatetimeIndex,
+    symbols: Sequence[str],
+    delays: Iterable[int] = (90,),
+    anchor: str = "max",
+    formula: Optional[Dict[str, tuple]] = None,
+    fill_median: bool = True,
+) -> Dict[int, pd.DataFrame]:
+    """
+    여러 delay 의 (T x N) quality 패널을 한 번에.
+
+    Returns:
+        {delay: DataFrame(index=dates, columns=symbols, float32)}
+    """
+    dates = pd.DatetimeIndex(dates)
+    symbols = pd.Index(symbols)
+    if anchor == "datekey":
+        base = _days(sf1_df["datekey"])
+    elif anchor == "max":
+        base = np.maximum(_days(sf1_df["datekey"]), _days(sf1_df["calendardate"]))
+    else:
+        raise ValueError(f"unknown anchor '{anchor}'")
+
+    code = symbols.get_indexer(sf1_df["ticker"])
+    ok = (code >= 0) & (base > np.iinfo(np.int64).min)     # NaT 제외
+    score = quality_scores(sf1_df, formula)[ok]
+    code, base = code[ok].astype(np.int64), base[ok]
+    key = code * _STRIDE + base
+    order = np.argsort(key, kind="stable")
+    key, code, score = key[order], code[order], score[order]
+
+    T, N = len(dates), len(symbols)
+    cols = np.arange(N, dtype=np.int64) * _STRIDE
+    t_days = _days(dates)
+
+    panels = {}
+    for delay in delays:
+        query = cols[None, :] + (t_days - int(delay))[:, None]            # (T x N)
+        idx = np.searchsorted(key, query.ravel(), side="right") - 1
+        hit = idx >= 0
+        hit[hit] = code[idx[hit]] == np.tile(np.arange(N), T)[hit]
+        Q = np.full(T * N, np.nan, dtype=np.float32)
+        Q[hit] = score[idx[hit]]
+        df = pd.DataFrame(Q.reshape(T, N), index=dates, columns=symbols)
+        panels[int(delay)] = _fill(df) if fill_median else df
+    return panels
+
+
+# ---- on-disk cache ---------------------------------------------------------- #
+
+def source_hash(path) -> str:
+    """파일 내용 sha1 (앞 16자리)"""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def panel_key(src_hash: str, delay: int, anchor: str, formula: Dict[str, tuple],
+              symbols: Sequence[str]) -> str:
+    return params_hash({
+        "source": src_hash,
+        "delay": int(delay),
+        "anchor": anchor,
+        "formula": {k: list(v) for k, v in sorted(formula.items())},
+        "symbols": hashlib.sha1("\0".join(map(str, symbols)).encode()).hexdigest()[:16],
+    })
+
+
+def load_quality_panels(
+    dates: pd.DatetimeIndex,
+    symbols: Sequence[str],
+    delays: Iterable[int] = (90,),
+    sf1_path=SF1_RAW,
+    anchor: str = "max",
+    formula: Optional[Dict[str, tuple]] = None,
+    cache_dir=DEFAULT_CACHE_DIR,
+    verbose: bool = True,
+) -> Dict[int, pd.DataFrame]:
+    """
+    캐시된 패널을 읽고, 없는 delay 만 SF1 을 한 번 읽어 함께 계산 후 저장.
+
+    캐시는 median 채우기 전 패널 + 날짜 축을 저장한다. 요청 날짜가 저장된 날짜의
+    부분집합이면 잘라서 쓰고 (median 은 요청 구간 기준), 아니면 합집합 날짜로 다시 만든다.
+    → step1 이 prices 전체 날짜로 캐시를 채우면 이후 단계는 날짜 구간이 달라도 재사용.
+    cache_dir=None 이면 캐시 없이 계산만.
+    """
+    dates = pd.DatetimeIndex(dates)
+    symbols = pd.Index(symbols)
+    formula = formula or QUALITY_FORMULA
+    delays = [int(d) for d in delays]
+    src = source_hash(sf1_path)
+
+    raw: Dict[int, pd.DataFrame] = {}
+    paths, grid = {}, dates
+    if cache_dir is not None:
+        cache_dir = Path(cache_dir)
+        for d in delays:
+            paths[d] = cache_dir / f"{panel_key(src, d, anchor, formula, symbols)}.npz"
+            if not paths[d].exists():
+                continue
+            with np.load(paths[d], allow_pickle=False) as z:
+                stored = pd.DatetimeIndex(z["dates"].astype("datetime64[D]"))
+                if dates.isin(stored).all():
+                    raw[d] = pd.DataFrame(z["quality"], index=stored, columns=symbols)
+                else:
+                    grid = grid.union(stored)
+
+    missing = [d for d in delays if d not in raw]
+    if verbose:
+        print(f"\n🔗 SF1 quality panels (point-in-time, anchor={anchor}, delays={delays})")
+        print(f"   Cached: {sorted(raw)}  Build: {missing}")
+    if missing:
+        sf1_df = pd.read_csv(sf1_path, parse_dates=["datekey", "calendardate"])
+        built = build_quality_panels(sf1_df, grid, symbols, missing, anchor, formula, fill_median=False)
+        for d, df in built.items():
+            raw[d] = df
+            if cache_dir is not None:
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp = paths[d].with_name(paths[d].stem + ".tmp.npz")
+                np.savez(tmp, quality=df.to_numpy(dtype=np.float32), dates=_days(grid))
+                tmp.replace(paths[d])
+
+    panels = {d: _fill(raw[d].reindex(dates)) for d in delays}
+    if verbose:
+        for d in delays:
+            cov = panels[d].notna().to_numpy().mean() * 100
+            print(f"   delay={d}d: {panels[d].shape}, coverage {cov:.1f}%")
+    return panels
@@ -0,0 +1,88 @@
+# engines/tuning_data.py
+"""
+step1~6 튜닝 스크립트 공통 입력
+
+step2/3/5/6 는 각각 baseline JSON 을 [item['ret'] for item in ...] 로 다시 파싱하고,
+prices.csv 를 읽어 pivot → pct_change → 날짜 정렬을 같은 코드로 반복했다.
+이 모듈은 그 로딩을 한 곳에 모으고, run_tuning_pipeline.py 가 한 번 만든 프레임을
+각 단계에 주입할 수 있게 한다 (단독 실행 시에는 각 단계가 여기서 직접 로드).
+
+Usage:
+
+    from engines.tuning_data import load_aligned_returns, load_bull_regime
+
+    baseline_returns, stock_returns = load_aligned_returns()
+    bull_regime = load_bull_regime(stock_returns.index)
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from engines.result_store import returns_from_json
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BASELINE_FILE = BASE_DIR / "results" / "ares7_best_ensemble_results.json"
+PRICES_FILE = BASE_DIR / "data" / "prices.csv"
+REGIME_FILE = BASE_DIR / "data" / "bull_regime.csv"
+RESULTS_DIR = BASE_DIR / "tuning" / "results"
+
+# train / OOS 구간 (step2~6 공통)
+SPLITS: Dict[str, Tuple[str, str]] = {
+    "train": ("2015-11-25", "2019-12-31"),
+    "oos1": ("2020-01-01", "2021-12-31"),
+    "oos2": ("2022-01-01", "2024-12-31"),
+    "oos3": ("2025-01-01", "2025-11-18"),
+}
+
+
+def load_baseline_returns(path=BASELINE_FILE) -> pd.Series:
+    """ARES7-Best 앙상블 daily_returns → Series(name='baseline')"""
+    with open(path) as f:
+        data = json.load(f)
+    dates, values = returns_from_json(data)
+    return pd.Series(values, index=pd.DatetimeIndex(dates), name="baseline")
+
+
+def load_stock_returns(path=PRICES_FILE) -> pd.DataFrame:
+    """prices.csv (timestamp, symbol, close) → 일간 수익률 (T x N), 결측 0"""
+    df = pd.read_csv(path, usecols=["timestamp", "symbol", "close"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"]).dt.normalize()
+    prices = df.pivot(index="timestamp", columns="symbol", values="close")
+    return prices.pct_change().fillna(0.0)
+
+
+def align_returns(baseline_returns: pd.Series,
+                  stock_returns: pd.DataFrame) -> Tuple[pd.Series, pd.DataFrame]:
+    """공통 날짜로 정렬"""
+    common_dates = baseline_returns.index.intersection(stock_returns.index)
+    return baseline_returns.loc[common_dates], stock_returns.loc[common_dates]
+
+
+def load_aligned_returns(baseline_path=BASELINE_FILE,
+                         prices_path=PRICES_FILE) -> Tuple[pd.Series, pd.DataFrame]:
+    return align_returns(load_baseline_returns(baseline_path), load_stock_returns(prices_path))
+
+
+def load_bull_regime(index: Optional[pd.DatetimeIndex] = None, path=REGIME_FILE) -> pd.Series:
+    """step4 의 bull_regime.csv → bool Series (index 가 주어지면 reindex, 없는 날은 False)"""
+    bull_regime = pd.read_csv(path, parse_dates=[0], index_col=0).squeeze("columns").astype(bool)
+    if index is not None:
+        bull_regime = bull_regime.reindex(index, fill_value=False)
+    return bull_regime
+
+
+def split_masks(index: pd.DatetimeIndex, splits: Optional[Dict[str, Tuple[str, str]]] = None
+                ) -> Dict[str, np.ndarray]:
+    """구간 이름 → bool mask (빈 구간 제외)"""
+    out = {}
+    for name, (start, end) in (splits or SPLITS).items():
+        mask = (index >= pd.Timestamp(start)) & (index <= pd.Timestamp(end))
+        if mask.any():
+            out[name] = mask
+    return out
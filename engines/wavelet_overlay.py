@@ -0,0 +1,273 @@
+# engines/wavelet_overlay.py
+"""
+Wavelet Overlay 엔진 (인과적 MODWT, 배치 + 증분)
+
+run_daily_wavelet_pead_prod.sh 의 Step 1 은 실제 엔진 없이 generate_sample_overlays.py 의
+난수 tilt 로 대체되어 있었다. 이 모듈은 (T x N) 수익률 행렬 전체를 시간 축으로 한 번에
+MODWT (maximal-overlap DWT, à trous) 분해하고, 선택한 detail / approximation 밴드를
+종목별 tilt 로 바꾼다.
+
+- 인과성: level j 필터는 X[t], X[t - 2^(j-1)], ..., X[t - (L-1)·2^(j-1)] 만 사용 (한쪽 필터).
+  주기적(circular) 경계 대신 warm-up 구간 ((2^j - 1)(L-1) 행) 은 NaN → 미래 값을 보지 않는다.
+- modwt_causal: 레벨마다 lag 슬라이스 L 개의 선형결합, O(T·N·L·J)
+- WaveletState: 레벨별 trailing 버퍼 (길이 (L-1)·2^(j-1) + 1) 만 유지,
+  새 bar 1개 갱신 비용 O(N·L·J). 배치 마지막 행과 수치적으로 동일
+- band_signal / signal_to_tilts: 밴드 가중합 → 단면 z-score → tilt (scale, cap)
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import json
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+# MODWT 스케일링 필터 g̃ (합 = 1, DWT 필터 / √2). wavelet 필터 h̃_l = (-1)^l g̃_(L-1-l)
+_SQ3 = np.sqrt(3.0)
+MODWT_FILTERS: Dict[str, np.ndarray] = {
+    "haar": np.array([0.5, 0.5]),
+    "d4": np.array([1 + _SQ3, 3 + _SQ3, 3 - _SQ3, 1 - _SQ3]) / 8.0,
+}
+
+
+def modwt_filters(wavelet: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(scaling g̃, wavelet h̃) 필터"""
+    try:
+        g = MODWT_FILTERS[wavelet]
+    except KeyError:
+        raise ValueError(f"unknown wavelet '{wavelet}' (available: {sorted(MODWT_FILTERS)})")
+    L = len(g)
+    h = np.array([(-1) ** l * g[L - 1 - l] for l in range(L)])
+    return g, h
+
+
+def warmup_rows(levels: int, wavelet: str = "haar") -> int:
+    """level J 계수가 처음으로 정의되는 행 수 ((2^J - 1)(L-1))"""
+    L = len(MODWT_FILTERS[wavelet])
+    return (2 ** levels - 1) * (L - 1)
+
+
+def modwt_causal(
+    X: np.ndarray,
+    levels: int = 4,
+    wavelet: str = "haar",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    인과적 MODWT (T x N 행렬, 시간 축 일괄).
+
+    Args:
+        X: (T x N) 또는 (T,) 입력 (예: 일별 로그 수익률)
+        levels: 분해 레벨 J
+        wavelet: "haar" / "d4"
+
+    Returns:
+        details: (J x T x N) wavelet 계수 W_1..W_J
+        approx: (T x N) scaling 계수 V_J
+        (warm-up 구간과 입력 NaN 이 걸린 위치는 NaN)
+    """
+    V = np.asarray(X, dtype=np.float64)
+    squeeze = V.ndim == 1
+    if squeeze:
+        V = V[:, None]
+    T, N = V.shape
+    g, h = modwt_filters(wavelet)
+    L = len(g)
+
+    details = np.empty((levels, T, N))
+    for j in range(levels):
+        step = 2 ** j
+        pad = step * (L - 1)
+        Vp = np.vstack([np.full((pad, N), np.nan), V])
+        Wj = np.zeros((T, N))
+        Vj = np.zeros((T, N))
+        for l in range(L):
+            lagged = Vp[pad - step * l: pad - step * l + T]
+            Wj += h[l] * lagged
+            Vj += g[l] * lagged
+        details[j] = Wj
+        V = Vj
+
+    if squeeze:
+        return details[:, :, 0], V[:, 0]
+    return details, V
+
+
+def band_signal(
+    details: np.ndarray,
+    approx: np.ndarray,
+    detail_weights: Sequence[float],
+    approx_weight: float,
+) -> np.ndarray:
+    """Σ_j w_j W_j + w_A V_J  (details: (J x ...) , approx: (...))"""
+    w = np.asarray(detail_weights, dtype=np.float64)
+    if len(w) != details.shape[0]:
+        raise ValueError(f"detail_weights has {len(w)} entries for {details.shape[0]} levels")
+    sig = approx_weight * approx
+    for j in np.flatnonzero(w):
+        sig = sig + w[j] * details[j]
+    return sig
+
+
+def signal_to_tilts(signal: np.ndarray, tilt_scale: float = 0.01, tilt_cap: float = 0.03) -> np.ndarray:
+    """
+    단면 z-score → tilt. signal: (N,) 또는 (T x N), 행마다 독립.
+
+    NaN 종목은 tilt 0.
+    """
+    S = np.asarray(signal, dtype=np.float64)
+    squeeze = S.ndim == 1
+    if squeeze:
+        S = S[None]
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)   # warm-up 행 (전부 NaN)
+        mu = np.nanmean(S, axis=1, keepdims=True)
+        sd = np.nanstd(S, axis=1, ddof=1, keepdims=True)
+        z = (S - mu) / sd
+    tilts = np.clip(np.nan_to_num(z * tilt_scale, nan=0.0, posinf=0.0, neginf=0.0),
+                    -tilt_cap, tilt_cap)
+    return tilts[0] if squeeze else tilts
+
+
+# ---- Config / incremental state ------------------------------------------- #
+
+@dataclass
+class WaveletConfig:
+    """
+    기본값: 중기 추세 (A4, ~16일 평활) 롱 + 단기 (D1) 반전.
+    """
+    wavelet: str = "haar"
+    levels: int = 4
+    detail_weights: Tuple[float, ...] = (-0.5, 0.0, 0.0, 0.0)
+    approx_weight: float = 1.0
+    tilt_scale: float = 0.01
+    tilt_cap: float = 0.03
+
+    def __post_init__(self):
+        self.detail_weights = tuple(float(w) for w in self.detail_weights)
+        if len(self.detail_weights) != self.levels:
+            raise ValueError("detail_weights length must equal levels")
+        modwt_filters(self.wavelet)
+
+
+def wavelet_tilts(returns: pd.DataFrame, config: Optional[WaveletConfig] = None) -> pd.DataFrame:
+    """배치: (T x N) 수익률 → (T x N) 일별 tilt (t 행은 t 까지의 수익률만 사용)"""
+    cfg = config or WaveletConfig()
+    details, approx = modwt_causal(returns.to_numpy(dtype=np.float64), cfg.levels, cfg.wavelet)
+    sig = band_signal(details, approx, cfg.detail_weights, cfg.approx_weight)
+    return pd.DataFrame(
+        signal_to_tilts(sig, cfg.tilt_scale, cfg.tilt_cap),
+        index=returns.index,
+        columns=returns.columns,
+    )
+
+
+@dataclass
+class WaveletState:
+    """
+    증분 MODWT 상태.
+
+    buffers[j] 는 level j 입력 (V_j, V_0 = X) 의 최근 (L-1)·2^j + 1 행 (ring buffer).
+    count 는 지금까지 들어온 bar 수 (warm-up 판정용).
+    """
+    config: WaveletConfig
+    symbols: List[str]
+    last_date: Optional[str] = None
+    count: int = 0
+    buffers: List[np.ndarray] = field(default_factory=list)
+
+    def __post_init__(self):
+        if not self.buffers:
+            L = len(MODWT_FILTERS[self.config.wavelet])
+            N = len(self.symbols)
+            self.buffers = [
+                np.full(((L - 1) * 2 ** j + 1, N), np.nan) for j in range(self.config.levels)
+            ]
+
+    def update(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        새 bar 하나 반영. O(N·L·J)
+
+        Returns:
+            details: (J x N) 이 bar 의 W_1..W_J, approx: (N,) V_J
+        """
+        cfg = self.config
+        g, h = modwt_filters(cfg.wavelet)
+        L = len(g)
+        t = self.count
+        v = np.asarray(x, dtype=np.float64)
+        details = np.empty((cfg.levels, len(v)))
+        for j, buf in enumerate(self.buffers):
+            B = len(buf)
+            buf[t % B] = v
+            step = 2 ** j
+            w_j = np.zeros_like(v)
+            v_next = np.zeros_like(v)
+            for l in range(L):
+                k = t - step * l
+                lagged = buf[k % B] if k >= 0 else np.full_like(v, np.nan)
+                w_j += h[l] * lagged
+                v_next += g[l] * lagged
+            details[j] = w_j
+            v = v_next
+        self.count += 1
+        return details, v
+
+    def tilts(self, details: np.ndarray, approx: np.ndarray) -> np.ndarray:
+        cfg = self.config
+        sig = band_signal(details, approx, cfg.detail_weights, cfg.approx_weight)
+        return signal_to_tilts(sig, cfg.tilt_scale, cfg.tilt_cap)
+
+    @classmethod
+    def from_history(cls, returns: pd.DataFrame, config: Optional[WaveletConfig] = None) -> "WaveletState":
+        """히스토리 전체로 초기화 (마지막 버퍼 구간만 채우면 충분)"""
+        cfg = config or WaveletConfig()
+        state = cls(config=cfg, symbols=[str(c) for c in returns.columns])
+        X = returns.to_numpy(dtype=np.float64)
+        T = len(X)
+        # level j 버퍼는 V_j 의 최근 값이 필요 → 앞 레벨을 배치로 계산해 tail 만 적재
+        V = X
+        g, _ = modwt_filters(cfg.wavelet)
+        L = len(g)
+        for j, buf in enumerate(state.buffers):
+            B = len(buf)
+            for t in range(max(0, T - B), T):
+                buf[t % B] = V[t]
+            step = 2 ** j
+            pad = step * (L - 1)
+            Vp = np.vstack([np.full((pad, V.shape[1]), np.nan), V])
+            V = sum(g[l] * Vp[pad - step * l: pad - step * l + T] for l in range(L))
+        state.count = T
+        if T:
+            state.last_date = pd.Timestamp(returns.index[-1]).isoformat()
+        return state
+
+    def save(self, path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "config": asdict(self.config),
+            "symbols": self.symbols,
+            "last_date": self.last_date,
+            "count": self.count,
+        }
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(tmp, meta=np.array(json.dumps(meta)), *self.buffers)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path) -> Optional["WaveletState"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            cfg = WaveletConfig(**meta["config"])
+            buffers = [z[f"arr_{j}"] for j in range(cfg.levels)]
+        return cls(config=cfg, symbols=meta["symbols"], last_date=meta["last_date"],
+                   count=meta["count"], buffers=buffers)
@@ -0,0 +1,322 @@
+# ensemble/adaptive_ensemble.py
+"""
+Rolling-Sharpe 적응형 앙상블 (배열 커널 버전)
+
+ares7_super_ensemble.py::ARES7SuperEnsemble.run 은 날짜마다 df.iloc[:i] 를 잘라
+AdaptiveWeighting.calculate_weights 를 호출하고, 가중치 dict 의 합집합으로 turnover 를
+계산하며, df.loc[date, col] 로 일별 수익률을 더한다. 설정 하나에 수 초가 걸려
+파라미터 스윕이 불가능했다.
+
+여기서는
+- trailing_* 커널: t 시점 값은 [t-L, t) 구간 (df.iloc[:t].iloc[-L:] 와 동일),
+  sliding_window_view 로 모든 엔진을 한 번에 계산 (pandas 와 같은 2-pass 분산)
+- 리밸런싱 마스크 (i % rebal_freq == 0 and i >= sharpe_lookback) 위치에서만
+  softmax 가중치를 만들고 forward-fill → (T x K) 가중치 경로
+- turnover = 리밸런싱 시점 가중치 diff 의 L1 합
+- 변동성 타깃 레버리지는 직전 앙상블 수익률에 의존 (경로 의존) → 리밸런싱 구간 단위로만
+  순차 진행하고, 구간 안 / 설정 간은 배열 연산
+- sweep_adaptive_ensemble: temperature / min_weight / target_vol / 레버리지 한도 /
+  turnover_cost 조합 수천 개를 (C x T) 로 한 번에 평가
+
+run_adaptive_ensemble 은 ARES7SuperEnsemble.run 의 일별 루프와 같은 결과를 낸다
+(부동소수점 반올림 수준 차이).
+"""
+
+from __future__ import annotations
+
+import itertools
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+TRADING_DAYS = 252
+
+
+# ---- Trailing-window kernels ----------------------------------------------- #
+
+def _trailing_windows(X: np.ndarray, lookback: int, rows: np.ndarray) -> np.ndarray:
+    """rows 각 t 에 대해 X[t-lookback:t] → (len(rows), lookback, ...) (rows >= lookback)"""
+    win = sliding_window_view(X, lookback, axis=0)       # (T-L+1, ..., L)
+    win = np.moveaxis(win, -1, 1)                         # (T-L+1, L, ...)
+    return win[np.asarray(rows) - lookback]
+
+
+def _valid_rows(T: int, lookback: int, rows: Optional[Sequence[int]]) -> np.ndarray:
+    if rows is None:
+        return np.arange(lookback, T + 1) if T >= lookback else np.arange(0)
+    return np.asarray(rows, dtype=np.int64)
+
+
+def trailing_sharpe(X: np.ndarray, lookback: int, rows: Optional[Sequence[int]] = None) -> np.ndarray:
+    """
+    연율화 Sharpe (mean*252 / (std*sqrt(252)), std<=0 → 0), t 시점 값은 X[t-L:t] 로 계산.
+
+    Args:
+        X: (T x K) 수익률
+        rows: 계산할 t 목록 (기본: L..T)
+
+    Returns:
+        (len(rows) x K)
+    """
+    X = np.asarray(X, dtype=np.float64)
+    w = _trailing_windows(X, lookback, _valid_rows(len(X), lookback, rows))
+    mean_ret = w.mean(axis=1) * TRADING_DAYS
+    std_ret = w.std(axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(std_ret > 0, mean_ret / std_ret, 0.0)
+
+
+def trailing_vol(X: np.ndarray, lookback: int, rows: Optional[Sequence[int]] = None) -> np.ndarray:
+    """연율화 변동성, t 시점 값은 X[t-L:t] 로 계산. X 는 (T,) 또는 (T x K)."""
+    X = np.asarray(X, dtype=np.float64)
+    w = _trailing_windows(X, lookback, _valid_rows(len(X), lookback, rows))
+    return w.std(axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+
+
+def trailing_corr(X: np.ndarray, lookback: int, rows: Optional[Sequence[int]] = None) -> np.ndarray:
+    """엔진 간 상관 행렬, t 시점 값은 X[t-L:t] 로 계산 → (len(rows) x K x K)"""
+    X = np.asarray(X, dtype=np.float64)
+    w = _trailing_windows(X, lookback, _valid_rows(len(X), lookback, rows))
+    d = w - w.mean(axis=1, keepdims=True)
+    cov = np.einsum("nlk,nlj->nkj", d, d)
+    sd = np.sqrt(np.einsum("nkk->nk", cov))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return cov / (sd[:, :, None] * sd[:, None, :])
+
+
+def softmax_weights(sharpes: np.ndarray, temperature, min_weight) -> np.ndarray:
+    """
+    AdaptiveWeighting.calculate_weights 의 배열 버전.
+
+    sharpes: (..., K). 음수가 있으면 행별로 s - min + 0.1 로 이동 후
+    softmax(s / temperature), 하한 min_weight, 합 1 정규화.
+    temperature / min_weight 는 스칼라 또는 앞쪽 차원에 broadcast 되는 배열.
+    """
+    s = np.asarray(sharpes, dtype=np.float64)
+    smin = s.min(axis=-1, keepdims=True)
+    s = np.where(smin < 0, s - smin + 0.1, s)
+    z = s / np.asarray(temperature, dtype=np.float64)[..., None]
+    e = np.exp(z - z.max(axis=-1, keepdims=True))
+    w = e / e.sum(axis=-1, keepdims=True)
+    w = np.maximum(w, np.asarray(min_weight, dtype=np.float64)[..., None])
+    return w / w.sum(axis=-1, keepdims=True)
+
+
+# ---- Engine ---------------------------------------------------------------- #
+
+@dataclass
+class AdaptiveEnsembleResult:
+    returns: pd.Series           # 순수익률 (레버리지, turnover 비용 반영)
+    weights: pd.DataFrame        # (T x K) 보유 가중치
+    leverage: pd.Series
+    turnover: pd.Series          # 리밸런싱일에만 0 이 아님
+    rebalance_dates: pd.DatetimeIndex
+    avg_corr: pd.Series          # 리밸런싱 시점 평균 엔진 간 상관 (진단용)
+
+
+def rebalance_rows(T: int, rebal_freq: int, sharpe_lookback: int) -> np.ndarray:
+    """ARES7SuperEnsemble.run 의 리밸런싱 조건: i % rebal_freq == 0 and i >= sharpe_lookback"""
+    rows = np.arange(0, T, rebal_freq)
+    return rows[rows >= sharpe_lookback]
+
+
+def _simulate(
+    R: np.ndarray,
+    rows: np.ndarray,
+    W_rebal: np.ndarray,
+    turnover_cost: np.ndarray,
+    target_vol: np.ndarray,
+    vol_lookback: int,
+    min_leverage: np.ndarray,
+    max_leverage: np.ndarray,
+):
+    """
+    C 개 설정을 동시에 시뮬레이션.
+
+    R: (T x K), rows: (n,), W_rebal: (C x n x K) 리밸런싱 가중치,
+    나머지 설정 배열: (C,)
+
+    Returns:
+        net (C x T), lev_rebal (C x n), turnover (C x n)
+    """
+    T, K = R.shape
+    C = W_rebal.shape[0]
+    w0 = np.full((C, 1, K), 1.0 / K)
+    turnover = np.abs(np.diff(np.concatenate([w0, W_rebal], axis=1), axis=1)).sum(axis=-1)
+
+    net = np.empty((C, T))
+    lev = np.ones(C)
+    lev_rebal = np.empty((C, len(rows)))
+    bounds = np.append(rows, T)
+
+    # 첫 리밸런싱 이전: 동일가중, 레버리지 1
+    first = bounds[0]
+    net[:, :first] = (R[:first] @ np.full(K, 1.0 / K))[None, :]
+
+    for j, r in enumerate(rows):
+        # 레버리지는 리밸런싱일에만, 직전까지의 앙상블 수익률로 갱신
+        if r > vol_lookback:
+            recent = net[:, r - vol_lookback:r]
+            vol = recent.std(axis=1, ddof=1) * np.sqrt(TRADING_DAYS)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                new_lev = np.clip(target_vol / vol, min_leverage, max_leverage)
+            lev = np.where((vol > 0) & np.isfinite(vol), new_lev, 1.0)
+        lev_rebal[:, j] = lev
+
+        block = R[r:bounds[j + 1]]                        # (n_b x K)
+        gross = np.einsum("ck,tk->ct", W_rebal[:, j], block)
+        net[:, r:bounds[j + 1]] = gross * lev[:, None]
+        net[:, r] -= turnover[:, j] * turnover_cost
+
+    return net, lev_rebal, turnover
+
+
+def run_adaptive_ensemble(
+    returns: pd.DataFrame,
+    rebal_freq: int = 21,
+    sharpe_lookback: int = 63,
+    temperature: float = 0.5,
+    min_weight: float = 0.05,
+    vol_lookback: int = 60,
+    target_vol: float = 0.10,
+    min_leverage: float = 0.3,
+    max_leverage: float = 2.0,
+    turnover_cost: float = 0.0010,
+    corr_lookback: int = 63,
+) -> AdaptiveEnsembleResult:
+    """
+    ARES7SuperEnsemble.run 의 앙상블 루프 (Rolling Sharpe softmax + 변동성 타깃 + turnover 비용).
+
+    Args:
+        returns: (T x K) 공통 날짜로 정렬된 엔진 수익률 (NaN 없음)
+    """
+    R = returns.to_numpy(dtype=np.float64)
+    T, K = R.shape
+    rows = rebalance_rows(T, rebal_freq, sharpe_lookback)
+
+    S = trailing_sharpe(R, sharpe_lookback, rows)                     # (n x K)
+    W = softmax_weights(S, temperature, min_weight)[None]            # (1 x n x K)
+    net, lev_rebal, turnover = _simulate(
+        R, rows, W, np.array([turnover_cost]), np.array([target_vol]), vol_lookback,
+        np.array([min_leverage]), np.array([max_leverage]),
+    )
+
+    idx = returns.index
+    held = np.full((T, K), 1.0 / K)
+    lev = np.ones(T)
+    seg = np.searchsorted(rows, np.arange(T), side="right") - 1      # 직전 리밸런싱 번호
+    after = seg >= 0
+    held[after] = W[0][seg[after]]
+    lev[after] = lev_rebal[0][seg[after]]
+    to = np.zeros(T)
+    to[rows] = turnover[0]
+
+    corr_rows = rows[rows >= corr_lookback]
+    avg_corr = pd.Series(dtype=float)
+    if len(corr_rows) and K > 1:
+        Cm = trailing_corr(R, corr_lookback, corr_rows)
+        off = (Cm.sum(axis=(1, 2)) - np.einsum("nkk->n", Cm)) / (K * (K - 1))
+        avg_corr = pd.Series(off, index=idx[corr_rows])
+
+    return AdaptiveEnsembleResult(
+        returns=pd.Series(net[0], index=idx),
+        weights=pd.DataFrame(held, index=idx, columns=returns.columns),
+        leverage=pd.Series(lev, index=idx),
+        turnover=pd.Series(to, index=idx),
+        rebalance_dates=idx[rows],
+        avg_corr=avg_corr,
+    )
+
+
+# ---- Sweep ----------------------------------------------------------------- #
+
+def _path_stats(net: np.ndarray) -> Dict[str, np.ndarray]:
+    """(C x T) 수익률 → 설정별 지표 (ARES7SuperEnsemble.calculate_stats 와 같은 정의)"""
+    mean = net.mean(axis=1)
+    std = net.std(axis=1, ddof=1)
+    ann_ret = mean * TRADING_DAYS
+    ann_vol = std * np.sqrt(TRADING_DAYS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(ann_vol > 0, ann_ret / ann_vol, 0.0)
+    cum = np.cumprod(1.0 + net, axis=1)
+    mdd = (cum / np.maximum.accumulate(cum, axis=1) - 1.0).min(axis=1)
+    downside = np.where(net < 0, net, np.nan)
+    n_down = (net < 0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        down_std = np.sqrt(np.nansum((downside - np.nanmean(downside, axis=1, keepdims=True)) ** 2,
+                                     axis=1) / (n_down - 1)) * np.sqrt(TRADING_DAYS)
+        sortino = np.where(down_std > 0, ann_ret / down_std, 0.0)
+        calmar = np.where(mdd < 0, ann_ret / np.abs(mdd), 0.0)
+    return {
+        "sharpe": sharpe,
+        "annual_return": ann_ret,
+        "annual_volatility": ann_vol,
+        "max_drawdown": mdd,
+        "sortino": np.nan_to_num(sortino),
+        "calmar": calmar,
+        "win_rate": (net > 0).mean(axis=1),
+        "total_return": cum[:, -1] - 1.0,
+    }
+
+
+def sweep_adaptive_ensemble(
+    returns: pd.DataFrame,
+    grid: Dict[str, Iterable],
+    chunk_size: int = 2048,
+) -> pd.DataFrame:
+    """
+    앙상블 설정 조합 전체를 평가.
+
+    grid: run_adaptive_ensemble 인자 이름 → 후보 값 목록 (없는 인자는 기본값).
+        rebal_freq / sharpe_lookback / vol_lookback 은 리밸런싱 구조를 바꾸므로 그룹 단위,
+        나머지 (temperature, min_weight, target_vol, min/max_leverage, turnover_cost) 는
+        (C x T) 배열로 한 번에 계산.
+
+    Returns:
+        조합별 파라미터 + 지표 DataFrame (sharpe 내림차순)
+    """
+    defaults = dict(rebal_freq=21, sharpe_lookback=63, vol_lookback=60, temperature=0.5,
+                    min_weight=0.05, target_vol=0.10, min_leverage=0.3, max_leverage=2.0,
+                    turnover_cost=0.0010)
+    unknown = set(grid) - set(defaults)
+    if unknown:
+        raise ValueError(f"unknown sweep parameters: {sorted(unknown)}")
+    axes = {k: list(grid.get(k, [v])) for k, v in defaults.items()}
+    structural = ["rebal_freq", "sharpe_lookback", "vol_lookback"]
+    vector = [k for k in defaults if k not in structural]
+
+    R = returns.to_numpy(dtype=np.float64)
+    T, K = R.shape
+    vec_combos = np.array(list(itertools.product(*[axes[k] for k in vector])), dtype=np.float64)
+    p = {k: vec_combos[:, i] for i, k in enumerate(vector)}
+
+    frames: List[pd.DataFrame] = []
+    for rebal_freq, sharpe_lookback, vol_lookback in itertools.product(
+            *[axes[k] for k in structural]):
+        rows = rebalance_rows(T, int(rebal_freq), int(sharpe_lookback))
+        if len(rows) == 0:
+            continue
+        S = trailing_sharpe(R, int(sharpe_lookback), rows)
+        for lo in range(0, len(vec_combos), chunk_size):
+            sl = slice(lo, lo + chunk_size)
+            W = softmax_weights(S[None], p["temperature"][sl, None], p["min_weight"][sl, None])
+            net, _, turnover = _simulate(
+                R, rows, W, p["turnover_cost"][sl], p["target_vol"][sl], int(vol_lookback),
+                p["min_leverage"][sl], p["max_leverage"][sl],
+            )
+            df = pd.DataFrame({k: p[k][sl] for k in vector})
+            df.insert(0, "vol_lookback", int(vol_lookback))
+            df.insert(0, "sharpe_lookback", int(sharpe_lookback))
+            df.insert(0, "rebal_freq", int(rebal_freq))
+            for name, vals in _path_stats(net).items():
+                df[name] = vals
+            df["avg_turnover"] = turnover.mean(axis=1)
+            frames.append(df)
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True).sort_values("sharpe", ascending=False,
+                                                            ignore_index=True)
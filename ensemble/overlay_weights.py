@@ -0,0 +1,204 @@
+# ensemble/overlay_weights.py
+"""
+Overlay sleeve 가중치 최적화 (심플렉스 그리드 / walk-forward / block bootstrap)
+
+run_wavelet_pead_optimizer.py::optimize_weights 는 2x2 Σ^-1 μ 를 한 번 풀고, 실패하면
+51 점 Python 루프에서 점마다 sharpe() 를 호출했다. 운영 가중치 (0.540 / 0.460) 는 그 결과를
+하드코딩한 것이라, 가중치 안정성을 확인할 방법이 없었다.
+
+- simplex_grid: N sleeve, 합 1 / 비음수, 1/steps 간격 전체 격자 (G x N)
+- grid_sharpe: 평균 / 공분산 모멘트로 모든 격자점 Sharpe 를 행렬곱 한 번에
+  (sharpe = μ'w / sqrt(w'Σw) · √252, pandas std 와 같은 ddof=1)
+- walk_forward_weights: 누적합으로 모든 윈도우의 (μ, Σ) 를 동시에 만들고 (K x G) Sharpe → argmax
+- bootstrap_weights: moving-block bootstrap 인덱스를 (B x T) 로 한 번에 생성,
+  표본별 최적 가중치 분포와 신뢰구간
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+ANN = np.sqrt(252)
+
+
+def simplex_grid(n: int, steps: int = 50) -> np.ndarray:
+    """
+    합이 1 인 n 차원 격자 (간격 1/steps). 점 개수 = C(steps + n - 1, n - 1).
+
+    n=2 이면 첫 열이 0 → 1 (linspace(0, 1, steps+1)), 둘째 열은 1 - 첫 열.
+    """
+    if n == 1:
+        return np.ones((1, 1))
+    # stars and bars: steps 개 별 사이에 n-1 개 막대
+    bars = np.array(list(combinations(range(steps + n - 1), n - 1)))
+    edges = np.hstack([
+        np.full((len(bars), 1), -1),
+        bars,
+        np.full((len(bars), 1), steps + n - 1),
+    ])
+    counts = np.diff(edges, axis=1) - 1
+    return counts / steps
+
+
+def _moments(X: np.ndarray):
+    """(T x N) → 평균 (N,), 공분산 (N x N, ddof=1)"""
+    mu = X.mean(axis=0)
+    d = X - mu
+    return mu, d.T @ d / (len(X) - 1)
+
+
+def grid_sharpe(mu: np.ndarray, cov: np.ndarray, W: np.ndarray) -> np.ndarray:
+    """
+    격자 Sharpe.
+
+    Args:
+        mu: (N,) 또는 (K x N)
+        cov: (N x N) 또는 (K x N x N)
+        W: (G x N)
+
+    Returns:
+        (G,) 또는 (K x G) 연율 Sharpe (분산 0 이면 NaN)
+    """
+    mean = mu @ W.T
+    if cov.ndim == 2:
+        var = np.einsum("gi,ij,gj->g", W, cov, W)
+    else:
+        var = np.einsum("gi,kij,gj->kg", W, cov, W)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sr = mean / np.sqrt(var) * ANN
+    return np.where(var > 0, sr, np.nan)
+
+
+@dataclass
+class SimplexResult:
+    weights: np.ndarray
+    sharpe: float
+    grid: np.ndarray
+    grid_sharpe: np.ndarray
+
+
+def optimize_simplex(X: np.ndarray, steps: int = 50, grid: Optional[np.ndarray] = None) -> SimplexResult:
+    """Sharpe 최대 격자점 (X: NaN 없는 (T x N) sleeve 수익률)"""
+    X = np.asarray(X, dtype=np.float64)
+    W = simplex_grid(X.shape[1], steps) if grid is None else grid
+    sr = grid_sharpe(*_moments(X), W)
+    best = int(np.nanargmax(sr))
+    return SimplexResult(W[best], float(sr[best]), W, sr)
+
+
+def walk_forward_weights(
+    returns: pd.DataFrame,
+    window: int = 504,
+    step: int = 21,
+    steps: int = 50,
+    expanding: bool = False,
+) -> pd.DataFrame:
+    """
+    롤링 재최적화: 각 시점 t 의 가중치는 [t-window, t) (expanding 이면 [0, t)) 로 추정.
+
+    모든 윈도우의 모멘트를 누적합 차분으로 동시에 계산 → (K x G) Sharpe 한 번.
+
+    Returns:
+        DataFrame (재최적화 날짜 x sleeve) + 'sharpe' 열 (in-sample 격자 최대값)
+    """
+    X = returns.to_numpy(dtype=np.float64)
+    T, N = X.shape
+    ends = np.arange(window, T + 1, step)
+    if len(ends) == 0:
+        return pd.DataFrame(columns=list(returns.columns) + ["sharpe"], dtype=float)
+    starts = np.zeros_like(ends) if expanding else ends - window
+    n = (ends - starts).astype(np.float64)
+
+    S1 = np.vstack([np.zeros((1, N)), np.cumsum(X, axis=0)])
+    S2 = np.concatenate([np.zeros((1, N, N)), np.cumsum(X[:, :, None] * X[:, None, :], axis=0)])
+    s1 = S1[ends] - S1[starts]
+    s2 = S2[ends] - S2[starts]
+    mu = s1 / n[:, None]
+    cov = (s2 - n[:, None, None] * mu[:, :, None] * mu[:, None, :]) / (n - 1)[:, None, None]
+
+    W = simplex_grid(N, steps)
+    sr = grid_sharpe(mu, cov, W)
+    sr_filled = np.where(np.isnan(sr), -np.inf, sr)
+    best = sr_filled.argmax(axis=1)
+    out = pd.DataFrame(W[best], columns=returns.columns)
+    out["sharpe"] = sr[np.arange(len(best)), best]
+    # ends[k] 행부터 적용 (마지막 윈도우가 끝까지 쓰였으면 다음 날짜 없음)
+    idx = [returns.index[e] if e < T else returns.index[-1] + pd.tseries.offsets.BDay(1) for e in ends]
+    out.index = pd.DatetimeIndex(idx, name="date")
+    return out
+
+
+def apply_walk_forward(returns: pd.DataFrame, wf_weights: pd.DataFrame) -> pd.Series:
+    """walk-forward 가중치를 (ffill 하여) 적용한 out-of-sample 합성 수익률"""
+    W = wf_weights[returns.columns].reindex(returns.index, method="ffill")
+    return (W * returns).sum(axis=1, min_count=1).dropna()
+
+
+@dataclass
+class BootstrapResult:
+    weights: np.ndarray        # (B x N) 표본별 최적 가중치
+    sharpe: np.ndarray         # (B,)
+    columns: Sequence[str]
+
+    def summary(self, ci: float = 0.90) -> pd.DataFrame:
+        lo, hi = (1 - ci) / 2, 1 - (1 - ci) / 2
+        W = self.weights
+        return pd.DataFrame({
+            "mean": W.mean(axis=0),
+            "std": W.std(axis=0, ddof=1),
+            f"p{lo * 100:g}": np.quantile(W, lo, axis=0),
+            "median": np.median(W, axis=0),
+            f"p{hi * 100:g}": np.quantile(W, hi, axis=0),
+        }, index=list(self.columns))
+
+
+def block_bootstrap_indices(T: int, n_boot: int, block: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    moving-block bootstrap 인덱스 (B x T): 길이 block 블록을 이어 붙이고 T 에서 자름.
+    block > T 면 block = T (표본이 원 시계열 그대로가 됨)
+    """
+    if T < 1 or block < 1:
+        raise ValueError(f"block bootstrap needs T >= 1 and block >= 1 (T={T}, block={block})")
+    block = min(block, T)
+    n_blocks = -(-T // block)
+    starts = rng.integers(0, T - block + 1, size=(n_boot, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block)).reshape(n_boot, -1)
+    return idx[:, :T]
+
+
+def bootstrap_weights(
+    returns: pd.DataFrame,
+    n_boot: int = 1000,
+    block: int = 21,
+    steps: int = 50,
+    seed: int = 42,
+    chunk: int = 250,
+) -> BootstrapResult:
+    """
+    block bootstrap 표본마다 격자 최적 가중치.
+
+    chunk 개 표본씩 (chunk x T x N) 으로 gather → 모멘트 → (chunk x G) Sharpe.
+    """
+    X = returns.to_numpy(dtype=np.float64)
+    T, N = X.shape
+    rng = np.random.default_rng(seed)
+    W = simplex_grid(N, steps)
+    best_w, best_sr = [], []
+    for b0 in range(0, n_boot, chunk):
+        idx = block_bootstrap_indices(T, min(chunk, n_boot - b0), block, rng)
+        Xb = X[idx]                                          # (b x T x N)
+        mu = Xb.mean(axis=1)
+        d = Xb - mu[:, None, :]
+        cov = np.einsum("bti,btj->bij", d, d) / (T - 1)
+        sr = grid_sharpe(mu, cov, W)
+        sr_filled = np.where(np.isnan(sr), -np.inf, sr)
+        k = sr_filled.argmax(axis=1)
+        best_w.append(W[k])
+        best_sr.append(sr[np.arange(len(k)), k])
+    return BootstrapResult(np.vstack(best_w), np.concatenate(best_sr), list(returns.columns))
@@ -0,0 +1,330 @@
+# ensemble/risk_allocation.py
+"""
+Risk Parity / HRP 배분 (배치 + warm start)
+
+ares7_optimized_ensemble.py::calculate_risk_parity_weights 는 리스크 기여 오차 제곱합을
+generator 로 계산하는 Python 목적함수를 SLSQP 수치 미분으로 풀고,
+engine_enhanced_v1_deepmind.py::hrp_optimization 은 리밸런싱마다 riskfolio
+HCPortfolio 를 새로 만들어 linkage 부터 다시 계산한다.
+
+- risk_parity_newton: Spinu (2013) 볼록 정식화
+      min_y  0.5 y'Σy - Σ b_i log y_i,   w = y / sum(y)
+  해석적 gradient (Σy - b/y) / Hessian (Σ + diag(b/y²)) 로 Newton 스텝.
+  (B x K x K) 공분산 묶음을 한 번에 풀고, 이전 해로 warm start 가능
+- risk_parity_bounded: 가중치 상·하한이 걸리면 기존 목적함수
+  Σ (RC_i - σ/n)² 를 해석적 gradient 와 함께 SLSQP 로 (Newton 해에서 시작)
+- HRPAllocator: 상관 구조 변화가 relink_tol 이하이면 linkage / leaf 순서를 재사용,
+  재귀 이분은 매번 현재 공분산으로
+- rolling_covariances: 리밸런싱 시점별 trailing 공분산 (sample / Ledoit-Wolf) 을 einsum 한 번에
+- walk_forward_weights: 위를 묶은 walk-forward 배분 (수백 리밸런싱 ≪ 1초)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.cluster.hierarchy import leaves_list, linkage
+from scipy.optimize import minimize
+from scipy.spatial.distance import squareform
+
+
+# ---- Covariance ------------------------------------------------------------ #
+
+def ledoit_wolf(X: np.ndarray) -> np.ndarray:
+    """
+    Ledoit-Wolf 수축 공분산 (sklearn.covariance.ledoit_wolf 와 같은 식, scaled identity 목표).
+
+    X: (n x K) 또는 (B x n x K) 관측 → (K x K) 또는 (B x K x K)
+    """
+    X = np.asarray(X, dtype=np.float64)
+    squeeze = X.ndim == 2
+    if squeeze:
+        X = X[None]
+    B, n, K = X.shape
+    Xc = X - X.mean(axis=1, keepdims=True)
+    emp = np.einsum("bnk,bnj->bkj", Xc, Xc) / n
+    X2 = Xc ** 2
+    emp_trace = X2.sum(axis=1) / n                               # (B x K)
+    mu = emp_trace.sum(axis=1) / K                                # (B,)
+    beta_ = np.einsum("bnk,bnj->bkj", X2, X2).sum(axis=(1, 2))
+    delta_ = (np.einsum("bnk,bnj->bkj", Xc, Xc) ** 2).sum(axis=(1, 2)) / n ** 2
+    beta = (beta_ / n - delta_) / (K * n)
+    delta = (delta_ - 2.0 * mu * emp_trace.sum(axis=1) + K * mu ** 2) / K
+    beta = np.minimum(beta, delta)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shrink = np.where(beta == 0, 0.0, beta / delta)
+    cov = (1.0 - shrink)[:, None, None] * emp
+    cov += (shrink * mu)[:, None, None] * np.eye(K)
+    return cov[0] if squeeze else cov
+
+
+def rolling_covariances(
+    returns: np.ndarray,
+    lookback: int,
+    rows: Sequence[int],
+    method: str = "sample",
+) -> np.ndarray:
+    """
+    rows 의 각 t 에 대해 returns[t-lookback:t] 공분산 → (len(rows) x K x K).
+
+    method: "sample" (ddof=1) / "ledoit"
+    """
+    R = np.asarray(returns, dtype=np.float64)
+    rows = np.asarray(rows, dtype=np.int64)
+    win = np.moveaxis(sliding_window_view(R, lookback, axis=0), -1, 1)[rows - lookback]
+    if method == "ledoit":
+        return ledoit_wolf(win)
+    if method != "sample":
+        raise ValueError(f"unknown covariance method '{method}'")
+    d = win - win.mean(axis=1, keepdims=True)
+    return np.einsum("bnk,bnj->bkj", d, d) / (lookback - 1)
+
+
+# ---- Risk parity ----------------------------------------------------------- #
+
+def risk_contributions(w: np.ndarray, cov: np.ndarray) -> np.ndarray:
+    """RC_i = w_i (Σw)_i / σ  (합 = 포트폴리오 변동성 σ)"""
+    m = cov @ w
+    return w * m / np.sqrt(w @ m)
+
+
+def risk_parity_newton(
+    cov: np.ndarray,
+    budget: Optional[np.ndarray] = None,
+    x0: Optional[np.ndarray] = None,
+    tol: float = 1e-10,
+    max_iter: int = 50,
+) -> np.ndarray:
+    """
+    Spinu 볼록 정식화 Newton 해법 (배치).
+
+    Args:
+        cov: (K x K) 또는 (B x K x K)
+        budget: (K,) 리스크 예산 (기본: 1/K 동일)
+        x0: warm start 가중치 (K,) 또는 (B x K) (예: 직전 리밸런싱 해)
+
+    Returns:
+        w: (K,) 또는 (B x K), 합 1, RC_i / σ = budget_i
+    """
+    S = np.asarray(cov, dtype=np.float64)
+    squeeze = S.ndim == 2
+    if squeeze:
+        S = S[None]
+    B, K, _ = S.shape
+    b = np.full(K, 1.0 / K) if budget is None else np.asarray(budget, dtype=np.float64)
+    b = b / b.sum()
+
+    if x0 is None:
+        # inverse-vol 시작점
+        y = 1.0 / np.sqrt(np.einsum("bkk->bk", S))
+    else:
+        y = np.broadcast_to(np.asarray(x0, dtype=np.float64), (B, K)).copy()
+    # y'Σy = sum(b) 가 되도록 스케일 (최적해가 만족하는 조건)
+    y *= np.sqrt(b.sum() / np.einsum("bk,bkj,bj->b", y, S, y))[:, None]
+
+    eye = np.eye(K)
+    for _ in range(max_iter):
+        Sy = np.einsum("bkj,bj->bk", S, y)
+        g = Sy - b / y
+        H = S + eye * (b / y ** 2)[:, :, None]
+        step = np.linalg.solve(H, g[..., None])[..., 0]
+        # y > 0 유지 (감쇠 Newton)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.where(step > 0, y / step, np.inf)
+        alpha = np.minimum(1.0, 0.95 * ratio.min(axis=1))
+        y = y - alpha[:, None] * step
+        # Newton decrement
+        if np.max(np.einsum("bk,bk->b", g, step)) < tol:
+            break
+
+    w = y / y.sum(axis=1, keepdims=True)
+    return w[0] if squeeze else w
+
+
+def _rc_objective(w: np.ndarray, cov: np.ndarray) -> Tuple[float, np.ndarray]:
+    """Σ (RC_i - σ/n)² 와 해석적 gradient"""
+    n = len(w)
+    m = cov @ w
+    var = w @ m
+    if var <= 0:
+        return 1e10, np.zeros(n)
+    sigma = np.sqrt(var)
+    rc = w * m / sigma
+    e = rc - sigma / n
+    f = float(e @ e)
+    grad = 2.0 * ((m * e + cov @ (w * e)) / sigma
+                  - m * ((w * m) @ e) / sigma ** 3
+                  - m * e.sum() / (n * sigma))
+    return f, grad
+
+
+def risk_parity_bounded(
+    cov: np.ndarray,
+    lower: float = 0.0,
+    upper: float = 1.0,
+    x0: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    상·하한이 있는 동일 리스크 기여 (ares7_optimized_ensemble 의 목적함수).
+
+    무제약 Newton 해가 한도 안이면 그 해가 곧 최적 (목적함수 0),
+    아니면 해석적 gradient SLSQP 로 clip 된 Newton 해에서 시작.
+    """
+    cov = np.asarray(cov, dtype=np.float64)
+    n = len(cov)
+    w = risk_parity_newton(cov, x0=x0)
+    if np.all(w >= lower - 1e-12) and np.all(w <= upper + 1e-12):
+        return w
+
+    # 목적함수가 분산 단위 (~1e-5) 라 SLSQP 기본 ftol 에서 조기 종료 → 상수 배 스케일
+    scale = n / np.trace(cov)
+
+    def _scaled(x):
+        f, g = _rc_objective(x, cov)
+        return f * scale, g * scale
+
+    start = np.clip(w, lower, upper)
+    result = minimize(
+        _scaled,
+        start / start.sum(),
+        jac=True,
+        method="SLSQP",
+        options={"ftol": 1e-12, "maxiter": 200},
+        bounds=[(lower, upper)] * n,
+        constraints=[{"type": "eq", "fun": lambda x: x.sum() - 1.0,
+                      "jac": lambda x: np.ones_like(x)}],
+    )
+    return result.x / result.x.sum()
+
+
+# ---- HRP ------------------------------------------------------------------- #
+
+def _cov_to_corr(cov: np.ndarray) -> np.ndarray:
+    sd = np.sqrt(np.diag(cov))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.outer(sd, sd)
+    corr = np.nan_to_num(corr)
+    np.fill_diagonal(corr, 1.0)
+    return np.clip(corr, -1.0, 1.0)
+
+
+def hrp_order(corr: np.ndarray, method: str = "single", optimal_ordering: bool = False) -> np.ndarray:
+    """상관 거리 sqrt(0.5 (1-ρ)) 계층 군집 → quasi-diagonal leaf 순서"""
+    dist = np.sqrt(np.clip(0.5 * (1.0 - corr), 0.0, None))
+    np.fill_diagonal(dist, 0.0)
+    Z = linkage(squareform(dist, checks=False), method=method, optimal_ordering=optimal_ordering)
+    return leaves_list(Z)
+
+
+def hrp_bisection(cov: np.ndarray, order: np.ndarray) -> np.ndarray:
+    """재귀 이분: 클러스터 분산은 클러스터 내 inverse-variance 포트폴리오 분산"""
+    cov = np.asarray(cov, dtype=np.float64)
+    ivp_all = 1.0 / np.diag(cov)
+    w = np.ones(len(cov))
+    clusters = [np.asarray(order)]
+
+    def _cluster_var(idx):
+        ivp = ivp_all[idx] / ivp_all[idx].sum()
+        return ivp @ cov[np.ix_(idx, idx)] @ ivp
+
+    while clusters:
+        nxt = []
+        for c in clusters:
+            if len(c) <= 1:
+                continue
+            half = len(c) // 2
+            left, right = c[:half], c[half:]
+            v_l, v_r = _cluster_var(left), _cluster_var(right)
+            alpha = 1.0 - v_l / (v_l + v_r)
+            w[left] *= alpha
+            w[right] *= 1.0 - alpha
+            nxt.extend([left, right])
+        clusters = nxt
+    return w / w.sum()
+
+
+@dataclass
+class HRPAllocator:
+    """
+    HRP with cached linkage.
+
+    linkage 는 상관 행렬이 마지막 군집 이후 relink_tol (off-diagonal 최대 절대 변화)
+    이상 바뀌었을 때만 다시 계산한다. relink_tol=0 이면 매번 재계산.
+    """
+    method: str = "single"
+    optimal_ordering: bool = False
+    relink_tol: float = 0.05
+    _corr: Optional[np.ndarray] = field(default=None, repr=False)
+    _order: Optional[np.ndarray] = field(default=None, repr=False)
+    n_linkages: int = 0
+
+    def weights(self, cov: np.ndarray, corr: Optional[np.ndarray] = None) -> np.ndarray:
+        """corr 미지정 시 cov 에서 유도 (군집용 상관과 배분용 공분산을 분리할 수 있음)"""
+        cov = np.asarray(cov, dtype=np.float64)
+        corr = _cov_to_corr(cov) if corr is None else np.asarray(corr, dtype=np.float64)
+        if (self._order is None or self._corr.shape != corr.shape
+                or np.max(np.abs(corr - self._corr)) > self.relink_tol):
+            self._order = hrp_order(corr, self.method, self.optimal_ordering)
+            self._corr = corr
+            self.n_linkages += 1
+        return hrp_bisection(cov, self._order)
+
+
+# ---- Walk-forward ---------------------------------------------------------- #
+
+def inverse_vol_weights(cov: np.ndarray) -> np.ndarray:
+    """(..., K, K) → (..., K) 1/σ 비례 가중치"""
+    iv = 1.0 / np.sqrt(np.einsum("...kk->...k", cov))
+    return iv / iv.sum(axis=-1, keepdims=True)
+
+
+def walk_forward_weights(
+    returns: pd.DataFrame,
+    method: str = "risk_parity",
+    lookback: int = 252,
+    rebal_freq: int = 21,
+    covariance: str = "sample",
+    lower: Optional[float] = None,
+    upper: Optional[float] = None,
+    hrp: Optional[HRPAllocator] = None,
+) -> pd.DataFrame:
+    """
+    리밸런싱 시점별 배분 가중치 (t 시점 가중치는 [t-lookback, t) 수익률로 추정).
+
+    Args:
+        returns: (T x K) NaN 없는 수익률
+        method: "risk_parity" / "hrp" / "inverse_vol"
+        lower, upper: risk_parity 가중치 한도 (지정 시 위반 시점만 SLSQP)
+        hrp: linkage 캐시를 공유할 HRPAllocator (기본: 새로 생성)
+
+    Returns:
+        DataFrame (리밸런싱 날짜 x K)
+    """
+    R = returns.to_numpy(dtype=np.float64)
+    T, K = R.shape
+    rows = np.arange(lookback, T, rebal_freq)
+    if len(rows) == 0:
+        return pd.DataFrame(columns=returns.columns, dtype=float)
+    covs = rolling_covariances(R, lookback, rows, covariance)
+
+    if method == "inverse_vol":
+        W = inverse_vol_weights(covs)
+    elif method == "risk_parity":
+        W = risk_parity_newton(covs)
+        if lower is not None or upper is not None:
+            lo = 0.0 if lower is None else lower
+            hi = 1.0 if upper is None else upper
+            bad = np.where((W < lo - 1e-12).any(axis=1) | (W > hi + 1e-12).any(axis=1))[0]
+            for i in bad:
+                W[i] = risk_parity_bounded(covs[i], lo, hi, x0=W[i - 1] if i > 0 else None)
+    elif method == "hrp":
+        alloc = hrp or HRPAllocator()
+        W = np.vstack([alloc.weights(c) for c in covs])
+    else:
+        raise ValueError(f"unknown allocation method '{method}'")
+
+    return pd.DataFrame(W, index=returns.index[rows], columns=returns.columns)
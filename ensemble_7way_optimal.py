@@ -31,20 +31,18 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from engines.result_store import ResultStore
+
 def load_engine_returns(path):
-    """Load engine returns from JSON file"""
-    with open(path) as f:
-        data = json.load(f)
-    
-    if 'daily_returns' in data:
-        if isinstance(data['daily_returns'], list):
-            if isinstance(data['daily_returns'][0], dict):
-                returns = [d['ret'] for d in data['daily_returns']]
-            else:
-                returns = data['daily_returns']
-        return pd.Series(returns)
-    
-    return None
+    """Load engine returns (engines/result_store.py; JSON parsed on first use only)"""
+    store = ResultStore()
+    try:
+        # 위치 기준 정렬 (아래 min_len 절단) 유지
+        return store.load_json_returns(path).reset_index(drop=True)
+    except (ValueError, KeyError, TypeError):
+        return None
+    finally:
+        store.close()
 
 def calculate_metrics(returns):
     """Calculate performance metrics"""
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+grid_search_benchmark.py
+
+================================================================================
+Grid Search Benchmark: random 50 (grid 모드) vs adaptive (Hyperband)
+================================================================================
+
+역할:
+  - seed 고정 합성 일간 수익률 (GARCH(1,1) + Student-t, 시계열마다 변동성 / Sharpe /
+    GARCH 계수를 다르게 뽑음) 을 --series 개 생성
+  - 시계열 × seed 마다 comprehensive_grid_search.py 의 AARM phase 를 두 방식으로 실행
+      random    sample_aarm_params(50, seed) 전부를 train 전체 기간으로 백테스트 (grid 모드)
+      adaptive  adaptive_search (--n_screen 개를 짧은 구간으로 선별 → 상위 --max_full 개만 전체 기간)
+  - 각 방식이 찾은 최고 train Sharpe / 전체 기간 백테스트 수 / 비용 (전체 기간 1 회 = 1) 비교
+  - adaptive 평가는 임시 trials.sqlite 에만 기록 (results/optimize/ 는 건드리지 않음)
+
+판정:
+  best Sharpe 평균 차이 (adaptive - random) 가 -tolerance 이상이면 parity
+
+실행:
+  python3 grid_search_benchmark.py                       # 7 시계열 × 3 seed (1 CPU ~1 시간)
+  python3 grid_search_benchmark.py --series 2 --seeds 1 --days 800
+  python3 grid_search_benchmark.py --surrogate none --n_screen 100 --max_full 10
+
+Author: ARES7/ARES8 Research Team
+Version: 1.0
+================================================================================
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from comprehensive_grid_search import AARM_PARAM_GRID, ComprehensiveGridSearch, sample_aarm_params
+from engines.result_store import params_hash
+
+
+def synthetic_returns(seed: int, days: int = 1400) -> pd.Series:
+    """GARCH(1,1) + Student-t(5) 일간 수익률 (seed 마다 연 변동성 10-25%, Sharpe 0.5-1.5)"""
+    rng = np.random.default_rng(seed)
+    vol = rng.uniform(0.10, 0.25)
+    sharpe = rng.uniform(0.5, 1.5)
+    alpha = rng.uniform(0.05, 0.12)
+    beta = min(rng.uniform(0.80, 0.92), 0.98 - alpha)
+    nu = 5.0
+
+    long_run_var = vol ** 2 / 252
+    omega = long_run_var * (1 - alpha - beta)
+    z = rng.standard_t(nu, size=days) * np.sqrt((nu - 2) / nu)
+
+    eps = np.empty(days)
+    h = long_run_var
+    prev = 0.0
+    for t in range(days):
+        h = omega + alpha * prev ** 2 + beta * h
+        eps[t] = np.sqrt(h) * z[t]
+        prev = eps[t]
+
+    index = pd.bdate_range('2019-01-01', periods=days)
+    return pd.Series(sharpe * vol / 252 + eps, index=index, name=f'synthetic_{seed}')
+
+
+def random_search(grid_search: ComprehensiveGridSearch, seed: int, n_samples: int, memo: dict) -> dict:
+    """grid 모드와 같은 샘플 → train 전체 기간 백테스트 (같은 시계열 안에서는 memo 재사용)"""
+    sharpes = []
+    for params in sample_aarm_params(n_samples, seed):
+        key = params_hash(params)
+        if key not in memo:
+            managed_returns = grid_search.backtest_aarm(grid_search.train_returns, params)
+            memo[key] = grid_search.calculate_metrics(managed_returns)['sharpe_ratio']
+        sharpes.append(memo[key])
+    return {'best': float(np.max(sharpes)), 'n_full': len(sharpes), 'cost': float(len(sharpes))}
+
+
+def adaptive(grid_search: ComprehensiveGridSearch, seed: int, db_path: str, args) -> dict:
+    """grid_search_aarm_parameters(search='adaptive') 와 같은 후보 / 제약"""
+    results = grid_search.adaptive_search(
+        'aarm_optimization', AARM_PARAM_GRID, base_params={'mdd_threshold': -0.10},
+        constraint=lambda p: p['max_leverage'] >= p['base_leverage'],
+        eta=args.eta, min_fraction=args.min_fraction, n_screen=args.n_screen, max_full=args.max_full,
+        surrogate=None if args.surrogate == 'none' else args.surrogate, jobs=args.jobs, seed=seed,
+        db_path=db_path, verbose=False
+    )
+    stats = grid_search.search_stats['aarm_optimization']
+    return {'best': max(r['metrics']['sharpe_ratio'] for r in results),
+            'n_full': stats['n_full'], 'cost': stats['budget']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='random 50 vs adaptive grid search benchmark')
+    parser.add_argument('--series', type=int, default=7, help='합성 시계열 수 (seed 0..series-1)')
+    parser.add_argument('--seeds', type=int, default=3, help='시계열마다 탐색 seed 수 (42, 43, ...)')
+    parser.add_argument('--days', type=int, default=1400)
+    parser.add_argument('--n_samples', type=int, default=50, help='random 모드 샘플 수 (grid 모드와 같음)')
+    parser.add_argument('--n_screen', type=int, default=80)
+    parser.add_argument('--max_full', type=int, default=20)
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--min_fraction', type=float, default=1 / 3)
+    parser.add_argument('--surrogate', default='rf', choices=['rf', 'gp', 'none'])
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--tolerance', type=float, default=0.02, help='parity 판정 Sharpe 허용 차이')
+    parser.add_argument('--output', default=None, help='결과 JSON 경로 (선택)')
+    args = parser.parse_args()
+
+    print("=" * 100)
+    print(f"Grid search benchmark: {args.series} series × {args.seeds} seeds, {args.days} days")
+    print(f"  random:   {args.n_samples} samples, train 전체 기간")
+    print(f"  adaptive: n_screen={args.n_screen}, min_fraction={args.min_fraction:.3f}, eta={args.eta}, "
+          f"max_full={args.max_full}, surrogate={args.surrogate}")
+    print("=" * 100)
+    print(f"{'series':>6} {'seed':>5} | {'random':>7} {'full':>4} {'cost':>5} | "
+          f"{'adaptive':>8} {'full':>4} {'cost':>5} | {'diff':>6} {'sec':>6}")
+
+    rows = []
+    t_start = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        for k in range(args.series):
+            grid_search = ComprehensiveGridSearch(synthetic_returns(k, args.days))
+            db_path = str(Path(tmp) / f'trials_{k}.sqlite')
+            memo = {}
+            for seed in range(42, 42 + args.seeds):
+                t0 = time.time()
+                base = random_search(grid_search, seed, args.n_samples, memo)
+                ada = adaptive(grid_search, seed, db_path, args)
+                row = {'series': k, 'seed': seed, 'random': base, 'adaptive': ada,
+                       'diff': ada['best'] - base['best']}
+                rows.append(row)
+                print(f"{k:>6} {seed:>5} | {base['best']:7.3f} {base['n_full']:4d} {base['cost']:5.1f} | "
+                      f"{ada['best']:8.3f} {ada['n_full']:4d} {ada['cost']:5.1f} | "
+                      f"{row['diff']:+6.3f} {time.time() - t0:6.1f}", flush=True)
+
+    diffs = np.array([r['diff'] for r in rows])
+    per_series = pd.DataFrame([{'series': r['series'], 'diff': r['diff']} for r in rows]).groupby('series')['diff'].mean()
+    summary = {
+        'random_best_mean': float(np.mean([r['random']['best'] for r in rows])),
+        'adaptive_best_mean': float(np.mean([r['adaptive']['best'] for r in rows])),
+        'diff_mean': float(diffs.mean()),
+        'diff_se': float(diffs.std(ddof=1) / np.sqrt(len(diffs))) if len(diffs) > 1 else float('nan'),
+        'adaptive_wins': int((diffs >= 0).sum()),
+        'runs': len(rows),
+        'series_below_tolerance': [int(k) for k, d in per_series.items() if d < -args.tolerance],
+        'random_cost_mean': float(np.mean([r['random']['cost'] for r in rows])),
+        'adaptive_cost_mean': float(np.mean([r['adaptive']['cost'] for r in rows])),
+        'random_full_mean': float(np.mean([r['random']['n_full'] for r in rows])),
+        'adaptive_full_mean': float(np.mean([r['adaptive']['n_full'] for r in rows])),
+    }
+    parity = summary['diff_mean'] >= -args.tolerance
+
+    print("=" * 100)
+    print(f"best Sharpe 평균: random {summary['random_best_mean']:.3f} / adaptive {summary['adaptive_best_mean']:.3f} "
+          f"(차이 {summary['diff_mean']:+.3f} ± {summary['diff_se']:.3f})")
+    print(f"adaptive >= random: {summary['adaptive_wins']}/{summary['runs']}")
+    print(f"시계열 평균 차이 < -{args.tolerance}: {summary['series_below_tolerance'] or '없음'}")
+    print(f"전체 기간 백테스트: random {summary['random_full_mean']:.1f} / adaptive {summary['adaptive_full_mean']:.1f}")
+    print(f"비용 (전체 기간 환산): random {summary['random_cost_mean']:.1f} / adaptive {summary['adaptive_cost_mean']:.1f}")
+    print(f"{'✓ parity' if parity else '✗ adaptive 가 random 보다 낮음'} (tolerance {args.tolerance})")
+    print(f"총 {time.time() - t_start:.0f}s")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'summary': summary, 'parity': parity, 'runs': rows}, f, indent=2)
+        print(f"결과 저장: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -176,6 +176,18 @@ class IBKRConnection:
             print(f"❌ Failed to place order: {e}")
             return None
 
+    def rebalance_to_weights(self, weights_path=None, execute=False, order_type='MKT'):
+        """Diff target weights against the portfolio and submit the basket (ibkr_execution)"""
+        if not self.connected:
+            print("❌ Not connected")
+            return None
+
+        from ibkr_execution import BasketExecutor, load_target_weights
+
+        target = load_target_weights(weights_path)
+        executor = BasketExecutor(self.ib)
+        return executor.rebalance(target, execute=execute, order_type=order_type)
+
 
 # ============================================================================
 # Main
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+ibkr_execution.py
+
+================================================================================
+IBKR Basket Execution (target weights → orders)
+================================================================================
+
+역할:
+  - ares7_final_weights_*.csv (symbol, weight_final) 목표 비중을 현재 포트폴리오와
+    한 번에 (index 정렬) 비교 → 목표 주식 수 (lot 단위 반올림) / 주문 수량
+  - 계약은 qualifyContractsAsync 로 한 번에 확인, conId 를 캐시
+    (ensemble_outputs/state/ibkr_contracts.json → 다음 실행은 qualify 생략)
+  - 가격이 없는 신규 종목은 reqTickersAsync 한 번으로 조회
+  - 주문 바스켓을 asyncio 로 동시 제출 (매도 먼저), 초당 메시지 수 제한 (token bucket)
+
+IBKRConnection.place_order 는 종목마다 Stock() 을 새로 만들고 하나씩 제출했다.
+이 모듈은 ib_insync.IB 와 같은 인터페이스를 가진 객체면 무엇이든 받는다
+(ibkr_fake.FakeIB 로 Gateway 없이 로컬 실행 가능).
+
+실행:
+  python3 ibkr_execution.py                    # dry run (주문 계획만 출력 / 저장)
+  python3 ibkr_execution.py --execute          # 실제 제출
+  python3 ibkr_execution.py --fake --execute   # FakeIB 로 전체 흐름 확인
+
+Author: ARES7/ARES8 Research Team
+Version: 1.0
+================================================================================
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from ib_insync import Contract, LimitOrder, MarketOrder, Stock
+
+# ============================================================================
+# Configuration
+# ============================================================================
+
+BASE_DIR = Path(__file__).resolve().parent
+OUTPUT_DIR = BASE_DIR / "ensemble_outputs"
+CONTRACT_CACHE = OUTPUT_DIR / "state" / "ibkr_contracts.json"
+WEIGHTS_PATTERN = "ares7_final_weights_*.csv"
+
+# IB API 는 초당 50 메시지 초과 시 pacing violation → 여유를 둔다
+MSG_RATE = 40
+MSG_BURST = 5             # 어느 1초 구간에서도 MSG_RATE + MSG_BURST 이하
+LOT_SIZE = 1
+MIN_NOTIONAL = 100.0      # 이보다 작은 주문은 생략 ($)
+LIMIT_SLIPPAGE = 0.002    # LMT 주문 가격 = 기준가 · (1 ± slippage)
+ORDER_TIMEOUT = 60.0
+DONE_STATES = {'Filled', 'Cancelled', 'ApiCancelled', 'Inactive'}
+
+# ============================================================================
+# Target / Portfolio diff
+# ============================================================================
+
+def load_target_weights(path: Optional[Path] = None) -> pd.Series:
+    """최신 (또는 지정한) final weights → weight_final (index=symbol)"""
+    if path is None:
+        files = sorted(OUTPUT_DIR.glob(WEIGHTS_PATTERN), reverse=True)
+        if not files:
+            raise FileNotFoundError(f"No {WEIGHTS_PATTERN} in {OUTPUT_DIR}")
+        path = files[0]
+    df = pd.read_csv(path)
+    return df.groupby('symbol')['weight_final'].sum()
+
+
+def portfolio_frame(items: Iterable) -> pd.DataFrame:
+    """
+    ib.portfolio() (PortfolioItem) 또는 IBKRConnection.get_portfolio() (dict) →
+    DataFrame(index=symbol, position, market_price)
+    """
+    rows = []
+    for it in items or []:
+        if isinstance(it, dict):
+            rows.append((it['symbol'], it['position'], it.get('market_price', np.nan)))
+        else:
+            rows.append((it.contract.symbol, it.position, it.marketPrice))
+    df = pd.DataFrame(rows, columns=['symbol', 'position', 'market_price'])
+    return df.groupby('symbol').agg(position=('position', 'sum'), market_price=('market_price', 'last'))
+
+
+def plan_orders(
+    target: pd.Series,
+    portfolio: pd.DataFrame,
+    equity: float,
+    prices: Optional[pd.Series] = None,
+    lot_size: int = LOT_SIZE,
+    min_notional: float = MIN_NOTIONAL,
+) -> pd.DataFrame:
+    """
+    목표 비중 vs 현재 보유 → 주문 계획 (벡터화).
+
+    - 보유 중이지만 목표에 없는 종목은 목표 0 (청산)
+    - target_shares = round(weight · equity / price / lot) · lot
+    - |delta| · price < min_notional 이면 주문 생략
+    - 가격을 모르면 status='no_price' (주문 없음). 단 목표 0 (청산) 은 가격 없이도 주문 (LMT 로 제출해도 시장가)
+
+    Returns:
+        DataFrame (symbol, weight, price, current, target, delta, action, quantity, notional, status)
+        매도 → 매수 순, 각 그룹은 notional 큰 순
+    """
+    symbols = target.index.union(portfolio.index)
+    weight = target.reindex(symbols).fillna(0.0)
+    current = portfolio['position'].reindex(symbols).fillna(0.0)
+    price = portfolio['market_price'].reindex(symbols)
+    if prices is not None:
+        price = price.where(price > 0).fillna(prices.reindex(symbols))
+    price = price.where(price > 0)
+
+    px = price.to_numpy(dtype=np.float64)
+    w = weight.to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tgt = np.round(w * equity / px / lot_size) * lot_size
+    tgt[w == 0] = 0.0
+    has_price = np.isfinite(tgt)
+    tgt = np.where(has_price, tgt, current.to_numpy())
+    delta = tgt - current.to_numpy()
+    notional = np.abs(delta) * px
+
+    plan = pd.DataFrame({
+        'symbol': symbols,
+        'weight': weight.to_numpy(),
+        'price': px,
+        'current': current.to_numpy(),
+        'target': tgt,
+        'delta': delta,
+        'action': np.where(delta > 0, 'BUY', 'SELL'),
+        'quantity': np.abs(delta),
+        'notional': notional,
+    })
+    plan['status'] = np.select(
+        [~has_price, delta == 0, notional < min_notional],
+        ['no_price', 'hold', 'below_min'],
+        default='pending',
+    )
+    plan = plan.sort_values(['action', 'notional'], ascending=[False, False], kind='stable')
+    return plan.reset_index(drop=True)
+
+# ============================================================================
+# Contracts / throttling
+# ============================================================================
+
+class ContractCache:
+    """
+    symbol → qualified Contract.
+
+    qualify() 는 캐시에 없는 종목만 qualifyContractsAsync 한 번으로 확인.
+    conId 는 JSON 으로 저장해 다음 실행에서 재사용 (Contract(conId=...) 만으로 주문 가능).
+    """
+
+    def __init__(self, ib, path: Optional[Path] = CONTRACT_CACHE):
+        self.ib = ib
+        self.path = Path(path) if path else None
+        self._contracts: Dict[str, Contract] = {}
+        if self.path is not None and self.path.exists():
+            with open(self.path) as f:
+                for symbol, con_id in json.load(f).items():
+                    self._contracts[symbol] = Contract(
+                        conId=con_id, symbol=symbol, secType='STK', exchange='SMART', currency='USD'
+                    )
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._contracts
+
+    def __getitem__(self, symbol: str) -> Contract:
+        return self._contracts[symbol]
+
+    async def qualify(self, symbols: Iterable[str], limiter: Optional["RateLimiter"] = None) -> Dict[str, Contract]:
+        symbols = list(symbols)
+        missing = [s for s in dict.fromkeys(symbols) if s not in self._contracts]
+        if missing:
+            stocks = [Stock(s, 'SMART', 'USD') for s in missing]
+            if limiter is None:
+                qualified = await self.ib.qualifyContractsAsync(*stocks)
+            else:
+                qualified = await throttled_batches(self.ib.qualifyContractsAsync, stocks, limiter)
+            for c in qualified:
+                if c is not None and c.conId:
+                    self._contracts[c.symbol] = c
+            self.save()
+        return {s: self._contracts[s] for s in symbols if s in self._contracts}
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({s: c.conId for s, c in sorted(self._contracts.items())}, f)
+        tmp.replace(self.path)
+
+
+class RateLimiter:
+    """async token bucket: 초당 rate 개, 최대 burst 개 연속"""
+
+    def __init__(self, rate: float = MSG_RATE, burst: int = MSG_BURST):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, n: int = 1) -> None:
+        """토큰 n 개 (n <= burst) 를 한 번에 확보"""
+        n = min(float(n), self.burst)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                await asyncio.sleep((n - self.tokens) / self.rate)
+
+
+async def throttled_batches(fn, items: list, limiter: RateLimiter, size: int = MSG_BURST) -> list:
+    """
+    fn(*chunk) 를 size 개씩 동시에 호출 (요청 메시지 1개 = 토큰 1개).
+
+    qualify / ticker 요청도 주문과 같은 pacing 한도를 공유한다.
+    """
+    async def _one(chunk):
+        await limiter.acquire(len(chunk))
+        return await fn(*chunk)
+
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    results = await asyncio.gather(*[_one(c) for c in chunks])
+    return [x for r in results for x in r]
+
+# ============================================================================
+# Executor
+# ============================================================================
+
+class BasketExecutor:
+    def __init__(self, ib, contracts: Optional[ContractCache] = None, rate: float = MSG_RATE):
+        self.ib = ib
+        self.contracts = contracts or ContractCache(ib)
+        self.limiter = RateLimiter(rate)
+
+    def account_equity(self) -> float:
+        for v in self.ib.accountValues():
+            if v.tag == 'NetLiquidation' and v.currency in ('USD', 'BASE'):
+                return float(v.value)
+        raise RuntimeError("NetLiquidation not available")
+
+    async def fetch_prices(self, contracts: List[Contract]) -> pd.Series:
+        """스냅샷 가격 (reqTickersAsync 한 번)"""
+        if not contracts:
+            return pd.Series(dtype=float)
+        tickers = await throttled_batches(self.ib.reqTickersAsync, contracts, self.limiter)
+        return pd.Series({t.contract.symbol: t.marketPrice() for t in tickers}, dtype=float)
+
+    async def plan(self, target: pd.Series, equity: Optional[float] = None, **kwargs) -> pd.DataFrame:
+        port = portfolio_frame(self.ib.portfolio())
+        equity = self.account_equity() if equity is None else equity
+        symbols = list(target.index.union(port.index))
+        contracts = await self.contracts.qualify(symbols, self.limiter)
+        need = [contracts[s] for s in symbols
+                if s in contracts and not (port['market_price'].get(s, np.nan) > 0)]
+        prices = await self.fetch_prices(need)
+        plan = plan_orders(target, port, equity, prices, **kwargs)
+        plan.loc[~plan['symbol'].isin(list(contracts)) & (plan['status'] == 'pending'), 'status'] = 'no_contract'
+        return plan
+
+    def _order(self, row, order_type: str, slippage: float):
+        qty = float(row.quantity)
+        # 가격 없는 청산 (plan_orders 가 가격 없이도 pending 으로 둔 목표 0 행) 은 LMT 여도 시장가
+        if order_type == 'MKT' or not np.isfinite(row.price):
+            return MarketOrder(row.action, qty)
+        side = 1.0 if row.action == 'BUY' else -1.0
+        return LimitOrder(row.action, qty, round(row.price * (1.0 + side * slippage), 2))
+
+    async def _submit_one(self, row, order_type: str, slippage: float, timeout: float) -> dict:
+        """제출 후 완료 상태까지 대기. timeout 이 지나면 주문을 취소하고 status='timeout'"""
+        await self.limiter.acquire()
+        trade = self.ib.placeOrder(self.contracts[row.symbol], self._order(row, order_type, slippage))
+        deadline = time.monotonic() + timeout
+        while trade.orderStatus.status not in DONE_STATES and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        st = trade.orderStatus
+        status = st.status
+        if status not in DONE_STATES:
+            # 브로커에 남은 working 주문 정리 (filled 는 취소 요청 시점까지의 부분 체결)
+            await self.limiter.acquire()
+            self.ib.cancelOrder(trade.order)
+            status = 'timeout'
+        return {
+            'symbol': row.symbol,
+            'order_id': trade.order.orderId,
+            'status': status,
+            'filled': st.filled,
+            'avg_fill_price': st.avgFillPrice,
+        }
+
+    async def submit(
+        self,
+        plan: pd.DataFrame,
+        order_type: str = 'MKT',
+        slippage: float = LIMIT_SLIPPAGE,
+        timeout: float = ORDER_TIMEOUT,
+    ) -> pd.DataFrame:
+        """status == 'pending' 행 전체를 동시 제출 (plan 순서 = 제출 순서, 매도 먼저)"""
+        if order_type not in ('MKT', 'LMT'):
+            raise ValueError(f"Unsupported order type: {order_type}")
+        todo = plan[plan['status'] == 'pending']
+        results = await asyncio.gather(*[
+            self._submit_one(row, order_type, slippage, timeout) for row in todo.itertuples(index=False)
+        ])
+        fills = pd.DataFrame(results, columns=['symbol', 'order_id', 'status', 'filled', 'avg_fill_price'])
+        out = plan.merge(fills.rename(columns={'status': 'order_status'}), on='symbol', how='left')
+        return out
+
+    async def rebalance_async(self, target: pd.Series, execute: bool = False,
+                              order_type: str = 'MKT', **kwargs) -> pd.DataFrame:
+        """계획 (+ execute 면 제출)"""
+        plan = await self.plan(target, **kwargs)
+        if not execute:
+            return plan
+        return await self.submit(plan, order_type)
+
+    def rebalance(self, target: pd.Series, execute: bool = False, order_type: str = 'MKT', **kwargs) -> pd.DataFrame:
+        """동기 진입점 (ib.run 으로 IB 이벤트 루프에서 실행)"""
+        return self.ib.run(self.rebalance_async(target, execute, order_type, **kwargs))
+
+# ============================================================================
+# Main
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="IBKR basket execution from ARES7 final weights")
+    parser.add_argument("--weights", type=str, default=None, help="기본: 최신 ares7_final_weights_*.csv")
+    parser.add_argument("--execute", action="store_true", help="주문 제출 (기본: dry run)")
+    parser.add_argument("--order_type", choices=['MKT', 'LMT'], default='MKT')
+    parser.add_argument("--lot_size", type=int, default=LOT_SIZE)
+    parser.add_argument("--min_notional", type=float, default=MIN_NOTIONAL)
+    parser.add_argument("--rate", type=float, default=MSG_RATE, help="초당 최대 주문 메시지")
+    parser.add_argument("--fake", action="store_true", help="IB Gateway 대신 ibkr_fake.FakeIB 사용")
+    args = parser.parse_args()
+
+    target = load_target_weights(Path(args.weights) if args.weights else None)
+    print(f"Target: {len(target)} symbols, total weight {target.sum():.4f}")
+
+    if args.fake:
+        from ibkr_fake import FakeIB
+        ib = FakeIB.from_target(target)
+        cache = ContractCache(ib, path=None)
+    else:
+        from ibkr_connect import IBKRConnection
+        conn = IBKRConnection()
+        if not conn.connect():
+            return
+        ib = conn.ib
+        cache = ContractCache(ib)
+
+    try:
+        executor = BasketExecutor(ib, cache, rate=args.rate)
+        t0 = time.perf_counter()
+        result = executor.rebalance(
+            target, execute=args.execute, order_type=args.order_type,
+            lot_size=args.lot_size, min_notional=args.min_notional,
+        )
+        elapsed = time.perf_counter() - t0
+    finally:
+        if not args.fake:
+            conn.disconnect()
+
+    print(result['status'].value_counts().to_string())
+    pending = result[result['status'] == 'pending']
+    print(f"Orders: {len(pending)} (BUY {int((pending['action'] == 'BUY').sum())}, "
+          f"SELL {int((pending['action'] == 'SELL').sum())}), "
+          f"notional ${pending['notional'].sum():,.0f}, {elapsed:.2f}s")
+    if 'order_status' in result:
+        print(result['order_status'].value_counts().to_string())
+
+    out_path = OUTPUT_DIR / f"ibkr_orders_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    OUTPUT_DIR.mkdir(exist_ok=True)
+    result.to_csv(out_path, index=False)
+    print(f"Saved: {out_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+ibkr_fake.py
+
+================================================================================
+Fake IB (local, in-process)
+================================================================================
+
+역할:
+  - ibkr_execution.BasketExecutor 가 쓰는 ib_insync.IB 메서드만 흉내
+    (portfolio / accountValues / qualifyContractsAsync / reqTickersAsync / placeOrder / run)
+  - 주문은 fill_delay 초 뒤 기준가로 전량 체결, 포지션에 반영
+  - 초당 메시지 수를 기록 → max_msg_rate() 로 pacing 한도 (50/s) 준수 확인
+
+실행:
+  python3 ibkr_execution.py --fake --execute
+
+Author: ARES7/ARES8 Research Team
+Version: 1.0
+================================================================================
+"""
+
+import asyncio
+import time
+import zlib
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+PACING_LIMIT = 50   # IB API 초당 메시지 한도
+
+
+@dataclass
+class FakeOrderStatus:
+    status: str = 'Submitted'
+    filled: float = 0.0
+    avgFillPrice: float = 0.0
+
+
+@dataclass
+class FakeTrade:
+    contract: object
+    order: object
+    orderStatus: FakeOrderStatus = field(default_factory=FakeOrderStatus)
+
+    def isDone(self) -> bool:
+        return self.orderStatus.status in ('Filled', 'Cancelled')
+
+
+class FakeIB:
+    def __init__(
+        self,
+        prices: Dict[str, float],
+        positions: Optional[Dict[str, float]] = None,
+        cash: float = 1_000_000.0,
+        fill_delay: float = 0.2,
+        unknown: tuple = (),
+    ):
+        self.prices = dict(prices)
+        self.positions = dict(positions or {})
+        self.cash = cash
+        self.fill_delay = fill_delay
+        self.unknown = set(unknown)       # qualify 실패로 처리할 종목
+        self.messages: List[float] = []   # 요청 시각 (perf_counter)
+        self.trades: List[FakeTrade] = []
+        self._next_id = 1
+        self._loop = asyncio.new_event_loop()   # IB.run 처럼 호출 간 같은 루프
+
+    @classmethod
+    def from_target(cls, target: pd.Series, seed: int = 0, equity: float = 1_000_000.0) -> "FakeIB":
+        """목표 종목 절반 보유 + 목표 밖 종목 2개 보유, 가격 20~500"""
+        rng = np.random.default_rng(seed)
+        symbols = list(target.index) + ['ZZOLD1', 'ZZOLD2']
+        prices = dict(zip(symbols, np.round(rng.uniform(20, 500, len(symbols)), 2)))
+        held = [s for s in symbols if rng.random() < 0.5 or s.startswith('ZZOLD')]
+        positions = {s: float(rng.integers(1, 200)) for s in held}
+        cash = equity - sum(positions[s] * prices[s] for s in held)
+        return cls(prices, positions, cash)
+
+    # ---- ib_insync.IB surface --------------------------------------------- #
+
+    def _msg(self, n: int = 1) -> None:
+        self.messages.extend([time.perf_counter()] * n)
+
+    def run(self, coro):
+        return self._loop.run_until_complete(coro)
+
+    def equity(self) -> float:
+        return self.cash + sum(q * self.prices[s] for s, q in self.positions.items())
+
+    def accountValues(self):
+        return [SimpleNamespace(account='DU000000', tag='NetLiquidation',
+                                value=f"{self.equity():.2f}", currency='USD')]
+
+    def portfolio(self):
+        return [
+            SimpleNamespace(contract=SimpleNamespace(symbol=s), position=q, marketPrice=self.prices[s])
+            for s, q in self.positions.items() if q != 0
+        ]
+
+    async def qualifyContractsAsync(self, *contracts):
+        self._msg(len(contracts))
+        await asyncio.sleep(0)
+        out = []
+        for c in contracts:
+            if c.symbol in self.unknown or c.symbol not in self.prices:
+                continue
+            c.conId = zlib.crc32(c.symbol.encode())
+            out.append(c)
+        return out
+
+    async def reqTickersAsync(self, *contracts):
+        self._msg(len(contracts))
+        await asyncio.sleep(0)
+        return [
+            SimpleNamespace(contract=c, marketPrice=(lambda p=self.prices[c.symbol]: p))
+            for c in contracts
+        ]
+
+    def placeOrder(self, contract, order):
+        self._msg()
+        order.orderId = self._next_id
+        self._next_id += 1
+        trade = FakeTrade(contract, order)
+        self.trades.append(trade)
+        asyncio.get_running_loop().call_later(self.fill_delay, self._fill, trade)
+        return trade
+
+    def cancelOrder(self, order):
+        self._msg()
+        for trade in self.trades:
+            if trade.order is order and not trade.isDone():
+                trade.orderStatus.status = 'Cancelled'
+                return trade
+        return None
+
+    def _fill(self, trade: FakeTrade) -> None:
+        if trade.isDone():
+            return
+        s = trade.contract.symbol
+        px = self.prices[s]
+        if trade.order.orderType == 'LMT':
+            ok = px <= trade.order.lmtPrice if trade.order.action == 'BUY' else px >= trade.order.lmtPrice
+            if not ok:
+                return
+        qty = trade.order.totalQuantity * (1 if trade.order.action == 'BUY' else -1)
+        self.positions[s] = self.positions.get(s, 0.0) + qty
+        self.cash -= qty * px
+        trade.orderStatus = FakeOrderStatus('Filled', trade.order.totalQuantity, px)
+
+    # ---- checks ----------------------------------------------------------- #
+
+    def max_msg_rate(self, window: float = 1.0) -> int:
+        """임의의 window 초 구간 최대 메시지 수"""
+        t = np.sort(np.asarray(self.messages))
+        if len(t) == 0:
+            return 0
+        return int((np.searchsorted(t, t + window, side='left') - np.arange(len(t))).max())
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+ingest_fake_server.py
+
+================================================================================
+Fake Polygon / Nasdaq Data Link server (local, in-process)
+================================================================================
+
+역할:
+  - engines/ingest.py 가 호출하는 두 엔드포인트만 흉내 (stdlib HTTP 서버, 백그라운드 스레드)
+      GET /v2/aggs/ticker/{sym}/range/1/day/{from}/{to}     (Polygon aggregates, next_url 페이지)
+      GET /api/v3/datatables/{vendor}/{table}.json          (SHARADAR/SF1, qopts.cursor_id 페이지)
+  - 데이터는 종목명 crc32 시드의 결정적 합성값 (같은 날짜는 언제 요청해도 같은 값)
+  - max_rate (초당 요청) 를 넘으면 429 + Retry-After, fail_every 번째 요청마다 503
+    → rate limiter / 재시도 / 재개 경로 확인
+  - 요청 시각 기록 → max_rate_seen() 으로 실제 초당 요청 수 확인
+
+실행:
+  python3 download_market_data.py --fake --source polygon --symbols SPY TLT QQQ
+  python3 ingest_fake_server.py --port 8765      # 단독 실행 (POLYGON_BASE_URL=http://127.0.0.1:8765)
+
+Author: ARES7/ARES8 Research Team
+Version: 1.0
+================================================================================
+"""
+
+import argparse
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZE = 1000        # Polygon 페이지 행 수 (실서버 50000, 페이지 경로 확인용으로 작게)
+TABLE_PAGE_SIZE = 20    # datatables 페이지 행 수
+SF1_COLUMNS = {
+    "ticker": "String", "dimension": "String", "calendardate": "Date", "datekey": "Date",
+    "roe": "BigDecimal(34,12)", "ebitda": "BigDecimal(34,12)", "revenue": "BigDecimal(34,12)",
+    "debt": "BigDecimal(34,12)", "equity": "BigDecimal(34,12)",
+}
+
+
+def _seed(symbol: str, salt: int = 0) -> int:
+    return zlib.crc32(symbol.encode()) ^ salt
+
+
+def synthetic_bars(symbol: str, start, end) -> pd.DataFrame:
+    """영업일 일봉. 날짜별 값이 요청 구간과 무관하도록 1990-01-01 부터의 고정 경로에서 자름"""
+    days = pd.bdate_range("1990-01-01", end)
+    rng = np.random.default_rng(_seed(symbol))
+    close = 50 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, len(days))))
+    df = pd.DataFrame({"date": days, "c": np.round(close, 4)})
+    df = df[df["date"] >= pd.Timestamp(start)]
+    df["o"] = np.round(df["c"] * 0.999, 4)
+    df["h"] = np.round(df["c"] * 1.01, 4)
+    df["l"] = np.round(df["c"] * 0.99, 4)
+    df["v"] = (1e6 + (df["c"] * 1000).astype(int)).astype(float)
+    df["vw"] = np.round(df["c"] * 1.0005, 4)
+    # Polygon: 미국 동부 자정의 UTC ms
+    utc = df["date"].dt.tz_localize("America/New_York").dt.tz_convert("UTC")
+    df["t"] = (utc - pd.Timestamp("1970-01-01", tz="UTC")) // pd.Timedelta(milliseconds=1)
+    return df[["v", "vw", "o", "c", "h", "l", "t"]]
+
+
+def synthetic_sf1(ticker: str, start, end) -> List[list]:
+    """분기 MRQ 레코드 (calendardate 분기말, datekey = +45일)"""
+    rows = []
+    for cd in pd.date_range("2000-03-31", end, freq="QE"):
+        if cd < pd.Timestamp(start):
+            continue
+        rng = np.random.default_rng(_seed(ticker, int(cd.strftime("%Y%m%d"))))
+        revenue = float(rng.uniform(1e9, 5e10))
+        equity = float(rng.uniform(5e9, 1e11))
+        rows.append([
+            ticker, "MRQ", str(cd.date()), str((cd + pd.Timedelta(days=45)).date()),
+            round(float(rng.normal(0.15, 0.05)), 6), round(revenue * float(rng.uniform(0.1, 0.4)), 2),
+            round(revenue, 2), round(equity * float(rng.uniform(0.2, 1.5)), 2), round(equity, 2),
+        ])
+    return rows
+
+
+class FakeMarketDataServer:
+    def __init__(self, port: int = 0, max_rate: Optional[float] = None, fail_every: int = 0,
+                 unknown: tuple = ()):
+        self.max_rate = max_rate
+        self.fail_every = fail_every
+        self.unknown = set(unknown)
+        self.times: List[float] = []        # 수락한 요청 시각
+        self.counts: Dict[str, int] = {"ok": 0, "429": 0, "503": 0, "404": 0}
+        self._lock = threading.Lock()
+        self._n = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeMarketDataServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def max_rate_seen(self, window: float = 1.0) -> int:
+        """임의의 window 초 구간 최대 (수락된) 요청 수"""
+        t = np.sort(np.asarray(self.times))
+        if len(t) == 0:
+            return 0
+        return int((np.searchsorted(t, t + window, side="left") - np.arange(len(t))).max())
+
+    # ---- request gate ----------------------------------------------------- #
+
+    def _admit(self) -> Optional[int]:
+        """None = 처리, 아니면 오류 상태 코드"""
+        now = time.monotonic()
+        with self._lock:
+            self._n += 1
+            if self.fail_every and self._n % self.fail_every == 0:
+                self.counts["503"] += 1
+                return 503
+            if self.max_rate:
+                recent = sum(1 for t in self.times[-int(self.max_rate) - 1:] if now - t < 1.0)
+                if recent >= self.max_rate:
+                    self.counts["429"] += 1
+                    return 429
+            self.times.append(now)
+            self.counts["ok"] += 1
+        return None
+
+    # ---- handlers --------------------------------------------------------- #
+
+    def _aggs(self, parts, query, base) -> dict:
+        # /v2/aggs/ticker/{sym}/range/1/day/{from}/{to}
+        symbol, start, end = parts[3], parts[7], parts[8]
+        if symbol in self.unknown:
+            return {"status": "OK", "ticker": symbol, "queryCount": 0, "resultsCount": 0, "adjusted": True}
+        bars = synthetic_bars(symbol, start, end)
+        offset = int(query.get("offset", ["0"])[0])
+        page = bars.iloc[offset:offset + PAGE_SIZE]
+        out = {"status": "OK", "ticker": symbol, "queryCount": len(bars), "resultsCount": len(page),
+               "adjusted": True, "results": page.to_dict("records")}
+        if offset + PAGE_SIZE < len(bars):
+            out["next_url"] = f"{base}/v2/aggs/ticker/{symbol}/range/1/day/{start}/{end}?" + urlencode(
+                {"adjusted": "true", "sort": "asc", "limit": 50000, "offset": offset + PAGE_SIZE})
+        return out
+
+    def _table(self, parts, query) -> dict:
+        ticker = query.get("ticker", [""])[0]
+        start = query.get("calendardate.gte", ["1990-01-01"])[0]
+        end = query.get("calendardate.lte", ["2100-01-01"])[0]
+        cols = query.get("qopts.columns", [",".join(SF1_COLUMNS)])[0].split(",")
+        rows = [] if ticker in self.unknown else synthetic_sf1(ticker, start, end)
+        idx = [list(SF1_COLUMNS).index(c) for c in cols]
+        rows = [[r[i] for i in idx] for r in rows]
+        offset = int(query.get("qopts.cursor_id", ["0"])[0] or 0)
+        page = rows[offset:offset + TABLE_PAGE_SIZE]
+        nxt = str(offset + TABLE_PAGE_SIZE) if offset + TABLE_PAGE_SIZE < len(rows) else None
+        return {"datatable": {"data": page, "columns": [{"name": c, "type": SF1_COLUMNS[c]} for c in cols]},
+                "meta": {"next_cursor_id": nxt}}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, code: int, body: dict, headers: Optional[dict] = None):
+                out = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(out)
+
+            def do_GET(self):
+                err = server._admit()
+                if err == 429:
+                    self._send(429, {"status": "ERROR", "error": "rate limit"}, {"Retry-After": "1"})
+                    return
+                if err == 503:
+                    self._send(503, {"status": "ERROR", "error": "unavailable"})
+                    return
+                u = urlparse(self.path)
+                parts = u.path.strip("/").split("/")
+                query = parse_qs(u.query)
+                host, port = self.server.server_address[:2]
+                if parts[:3] == ["v2", "aggs", "ticker"] and len(parts) == 9:
+                    self._send(200, server._aggs(parts, query, f"http://{host}:{port}"))
+                elif parts[:3] == ["api", "v3", "datatables"]:
+                    self._send(200, server._table(parts, query))
+                else:
+                    server.counts["404"] += 1
+                    self._send(404, {"status": "NOT_FOUND"})
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Polygon / Nasdaq Data Link server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max_rate", type=float, default=None, help="초당 요청 한도 (넘으면 429)")
+    parser.add_argument("--fail_every", type=int, default=0, help="N 번째 요청마다 503")
+    args = parser.parse_args()
+
+    srv = FakeMarketDataServer(args.port, args.max_rate, args.fail_every).start()
+    print(f"Fake market data server: {srv.url}  (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        srv.stop()
+
+
+if __name__ == "__main__":
+    main()
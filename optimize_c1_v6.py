@@ -1,116 +1,196 @@
 #!/usr/bin/env python3
 """
 Optimize C1 v6 parameters
+
+engines/param_search.py 하니스 사용:
+- 가격 / 수익률 / 변동성 필터 마스크 (sweep 파라미터와 무관) 는 한 번만 계산해 공유 메모리로
+- span 별 신호는 워커에서 한 번 계산 (shard = (signal_span, vol_filter))
+- successive halving: 앞 25% → 50% → 전체 기간, rung 마다 Sharpe 상위 1/3 만 진행 (--rungs 1 = 전수)
+- 결과는 results/optimize/trials.sqlite 에 바로 기록, 같은 데이터로 다시 실행하면 끝난 조합은 건너뜀
+- 상위 --export_top 개만 기존 형식 JSON (results/c1_v6_opt_*.json) 으로 저장
+  (gross 만 다른 조합은 Sharpe 가 같으므로 하나로)
+
+Usage:
+    python3 optimize_c1_v6.py --jobs 4
+    python3 optimize_c1_v6.py --rungs 1 --fresh      # 전체 기간 전수 평가, 기존 결과 무시
 """
 
-import subprocess
+import argparse
+import contextlib
+import io
 import json
 import pandas as pd
+import numpy as np
 from pathlib import Path
 
+from engine_c1_v6_simple import (backtest_c1_v6, c1_v6_returns, calculate_correlation_with_existing,
+                                 calculate_returns, calculate_signals, calculate_volatility,
+                                 extreme_volatility_mask, load_data, target_weights)
+from engines.momentum import rebalance_rows
+from engines.param_search import (DEFAULT_DB_PATH, ParamSearch, SharedData, cached, load_reference_returns,
+                                  param_grid, performance_stats, reference_correlations)
+
+# engine_c1_v6_simple.py 기본값 (sweep 하지 않음)
+REBAL_FREQ = 7
+VOL_WINDOW = 60
+WEIGHT_BY_SIGNAL = False
+
+# Parameter grid
+PARAM_GRID = {
+    'signal_span': [3, 5, 7, 10],
+    'n_long': [15, 20, 25],
+    'n_short': [15, 20, 25],
+    'gross': [1.5, 2.0, 2.5],
+    'vol_filter': [True, False],
+}
+
+CORR_COLUMNS = {'A+LS': 'corr_ALS', 'LV2': 'corr_LV2', 'FactorV2': 'corr_FV2'}
+
+
+def signal_key(params):
+    """span 신호 / 변동성 필터만 중간 신호에 영향 (n_long, n_short, gross 는 선택 단계)"""
+    return params['signal_span'], params['vol_filter']
+
 
-def run_c1_v6(signal_span, n_long, n_short, gross, vol_filter, output_path):
-    """Run C1 v6 with specific parameters"""
-    cmd = [
-        'python3.11', 'engine_c1_v6_simple.py',
-        '--signal_span', str(signal_span),
-        '--n_long', str(n_long),
-        '--n_short', str(n_short),
-        '--gross', str(gross),
-        '--out', output_path
-    ]
-    
+def c1_signals(data, signal_span, vol_filter):
+    """(T x N) 전날 신호 (backtest_c1_v6 와 같은 순서: momentum 합 → shift(1) → 변동성 필터)"""
+    signals = calculate_signals(data['returns'], signal_span, reversion=False).shift(1)
+    signals = signals.to_numpy(dtype=np.float64)
     if vol_filter:
-        cmd.append('--vol_filter')
-    
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        print(f"  ERROR: {result.stderr[:200]}")
-        return None
-    
-    # Load results
-    with open(output_path, 'r') as f:
-        data = json.load(f)
-    
-    return data
+        signals = np.where(data['vol_extreme'], np.nan, signals)
+    return signals
+
+
+def evaluate(data, params, end):
+    """앞 end 행으로 백테스트 → 지표 (end = 전체 길이면 기존 엔진 결과와 같음)"""
+    signals = cached(('signals',) + signal_key(params),
+                     lambda: c1_signals(data, params['signal_span'], params['vol_filter']))
+    rebal_rows = rebalance_rows(end, REBAL_FREQ)
+    targets = target_weights(signals[rebal_rows], params['n_long'], params['n_short'],
+                             params['gross'], WEIGHT_BY_SIGNAL)
+    daily = c1_v6_returns(data['returns'].to_numpy()[:end], rebal_rows, targets)
+
+    metrics = performance_stats(daily)
+    metrics['avg_turnover'] = params['gross'] * len(rebal_rows) / end
+    if end == len(data['returns']):
+        # Correlation with existing engines
+        corrs = reference_correlations(daily, data, CORR_COLUMNS)
+        metrics.update({column: corrs[name] for name, column in CORR_COLUMNS.items()})
+    return metrics
+
+
+def output_path_for(params):
+    return (f"./results/c1_v6_opt_s{params['signal_span']}_l{params['n_long']}_s{params['n_short']}"
+            f"_g{params['gross']}_v{int(params['vol_filter'])}.json")
+
+
+def export_config(price, params, existing_engines):
+    """엔진 스크립트와 같은 형식의 결과 JSON"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = backtest_c1_v6(price, signal_span=params['signal_span'], rebal_freq=REBAL_FREQ,
+                                 n_long=params['n_long'], n_short=params['n_short'],
+                                 gross_exposure=params['gross'], vol_window=VOL_WINDOW,
+                                 vol_filter=params['vol_filter'], weight_by_signal=WEIGHT_BY_SIGNAL)
+    correlations = calculate_correlation_with_existing(pd.Series(results['daily_returns']), existing_engines)
+    output = {
+        'sharpe': results['sharpe'],
+        'annual_return': results['annual_return'],
+        'annual_volatility': results['annual_volatility'],
+        'max_drawdown': results['max_drawdown'],
+        'avg_turnover': results['avg_turnover'],
+        'correlations': correlations,
+        'config': {
+            'signal_span': params['signal_span'],
+            'rebal_freq': REBAL_FREQ,
+            'n_long': params['n_long'],
+            'n_short': params['n_short'],
+            'gross_exposure': params['gross'],
+            'vol_filter': params['vol_filter'],
+            'weight_by_signal': WEIGHT_BY_SIGNAL
+        },
+        'daily_returns': results['daily_returns'],
+        'dates': results['dates']
+    }
+    path = output_path_for(params)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(output, f, indent=2)
+    return path
 
 
 def main():
+    parser = argparse.ArgumentParser(description='C1 v6 Parameter Optimization')
+    parser.add_argument('--price', default='./data/price_full.csv')
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: min(CPU, 4))')
+    parser.add_argument('--rungs', default='0.25,0.5,1.0',
+                        help='Successive halving data fractions ("1" = full grid on full period)')
+    parser.add_argument('--eta', type=float, default=3.0, help='Keep top 1/eta configs per rung')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='Trial table (SQLite)')
+    parser.add_argument('--fresh', action='store_true', help='Ignore finished trials (no resume)')
+    parser.add_argument('--export_top', type=int, default=3,
+                        help='Write engine JSON for top K configs (distinct apart from gross)')
+    parser.add_argument('--out', default='./results/c1_v6_optimization_results.csv')
+
+    # Existing engines for correlation
+    parser.add_argument('--a_json', default='./results/engine_ls_enhanced_results.json')
+    parser.add_argument('--lv_json', default='./results/engine_c_lowvol_v2_final_results.json')
+    parser.add_argument('--fv2_json', default='./results/engine_factor_v2_best.json')
+
+    args = parser.parse_args()
+
     print("=" * 60)
     print("C1 v6 Parameter Optimization")
     print("=" * 60)
     print()
-    
-    # Parameter grid
-    signal_span_values = [3, 5, 7, 10]
-    n_long_values = [15, 20, 25]
-    n_short_values = [15, 20, 25]
-    gross_values = [1.5, 2.0, 2.5]
-    vol_filter_values = [True, False]
-    
-    results = []
-    
-    total_tests = len(signal_span_values) * len(n_long_values) * len(n_short_values) * len(gross_values) * len(vol_filter_values)
-    test_num = 0
-    
-    for signal_span in signal_span_values:
-        for n_long in n_long_values:
-            for n_short in n_short_values:
-                for gross in gross_values:
-                    for vol_filter in vol_filter_values:
-                        test_num += 1
-                        
-                        config_str = f"Span={signal_span}, Long={n_long}, Short={n_short}, Gross={gross}, VolFilter={vol_filter}"
-                        print(f"[{test_num}/{total_tests}] Testing {config_str}...")
-                        
-                        output_path = f"./results/c1_v6_opt_s{signal_span}_l{n_long}_s{n_short}_g{gross}_v{int(vol_filter)}.json"
-                        
-                        data = run_c1_v6(signal_span, n_long, n_short, gross, vol_filter, output_path)
-                        
-                        if data:
-                            results.append({
-                                'signal_span': signal_span,
-                                'n_long': n_long,
-                                'n_short': n_short,
-                                'gross': gross,
-                                'vol_filter': vol_filter,
-                                'sharpe': data['sharpe'],
-                                'annual_return': data['annual_return'],
-                                'annual_volatility': data['annual_volatility'],
-                                'max_drawdown': data['max_drawdown'],
-                                'avg_turnover': data['avg_turnover'],
-                                'corr_ALS': data['correlations'].get('A+LS', None),
-                                'corr_LV2': data['correlations'].get('LV2', None),
-                                'corr_FV2': data['correlations'].get('FactorV2', None),
-                                'output_file': output_path
-                            })
-                            
-                            print(f"  Sharpe: {data['sharpe']:.3f}, Return: {data['annual_return']*100:.2f}%, "
-                                  f"MDD: {data['max_drawdown']*100:.2f}%")
-                        else:
-                            print(f"  FAILED")
-                        
-                        print()
-    
-    # Create results DataFrame
-    df = pd.DataFrame(results)
-    
-    # Sort by Sharpe
-    df = df.sort_values('sharpe', ascending=False)
-    
+
+    existing_engines = {
+        'A+LS': args.a_json,
+        'LV2': args.lv_json,
+        'FactorV2': args.fv2_json
+    }
+
+    # Load data once (sweep 파라미터와 무관한 수익률 / 변동성 필터 포함)
+    print("Loading data...")
+    price = load_data(args.price)
+    returns = calculate_returns(price)
+    vol_extreme = extreme_volatility_mask(calculate_volatility(returns, VOL_WINDOW)).to_numpy()
+    refs = load_reference_returns(existing_engines)
+    print(f"  Price: {price.shape}, references: {[k[4:] for k in refs]}")
+    print()
+
+    configs = param_grid(PARAM_GRID)
+    rungs = [float(x) for x in args.rungs.split(',')]
+
+    with SharedData(returns=returns, vol_extreme=vol_extreme, **refs) as data:
+        search = ParamSearch('c1_v6', evaluate, shard_key=signal_key, jobs=args.jobs, rungs=rungs,
+                             eta=args.eta, db_path=args.db)
+        df = search.run(configs, data, n_rows=len(price), resume=not args.fresh)
+
+    columns = list(PARAM_GRID) + ['sharpe', 'annual_return', 'annual_volatility', 'max_drawdown',
+                                  'avg_turnover'] + list(CORR_COLUMNS.values())
+    df = df[columns]
+
+    print()
     print("=" * 60)
     print("Top 10 Configurations by Sharpe Ratio")
     print("=" * 60)
     print()
-    
+
     print(df.head(10)[['signal_span', 'n_long', 'n_short', 'gross', 'vol_filter', 'sharpe', 'annual_return', 'max_drawdown']].to_string(index=False))
     print()
-    
+
     # Save results
-    df.to_csv('./results/c1_v6_optimization_results.csv', index=False)
-    print(f"Full results saved to: ./results/c1_v6_optimization_results.csv")
-    
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(args.out, index=False)
+    print(f"Full-period results ({len(df)} of {len(configs)} configs) saved to: {args.out}")
+    print(f"All rungs: {args.db} (study 'c1_v6')")
+
+    # gross 는 수익률을 비례 배율할 뿐 (Sharpe 동일) → gross 를 뺀 조합별 최상위 1개씩
+    top = df.drop_duplicates([k for k in PARAM_GRID if k != 'gross']).head(args.export_top)
+    for _, row in top.iterrows():
+        params = {k: row[k].item() if hasattr(row[k], 'item') else row[k] for k in PARAM_GRID}
+        print(f"  Exported: {export_config(price, params, existing_engines)}")
+
     # Best config
     best = df.iloc[0]
     print()
@@ -130,7 +210,6 @@ def main():
     print(f"  Corr with A+LS: {best['corr_ALS']:.3f}")
     print(f"  Corr with LV2: {best['corr_LV2']:.3f}")
     print(f"  Corr with FactorV2: {best['corr_FV2']:.3f}")
-    print(f"  Output: {best['output_file']}")
     print("=" * 60)
 
 
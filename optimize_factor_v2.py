@@ -2,109 +2,204 @@
 """
 Optimize Factor v2 parameters
 Test different combinations of Q and rebalance frequency
+
+engines/param_search.py 하니스 사용:
+- 가격 / 종목 수익률 / 리밸런스 주기별 재무 패널 (q, lookback, gross 와 무관) 은 한 번만 계산해 공유 메모리로
+- (rebalance, lookback) 별 momentum + composite z-score 는 워커에서 한 번 계산 (shard 단위)
+- successive halving: 앞 25% → 50% → 전체 기간, rung 마다 Sharpe 상위 1/3 만 진행 (--rungs 1 = 전수)
+- 결과는 results/optimize/trials.sqlite 에 바로 기록, 같은 데이터로 다시 실행하면 끝난 조합은 건너뜀
+- 상위 --export_top 개 (gross 만 다른 조합은 Sharpe 가 같으므로 하나로) 와 ensemble_7way_optimal.py 가
+  읽는 ENSEMBLE_CONFIGS 를 기존 형식 JSON (results/factor_v2_opt_*.json) 으로 저장
+
+Usage:
+    python3 optimize_factor_v2.py --jobs 4
+    python3 optimize_factor_v2.py --rungs 1 --fresh      # 전체 기간 전수 평가, 기존 결과 무시
 """
 
-import subprocess
+import argparse
+import contextlib
+import io
 import json
 import pandas as pd
+import numpy as np
 from pathlib import Path
 
+from engine_factor_v2 import backtest_factor_v2, calculate_correlation_with_existing, calculate_returns, load_data
+from engines.factor_portfolio import (composite_zscore, fundamentals_panel, hold_weights, momentum_panel,
+                                      portfolio_returns, rebalance_rows, sector_neutral_weights)
+from engines.param_search import (DEFAULT_DB_PATH, ParamSearch, SharedData, cached, load_reference_returns,
+                                  param_grid, performance_stats, reference_correlations)
+
+# Parameter grid
+PARAM_GRID = {
+    'q': [0.05, 0.1, 0.15, 0.2],
+    'rebalance': ['W', 'M'],
+    'lookback': [40, 60, 80],
+    'gross': [1.5, 2.0, 2.5],
+}
+
+CORR_COLUMNS = {'C1': 'corr_C1', 'LV2': 'corr_LV2'}
+
+# ensemble_7way_optimal.py 의 FV2_1 / FV2_2 / FV2_3 (순위와 무관하게 매 실행 다시 씀)
+ENSEMBLE_CONFIGS = [
+    {'q': 0.15, 'rebalance': 'W', 'lookback': 40, 'gross': 2.0},
+    {'q': 0.2, 'rebalance': 'W', 'lookback': 40, 'gross': 1.5},
+    {'q': 0.05, 'rebalance': 'W', 'lookback': 40, 'gross': 2.0},
+]
+
+
+def signal_key(params):
+    """composite 는 리밸런스 주기 / momentum lookback 에만 의존 (q, gross 는 선택 단계)"""
+    return params['rebalance'], params['lookback']
+
+
+def factor_composite(data, rebalance, lookback):
+    """(R x N) Value + Quality + Momentum z-score 합 (backtest_factor_v2 와 같은 build_targets 경로)"""
+    rows = rebalance_rows(data['price'].index, rebalance)
+    mom = momentum_panel(data['price'].to_numpy(), rows, lookback, signal_lag=0)
+    included = data[f'fund:{rebalance}:available'] & ~np.isnan(mom)
+    return composite_zscore((data[f'fund:{rebalance}:value'], data[f'fund:{rebalance}:quality'], mom), included)
+
+
+def evaluate(data, params, end):
+    """앞 end 행으로 백테스트 → 지표 (end = 전체 길이면 기존 엔진 결과와 같음)"""
+    rebalance = params['rebalance']
+    composite = cached(('composite',) + signal_key(params),
+                       lambda: factor_composite(data, rebalance, params['lookback']))
+    rows = rebalance_rows(data['price'].index, rebalance)
+    k = int(np.searchsorted(rows, end))
+    rows = rows[:k]
+    weights, n_positions = sector_neutral_weights(composite[:k], data[f'fund:{rebalance}:sector'][:k],
+                                                  params['q'], params['gross'])
+    held = hold_weights(end, rows, weights, np.ones(k, dtype=bool), apply_lag=0)
+    daily = portfolio_returns(held, data['stock_ret'][:end])
+
+    metrics = performance_stats(daily)
+    # Turnover: 직전 리밸런스에 포지션이 있었던 날짜만
+    turnover = np.abs(weights[1:] - weights[:-1]).sum(axis=1)[n_positions[:-1] > 0]
+    metrics['avg_turnover'] = float(turnover.mean()) if len(turnover) else 0.0
+    if end == len(data['price']):
+        # Correlation with existing engines
+        corrs = reference_correlations(daily, data, CORR_COLUMNS)
+        metrics.update({column: corrs[name] for name, column in CORR_COLUMNS.items()})
+    return metrics
+
+
+def output_path_for(params):
+    return (f"./results/factor_v2_opt_q{params['q']}_r{params['rebalance']}"
+            f"_l{params['lookback']}_g{params['gross']}.json")
+
 
-def run_factor_v2(q, rebalance, lookback_mom, gross, output_path):
-    """Run Factor v2 with specific parameters"""
-    cmd = [
-        'python3.11', 'engine_factor_v2.py',
-        '--q', str(q),
-        '--rebalance', rebalance,
-        '--lookback_mom', str(lookback_mom),
-        '--gross', str(gross),
-        '--out', output_path
-    ]
-    
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        print(f"  ERROR: {result.stderr[:200]}")
-        return None
-    
-    # Load results
-    with open(output_path, 'r') as f:
-        data = json.load(f)
-    
-    return data
+def export_config(price, fundamentals, params, existing_engines):
+    """엔진 스크립트와 같은 형식의 결과 JSON"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = backtest_factor_v2(price, fundamentals, q=params['q'], rebalance_freq=params['rebalance'],
+                                     lookback_momentum=params['lookback'], gross_exposure=params['gross'])
+    correlations = calculate_correlation_with_existing(pd.Series(results['daily_returns']), existing_engines)
+    output = {
+        'sharpe': results['sharpe'],
+        'annual_return': results['annual_return'],
+        'annual_volatility': results['annual_volatility'],
+        'max_drawdown': results['max_drawdown'],
+        'avg_turnover': results['avg_turnover'],
+        'correlations': correlations,
+        'config': {
+            'q': params['q'],
+            'rebalance': params['rebalance'],
+            'lookback_momentum': params['lookback'],
+            'gross_exposure': params['gross']
+        },
+        'daily_returns': results['daily_returns'],
+        'dates': results['dates']
+    }
+    path = output_path_for(params)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(output, f, indent=2)
+    return path
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Factor v2 Parameter Optimization')
+    parser.add_argument('--price', default='./data/price_full.csv')
+    parser.add_argument('--fundamentals', default='./data/fundamentals.csv')
+    parser.add_argument('--jobs', type=int, default=None, help='Worker processes (default: min(CPU, 4))')
+    parser.add_argument('--rungs', default='0.25,0.5,1.0',
+                        help='Successive halving data fractions ("1" = full grid on full period)')
+    parser.add_argument('--eta', type=float, default=3.0, help='Keep top 1/eta configs per rung')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='Trial table (SQLite)')
+    parser.add_argument('--fresh', action='store_true', help='Ignore finished trials (no resume)')
+    parser.add_argument('--export_top', type=int, default=3,
+                        help='Write engine JSON for top K configs (distinct apart from gross)')
+    parser.add_argument('--out', default='./results/factor_v2_optimization_results.csv')
+
+    # Existing engines for correlation
+    parser.add_argument('--a_json', default='./results/A+LS_enhanced_results.json')
+    parser.add_argument('--c1_json', default='./results/C1_final_v5.json')
+    parser.add_argument('--lv_json', default='./results/engine_c_lowvol_v2_final_results.json')
+
+    args = parser.parse_args()
+
     print("=" * 60)
     print("Factor v2 Parameter Optimization")
     print("=" * 60)
     print()
-    
-    # Parameter grid
-    q_values = [0.05, 0.1, 0.15, 0.2]
-    rebalance_values = ['W', 'M']
-    lookback_values = [40, 60, 80]
-    gross_values = [1.5, 2.0, 2.5]
-    
-    results = []
-    
-    total_tests = len(q_values) * len(rebalance_values) * len(lookback_values) * len(gross_values)
-    test_num = 0
-    
-    for q in q_values:
-        for rebal in rebalance_values:
-            for lookback in lookback_values:
-                for gross in gross_values:
-                    test_num += 1
-                    
-                    config_str = f"Q={q}, Rebal={rebal}, Lookback={lookback}, Gross={gross}"
-                    print(f"[{test_num}/{total_tests}] Testing {config_str}...")
-                    
-                    output_path = f"./results/factor_v2_opt_q{q}_r{rebal}_l{lookback}_g{gross}.json"
-                    
-                    data = run_factor_v2(q, rebal, lookback, gross, output_path)
-                    
-                    if data:
-                        results.append({
-                            'q': q,
-                            'rebalance': rebal,
-                            'lookback': lookback,
-                            'gross': gross,
-                            'sharpe': data['sharpe'],
-                            'annual_return': data['annual_return'],
-                            'annual_volatility': data['annual_volatility'],
-                            'max_drawdown': data['max_drawdown'],
-                            'avg_turnover': data['avg_turnover'],
-                            'corr_C1': data['correlations'].get('C1', None),
-                            'corr_LV2': data['correlations'].get('LV2', None),
-                            'output_file': output_path
-                        })
-                        
-                        print(f"  Sharpe: {data['sharpe']:.3f}, Return: {data['annual_return']*100:.2f}%, "
-                              f"Vol: {data['annual_volatility']*100:.2f}%, MDD: {data['max_drawdown']*100:.2f}%")
-                    else:
-                        print(f"  FAILED")
-                    
-                    print()
-    
-    # Create results DataFrame
-    df = pd.DataFrame(results)
-    
-    # Sort by Sharpe
-    df = df.sort_values('sharpe', ascending=False)
-    
+
+    existing_engines = {
+        'A+LS': args.a_json,
+        'C1': args.c1_json,
+        'LV2': args.lv_json
+    }
+
+    # Load data once (sweep 파라미터와 무관한 수익률 / 재무 패널 포함)
+    print("Loading data...")
+    price, fundamentals = load_data(args.price, args.fundamentals)
+    shared = {'price': price, 'stock_ret': calculate_returns(price)}
+    for rebalance in PARAM_GRID['rebalance']:
+        rows = rebalance_rows(price.index, rebalance)
+        panel = fundamentals_panel(fundamentals, price.columns, price.index[rows], lag_days=None)
+        shared.update({f'fund:{rebalance}:available': panel.available, f'fund:{rebalance}:value': panel.value,
+                       f'fund:{rebalance}:quality': panel.quality, f'fund:{rebalance}:sector': panel.sector})
+    shared.update(load_reference_returns(existing_engines))
+    print(f"  Price: {price.shape}")
+    print(f"  Fundamentals: {fundamentals.shape}")
+    print()
+
+    configs = param_grid(PARAM_GRID)
+    rungs = [float(x) for x in args.rungs.split(',')]
+
+    with SharedData(**shared) as data:
+        search = ParamSearch('factor_v2', evaluate, shard_key=signal_key, jobs=args.jobs, rungs=rungs,
+                             eta=args.eta, db_path=args.db)
+        df = search.run(configs, data, n_rows=len(price), resume=not args.fresh)
+
+    columns = list(PARAM_GRID) + ['sharpe', 'annual_return', 'annual_volatility', 'max_drawdown',
+                                  'avg_turnover'] + list(CORR_COLUMNS.values())
+    df = df[columns]
+
+    print()
     print("=" * 60)
     print("Top 10 Configurations by Sharpe Ratio")
     print("=" * 60)
     print()
-    
+
     print(df.head(10).to_string(index=False))
     print()
-    
+
     # Save results
-    df.to_csv('./results/factor_v2_optimization_results.csv', index=False)
-    print(f"Full results saved to: ./results/factor_v2_optimization_results.csv")
-    
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(args.out, index=False)
+    print(f"Full-period results ({len(df)} of {len(configs)} configs) saved to: {args.out}")
+    print(f"All rungs: {args.db} (study 'factor_v2')")
+
+    # gross 는 수익률을 비례 배율할 뿐 (Sharpe 동일) → gross 를 뺀 조합별 최상위 1개씩
+    top = df.drop_duplicates([k for k in PARAM_GRID if k != 'gross']).head(args.export_top)
+    exports = [{k: row[k].item() if hasattr(row[k], 'item') else row[k] for k in PARAM_GRID}
+               for _, row in top.iterrows()]
+    exports += [params for params in ENSEMBLE_CONFIGS if params not in exports]
+    for params in exports:
+        print(f"  Exported: {export_config(price, fundamentals, params, existing_engines)}")
+
     # Best config
     best = df.iloc[0]
     print()
@@ -122,7 +217,6 @@ def main():
     print(f"  Avg Turnover: {best['avg_turnover']:.2f}")
     print(f"  Corr with C1: {best['corr_C1']:.3f}")
     print(f"  Corr with LV2: {best['corr_LV2']:.3f}")
-    print(f"  Output: {best['output_file']}")
     print("=" * 60)
 
 
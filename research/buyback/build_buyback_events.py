@@ -14,19 +14,22 @@ Usage example:
 
 Requirements:
     - SEC-API account + API key in environment variable: SEC_API_KEY
+      (not needed with --offline, which rebuilds from --cache_dir only)
     - pip: requests, pandas, pyarrow (for parquet)
 """
 
 import argparse
+import json
 import os
 import time
 import hashlib
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-import requests
 import pandas as pd
 
+from research.buyback.filing_cache import FilingCache
+
 BASE_URL = "https://api.sec-api.io"
 
 
@@ -66,35 +69,28 @@ def detect_buyback(text: str, keywords: List[str]) -> Dict[str, Any]:
 # ---- SEC-API client -------------------------------------------------------- #
 
 class SecApiClient:
-    def __init__(self, api_key: str, rate_limit_per_sec: float = 4.0):
+    def __init__(self, api_key: str, rate_limit_per_sec: float = 4.0,
+                 cache: Optional[FilingCache] = None):
         """
         rate_limit_per_sec: approximate requests per second to SEC-API.
+        cache: persistent response cache (research/buyback/filing_cache.py).
+               Query results and filing HTML are served from disk on rerun;
+               throttling / retry happen inside the cache on a miss.
         """
         self.api_key = api_key
-        self.headers = {"Authorization": api_key}
-        self.min_interval = 1.0 / rate_limit_per_sec
-        self._last_call_ts = 0.0
-
-    def _throttle(self):
-        import time as _time
-        now = _time.time()
-        dt = now - self._last_call_ts
-        if dt < self.min_interval:
-            _time.sleep(self.min_interval - dt)
-        self._last_call_ts = _time.time()
+        self.headers = {"Authorization": api_key} if api_key else {}
+        self.cache = cache or FilingCache(rate_limit_per_sec=rate_limit_per_sec)
 
     def query_filings(self, query: Dict[str, Any]) -> Dict[str, Any]:
-        self._throttle()
-        resp = requests.post(BASE_URL, json=query, headers=self.headers, timeout=30)
-        resp.raise_for_status()
-        return resp.json()
+        # Authorization header is not part of the cache key
+        text = self.cache.fetch_url(BASE_URL, method="POST", json_body=query,
+                                    headers=self.headers)
+        if text is None:
+            raise RuntimeError(f"SEC-API query failed (offline={self.cache.offline})")
+        return json.loads(text)
 
     def fetch_html(self, url: str) -> str:
-        self._throttle()
-        resp = requests.get(url, timeout=30)
-        if resp.status_code != 200:
-            return ""
-        return resp.text
+        return self.cache.fetch_url(url) or ""
 
 
 # ---- Core logic ------------------------------------------------------------ #
@@ -220,11 +216,13 @@ def build_buyback_events(
     max_filings_per_ticker: int = 200,
     keywords: List[str] = None,
     verbose: bool = False,
+    cache: Optional[FilingCache] = None,
+    rate_limit_per_sec: float = 4.0,
 ) -> pd.DataFrame:
     if keywords is None:
         keywords = DEFAULT_BUYBACK_KEYWORDS
 
-    client = SecApiClient(api_key=api_key, rate_limit_per_sec=4.0)
+    client = SecApiClient(api_key=api_key, rate_limit_per_sec=rate_limit_per_sec, cache=cache)
     all_events: List[Dict[str, Any]] = []
 
     t0 = time.time()
@@ -248,6 +246,7 @@ def build_buyback_events(
 
     t1 = time.time()
     print(f"Total events found: {len(all_events)} in {t1 - t0:.1f}s")
+    print(f"Cache: {client.cache.stats.as_dict()}")
 
     if not all_events:
         return pd.DataFrame(
@@ -313,6 +312,17 @@ def parse_args():
         default=4.0,
         help="Approximate SEC-API requests per second (throttling).",
     )
+    p.add_argument(
+        "--cache_dir",
+        type=str,
+        default="data/buyback/filing_cache",
+        help="Persistent SEC response cache directory.",
+    )
+    p.add_argument(
+        "--offline",
+        action="store_true",
+        help="Use cached responses only (no network, no API key needed).",
+    )
     p.add_argument(
         "--verbose",
         action="store_true",
@@ -324,10 +334,16 @@ def parse_args():
 def main():
     args = parse_args()
 
-    api_key = os.getenv("SEC_API_KEY")
-    if not api_key:
+    api_key = os.getenv("SEC_API_KEY", "")
+    if not api_key and not args.offline:
         raise RuntimeError("Environment variable SEC_API_KEY is not set.")
 
+    cache = FilingCache(
+        cache_dir=args.cache_dir,
+        rate_limit_per_sec=args.rate_limit_per_sec,
+        offline=args.offline,
+    )
+
     universe_df = pd.read_csv(args.universe_path)
     if "symbol" not in universe_df.columns:
         raise ValueError("universe CSV must contain a 'symbol' column.")
@@ -343,7 +359,10 @@ def main():
         api_key=api_key,
         max_filings_per_ticker=args.max_filings_per_ticker,
         verbose=args.verbose,
+        cache=cache,
+        rate_limit_per_sec=args.rate_limit_per_sec,
     )
+    cache.close()
 
     out_path = Path(args.output)
     out_path.parent.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,504 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Content-addressed local cache for EDGAR / SEC filing downloads.
+
+buyback_event_builder_v5/v6.py::download_edgar_text 와
+build_buyback_events*.py::fetch_html 은 실행할 때마다 같은 8-K 문서를 다시 받는다.
+이 모듈은 다운로드한 원문을 디스크에 영구 저장한다.
+
+- 파일 본문: sha256 기준 content-addressed gzip blob (objects/ab/abcdef....gz)
+- 인덱스: SQLite
+    filings(cik, accession)  → 8-K 원문 (download_edgar_text 대체)
+    urls(key)                → 그 밖의 URL (company_tickers.json, 목록 페이지, SEC-API 응답 등)
+- 404 등 영구 실패도 기록 (negative cache) → 재실행 시 재요청하지 않음
+- 429/5xx 는 지수 백오프 + Retry-After, 요청 간 최소 간격은 모든 스레드가 공유
+- offline=True 이면 네트워크를 전혀 쓰지 않고 캐시만 사용 (정규식 재처리용)
+- prefetch(): 스레드 풀로 미리 받아두기, stats 로 hit/miss 집계
+
+Usage:
+
+    cache = FilingCache("data/buyback/filing_cache", headers=HEADERS)
+    text = cache.get_filing(cik, accession_no)          # 8-K 원문
+    html = cache.fetch_url(url)                         # 임의 URL
+    cache.prefetch([(cik, acc), ...], n_workers=4)
+    print(cache.stats.as_dict())
+
+    # 캐시 상태 확인
+    python -m research.buyback.filing_cache --cache_dir data/buyback/filing_cache
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+EDGAR_BASE = "https://www.sec.gov"
+
+DEFAULT_HEADERS = {
+    "User-Agent": "ARES Research ares@research.com",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+# ---- Keys ------------------------------------------------------------------ #
+
+def normalize_cik(cik) -> str:
+    """'0000320193' / 320193 → '320193'"""
+    s = str(cik).strip()
+    return s.lstrip("0") or "0"
+
+
+def normalize_accession(accession_no: str) -> str:
+    """'000032019325000077' → '0000320193-25-000077'"""
+    s = str(accession_no).strip()
+    digits = s.replace("-", "")
+    if len(digits) == 18 and digits.isdigit():
+        return f"{digits[:10]}-{digits[10:12]}-{digits[12:]}"
+    return s
+
+
+def edgar_filing_urls(cik, accession_no: str, edgar_base: str = EDGAR_BASE) -> List[str]:
+    """EDGAR 원문 후보 URL (앞에서부터 시도)"""
+    cik_n = normalize_cik(cik)
+    acc = normalize_accession(accession_no)
+    acc_clean = acc.replace("-", "")
+    base = f"{edgar_base}/Archives/edgar/data/{cik_n}/{acc_clean}"
+    return [
+        f"{base}/{acc}.txt",
+        f"{base}/{acc}-index.htm",
+        f"{base}/primary_doc.html",
+    ]
+
+
+def url_key(url: str, params: Optional[Dict[str, Any]] = None,
+            method: str = "GET", json_body: Any = None) -> str:
+    """요청을 식별하는 정규화된 키 (인증 헤더는 제외)"""
+    parts = [method.upper(), url]
+    if params:
+        parts.append(json.dumps(params, sort_keys=True, default=str))
+    if json_body is not None:
+        parts.append(json.dumps(json_body, sort_keys=True, default=str))
+    return "|".join(parts)
+
+
+# ---- Stats ----------------------------------------------------------------- #
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    fetched: int = 0
+    failed: int = 0
+    bytes_downloaded: int = 0
+    http_requests: int = 0
+    retries: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["hit_rate"] = round(self.hit_rate, 4)
+        return d
+
+
+# ---- Cache ----------------------------------------------------------------- #
+
+class FilingCache:
+    def __init__(
+        self,
+        cache_dir: str = "data/buyback/filing_cache",
+        headers: Optional[Dict[str, str]] = None,
+        rate_limit_per_sec: float = 8.0,
+        max_retries: int = 4,
+        backoff_base: float = 1.0,
+        timeout: float = 30.0,
+        offline: bool = False,
+        session: Optional[requests.Session] = None,
+        edgar_base: str = EDGAR_BASE,
+    ):
+        """
+        rate_limit_per_sec: 모든 스레드가 공유하는 최대 요청 속도 (SEC 한도 10 req/s)
+        offline: True 면 네트워크 요청 없이 캐시만 사용 (miss → None)
+        edgar_base: EDGAR 원문 호스트 (로컬 HTTP stand-in 으로 교체 가능)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.headers = dict(headers or DEFAULT_HEADERS)
+        # requests 가 URL 로 Host 를 채우도록 고정 Host 헤더는 제거 (로컬 stand-in 테스트 호환)
+        self.headers.pop("Host", None)
+        self.min_interval = 1.0 / rate_limit_per_sec if rate_limit_per_sec > 0 else 0.0
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.offline = offline
+        self.edgar_base = edgar_base.rstrip("/")
+        self.session = session or requests.Session()
+        self.stats = CacheStats()
+
+        self._db_lock = threading.Lock()
+        self._rate_lock = threading.Lock()
+        self._next_slot = 0.0
+        self._conn: Optional[sqlite3.Connection] = None
+
+    # -- storage ----------------------------------------------------------- #
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            (self.cache_dir / "objects").mkdir(exist_ok=True)
+            conn = sqlite3.connect(str(self.cache_dir / "index.sqlite"), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS filings (
+                       cik TEXT NOT NULL,
+                       accession TEXT NOT NULL,
+                       url TEXT,
+                       sha256 TEXT,
+                       size INTEGER,
+                       status INTEGER,
+                       fetched_at TEXT,
+                       PRIMARY KEY (cik, accession))"""
+            )
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS urls (
+                       key TEXT PRIMARY KEY,
+                       url TEXT,
+                       sha256 TEXT,
+                       size INTEGER,
+                       status INTEGER,
+                       fetched_at REAL)"""
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _blob_path(self, sha: str) -> Path:
+        return self.cache_dir / "objects" / sha[:2] / f"{sha}.gz"
+
+    def _write_blob(self, text: str) -> Tuple[str, int]:
+        raw = text.encode("utf-8")
+        sha = hashlib.sha256(raw).hexdigest()
+        path = self._blob_path(sha)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".tmp{threading.get_ident()}")
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(raw)
+            os.replace(tmp, path)
+        return sha, len(raw)
+
+    def _read_blob(self, sha: str) -> Optional[str]:
+        path = self._blob_path(sha)
+        if not path.exists():
+            return None
+        with gzip.open(path, "rb") as f:
+            return f.read().decode("utf-8")
+
+    def _query(self, sql: str, args: tuple):
+        with self._db_lock:
+            return self.conn.execute(sql, args).fetchone()
+
+    def _execute(self, sql: str, args: tuple):
+        with self._db_lock:
+            self.conn.execute(sql, args)
+            self.conn.commit()
+
+    def _count(self, hit: bool):
+        with self._db_lock:
+            if hit:
+                self.stats.hits += 1
+            else:
+                self.stats.misses += 1
+
+    # -- network ----------------------------------------------------------- #
+
+    def _throttle(self):
+        if self.min_interval <= 0:
+            return
+        with self._rate_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def _request(self, url: str, params=None, method: str = "GET",
+                 json_body: Any = None, headers=None) -> Tuple[int, Optional[str]]:
+        """
+        HTTP 요청 (재시도 포함). Returns (status, text).
+        status 는 최종 HTTP 코드, 네트워크 오류는 0.
+        """
+        hdrs = dict(self.headers)
+        if headers:
+            hdrs.update(headers)
+
+        status = 0
+        for attempt in range(self.max_retries):
+            self._throttle()
+            retry_after = None
+            try:
+                with self._db_lock:
+                    self.stats.http_requests += 1
+                resp = self.session.request(method, url, params=params, json=json_body,
+                                            headers=hdrs, timeout=self.timeout)
+                status = resp.status_code
+                if status == 200:
+                    with self._db_lock:
+                        self.stats.bytes_downloaded += len(resp.content)
+                    return status, resp.text
+                if status not in RETRY_STATUS:
+                    return status, None
+                retry_after = resp.headers.get("Retry-After")
+            except requests.RequestException:
+                status = 0
+
+            if attempt < self.max_retries - 1:
+                with self._db_lock:
+                    self.stats.retries += 1
+                try:
+                    wait = float(retry_after) if retry_after else None
+                except ValueError:
+                    wait = None
+                if wait is None:
+                    wait = self.backoff_base * (2 ** attempt) * (1.0 + 0.25 * random.random())
+                time.sleep(wait)
+
+        return status, None
+
+    # -- public API -------------------------------------------------------- #
+
+    def get_filing(self, cik, accession_no: str, refresh: bool = False) -> Optional[str]:
+        """
+        (CIK, accession number) 8-K 원문. 캐시에 있으면 디스크에서, 없으면 EDGAR 에서 받아 저장.
+        영구 실패(404 등)도 기록되어 재요청하지 않는다 (refresh=True 로 무시).
+        """
+        cik_n = normalize_cik(cik)
+        acc = normalize_accession(accession_no)
+
+        if not refresh:
+            row = self._query(
+                "SELECT sha256, status FROM filings WHERE cik=? AND accession=?", (cik_n, acc)
+            )
+            if row is not None:
+                sha, status = row
+                text = self._read_blob(sha) if sha else None
+                if text is not None or status != 200:
+                    self._count(hit=True)
+                    return text
+
+        self._count(hit=False)
+        if self.offline:
+            return None
+
+        last_status = 0
+        for url in edgar_filing_urls(cik_n, acc, self.edgar_base):
+            status, text = self._request(url)
+            last_status = status
+            if text is not None:
+                sha, size = self._write_blob(text)
+                self._execute(
+                    "INSERT OR REPLACE INTO filings VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (cik_n, acc, url, sha, size, status, datetime.now().isoformat()),
+                )
+                with self._db_lock:
+                    self.stats.fetched += 1
+                return text
+            if status != 404:
+                break
+
+        with self._db_lock:
+            self.stats.failed += 1
+        if last_status == 404:
+            self._execute(
+                "INSERT OR REPLACE INTO filings VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (cik_n, acc, None, None, 0, 404, datetime.now().isoformat()),
+            )
+        return None
+
+    def fetch_url(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        method: str = "GET",
+        json_body: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        max_age: Optional[float] = None,
+        refresh: bool = False,
+    ) -> Optional[str]:
+        """
+        임의 URL 응답 본문 캐시 (company_tickers.json, 목록 페이지, SEC-API 조회 등).
+
+        max_age: 초 단위 유효기간. None 이면 영구. offline 모드에서는 무시하고 캐시 사용.
+        """
+        key = url_key(url, params, method, json_body)
+
+        if not refresh:
+            row = self._query("SELECT sha256, status, fetched_at FROM urls WHERE key=?", (key,))
+            if row is not None:
+                sha, status, fetched_at = row
+                fresh = self.offline or max_age is None or (time.time() - fetched_at) <= max_age
+                if fresh:
+                    text = self._read_blob(sha) if sha else None
+                    if text is not None or status != 200:
+                        self._count(hit=True)
+                        return text
+
+        self._count(hit=False)
+        if self.offline:
+            return None
+
+        status, text = self._request(url, params=params, method=method,
+                                     json_body=json_body, headers=headers)
+        if text is None:
+            with self._db_lock:
+                self.stats.failed += 1
+            if status == 404:
+                self._execute("INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?, ?, ?)",
+                              (key, url, None, 0, 404, time.time()))
+            return None
+
+        sha, size = self._write_blob(text)
+        self._execute("INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?, ?, ?)",
+                      (key, url, sha, size, status, time.time()))
+        with self._db_lock:
+            self.stats.fetched += 1
+        return text
+
+    def has_filing(self, cik, accession_no: str) -> bool:
+        row = self._query(
+            "SELECT sha256, status FROM filings WHERE cik=? AND accession=?",
+            (normalize_cik(cik), normalize_accession(accession_no)),
+        )
+        return row is not None and (row[0] is not None or row[1] != 200)
+
+    def prefetch(
+        self,
+        filings: Iterable,
+        n_workers: int = 4,
+        verbose: bool = True,
+    ) -> CacheStats:
+        """
+        캐시에 없는 filing 을 스레드 풀로 미리 받아둔다.
+
+        filings: (cik, accession) 튜플 또는 'cik' / 'accessionNo' 키를 가진 dict 의 iterable
+        """
+        keys = []
+        for f in filings:
+            if isinstance(f, dict):
+                keys.append((f["cik"], f["accessionNo"]))
+            else:
+                keys.append((f[0], f[1]))
+        todo = [k for k in dict.fromkeys(keys) if not self.has_filing(*k)]
+
+        if verbose:
+            print(f"[cache] prefetch: {len(keys)} filings, {len(keys) - len(todo)} cached, "
+                  f"{len(todo)} to download")
+        if not todo or self.offline:
+            return self.stats
+
+        t0 = time.time()
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            for i, _ in enumerate(executor.map(lambda k: self.get_filing(*k), todo), start=1):
+                if verbose and i % 100 == 0:
+                    print(f"[cache]   {i}/{len(todo)} ({i / (time.time() - t0):.1f} filings/s)")
+        if verbose:
+            print(f"[cache] prefetch done in {time.time() - t0:.1f}s: {self.stats.as_dict()}")
+        return self.stats
+
+    def list_filings(self, cik=None) -> List[Tuple[str, str]]:
+        """원문이 캐시된 filing 키 목록 → [(cik, accession), ...]"""
+        sql = "SELECT cik, accession FROM filings WHERE sha256 IS NOT NULL"
+        args: tuple = ()
+        if cik is not None:
+            sql += " AND cik=?"
+            args = (normalize_cik(cik),)
+        with self._db_lock:
+            return self.conn.execute(sql + " ORDER BY cik, accession", args).fetchall()
+
+    def iter_filings(self, cik=None) -> Iterator[Tuple[str, str, str]]:
+        """캐시된 filing 원문 순회 → (cik, accession, text). 오프라인 재처리용."""
+        sql = "SELECT cik, accession, sha256 FROM filings WHERE sha256 IS NOT NULL"
+        args: tuple = ()
+        if cik is not None:
+            sql += " AND cik=?"
+            args = (normalize_cik(cik),)
+        with self._db_lock:
+            rows = self.conn.execute(sql + " ORDER BY cik, accession", args).fetchall()
+        for cik_n, acc, sha in rows:
+            text = self._read_blob(sha)
+            if text is not None:
+                yield cik_n, acc, text
+
+    def summary(self) -> Dict[str, Any]:
+        with self._db_lock:
+            n_filings, raw_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM filings WHERE sha256 IS NOT NULL"
+            ).fetchone()
+            n_negative = self.conn.execute(
+                "SELECT COUNT(*) FROM filings WHERE sha256 IS NULL"
+            ).fetchone()[0]
+            n_urls = self.conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+        disk = sum(p.stat().st_size for p in (self.cache_dir / "objects").rglob("*.gz"))
+        return {
+            "filings": n_filings,
+            "negative_entries": n_negative,
+            "urls": n_urls,
+            "raw_bytes": int(raw_bytes),
+            "disk_bytes": int(disk),
+        }
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+# ---- CLI ------------------------------------------------------------------- #
+
+def parse_args():
+    p = argparse.ArgumentParser(description="EDGAR filing cache: summary / prefetch.")
+    p.add_argument("--cache_dir", type=str, default="data/buyback/filing_cache")
+    p.add_argument(
+        "--prefetch_csv",
+        type=str,
+        default=None,
+        help="CSV with 'cik' and 'accessionNo' columns to download into the cache.",
+    )
+    p.add_argument("--workers", type=int, default=4)
+    p.add_argument("--rate_limit_per_sec", type=float, default=8.0)
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    cache = FilingCache(args.cache_dir, rate_limit_per_sec=args.rate_limit_per_sec)
+
+    if args.prefetch_csv:
+        import pandas as pd
+        df = pd.read_csv(args.prefetch_csv, dtype={"cik": str, "accessionNo": str})
+        cache.prefetch(df[["cik", "accessionNo"]].to_dict("records"), n_workers=args.workers)
+
+    print(json.dumps(cache.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Buyback 8-K text extraction stage (compiled regex + process pool).
+
+buyback_event_builder_v6.py::extract_buyback_info 는 filing 마다 BeautifulSoup(lxml) 로
+전체 DOM 을 만들고, KEYWORDS 마다 re.search, AMOUNT_PATTERNS / SHARE_PATTERNS 마다
+re.findall 을 다시 돌린다 (패턴 문자열은 매번 re 캐시 조회). 그것도 다운로드 루프 안에서
+한 filing 씩 순차로 실행된다.
+
+이 모듈은 추출을 다운로드와 분리한다.
+
+- 전처리 prefilter: 모든 KEYWORDS 는 'repurchase' 또는 'buyback' 을 포함하므로,
+  원문에 두 단어가 없으면 HTML 정리 없이 바로 None (대부분의 8-K)
+- HTML → text: 정규식 태그 제거 + html.unescape (DOM 생성 없음),
+  script/style/주석과 uuencode 첨부(이미지, PDF)는 먼저 잘라낸다
+- 금액: AMOUNT_PATTERNS[1:] 가 잡는 금액은 모두 AMOUNT_PATTERNS[0] ('$N million|billion')
+  매치의 부분집합 → max(amount) 가 같으므로 [0] 하나만 실행
+  ('authorized.*?...repurchase' 같은 .*? 패턴의 O(n^2) 역추적 제거)
+- 주식 수: SHARE_PATTERNS 를 하나의 alternation 으로 합쳐 한 번만 스캔
+- extract_filings(): FilingCache (offline) 위에서 ProcessPoolExecutor 로 병렬 추출,
+  이벤트를 CSV 로 스트리밍 저장하고 filing 당 처리량을 보고
+
+Usage:
+
+    from research.buyback.text_extraction import extract_buyback_info, extract_filings
+
+    info = extract_buyback_info(text)
+    events, stats = extract_filings(filings, cache_dir, n_workers=8, out_csv="events.csv")
+
+    # 캐시된 모든 filing 재처리 (네트워크 없음)
+    python -m research.buyback.text_extraction \
+        --cache_dir data/buyback/filing_cache --output data/buyback/buyback_events_cached.csv
+"""
+
+import argparse
+import csv
+import html
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from research.buyback.filing_cache import FilingCache
+
+
+# ---- Patterns -------------------------------------------------------------- #
+
+# Keywords for buyback identification
+KEYWORDS = [
+    r'share repurchase',
+    r'stock repurchase',
+    r'buyback',
+    r'repurchase program',
+    r'share buyback',
+    r'stock buyback',
+    r'repurchase authorization'
+]
+
+# Amount patterns
+AMOUNT_PATTERNS = [
+    r'\$\s*(\d+(?:\.\d+)?)\s*(million|billion)',
+    r'repurchase\s+(?:up\s+to\s+)?\$\s*(\d+(?:\.\d+)?)\s*(million|billion)',
+    r'authorized.*?\$\s*(\d+(?:\.\d+)?)\s*(million|billion).*?repurchase',
+    r'repurchase\s+program\s+of\s+\$\s*(\d+(?:\.\d+)?)\s*(million|billion)',
+    r'\$\s*(\d+(?:\.\d+)?)\s*(million|billion).*?share\s+repurchase',
+]
+
+# Share count patterns
+SHARE_PATTERNS = [
+    r'repurchase\s+(?:up\s+to\s+)?(\d+(?:,\d+)*(?:\.\d+)?)\s*million\s+shares',
+    r'repurchase\s+(\d+(?:,\d+)*)\s+shares',
+    r'buyback\s+(?:of\s+)?(\d+(?:,\d+)*(?:\.\d+)?)\s*million\s+shares',
+]
+
+# 모든 KEYWORDS 가 포함하는 단어 (원문 prefilter 용)
+PREFILTER_TERMS = ('repurchase', 'buyback')
+
+_PREFILTER_RE = re.compile('|'.join(PREFILTER_TERMS), re.IGNORECASE)
+_KEYWORD_RES = [re.compile(k) for k in KEYWORDS]
+_AMOUNT_RE = re.compile(AMOUNT_PATTERNS[0])
+# 그룹 번호(lastindex) → SHARE_PATTERNS 인덱스
+_SHARE_RE = re.compile('|'.join(f'(?:{p})' for p in SHARE_PATTERNS))
+_SHARE_MULT = [1e6 if 'million' in p else 1.0 for p in SHARE_PATTERNS]
+
+_UUENCODE_RE = re.compile(r'^begin [0-7]{3} .*?^end$', re.MULTILINE | re.DOTALL)
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]*>')
+_WS_RE = re.compile(r'\s+')
+
+
+# ---- Single filing --------------------------------------------------------- #
+
+def html_to_text(text: str, parser: str = "regex") -> str:
+    """
+    8-K 원문(HTML / SGML .txt) → 공백 정규화된 평문.
+
+    parser="regex": 태그 제거 + 엔티티 디코드 (기본, DOM 생성 없음)
+    parser="bs4":   BeautifulSoup(lxml).get_text(' ') (기존 v6 경로)
+    """
+    text = _UUENCODE_RE.sub(' ', text)
+    if parser == "bs4":
+        from bs4 import BeautifulSoup
+        try:
+            text = BeautifulSoup(text, 'lxml').get_text(separator=' ')
+        except Exception:
+            pass
+    else:
+        text = _SCRIPT_STYLE_RE.sub(' ', text)
+        text = _COMMENT_RE.sub(' ', text)
+        text = html.unescape(_TAG_RE.sub(' ', text))
+    return _WS_RE.sub(' ', text).strip()
+
+
+def extract_buyback_info(text: Optional[str], parser: str = "regex") -> Optional[Dict[str, Any]]:
+    """
+    Extract buyback information from filing text
+
+    Returns:
+        Dict with keys: has_buyback, amount, shares, confidence, keyword_count
+        Or None if no buyback detected
+    """
+    if not text or not _PREFILTER_RE.search(text):
+        return None
+
+    text_lower = html_to_text(text, parser).lower()
+
+    keyword_count = sum(1 for k in _KEYWORD_RES if k.search(text_lower))
+    if keyword_count == 0:
+        return None
+
+    amounts = []
+    for value, unit in _AMOUNT_RE.findall(text_lower):
+        try:
+            amounts.append(float(value) * (1e9 if unit == 'billion' else 1e6))
+        except ValueError:
+            continue
+
+    shares = []
+    for m in _SHARE_RE.finditer(text_lower):
+        idx = m.lastindex - 1
+        try:
+            shares.append(float(m.group(m.lastindex).replace(',', '')) * _SHARE_MULT[idx])
+        except ValueError:
+            continue
+
+    # Determine confidence level
+    confidence = 'low'
+    if amounts and shares:
+        confidence = 'high'
+    elif amounts or shares:
+        confidence = 'medium'
+
+    return {
+        'has_buyback': True,
+        'amount': max(amounts) if amounts else None,
+        'shares': max(shares) if shares else None,
+        'confidence': confidence,
+        'keyword_count': keyword_count,
+    }
+
+
+# ---- Parallel stage -------------------------------------------------------- #
+
+EVENT_COLUMNS = [
+    'date', 'ticker', 'buyback_amount', 'share_count', 'confidence',
+    'keyword_count', 'accessionNo', 'url', 'cik',
+]
+
+
+@dataclass
+class ExtractionStats:
+    filings: int = 0
+    missing: int = 0          # 캐시에 원문 없음 (미다운로드 / 404)
+    events: int = 0
+    bytes_parsed: int = 0
+    worker_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+    @property
+    def filings_per_sec(self) -> float:
+        return self.filings / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    @property
+    def ms_per_filing(self) -> float:
+        n = self.filings - self.missing
+        return 1e3 * self.worker_seconds / n if n > 0 else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes_parsed / 1e6 / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["filings_per_sec"] = round(self.filings_per_sec, 2)
+        d["ms_per_filing"] = round(self.ms_per_filing, 3)
+        d["mb_per_sec"] = round(self.mb_per_sec, 3)
+        return d
+
+
+_worker_cache: Optional[FilingCache] = None
+_worker_parser = "regex"
+
+
+def _init_worker(cache_dir: str, parser: str):
+    global _worker_cache, _worker_parser
+    _worker_cache = FilingCache(cache_dir, offline=True)
+    _worker_parser = parser
+
+
+def _extract_one(key: Tuple[str, str]):
+    """worker: 캐시에서 원문을 읽어 추출 → (n_bytes, info, seconds). n_bytes=-1 은 원문 없음."""
+    t0 = time.perf_counter()
+    text = _worker_cache.get_filing(*key)
+    if text is None:
+        return -1, None, time.perf_counter() - t0
+    info = extract_buyback_info(text, _worker_parser)
+    return len(text), info, time.perf_counter() - t0
+
+
+def _as_filing_dict(f) -> Dict[str, Any]:
+    if isinstance(f, dict):
+        return f
+    return {'cik': f[0], 'accessionNo': f[1]}
+
+
+def extract_filings(
+    filings: Optional[Iterable] = None,
+    cache_dir: str = "data/buyback/filing_cache",
+    n_workers: Optional[int] = None,
+    chunksize: int = 16,
+    out_csv: Optional[str] = None,
+    parser: str = "regex",
+    verbose: bool = True,
+    progress_every: int = 500,
+) -> Tuple[pd.DataFrame, ExtractionStats]:
+    """
+    캐시된 filing 원문에서 buyback 이벤트를 병렬 추출 (네트워크 없음).
+
+    Args:
+        filings: 'cik' / 'accessionNo' (선택: 'ticker', 'date', 'url') 키 dict 또는
+                 (cik, accession) 튜플의 iterable. None 이면 캐시의 모든 filing.
+        n_workers: 프로세스 수 (None → os.cpu_count(), 1 이하 → 현재 프로세스에서 실행)
+        out_csv: 이벤트를 찾는 즉시 한 줄씩 기록 (중단되어도 그때까지 결과 보존)
+
+    Returns:
+        (events DataFrame [EVENT_COLUMNS], ExtractionStats)
+    """
+    if filings is None:
+        cache = FilingCache(cache_dir, offline=True)
+        items = [{'cik': c, 'accessionNo': a} for c, a in cache.list_filings()]
+        cache.close()
+    else:
+        items = [_as_filing_dict(f) for f in filings]
+    keys = [(f['cik'], f['accessionNo']) for f in items]
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    stats = ExtractionStats()
+    events: List[Dict[str, Any]] = []
+    writer = None
+    fh = None
+    if out_csv:
+        os.makedirs(os.path.dirname(out_csv) or ".", exist_ok=True)
+        fh = open(out_csv, "w", newline="")
+        writer = csv.DictWriter(fh, fieldnames=EVENT_COLUMNS)
+        writer.writeheader()
+
+    if verbose:
+        print(f"[extract] {len(keys)} filings, workers={max(n_workers, 1)}, parser={parser}")
+
+    t0 = time.time()
+    executor = None
+    try:
+        if n_workers > 1 and len(keys) > chunksize:
+            executor = ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                           initargs=(cache_dir, parser))
+            results = executor.map(_extract_one, keys, chunksize=chunksize)
+        else:
+            _init_worker(cache_dir, parser)
+            results = map(_extract_one, keys)
+
+        for i, (filing, (n_bytes, info, secs)) in enumerate(zip(items, results), start=1):
+            stats.filings += 1
+            stats.worker_seconds += secs
+            if n_bytes < 0:
+                stats.missing += 1
+            else:
+                stats.bytes_parsed += n_bytes
+
+            if info and info['has_buyback']:
+                event = {
+                    'date': filing.get('date'),
+                    'ticker': filing.get('ticker'),
+                    'buyback_amount': info['amount'],
+                    'share_count': info['shares'],
+                    'confidence': info['confidence'],
+                    'keyword_count': info['keyword_count'],
+                    'accessionNo': filing['accessionNo'],
+                    'url': filing.get('url'),
+                    'cik': filing['cik'],
+                }
+                events.append(event)
+                stats.events += 1
+                if writer is not None:
+                    writer.writerow(event)
+                    fh.flush()
+
+            if verbose and i % progress_every == 0:
+                dt = time.time() - t0
+                print(f"[extract]   {i}/{len(keys)} ({i / dt:.1f} filings/s, "
+                      f"{stats.events} events)")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if fh is not None:
+            fh.close()
+
+    stats.wall_seconds = time.time() - t0
+    if verbose:
+        print(f"[extract] done: {stats.as_dict()}")
+
+    return pd.DataFrame(events, columns=EVENT_COLUMNS), stats
+
+
+# ---- CLI ------------------------------------------------------------------- #
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Extract buyback events from cached 8-K filings.")
+    p.add_argument("--cache_dir", type=str, default="data/buyback/filing_cache")
+    p.add_argument(
+        "--filings_csv",
+        type=str,
+        default=None,
+        help="CSV with 'cik' and 'accessionNo' (optional 'ticker', 'date', 'url'). "
+             "Default: every filing in the cache.",
+    )
+    p.add_argument("--output", type=str, default="data/buyback/buyback_events_cached.csv")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--chunksize", type=int, default=16)
+    p.add_argument("--parser", type=str, default="regex", choices=["regex", "bs4"])
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    filings = None
+    if args.filings_csv:
+        df = pd.read_csv(args.filings_csv, dtype={"cik": str, "accessionNo": str})
+        filings = df.where(df.notna(), None).to_dict("records")
+
+    events, stats = extract_filings(
+        filings,
+        cache_dir=args.cache_dir,
+        n_workers=args.workers,
+        chunksize=args.chunksize,
+        out_csv=args.output,
+        parser=args.parser,
+    )
+    print(f"Saved {len(events)} events → {args.output}")
+    print(json.dumps(stats.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,14 +15,18 @@ Execution Time: 3-8 hours for SP100 × 10 years
 
 import os
 import sys
-import time
-import requests
 import re
 from bs4 import BeautifulSoup
 import pandas as pd
 from sec_api import QueryApi
 from datetime import datetime
 import json
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from research.buyback.filing_cache import FilingCache
 
 # Configuration
 SEC_API_KEY = os.environ.get('SEC_API_KEY', 'c7e1d8f6b3e5a0c4d2f9e8b7a6c5d4e3f2a1b0c9d8e7f6a5b4c3d2e1f0a9b8c7')
@@ -30,6 +34,14 @@ DATA_DIR = '/home/ubuntu/ares7-ensemble/data'
 UNIVERSE_FILE = f'{DATA_DIR}/universe/sp100.csv'
 OUTPUT_FILE = f'{DATA_DIR}/buyback/buyback_events_v5.csv'
 LOG_FILE = f'{DATA_DIR}/buyback/extraction_log_v5.json'
+CACHE_DIR = f'{DATA_DIR}/buyback/filing_cache'
+
+# SEC requires User-Agent header
+EDGAR_HEADERS = {
+    'User-Agent': 'ARES Research ares@research.com',
+    'Accept-Encoding': 'gzip, deflate',
+}
+_filing_cache = None
 
 # Initialize SEC-API
 query_api = QueryApi(api_key=SEC_API_KEY)
@@ -122,62 +134,31 @@ def get_8k_filings(ticker, start_year=2015, end_year=2025):
     return filings
 
 
-def download_edgar_text(cik, accession_no, max_retries=3):
+def get_filing_cache():
+    """Shared FilingCache (created on first use)"""
+    global _filing_cache
+    if _filing_cache is None:
+        _filing_cache = FilingCache(CACHE_DIR, headers=EDGAR_HEADERS, rate_limit_per_sec=8.0)
+    return _filing_cache
+
+
+def download_edgar_text(cik, accession_no):
     """
-    Download full text from EDGAR
+    Download full text from EDGAR (via the persistent filing cache)
     
     Args:
         cik: Company CIK number
         accession_no: Accession number (format: 0000000000-00-000000)
-        max_retries: Maximum number of retry attempts
     
     Returns:
         Full text content or None if failed
     """
-    # Remove hyphens from accession number for directory name
-    acc_clean = accession_no.replace('-', '')
-    
-    # EDGAR URL format
-    url = f"https://www.sec.gov/Archives/edgar/data/{cik}/{acc_clean}/{accession_no}.txt"
-    
-    # SEC requires User-Agent header
-    headers = {
-        'User-Agent': 'ARES Research ares@research.com',
-        'Accept-Encoding': 'gzip, deflate',
-        'Host': 'www.sec.gov'
-    }
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            return response.text
-        
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
-                # Try alternative URL format
-                url_alt = f"https://www.sec.gov/Archives/edgar/data/{cik}/{acc_clean}/{accession_no}-index.htm"
-                try:
-                    response = requests.get(url_alt, headers=headers, timeout=15)
-                    response.raise_for_status()
-                    return response.text
-                except:
-                    pass
-            
-            if attempt < max_retries - 1:
-                time.sleep(1)
-            else:
-                print(f"    ⚠️  HTTP {e.response.status_code} for {accession_no}")
-                return None
-        
-        except Exception as e:
-            if attempt < max_retries - 1:
-                time.sleep(1)
-            else:
-                print(f"    ⚠️  Download error for {accession_no}: {e}")
-                return None
-    
-    return None
+    # Cache hit → no network; miss → throttled download with retry/backoff
+    # (.txt first, -index.htm fallback) and the result is stored for reruns.
+    text = get_filing_cache().get_filing(cik, accession_no)
+    if text is None:
+        print(f"    ⚠️  Download failed for {accession_no}")
+    return text
 
 
 def extract_buyback_info(text):
@@ -320,9 +301,6 @@ def main():
                         extraction_log['buybacks_found'] += 1
                         
                         print(f"    ✅ BUYBACK FOUND: {filing['date']} - ${buyback_info['amount']:,.0f}" if buyback_info['amount'] else f"    ✅ BUYBACK FOUND: {filing['date']} (no amount)")
-                
-                # Rate limiting (SEC allows 10 requests/second)
-                time.sleep(0.15)
             
             extraction_log['tickers_processed'] += 1
             
@@ -10,56 +10,52 @@ Approach:
 4. Parse text with regex to extract buyback information
 5. Store results in CSV format
 
+All EDGAR responses go through research/buyback/filing_cache.py (persistent,
+content-addressed). Set EDGAR_OFFLINE=1 to rerun extraction from the cache only,
+EDGAR_PREFETCH_WORKERS=N to download filings with N threads. Extraction runs after
+the download phase in EDGAR_EXTRACT_WORKERS processes
+(research/buyback/text_extraction.py).
+
 No API key required - completely free and open access
 Expected Success Rate: 70-90%
 """
 
 import os
 import sys
-import time
-import requests
 import re
 from bs4 import BeautifulSoup
 import pandas as pd
 from datetime import datetime
 import json
+from pathlib import Path
 from urllib.parse import urljoin
 
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from research.buyback.filing_cache import FilingCache
+from research.buyback.text_extraction import (
+    KEYWORDS, AMOUNT_PATTERNS, SHARE_PATTERNS, extract_filings,
+    extract_buyback_info as _extract_buyback_info,
+)
+
 # Configuration
 DATA_DIR = '/home/ubuntu/ares7-ensemble/data'
 UNIVERSE_FILE = f'{DATA_DIR}/universe/sp100.csv'
 OUTPUT_FILE = f'{DATA_DIR}/buyback/buyback_events_v6.csv'
 LOG_FILE = f'{DATA_DIR}/buyback/extraction_log_v6.json'
+CACHE_DIR = f'{DATA_DIR}/buyback/filing_cache'
+
+# Cache behaviour
+OFFLINE = os.environ.get('EDGAR_OFFLINE', '0') == '1'             # cache only, no network
+PREFETCH_WORKERS = int(os.environ.get('EDGAR_PREFETCH_WORKERS', '1'))  # download threads
+EXTRACT_WORKERS = int(os.environ.get('EDGAR_EXTRACT_WORKERS', str(os.cpu_count() or 1)))  # regex processes
+LISTING_MAX_AGE = 24 * 3600  # seconds before filing list / ticker map pages are refetched
 
 # SEC EDGAR base URL
 EDGAR_BASE = 'https://www.sec.gov'
 
-# Keywords for buyback identification
-KEYWORDS = [
-    r'share repurchase',
-    r'stock repurchase',
-    r'buyback',
-    r'repurchase program',
-    r'share buyback',
-    r'stock buyback',
-    r'repurchase authorization'
-]
-
-# Amount patterns
-AMOUNT_PATTERNS = [
-    r'\$\s*(\d+(?:\.\d+)?)\s*(million|billion)',
-    r'repurchase\s+(?:up\s+to\s+)?\$\s*(\d+(?:\.\d+)?)\s*(million|billion)',
-    r'authorized.*?\$\s*(\d+(?:\.\d+)?)\s*(million|billion).*?repurchase',
-    r'repurchase\s+program\s+of\s+\$\s*(\d+(?:\.\d+)?)\s*(million|billion)',
-    r'\$\s*(\d+(?:\.\d+)?)\s*(million|billion).*?share\s+repurchase',
-]
-
-# Share count patterns
-SHARE_PATTERNS = [
-    r'repurchase\s+(?:up\s+to\s+)?(\d+(?:,\d+)*(?:\.\d+)?)\s*million\s+shares',
-    r'repurchase\s+(\d+(?:,\d+)*)\s+shares',
-    r'buyback\s+(?:of\s+)?(\d+(?:,\d+)*(?:\.\d+)?)\s*million\s+shares',
-]
+# Keywords / AMOUNT_PATTERNS / SHARE_PATTERNS: research/buyback/text_extraction.py
 
 # User-Agent header (required by SEC)
 HEADERS = {
@@ -69,6 +65,19 @@ HEADERS = {
 }
 
 
+_filing_cache = None
+_cik_map = None
+
+
+def get_filing_cache():
+    """Shared FilingCache (created on first use)"""
+    global _filing_cache
+    if _filing_cache is None:
+        _filing_cache = FilingCache(CACHE_DIR, headers=HEADERS, rate_limit_per_sec=8.0,
+                                    offline=OFFLINE)
+    return _filing_cache
+
+
 def get_sp100_tickers():
     """Load SP100 ticker list"""
     if not os.path.exists(UNIVERSE_FILE):
@@ -88,19 +97,26 @@ def get_cik_from_ticker(ticker):
     Returns:
         CIK as string (zero-padded to 10 digits) or None
     """
-    # SEC company tickers JSON (updated daily)
+    global _cik_map
+
+    # SEC company tickers JSON (updated daily) - loaded once per run, cached on disk
     url = 'https://www.sec.gov/files/company_tickers.json'
     
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        if _cik_map is None:
+            text = get_filing_cache().fetch_url(url, max_age=LISTING_MAX_AGE)
+            if text is None:
+                print(f"  ⚠️  company_tickers.json unavailable")
+                return None
+            data = json.loads(text)
+            _cik_map = {
+                entry['ticker'].upper(): str(entry['cik_str']).zfill(10)
+                for entry in data.values()
+            }
         
-        # Search for ticker
-        for entry in data.values():
-            if entry['ticker'].upper() == ticker.upper():
-                cik = str(entry['cik_str']).zfill(10)
-                return cik
+        cik = _cik_map.get(ticker.upper())
+        if cik:
+            return cik
         
         print(f"  ⚠️  CIK not found for {ticker}")
         return None
@@ -136,10 +152,12 @@ def get_8k_filings_from_edgar(ticker, cik, start_year=2015, end_year=2025):
     }
     
     try:
-        response = requests.get(base_url, params=params, headers=HEADERS, timeout=15)
-        response.raise_for_status()
+        html = get_filing_cache().fetch_url(base_url, params=params, max_age=LISTING_MAX_AGE)
+        if html is None:
+            print(f"  ⚠️  Filing list unavailable for {ticker}")
+            return filings
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = BeautifulSoup(html, 'html.parser')
         
         # Find the filings table
         table = soup.find('table', {'class': 'tableFile2'})
@@ -200,133 +218,32 @@ def get_8k_filings_from_edgar(ticker, cik, start_year=2015, end_year=2025):
 
 def download_edgar_text(cik, accession_no, max_retries=3):
     """
-    Download full text from EDGAR
+    Download full text from EDGAR (via the local filing cache)
     
     Args:
         cik: Company CIK number (10 digits)
         accession_no: Accession number (format: 0000000000-00-000000)
-        max_retries: Maximum number of retry attempts
+        max_retries: Kept for compatibility; retries/backoff are handled by FilingCache
     
     Returns:
-        Full text content or None if failed
+        Full text content or None if failed (or not cached in offline mode)
     """
-    # Remove hyphens from accession number for directory name
-    acc_clean = accession_no.replace('-', '')
-    
-    # EDGAR URL format
-    url = f"{EDGAR_BASE}/Archives/edgar/data/{cik}/{acc_clean}/{accession_no}.txt"
-    
-    for attempt in range(max_retries):
-        try:
-            response = requests.get(url, headers=HEADERS, timeout=15)
-            response.raise_for_status()
-            return response.text
-        
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
-                # Try alternative formats
-                alternatives = [
-                    f"{EDGAR_BASE}/Archives/edgar/data/{cik}/{acc_clean}/{accession_no}-index.htm",
-                    f"{EDGAR_BASE}/Archives/edgar/data/{cik}/{acc_clean}/primary_doc.html",
-                ]
-                
-                for alt_url in alternatives:
-                    try:
-                        response = requests.get(alt_url, headers=HEADERS, timeout=15)
-                        response.raise_for_status()
-                        return response.text
-                    except:
-                        continue
-            
-            if attempt < max_retries - 1:
-                time.sleep(1)
-        
-        except Exception as e:
-            if attempt < max_retries - 1:
-                time.sleep(1)
-    
-    return None
+    return get_filing_cache().get_filing(cik, accession_no)
 
 
 def extract_buyback_info(text):
     """
     Extract buyback information from filing text
     
+    Compiled-regex implementation in research/buyback/text_extraction.py
+    (same output as the former BeautifulSoup + per-pattern re.findall version
+    on well-formed HTML).
+    
     Returns:
         Dict with keys: has_buyback, amount, shares, confidence
         Or None if no buyback detected
     """
-    if not text:
-        return None
-    
-    # Preprocess text with error handling
-    try:
-        soup = BeautifulSoup(text, 'lxml')
-        text = soup.get_text(separator=' ')
-    except:
-        # Fallback: use raw text if parsing fails
-        pass
-    
-    text = re.sub(r'\s+', ' ', text).strip()
-    text_lower = text.lower()
-    
-    # Check for buyback keywords
-    keyword_matches = []
-    for keyword in KEYWORDS:
-        if re.search(keyword, text_lower):
-            keyword_matches.append(keyword)
-    
-    if not keyword_matches:
-        return None
-    
-    # Extract dollar amounts
-    amounts = []
-    for pattern in AMOUNT_PATTERNS:
-        matches = re.findall(pattern, text_lower)
-        for match in matches:
-            try:
-                value = float(match[0])
-                unit = match[1]
-                
-                if unit == 'billion':
-                    value *= 1e9
-                elif unit == 'million':
-                    value *= 1e6
-                
-                amounts.append(value)
-            except (ValueError, IndexError):
-                continue
-    
-    # Extract share counts
-    shares = []
-    for pattern in SHARE_PATTERNS:
-        matches = re.findall(pattern, text_lower)
-        for match in matches:
-            try:
-                share_str = match.replace(',', '')
-                share_count = float(share_str)
-                
-                if 'million' in pattern:
-                    share_count *= 1e6
-                
-                shares.append(share_count)
-            except (ValueError, AttributeError):
-                continue
-    
-    # Determine confidence level
-    confidence = 'low'
-    if amounts and shares:
-        confidence = 'high'
-    elif amounts or shares:
-        confidence = 'medium'
-    
-    return {
-        'has_buyback': True,
-        'amount': max(amounts) if amounts else None,
-        'shares': max(shares) if shares else None,
-        'confidence': confidence,
-        'keyword_count': len(keyword_matches)
-    }
+    return _extract_buyback_info(text)
 
 
 def main():
@@ -348,7 +265,6 @@ def main():
     print()
     
     # Storage
-    all_events = []
     extraction_log = {
         'start_time': datetime.now().isoformat(),
         'tickers_processed': 0,
@@ -357,9 +273,14 @@ def main():
         'errors': []
     }
     
-    # Process each ticker
+    cache = get_filing_cache()
+    if OFFLINE:
+        print("📦 Offline mode: reading filings from cache only")
+    
+    # Phase 1: CIK + 8-K filing list per ticker
+    ticker_filings = []
     for i, ticker in enumerate(tickers, 1):
-        print(f"[{i}/{len(tickers)}] Processing {ticker}...")
+        print(f"[{i}/{len(tickers)}] Listing {ticker}...")
         
         try:
             # Get CIK
@@ -373,48 +294,35 @@ def main():
             # Get 8-K filings
             filings = get_8k_filings_from_edgar(ticker, cik, start_year, end_year)
             extraction_log['filings_checked'] += len(filings)
-            
-            # Process each filing
-            for filing in filings:
-                # Download full text
-                text = download_edgar_text(filing['cik'], filing['accessionNo'])
-                
-                if text:
-                    # Extract buyback info
-                    buyback_info = extract_buyback_info(text)
-                    
-                    if buyback_info and buyback_info['has_buyback']:
-                        event = {
-                            'date': filing['date'],
-                            'ticker': filing['ticker'],
-                            'buyback_amount': buyback_info['amount'],
-                            'share_count': buyback_info['shares'],
-                            'confidence': buyback_info['confidence'],
-                            'keyword_count': buyback_info['keyword_count'],
-                            'accessionNo': filing['accessionNo'],
-                            'url': filing['url']
-                        }
-                        all_events.append(event)
-                        extraction_log['buybacks_found'] += 1
-                        
-                        amount_str = f"${buyback_info['amount']:,.0f}" if buyback_info['amount'] else "no amount"
-                        print(f"    ✅ BUYBACK: {filing['date']} - {amount_str}")
-                
-                # Rate limiting (SEC allows 10 requests/second)
-                time.sleep(0.15)
-            
-            extraction_log['tickers_processed'] += 1
+            ticker_filings.append((ticker, filings))
             
         except Exception as e:
-            error_msg = f"Error processing {ticker}: {e}"
+            error_msg = f"Error listing {ticker}: {e}"
             print(f"  ❌ {error_msg}")
             extraction_log['errors'].append(error_msg)
-        
-        # Save intermediate results every 10 tickers
-        if i % 10 == 0:
-            df_temp = pd.DataFrame(all_events)
-            df_temp.to_csv(OUTPUT_FILE.replace('.csv', '_temp.csv'), index=False)
-            print(f"  💾 Intermediate save: {len(all_events)} events")
+    
+    # Phase 2: download every filing not yet cached (EDGAR_PREFETCH_WORKERS threads)
+    all_filings = [f for _, filings in ticker_filings for f in filings]
+    if not OFFLINE:
+        cache.prefetch(all_filings, n_workers=max(PREFETCH_WORKERS, 1))
+    
+    # Phase 3: parallel extraction over the cache (no network), events streamed to CSV
+    df, ext_stats = extract_filings(
+        all_filings,
+        cache_dir=CACHE_DIR,
+        n_workers=EXTRACT_WORKERS,
+        out_csv=OUTPUT_FILE.replace('.csv', '_temp.csv'),
+    )
+    df = df.drop(columns=['cik'])
+    all_events = df.to_dict('records')
+    extraction_log['buybacks_found'] = len(all_events)
+    extraction_log['tickers_processed'] = len(ticker_filings)
+    extraction_log['extraction_stats'] = ext_stats.as_dict()
+    
+    for event in all_events:
+        amount = event['buyback_amount']
+        amount_str = f"${amount:,.0f}" if pd.notna(amount) else "no amount"
+        print(f"    ✅ BUYBACK: {event['ticker']} {event['date']} - {amount_str}")
     
     # Final save
     print()
@@ -422,12 +330,12 @@ def main():
     print("Saving results...")
     print("=" * 80)
     
-    df = pd.DataFrame(all_events)
     df.to_csv(OUTPUT_FILE, index=False)
     
     # Save extraction log
     extraction_log['end_time'] = datetime.now().isoformat()
     extraction_log['total_events'] = len(all_events)
+    extraction_log['cache_stats'] = cache.stats.as_dict()
     
     with open(LOG_FILE, 'w') as f:
         json.dump(extraction_log, f, indent=2)
@@ -440,6 +348,11 @@ def main():
     print(f"Filings Checked:      {extraction_log['filings_checked']}")
     print(f"Buybacks Found:       {extraction_log['buybacks_found']}")
     print(f"Errors:               {len(extraction_log['errors'])}")
+    print(f"Cache Hit Rate:       {cache.stats.hit_rate:.1%} "
+          f"({cache.stats.hits} hits / {cache.stats.misses} misses, "
+          f"{cache.stats.bytes_downloaded / 1e6:.1f} MB downloaded)")
+    print(f"Extraction:           {ext_stats.filings_per_sec:.1f} filings/s, "
+          f"{ext_stats.ms_per_filing:.2f} ms/filing ({ext_stats.missing} not in cache)")
     print()
     
     if len(df) > 0:
@@ -47,6 +47,19 @@ class EventBook:
             'status': 'opened'
         })
     
+    def add_events(self, symbols, open_date, horizon_days: int, tilt_amount: float):
+        """
+        같은 날 여러 이벤트 추가 (EventCalendar.day(pos) 결과를 그대로 전달)
+
+        Args:
+            symbols: 종목 코드 iterable (추가 순서 유지)
+            open_date: 이벤트 오픈 날짜
+            horizon_days: 보유 기간 (영업일)
+            tilt_amount: Tilt 크기
+        """
+        for symbol in symbols:
+            self.add_event(symbol, open_date, horizon_days, tilt_amount)
+
     def get_active_tilts(self, current_date) -> Dict[str, float]:
         """
         현재 날짜에 활성화된 tilts 반환
@@ -101,6 +114,33 @@ class EventBook:
         """이벤트 히스토리를 DataFrame으로 반환"""
         return pd.DataFrame(self.event_history)
 
+    def to_records(self) -> List[dict]:
+        """활성 이벤트를 JSON 직렬화 가능한 레코드로 (체크포인트용, 추가 순서 유지)"""
+        return [
+            {
+                'symbol': symbol,
+                'open_date': pd.Timestamp(open_date).isoformat(),
+                'close_date': pd.Timestamp(close_date).isoformat(),
+                'tilt_amount': float(amount),
+            }
+            for symbol, open_date, close_date, amount in self.active_events
+        ]
+
+    @classmethod
+    def from_records(cls, records: List[dict]) -> "EventBook":
+        """to_records() 결과로부터 복원 (히스토리는 비어 있음)"""
+        book = cls()
+        book.active_events = [
+            (
+                r['symbol'],
+                pd.Timestamp(r['open_date']),
+                pd.Timestamp(r['close_date']),
+                float(r['tilt_amount']),
+            )
+            for r in records
+        ]
+        return book
+
 
 def apply_pure_tilt_overlay(
     w_base: pd.Series,
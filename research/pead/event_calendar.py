@@ -0,0 +1,114 @@
+# research/pead/event_calendar.py
+"""
+거래일별 이벤트 인덱스 (CSR)
+
+tilt 백테스트들은 거래일마다 events[events['date'] == t] 로 전체 이벤트 프레임을 스캔했다
+(O(T x E)). EventCalendar 는 이벤트를 한 번 정렬해 거래일 위치별 offsets 를 만든다:
+
+    offsets[p] : offsets[p + 1]  →  p 번째 거래일의 이벤트 (입력 프레임 순서 유지)
+
+- min_rank / universe 필터는 생성 시 벡터화 (기존 루프와 같이 rank 가 NaN 인 이벤트는 통과)
+- align="exact": 거래일과 같은 날짜의 이벤트만, "next": 이벤트 날짜 이후 첫 거래일로 매칭
+- active_counts: [open, open + horizon일) 활성 이벤트 수 (T x N) — 차분 배열 + cumsum
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class EventCalendar:
+    dates: pd.DatetimeIndex
+    offsets: np.ndarray      # (T + 1,)
+    tickers: np.ndarray      # (E,) 거래일 위치 순, 같은 날은 입력 순서
+    ranks: np.ndarray        # (E,)
+    rows: np.ndarray         # (E,) 입력 프레임의 위치 인덱스
+
+    @classmethod
+    def build(
+        cls,
+        events: pd.DataFrame,
+        dates: pd.DatetimeIndex,
+        universe: Optional[Iterable[str]] = None,
+        min_rank: Optional[float] = None,
+        align: str = "exact",
+        date_col: str = "date",
+        ticker_col: str = "ticker",
+        rank_col: str = "weighted_rank",
+    ) -> "EventCalendar":
+        dates = pd.DatetimeIndex(dates)
+        ev_dates = pd.DatetimeIndex(events[date_col])
+        tickers = events[ticker_col].to_numpy()
+        ranks = (
+            events[rank_col].to_numpy(dtype=np.float64)
+            if rank_col in events.columns else np.full(len(events), np.nan)
+        )
+
+        if align == "exact":
+            pos = dates.get_indexer(ev_dates)
+        elif align == "next":
+            pos = dates.searchsorted(ev_dates, side="left")
+            pos[pos >= len(dates)] = -1
+        else:
+            raise ValueError(f"unknown align '{align}'")
+
+        keep = pos >= 0
+        if universe is not None:
+            keep &= pd.Index(tickers).isin(pd.Index(universe))
+        if min_rank is not None:
+            keep &= ~(ranks < min_rank)
+
+        rows = np.flatnonzero(keep)
+        order = np.argsort(pos[rows], kind="stable")
+        rows = rows[order]
+        counts = np.bincount(pos[rows], minlength=len(dates))
+        offsets = np.zeros(len(dates) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(dates, offsets, tickers[rows], ranks[rows], rows)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def day(self, pos: int) -> np.ndarray:
+        """pos 번째 거래일 이벤트 종목"""
+        return self.tickers[self.offsets[pos]:self.offsets[pos + 1]]
+
+    def on(self, date) -> np.ndarray:
+        """날짜로 조회 (거래일이 아니면 빈 배열)"""
+        pos = self.dates.get_indexer([pd.Timestamp(date)])[0]
+        return self.tickers[:0] if pos < 0 else self.day(pos)
+
+    def positions(self) -> np.ndarray:
+        """이벤트별 거래일 위치 (E,)"""
+        return np.repeat(np.arange(len(self.dates)), np.diff(self.offsets))
+
+    def indicator(self, columns: pd.Index) -> np.ndarray:
+        """(T x N) 0/1 이벤트 발생 행렬 (columns 밖 종목은 무시)"""
+        columns = pd.Index(columns)
+        col = columns.get_indexer(self.tickers)
+        ok = col >= 0
+        out = np.zeros((len(self.dates), len(columns)))
+        out[self.positions()[ok], col[ok]] = 1.0
+        return out
+
+    def active_counts(self, horizon_days: int, columns: pd.Index) -> np.ndarray:
+        """
+        (T x N) 날짜별 활성 이벤트 수.
+
+        EventBook 규칙과 같다: open 거래일부터 open + horizon_days (달력일) 미만 거래일까지.
+        """
+        columns = pd.Index(columns)
+        col = columns.get_indexer(self.tickers)
+        ok = col >= 0
+        start = self.positions()[ok]
+        close = self.dates[start] + pd.Timedelta(days=horizon_days)
+        end = self.dates.searchsorted(close, side="left")
+        diff = np.zeros((len(self.dates) + 1, len(columns)))
+        np.add.at(diff, (start, col[ok]), 1.0)
+        np.add.at(diff, (end, col[ok]), -1.0)
+        return np.cumsum(diff[:-1], axis=0)
@@ -15,6 +15,7 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from research.pead.event_book import EventBook, backtest_pure_tilt
+from research.pead.event_calendar import EventCalendar
 from research.pead.overlay_engine import compute_portfolio_returns
 # 경로 직접 지정
 PRICES_FILE = project_root / "data" / "prices.csv"
@@ -54,21 +55,12 @@ print(f"  Date range: {events['date'].min()} ~ {events['date'].max()}")
 print("\n[3/6] 시그널 생성...")
 signal = pd.DataFrame(0, index=px.index, columns=px.columns)
 
-# 날짜 매칭 개선: 이벤트 날짜를 가장 가까운 거래일로 매칭
-matched_events = 0
-for _, row in events.iterrows():
-    event_date = row['date']
-    symbol = row['symbol']
-    
-    if symbol not in signal.columns:
-        continue
-    
-    # 이벤트 날짜 이후 가장 가까운 거래일 찾기
-    future_dates = px.index[px.index >= event_date]
-    if len(future_dates) > 0:
-        trade_date = future_dates[0]
-        signal.loc[trade_date, symbol] = 1
-        matched_events += 1
+# 날짜 매칭 개선: 이벤트 날짜 이후 가장 가까운 거래일로 매칭 (EventCalendar, align="next")
+calendar = EventCalendar.build(
+    events, px.index, universe=signal.columns, align="next", ticker_col="symbol"
+)
+signal[:] = calendar.indicator(signal.columns).astype(int)
+matched_events = len(calendar)
 
 pos_events = (signal == 1).sum().sum()
 print(f"  Total events: {len(events)}")
@@ -0,0 +1,293 @@
+# research/pead/tilt_state.py
+"""
+Pure Tilt Overlay 프로덕션 상태 (증분 실행 + 전체 재생 검증)
+
+run_pead_buyback_ensemble_prod.py 는 오늘의 가중치 하나를 얻기 위해 매일 전체 가격 히스토리를
+EventBook 으로 다시 재생했다 (날짜마다 events[events['date'] == t] 필터 + iterrows,
+만료 이벤트를 정리하지 않아 active_events 가 계속 증가).
+
+- pure_tilt_batch / base_returns_batch: 같은 규칙의 벡터화 배치 계산
+  (EventCalendar.active_counts: 이벤트 구간 [open, open + horizon일) → 차분 배열 + cumsum)
+- TiltState: EventBook 활성 이벤트 / 마지막 가중치 / 일별 수익률·equity 체크포인트 (JSON)
+- advance_state: 체크포인트 이후의 새 거래일과 그날의 이벤트만 EventBook 으로 적용
+- verify_state: 배치 전체 재생 결과와 증분 상태 비교
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from research.pead.event_book import EventBook
+from research.pead.event_calendar import EventCalendar
+
+
+STATE_VERSION = 1
+
+
+# ---- Batch ----------------------------------------------------------------- #
+
+def _calendar(
+    events: pd.DataFrame,
+    dates: pd.DatetimeIndex,
+    symbols: pd.Index,
+    min_rank: float,
+) -> EventCalendar:
+    """기존 루프와 같은 필터: 거래일 이벤트, 가격 유니버스 종목, min_rank 이상"""
+    return EventCalendar.build(events, dates, universe=symbols, min_rank=min_rank)
+
+
+def pure_tilt_batch(
+    events: pd.DataFrame,
+    base_weights: pd.DataFrame,
+    px: pd.DataFrame,
+    tilt_size: float,
+    horizon: int,
+    min_rank: float,
+) -> Tuple[pd.Series, pd.DataFrame]:
+    """
+    Pure Tilt Overlay 배치 백테스트 (벡터화).
+
+    base_weights 는 px.index 로 reindex 되어 있다고 가정 (load_base_weights).
+
+    Returns:
+        (overlay 일별 수익률, overlay 가중치 DataFrame)
+    """
+    dates = px.index
+    cols = base_weights.columns
+
+    # 첫 거래일은 루프와 같이 건너뜀 → dates[1:] 기준 활성 이벤트 수 (T-1 x N)
+    cal = _calendar(events, dates[1:], px.columns, min_rank)
+    counts = cal.active_counts(horizon, cols)
+    tilt = np.vstack([np.zeros((1, len(cols))), counts]) * tilt_size
+
+    B = base_weights.reindex(dates).to_numpy(dtype=np.float64)
+    W = B + tilt
+    with np.errstate(divide='ignore', invalid='ignore'):
+        W = W / np.nansum(W, axis=1, keepdims=True)
+    R = px.pct_change().reindex(columns=cols).to_numpy(dtype=np.float64)
+    ret = np.nansum(W * R, axis=1)
+
+    overlay_wt = base_weights.copy()
+    overlay_wt.iloc[1:] = W[1:]
+    portfolio_ret = pd.Series(ret[1:], index=pd.Index(dates[1:], name='date'), name='ret')
+    return portfolio_ret, overlay_wt
+
+
+def base_returns_batch(base_weights: pd.DataFrame, px: pd.DataFrame) -> pd.Series:
+    """Base 포트폴리오 일별 수익률 (overlay 없음)"""
+    R = px.pct_change().reindex(columns=base_weights.columns)
+    W = base_weights.reindex(px.index)
+    ret = np.nansum(W.to_numpy(dtype=np.float64) * R.to_numpy(dtype=np.float64), axis=1)
+    return pd.Series(ret[1:], index=pd.Index(px.index[1:], name='date'), name='ret')
+
+
+def active_book_at(
+    events: pd.DataFrame,
+    px: pd.DataFrame,
+    date: pd.Timestamp,
+    tilt_size: float,
+    horizon: int,
+    min_rank: float,
+) -> EventBook:
+    """date 시점에 살아 있는 이벤트만 담은 EventBook (루프와 같은 추가 순서)"""
+    cal = _calendar(events, px.index[1:], px.columns, min_rank)
+    open_dates = cal.dates[cal.positions()]
+    alive = (open_dates <= date) & (open_dates + pd.Timedelta(days=horizon) > date)
+    book = EventBook()
+    for symbol, open_date in zip(cal.tickers[alive], open_dates[alive]):
+        book.add_event(symbol=symbol, open_date=open_date, horizon_days=horizon, tilt_amount=tilt_size)
+    book.event_history = []
+    return book
+
+
+# ---- Incremental state ----------------------------------------------------- #
+
+@dataclass
+class TiltState:
+    """
+    증분 실행 체크포인트.
+
+    config 가 바뀌면 (tilt / horizon / min_rank / alpha / mode) 상태를 재사용하지 않는다.
+    """
+    config: Dict
+    last_date: str
+    active_events: List[dict]
+    last_weights: Dict[str, float]
+    base_ret: Dict[str, float] = field(default_factory=dict)
+    overlay_ret: Dict[str, float] = field(default_factory=dict)
+    base_equity: float = 1.0
+    overlay_equity: float = 1.0
+    version: int = STATE_VERSION
+
+    @classmethod
+    def load(cls, path) -> Optional["TiltState"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        if data.get('version') != STATE_VERSION:
+            return None
+        return cls(**data)
+
+    def save(self, path) -> None:
+        """tmp 파일에 쓰고 rename (중간에 죽어도 이전 체크포인트 유지)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(asdict(self), f)
+        os.replace(tmp, path)
+
+    def returns(self) -> Tuple[pd.Series, pd.Series]:
+        """(base 수익률, overlay 수익률) 시리즈"""
+        def _series(d):
+            s = pd.Series(d, dtype=float, name='ret')
+            s.index = pd.DatetimeIndex(pd.to_datetime(s.index), name='date')
+            return s
+        return _series(self.base_ret), _series(self.overlay_ret)
+
+
+def bootstrap_state(
+    events: pd.DataFrame,
+    base_weights: pd.DataFrame,
+    px: pd.DataFrame,
+    config: Dict,
+) -> TiltState:
+    """체크포인트가 없을 때: 배치 1회 실행 결과로 상태 생성"""
+    tilt_size, horizon, min_rank = config['tilt_size'], config['horizon'], config['min_rank']
+    overlay_ret, overlay_wt = pure_tilt_batch(events, base_weights, px, tilt_size, horizon, min_rank)
+    base_ret = base_returns_batch(base_weights, px)
+    last = px.index[-1]
+    book = active_book_at(events, px, last, tilt_size, horizon, min_rank)
+    return TiltState(
+        config=dict(config),
+        last_date=last.isoformat(),
+        active_events=book.to_records(),
+        last_weights=overlay_wt.iloc[-1].dropna().to_dict(),
+        base_ret={d.isoformat(): float(r) for d, r in base_ret.items()},
+        overlay_ret={d.isoformat(): float(r) for d, r in overlay_ret.items()},
+        base_equity=float((1 + base_ret).prod()),
+        overlay_equity=float((1 + overlay_ret).prod()),
+    )
+
+
+def advance_state(
+    state: TiltState,
+    events: pd.DataFrame,
+    base_weights: pd.DataFrame,
+    px: pd.DataFrame,
+) -> int:
+    """
+    state.last_date 이후 거래일만 적용 (그날 이벤트 추가 → 활성 tilt → 정규화 → 수익률).
+
+    Returns:
+        적용한 거래일 수
+    """
+    cfg = state.config
+    tilt_size, horizon, min_rank = cfg['tilt_size'], cfg['horizon'], cfg['min_rank']
+    last = pd.Timestamp(state.last_date)
+    start = px.index.searchsorted(last, side='right')
+    if start >= len(px.index):
+        return 0
+    if start == 0:
+        raise ValueError(f"state last_date {state.last_date} precedes price history")
+
+    new_dates = px.index[start:]
+    cal = _calendar(events, new_dates, px.columns, min_rank)
+
+    book = EventBook.from_records(state.active_events)
+    cols = base_weights.columns
+    for pos in range(start, len(px.index)):
+        t = px.index[pos]
+        book.add_events(cal.day(pos - start), open_date=t, horizon_days=horizon, tilt_amount=tilt_size)
+        tilts = book.get_active_tilts(t)
+
+        base_wt = base_weights.loc[t]
+        new_wt = base_wt.copy()
+        for ticker, tilt in tilts.items():
+            if ticker in new_wt.index:
+                new_wt[ticker] += tilt
+        new_wt = new_wt / new_wt.sum()
+
+        px_ret = (px.iloc[pos] / px.iloc[pos - 1] - 1).reindex(cols)
+        r_base = float(np.nansum(base_wt.to_numpy(dtype=np.float64) * px_ret.to_numpy()))
+        r_overlay = float(np.nansum(new_wt.to_numpy(dtype=np.float64) * px_ret.to_numpy()))
+
+        key = t.isoformat()
+        state.base_ret[key] = r_base
+        state.overlay_ret[key] = r_overlay
+        state.base_equity *= 1 + r_base
+        state.overlay_equity *= 1 + r_overlay
+        state.last_weights = new_wt.dropna().to_dict()
+        book.close_expired_events(t)
+
+    state.active_events = book.to_records()
+    state.last_date = px.index[-1].isoformat()
+    return len(new_dates)
+
+
+def verify_state(
+    state: TiltState,
+    events: pd.DataFrame,
+    base_weights: pd.DataFrame,
+    px: pd.DataFrame,
+    atol: float = 1e-10,
+) -> Dict:
+    """
+    배치 전체 재생과 증분 상태 비교.
+
+    Returns:
+        {'ok', 'max_ret_diff', 'max_weight_diff', 'equity_diff', 'active_tilts_match', 'n_days'}
+    """
+    cfg = state.config
+    overlay_ret, overlay_wt = pure_tilt_batch(
+        events, base_weights, px, cfg['tilt_size'], cfg['horizon'], cfg['min_rank']
+    )
+    base_ret = base_returns_batch(base_weights, px)
+    inc_base, inc_overlay = state.returns()
+
+    def _diff(a, b):
+        if not a.index.equals(b.index):
+            return np.inf
+        return float(np.max(np.abs(a.to_numpy() - b.to_numpy()), initial=0.0))
+
+    last = pd.Timestamp(state.last_date)
+    batch_wt = overlay_wt.loc[last].dropna()
+    inc_wt = pd.Series(state.last_weights, dtype=float)
+    weight_diff = (
+        float(np.max(np.abs(batch_wt.to_numpy() - inc_wt.reindex(batch_wt.index).to_numpy())))
+        if batch_wt.index.sort_values().equals(inc_wt.index.sort_values()) else np.inf
+    )
+
+    batch_book = active_book_at(
+        events, px, last, cfg['tilt_size'], cfg['horizon'], cfg['min_rank']
+    )
+    inc_book = EventBook.from_records(state.active_events)
+    batch_tilts = batch_book.get_active_tilts(last)
+    inc_tilts = inc_book.get_active_tilts(last)
+    tilts_match = batch_tilts.keys() == inc_tilts.keys() and all(
+        abs(batch_tilts[k] - inc_tilts[k]) <= atol for k in batch_tilts
+    )
+
+    report = {
+        'n_days': len(overlay_ret),
+        'max_ret_diff': max(_diff(overlay_ret, inc_overlay), _diff(base_ret, inc_base)),
+        'max_weight_diff': weight_diff,
+        'equity_diff': abs(float((1 + overlay_ret).prod()) - state.overlay_equity),
+        'active_tilts_match': tilts_match,
+    }
+    report['ok'] = (
+        report['max_ret_diff'] <= atol
+        and report['max_weight_diff'] <= atol
+        and report['equity_diff'] <= atol * max(1.0, state.overlay_equity) * len(overlay_ret)
+        and tilts_match
+    )
+    return report
@@ -46,14 +46,9 @@ echo "" | tee -a "${LOG_FILE}"
 echo "[$(date '+%Y-%m-%d %H:%M:%S')] Step 1: Generating Wavelet Overlay..." | tee -a "${LOG_FILE}"
 echo "================================================================================" | tee -a "${LOG_FILE}"
 
-# TODO: Replace with actual Wavelet overlay generation script
-# Example: python3 run_wavelet_overlay_prod.py >> "${LOG_FILE}" 2>&1
-
-# For testing, use sample data
-if [ ! -f "${BASE_DIR}/ensemble_outputs/wavelet_overlay_latest.csv" ]; then
-    echo "[WARNING] wavelet_overlay_latest.csv not found, generating sample data..." | tee -a "${LOG_FILE}"
-    python3 generate_sample_overlays.py >> "${LOG_FILE}" 2>&1
-fi
+# 인과적 MODWT Wavelet 엔진 (engines/wavelet_overlay.py)
+# ensemble_outputs/state/ 의 MODWT 버퍼로 새 bar 만 증분 반영
+python3 run_wavelet_overlay_prod.py >> "${LOG_FILE}" 2>&1
 
 echo "[$(date '+%Y-%m-%d %H:%M:%S')] Wavelet overlay ready" | tee -a "${LOG_FILE}"
 
@@ -68,7 +63,7 @@ echo "==========================================================================
 # TODO: Modify run_pead_buyback_ensemble_prod.py to output pead_overlay_latest.csv
 # Example: python3 run_pead_buyback_ensemble_prod.py >> "${LOG_FILE}" 2>&1
 
-# For testing, sample data is already generated in Step 1
+# pead_overlay_latest.csv 가 없으면 중단 (테스트용 샘플: python3 generate_sample_overlays.py)
 if [ ! -f "${BASE_DIR}/ensemble_outputs/pead_overlay_latest.csv" ]; then
     echo "[WARNING] pead_overlay_latest.csv not found" | tee -a "${LOG_FILE}"
     exit 1
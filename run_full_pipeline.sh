@@ -9,6 +9,8 @@
 #   1) Wavelet + PEAD Overlay 생성
 #   2) ARES7 Base weights + Overlay 통합
 #   3) 최종 weights CSV 생성
+#   4) 단계 진행을 ensemble_outputs/state/pipeline_progress.json 에 기록
+#      (dashboard_api.py /stream 이 구독자에게 push)
 #
 # 실행:
 #   ./run_full_pipeline.sh
@@ -28,8 +30,21 @@ mkdir -p "${LOG_DIR}"
 # Timestamp
 TS="$(date '+%Y%m%d_%H%M%S')"
 LOG_FILE="${LOG_DIR}/full_pipeline_${TS}.log"
+PROGRESS_FILE="${BASE_DIR}/ensemble_outputs/state/pipeline_progress.json"
 
 cd "${BASE_DIR}"
+mkdir -p "$(dirname "${PROGRESS_FILE}")"
+
+# 대시보드용 단계 진행 (tmp 에 쓰고 mv → 읽는 쪽은 항상 완전한 JSON)
+progress() {
+    printf '{"run":"%s","stage":"%s","status":"%s","updated":"%s"}\n' \
+        "${TS}" "$1" "$2" "$(date '+%Y-%m-%dT%H:%M:%S')" > "${PROGRESS_FILE}.tmp"
+    mv "${PROGRESS_FILE}.tmp" "${PROGRESS_FILE}"
+}
+
+STAGE="start"
+trap 'progress "${STAGE}" "failed"' ERR
+progress "${STAGE}" "running"
 
 echo "================================================================================" | tee -a "${LOG_FILE}"
 echo "[$(date '+%Y-%m-%d %H:%M:%S')] ARES7 + Wavelet + PEAD Full Pipeline START" | tee -a "${LOG_FILE}"
@@ -46,6 +61,8 @@ echo "" | tee -a "${LOG_FILE}"
 echo "[$(date '+%Y-%m-%d %H:%M:%S')] Step 1: Generating Wavelet + PEAD Overlay..." | tee -a "${LOG_FILE}"
 echo "================================================================================" | tee -a "${LOG_FILE}"
 
+STAGE="overlay"
+progress "${STAGE}" "running"
 ./run_daily_wavelet_pead_prod.sh >> "${LOG_FILE}" 2>&1
 
 RET1=$?
@@ -56,6 +73,7 @@ if [ ${RET1} -ne 0 ]; then
 fi
 
 echo "[$(date '+%Y-%m-%d %H:%M:%S')] Wavelet + PEAD overlay generation complete" | tee -a "${LOG_FILE}"
+progress "${STAGE}" "done"
 
 # ============================================================================
 # Step 2: ARES7 통합
@@ -65,6 +83,8 @@ echo "" | tee -a "${LOG_FILE}"
 echo "[$(date '+%Y-%m-%d %H:%M:%S')] Step 2: Integrating with ARES7 Base Weights..." | tee -a "${LOG_FILE}"
 echo "================================================================================" | tee -a "${LOG_FILE}"
 
+STAGE="integrate"
+progress "${STAGE}" "running"
 python3 ares7_integrate_overlay.py >> "${LOG_FILE}" 2>&1
 
 RET2=$?
@@ -75,6 +95,7 @@ if [ ${RET2} -ne 0 ]; then
 fi
 
 echo "[$(date '+%Y-%m-%d %H:%M:%S')] ARES7 integration complete" | tee -a "${LOG_FILE}"
+progress "${STAGE}" "done"
 
 # ============================================================================
 # Summary
@@ -115,9 +136,12 @@ if [ -f "${FINAL_WEIGHTS_FILE}" ]; then
     head -6 "${FINAL_WEIGHTS_FILE}" | tee -a "${LOG_FILE}"
 else
     echo "❌ Final weights file not found: ${FINAL_WEIGHTS_FILE}" | tee -a "${LOG_FILE}"
+    progress "check" "failed"
     exit 1
 fi
 
+progress "complete" "done"
+
 echo "" | tee -a "${LOG_FILE}"
 echo "================================================================================" | tee -a "${LOG_FILE}"
 echo "Full log: ${LOG_FILE}" | tee -a "${LOG_FILE}"
@@ -13,6 +13,7 @@ import matplotlib.pyplot as plt
 
 # Import optimized engine
 from optimized_backtest_engine import OptimizedBacktestEngine, calculate_metrics
+from engines.sf1_panel import build_quality_panels, load_quality_panels
 
 BASE_DIR = Path(__file__).parent
 
@@ -60,55 +61,10 @@ def merge_sf1_pit(stock_returns, sf1_df):
     
     print(f"\n🔗 Merging SF1 data (point-in-time, bias-free)...")
     
-    dates = stock_returns.index
-    symbols = stock_returns.columns
-    n_dates = len(dates)
-    n_symbols = len(symbols)
-    
-    # Convert to int64 for faster comparison
-    dates_int = dates.values.astype('datetime64[D]').astype(np.int64)
-    
-    # Pre-allocate
-    quality_matrix = np.full((n_dates, n_symbols), np.nan, dtype=np.float32)
-    
-    for j, ticker in enumerate(symbols):
-        if j % 20 == 0:
-            print(f"   Processing {j}/{n_symbols}...")
-        
-        ticker_sf1 = sf1_df[sf1_df['ticker'] == ticker].copy()
-        
-        if len(ticker_sf1) == 0:
-            continue
-        
-        ticker_sf1 = ticker_sf1.sort_values('datekey')
-        sf1_dates = ticker_sf1['datekey'].values.astype('datetime64[D]').astype(np.int64)
-        
-        # Quality scores
-        roe = ticker_sf1['roe'].fillna(0.0).values
-        ebitda_margin = ticker_sf1['ebitdamargin'].fillna(0.0).values
-        de = ticker_sf1['de'].fillna(1.0).values
-        
-        quality_scores = 0.5 * roe + 0.3 * ebitda_margin - 0.2 * de
-        
-        # Point-in-time merge
-        for i in range(n_dates):
-            target_date = dates_int[i]
-            
-            # Find latest SF1 data where datekey <= target_date
-            valid_idx = np.where(sf1_dates <= target_date)[0]
-            
-            if len(valid_idx) > 0:
-                latest_idx = valid_idx[-1]
-                quality_matrix[i, j] = quality_scores[latest_idx]
-    
-    quality_df = pd.DataFrame(
-        quality_matrix,
-        index=stock_returns.index,
-        columns=stock_returns.columns
-    )
-    
-    # Fill missing with median
-    quality_df = quality_df.fillna(quality_df.median())
+    # sf1_df 의 datekey 는 이미 delay 가 반영된 유효일 → delay 0, 종목 그룹핑 / searchsorted 한 번
+    quality_df = build_quality_panels(
+        sf1_df, stock_returns.index, stock_returns.columns, delays=(0,), anchor='datekey'
+    )[0]
     
     coverage = quality_df.notna().sum().sum() / quality_df.size * 100
     print(f"   Coverage: {coverage:.1f}%")
@@ -156,11 +112,10 @@ def run_walk_forward_backtest():
     print(f"   Start: {common_dates[0].date()}")
     print(f"   End: {common_dates[-1].date()}")
     
-    # Load and fix SF1 data
-    sf1_df = load_and_fix_sf1(reporting_delay_days=45)
-    
-    # Merge SF1 (point-in-time, bias-free)
-    quality_df = merge_sf1_pit(stock_returns, sf1_df)
+    # SF1 quality panel (datekey + 45-day reporting delay; results/cache/sf1_panels 공유)
+    quality_df = load_quality_panels(
+        stock_returns.index, stock_returns.columns, delays=(45,), anchor='datekey'
+    )[45]
     
     # Define train/OOS splits
     splits = [
@@ -30,7 +30,7 @@ from typing import Dict, Tuple
 project_root = Path(__file__).resolve().parent
 sys.path.insert(0, str(project_root))
 
-from research.pead.event_book import EventBook
+from research.pead.tilt_state import base_returns_batch, pure_tilt_batch
 
 # ============================================================================
 # Configuration
@@ -168,10 +168,8 @@ def build_ensemble_events(
         print("  Mode: R&D (PEAD + Buyback)")
     
     # Adjust signal_rank by weight
-    ensemble['weighted_rank'] = ensemble.apply(
-        lambda row: row['signal_rank'] * alpha_pead if row['source'] == 'pead' 
-                    else row['signal_rank'] * alpha_bb,
-        axis=1
+    ensemble['weighted_rank'] = ensemble['signal_rank'] * np.where(
+        ensemble['source'] == 'pead', alpha_pead, alpha_bb
     )
     
     # Sort by date and weighted_rank
@@ -201,66 +199,11 @@ def run_pure_tilt_backtest(
     """
     print(f"\nRunning Pure Tilt backtest (tilt={tilt_size}, horizon={horizon})...")
     
-    # Initialize event book
-    event_book = EventBook()
-    
-    # Returns
-    px_ret = px.pct_change()
-    
-    # Overlay weights (start with base)
-    overlay_wt = base_weights.copy()
-    
-    # Track daily portfolio returns
-    portfolio_ret = []
-    
-    for t in px.index[1:]:
-        # Check for new events
-        events_today = events[events['date'] == t]
-        
-        for _, event in events_today.iterrows():
-            ticker = event['ticker']
-            if ticker not in px.columns:
-                continue
-            
-            if event['weighted_rank'] < min_rank:
-                continue
-            
-            # Add event to book
-            event_book.add_event(
-                symbol=ticker,
-                open_date=t,
-                horizon_days=horizon,
-                tilt_amount=tilt_size
-            )
-        
-        # Get current tilts
-        tilts = event_book.get_active_tilts(t)
-        
-        # Apply tilts to base weights
-        if t in base_weights.index:
-            base_wt = base_weights.loc[t]
-            
-            # Start with base
-            new_wt = base_wt.copy()
-            
-            # Apply tilts
-            for ticker, tilt in tilts.items():
-                if ticker in new_wt.index:
-                    new_wt[ticker] += tilt
-            
-            # Normalize to sum to 1
-            new_wt = new_wt / new_wt.sum()
-            
-            # Store overlay weights
-            overlay_wt.loc[t] = new_wt
-            
-            # Compute portfolio return
-            if t in px_ret.index:
-                ret_today = (new_wt * px_ret.loc[t]).sum()
-                portfolio_ret.append({'date': t, 'ret': ret_today})
-    
-    # Convert to Series
-    portfolio_ret = pd.DataFrame(portfolio_ret).set_index('date')['ret']
+    # research/pead/tilt_state.py: EventCalendar (거래일별 CSR 인덱스) 기반 벡터화,
+    # 기존 EventBook 일별 루프와 같은 규칙
+    portfolio_ret, overlay_wt = pure_tilt_batch(
+        events, base_weights, px, tilt_size, horizon, min_rank
+    )
     
     print(f"  Backtest days: {len(portfolio_ret)}")
     
@@ -273,16 +216,7 @@ def compute_base_returns(
 ) -> pd.Series:
     """Compute base portfolio returns (no overlay)"""
     print("\nComputing base portfolio returns...")
-    px_ret = px.pct_change()
-    
-    base_ret = []
-    for t in px.index[1:]:
-        if t in base_weights.index and t in px_ret.index:
-            wt = base_weights.loc[t]
-            ret = (wt * px_ret.loc[t]).sum()
-            base_ret.append({'date': t, 'ret': ret})
-    
-    base_ret = pd.DataFrame(base_ret).set_index('date')['ret']
+    base_ret = base_returns_batch(base_weights, px)
     print(f"  Base return days: {len(base_ret)}")
     return base_ret
 
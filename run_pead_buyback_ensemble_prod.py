@@ -18,6 +18,9 @@ PRODUCTION VERSION - PEAD Only Overlay (Buyback Disabled)
 실행 방법:
   - PRODUCTION: python3.11 run_pead_buyback_ensemble_prod.py
   - R&D: ENABLE_RD_MODE=1 python3.11 run_pead_buyback_ensemble_prod.py
+  - 증분 (일일): python3.11 run_pead_buyback_ensemble_prod.py --incremental
+    (ensemble_outputs/state/ 체크포인트 이후 새 거래일만 적용,
+     --verify_full_replay 로 전체 재생 결과와 일치 확인)
 
 Author: ARES7/ARES8 Research Team
 Date: 2025-12-01
@@ -27,6 +30,7 @@ Version: PRODUCTION v1.0
 
 import os
 import sys
+import argparse
 import numpy as np
 import pandas as pd
 from pathlib import Path
@@ -37,7 +41,14 @@ from datetime import datetime
 project_root = Path(__file__).resolve().parent
 sys.path.insert(0, str(project_root))
 
-from research.pead.event_book import EventBook
+from research.pead.tilt_state import (
+    TiltState,
+    advance_state,
+    base_returns_batch,
+    bootstrap_state,
+    pure_tilt_batch,
+    verify_state,
+)
 
 # ============================================================================
 # PRODUCTION MODE ENFORCEMENT
@@ -108,6 +119,9 @@ BUYBACK_EVENTS_PATH = DATA_DIR / "buyback_events.csv"
 OUTPUT_DIR = project_root / "ensemble_outputs"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# Incremental production state (EventBook / last weights / equity checkpoint)
+STATE_PATH = OUTPUT_DIR / "state" / f"pure_tilt_state_{MODE.lower()}.json"
+
 # Logging
 LOG_DIR = project_root / "logs"
 LOG_DIR.mkdir(exist_ok=True)
@@ -241,10 +255,8 @@ def build_ensemble_events(
         log_message("  Mode: R&D (PEAD + Buyback)")
     
     # Adjust signal_rank by weight
-    ensemble['weighted_rank'] = ensemble.apply(
-        lambda row: row['signal_rank'] * alpha_pead if row['source'] == 'pead' 
-                    else row['signal_rank'] * alpha_bb,
-        axis=1
+    ensemble['weighted_rank'] = ensemble['signal_rank'] * np.where(
+        ensemble['source'] == 'pead', alpha_pead, alpha_bb
     )
     
     # Sort by date and weighted_rank
@@ -268,47 +280,10 @@ def run_pure_tilt_backtest(
     """Run Pure Tilt overlay backtest"""
     log_message(f"\nRunning Pure Tilt backtest (tilt={tilt_size}, horizon={horizon})...")
     
-    event_book = EventBook()
-    px_ret = px.pct_change()
-    overlay_wt = base_weights.copy()
-    portfolio_ret = []
-    
-    for t in px.index[1:]:
-        events_today = events[events['date'] == t]
-        
-        for _, event in events_today.iterrows():
-            ticker = event['ticker']
-            if ticker not in px.columns:
-                continue
-            
-            if event['weighted_rank'] < min_rank:
-                continue
-            
-            event_book.add_event(
-                symbol=ticker,
-                open_date=t,
-                horizon_days=horizon,
-                tilt_amount=tilt_size
-            )
-        
-        tilts = event_book.get_active_tilts(t)
-        
-        if t in base_weights.index:
-            base_wt = base_weights.loc[t]
-            new_wt = base_wt.copy()
-            
-            for ticker, tilt in tilts.items():
-                if ticker in new_wt.index:
-                    new_wt[ticker] += tilt
-            
-            new_wt = new_wt / new_wt.sum()
-            overlay_wt.loc[t] = new_wt
-            
-            if t in px_ret.index:
-                ret_today = (new_wt * px_ret.loc[t]).sum()
-                portfolio_ret.append({'date': t, 'ret': ret_today})
-    
-    portfolio_ret = pd.DataFrame(portfolio_ret).set_index('date')['ret']
+    # research/pead/tilt_state.py: 이벤트 구간 차분 배열로 벡터화 (EventBook 일별 재생과 동일 규칙)
+    portfolio_ret, overlay_wt = pure_tilt_batch(
+        events, base_weights, px, tilt_size, horizon, min_rank
+    )
     log_message(f"  Backtest days: {len(portfolio_ret)}")
     
     return portfolio_ret, overlay_wt
@@ -320,16 +295,7 @@ def compute_base_returns(
 ) -> pd.Series:
     """Compute base portfolio returns (no overlay)"""
     log_message("\nComputing base portfolio returns...")
-    px_ret = px.pct_change()
-    
-    base_ret = []
-    for t in px.index[1:]:
-        if t in base_weights.index and t in px_ret.index:
-            wt = base_weights.loc[t]
-            ret = (wt * px_ret.loc[t]).sum()
-            base_ret.append({'date': t, 'ret': ret})
-    
-    base_ret = pd.DataFrame(base_ret).set_index('date')['ret']
+    base_ret = base_returns_batch(base_weights, px)
     log_message(f"  Base return days: {len(base_ret)}")
     return base_ret
 
@@ -414,7 +380,58 @@ def summarize_performance(
 # Main
 # ============================================================================
 
+def run_incremental(
+    events: pd.DataFrame,
+    base_weights: pd.DataFrame,
+    px: pd.DataFrame,
+    state_path: Path,
+    reset: bool = False,
+) -> TiltState:
+    """
+    증분 프로덕션 실행: 체크포인트 이후 새 거래일 / 새 이벤트만 적용하고 상태 저장.
+
+    체크포인트가 없거나, 설정이 바뀌었거나, reset 이면 배치 1회로 상태를 만든다.
+    """
+    config = {
+        'mode': MODE,
+        'alpha_pead': ALPHA_PEAD,
+        'alpha_bb': ALPHA_BB,
+        'tilt_size': TILT_SIZE,
+        'horizon': HORIZON,
+        'min_rank': MIN_RANK,
+    }
+    state = None if reset else TiltState.load(state_path)
+    if state is not None and state.config != config:
+        log_message(f"  State config changed ({state.config} → {config}), rebuilding")
+        state = None
+
+    if state is None:
+        log_message(f"\nBootstrapping Pure Tilt state (full history, {len(px)} days)...")
+        state = bootstrap_state(events, base_weights, px, config)
+    else:
+        log_message(f"\nAdvancing Pure Tilt state from {state.last_date[:10]}...")
+        n_new = advance_state(state, events, base_weights, px)
+        log_message(f"  New days applied: {n_new}")
+
+    state.save(state_path)
+    log_message(f"  State: last_date={state.last_date[:10]}, "
+                f"active events={len(state.active_events)}, "
+                f"overlay equity={state.overlay_equity:.4f}")
+    log_message(f"  Saved: {state_path}")
+    return state
+
+
 def main():
+    parser = argparse.ArgumentParser(description="ARES8 PEAD/Buyback ensemble (production)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="체크포인트 이후 새 거래일만 적용 (EventBook / 가중치 / equity 상태 유지)")
+    parser.add_argument("--state_path", type=str, default=str(STATE_PATH))
+    parser.add_argument("--reset_state", action="store_true",
+                        help="체크포인트를 무시하고 전체 히스토리로 상태 재생성")
+    parser.add_argument("--verify_full_replay", action="store_true",
+                        help="증분 상태를 전체 배치 재생 결과와 비교 (불일치 시 exit 1)")
+    args = parser.parse_args()
+
     log_message("=" * 80)
     log_message(f"ARES8 ENSEMBLE - {MODE} MODE")
     log_message("=" * 80)
@@ -443,16 +460,39 @@ def main():
     )
     
     # Run backtests
-    base_ret = compute_base_returns(base_weights, px)
-    
-    overlay_ret, _ = run_pure_tilt_backtest(
-        events=ensemble_events,
-        base_weights=base_weights,
-        px=px,
-        tilt_size=TILT_SIZE,
-        horizon=HORIZON,
-        min_rank=MIN_RANK
-    )
+    if args.incremental:
+        state = run_incremental(
+            events=ensemble_events,
+            base_weights=base_weights,
+            px=px,
+            state_path=Path(args.state_path),
+            reset=args.reset_state
+        )
+        base_ret, overlay_ret = state.returns()
+        
+        if args.verify_full_replay:
+            log_message("\nVerifying incremental state against full replay...")
+            report = verify_state(state, ensemble_events, base_weights, px)
+            log_message(f"  Days: {report['n_days']}, "
+                        f"max |Δret|: {report['max_ret_diff']:.2e}, "
+                        f"max |Δw|: {report['max_weight_diff']:.2e}, "
+                        f"|Δequity|: {report['equity_diff']:.2e}, "
+                        f"active tilts match: {report['active_tilts_match']}")
+            if not report['ok']:
+                log_message("❌ Incremental state diverges from full replay (rerun with --reset_state)")
+                sys.exit(1)
+            log_message("✅ Incremental state matches full replay")
+    else:
+        base_ret = compute_base_returns(base_weights, px)
+        
+        overlay_ret, _ = run_pure_tilt_backtest(
+            events=ensemble_events,
+            base_weights=base_weights,
+            px=px,
+            tilt_size=TILT_SIZE,
+            horizon=HORIZON,
+            min_rank=MIN_RANK
+        )
     
     # Summarize performance
     summary = summarize_performance(
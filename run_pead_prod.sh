@@ -83,11 +83,18 @@ echo "" | tee -a "${LOG_FILE}"
 
 cd "${BASE_DIR}"
 
-echo "[$(date '+%Y-%m-%d %H:%M:%S')] Executing: python3 ${SCRIPT_NAME}" | tee -a "${LOG_FILE}"
+# 증분 실행: ensemble_outputs/state/ 체크포인트 이후 새 거래일만 적용
+# VERIFY_FULL_REPLAY=1 이면 전체 재생 결과와 비교 (불일치 시 exit 1)
+SCRIPT_ARGS="--incremental"
+if [ "${VERIFY_FULL_REPLAY:-0}" = "1" ]; then
+    SCRIPT_ARGS="${SCRIPT_ARGS} --verify_full_replay"
+fi
+
+echo "[$(date '+%Y-%m-%d %H:%M:%S')] Executing: python3 ${SCRIPT_NAME} ${SCRIPT_ARGS}" | tee -a "${LOG_FILE}"
 echo "" | tee -a "${LOG_FILE}"
 
 # 실제 프로덕션 스크립트 실행
-python3 "${SCRIPT_NAME}" >> "${LOG_FILE}" 2>&1
+python3 "${SCRIPT_NAME}" ${SCRIPT_ARGS} >> "${LOG_FILE}" 2>&1
 
 RET=$?
 
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+run_tuning_pipeline.py
+
+================================================================================
+PIT 90d + OOS 튜닝 파이프라인 (step1 → step6) DAG 실행기
+================================================================================
+
+역할:
+  - step1~6 을 입력/출력을 선언한 단계로 묶어 engines/pipeline_dag.Pipeline 으로 실행
+  - baseline / 정렬된 수익률 / quality 패널 / BULL 레짐은 한 번 만든 프레임을
+    results/cache/dag/values 에 저장하고 각 단계에 주입 (단계마다 CSV/JSON 재파싱 없음)
+  - 키 = 코드 + 입력 파일 내용 + 파라미터 + 상위 단계 결과 해시
+    → 바뀐 단계와 그 하위만 다시 실행, 결과가 같으면 하위는 그대로 hit
+  - 의존성이 없는 단계 (step1 ∥ baseline, step2 ∥ step4 ∥ step5 ...) 는 병렬 실행
+  - 단계별 시간 / cache hit rate 출력, results/cache/dag/last_run.json 기록
+
+DAG (단계 → 하위 단계):
+  baseline      → returns, step4_regime
+  step1_pit     → quality              (pit90d CSV + SF1 패널 캐시 warm-up)
+  returns       → quality, step2, step3, step5, step6
+  quality       → step2, step3, step5, step6
+  step4_regime  → step5, step6
+  step2 → step3,  step5 → step6
+
+실행:
+  python3 run_tuning_pipeline.py                  # 전체 (바뀐 단계만)
+  python3 run_tuning_pipeline.py --jobs 4
+  python3 run_tuning_pipeline.py --only step3     # step3 과 상위 단계
+  python3 run_tuning_pipeline.py --force step2    # step2 캐시 무시 (하위는 결과가 바뀌면 재실행)
+  python3 run_tuning_pipeline.py --status         # 실행 없이 hit/stale 표시
+
+단계 로그: results/cache/dag/logs/{stage}.log
+
+Author: ARES7/ARES8 Research Team
+Version: 1.0
+================================================================================
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+from engines.pipeline_dag import Pipeline, Stage
+
+BASE_DIR = Path(__file__).resolve().parent
+
+BASELINE = 'results/ares7_best_ensemble_results.json'
+PRICES = 'data/prices.csv'
+SF1 = 'data/ares7_sf1_fundamentals.csv'
+VIX = 'data/vix_data.csv'
+RESULTS = 'tuning/results'
+QUALITY_DELAY = 90
+
+# ============================================================================
+# Stage functions (fn(inputs, **params), worker 에서 pickle 로 호출 → 모듈 최상위)
+# ============================================================================
+
+def stage_baseline(inputs):
+    from engines.tuning_data import load_baseline_returns
+    return load_baseline_returns(BASE_DIR / BASELINE)
+
+
+def stage_returns(inputs):
+    from engines.tuning_data import align_returns, load_stock_returns
+    return align_returns(inputs['baseline'], load_stock_returns(BASE_DIR / PRICES))
+
+
+def stage_step1(inputs):
+    from step1_pit_delay_90d import fix_pit_delay_90d, warm_quality_panels
+    fix_pit_delay_90d()
+    warm_quality_panels()
+
+
+def stage_quality(inputs, delay=QUALITY_DELAY):
+    from engines.sf1_panel import load_quality_panels
+    _, stock_returns = inputs['returns']
+    return load_quality_panels(stock_returns.index, stock_returns.columns, delays=(delay,),
+                               sf1_path=BASE_DIR / SF1)[delay]
+
+
+def stage_step4(inputs):
+    from step4_regime_filter import build_bull_regime
+    bull_regime, _ = build_bull_regime(inputs['baseline'])
+    return bull_regime
+
+
+def stage_step2(inputs):
+    from step2_oos_grid_search import run_oos_grid_search
+    baseline_returns, stock_returns = inputs['returns']
+    run_oos_grid_search(baseline_returns, stock_returns, inputs['quality'])
+
+
+def stage_step3(inputs):
+    from step3_exposure_scale import run_exposure_scaling
+    baseline_returns, stock_returns = inputs['returns']
+    run_exposure_scaling(baseline_returns, stock_returns, inputs['quality'])
+
+
+def stage_step5(inputs):
+    from step5_regime_grid_search import run_regime_grid_search
+    baseline_returns, stock_returns = inputs['returns']
+    run_regime_grid_search(baseline_returns, stock_returns, inputs['quality'], inputs['step4_regime'])
+
+
+def stage_step6(inputs):
+    from step6_final_validation import run_final_validation
+    baseline_returns, stock_returns = inputs['returns']
+    run_final_validation(baseline_returns, stock_returns, inputs['quality'], inputs['step4_regime'])
+
+# ============================================================================
+# DAG
+# ============================================================================
+
+def build_pipeline(cache_dir='results/cache/dag') -> Pipeline:
+    data_code = ['engines/tuning_data.py', 'engines/result_store.py']
+    engine_code = ['optimized_backtest_engine.py']
+    return Pipeline([
+        Stage('baseline', stage_baseline, files_in=[BASELINE], code=data_code),
+        Stage('returns', stage_returns, deps=['baseline'], files_in=[PRICES], code=data_code),
+        Stage('step1_pit', stage_step1, files_in=[SF1, PRICES],
+              files_out=['data/ares7_sf1_fundamentals_pit90d.csv'],
+              code=['step1_pit_delay_90d.py', 'engines/sf1_panel.py'], value=False),
+        Stage('quality', stage_quality, deps=['returns', 'step1_pit'], files_in=[SF1],
+              code=['engines/sf1_panel.py'], params={'delay': QUALITY_DELAY}),
+        Stage('step4_regime', stage_step4, deps=['baseline'], files_in=[VIX],
+              files_out=['data/bull_regime.csv', 'data/bull_regime_stats.json'],
+              code=['step4_regime_filter.py']),
+        Stage('step2', stage_step2, deps=['returns', 'quality'],
+              files_out=[f'{RESULTS}/step2_oos_grid_search_results.json'],
+              code=['step2_oos_grid_search.py'] + engine_code, value=False),
+        Stage('step3', stage_step3, deps=['returns', 'quality', 'step2'],
+              files_out=[f'{RESULTS}/step3_final_results.json', f'{RESULTS}/step3_final_comparison.png'],
+              code=['step3_exposure_scale.py'] + engine_code, value=False),
+        Stage('step5', stage_step5, deps=['returns', 'quality', 'step4_regime'],
+              files_out=[f'{RESULTS}/step5_regime_grid_search_results.json'],
+              code=['step5_regime_grid_search.py'] + engine_code, value=False),
+        Stage('step6', stage_step6, deps=['returns', 'quality', 'step4_regime', 'step5'],
+              files_out=[f'{RESULTS}/step6_final_results.json', f'{RESULTS}/step6_final_comparison.png'],
+              code=['step6_final_validation.py'] + engine_code, value=False),
+    ], root=BASE_DIR, cache_dir=cache_dir)
+
+# ============================================================================
+# Main
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Artifact-cached step1→step6 tuning pipeline")
+    parser.add_argument("--jobs", type=int, default=min(4, os.cpu_count() or 1), help="병렬 worker 수 (1 = 순차)")
+    parser.add_argument("--only", nargs="+", default=None, help="이 단계들과 상위 단계만 실행")
+    parser.add_argument("--force", nargs="+", default=(), help="캐시 무시하고 다시 실행할 단계")
+    parser.add_argument("--status", action="store_true", help="실행 없이 hit/stale 표시")
+    parser.add_argument("--cache_dir", type=str, default="results/cache/dag")
+    args = parser.parse_args()
+
+    pipe = build_pipeline(args.cache_dir)
+
+    if args.status:
+        for name, state in pipe.status(args.only).items():
+            print(f"{name:<16} {state}")
+        return
+
+    report = pipe.run(args.only, jobs=args.jobs, force=args.force)
+    if report['failed']:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+run_wavelet_overlay_prod.py
+
+================================================================================
+Wavelet Overlay Generator (PRODUCTION)
+================================================================================
+
+역할:
+  - data/prices.csv 로그 수익률 (date x symbol) 에 인과적 MODWT 적용
+    (engines/wavelet_overlay.py) → 종목별 tilt
+  - ensemble_outputs/wavelet_overlay_latest.csv (symbol,tilt_wavelet) 생성
+    → run_wavelet_pead_overlay_prod.py 가 PEAD overlay 와 합성
+
+증분 실행 (기본):
+  - ensemble_outputs/state/wavelet_modwt_state.npz 에 레벨별 trailing 버퍼 저장
+  - 다음 실행에서는 새 bar 만 반영 (bar 당 O(N·levels))
+  - 상태가 없거나 설정 / 종목 구성이 바뀌면 전체 히스토리로 재구성
+
+실행:
+  python3 run_wavelet_overlay_prod.py                 # 증분
+  python3 run_wavelet_overlay_prod.py --full          # 전체 재계산
+  python3 run_wavelet_overlay_prod.py --verify        # 증분 결과를 배치 MODWT 와 비교
+
+Author: ARES7/ARES8 Research Team
+Version: PRODUCTION v1.0
+================================================================================
+"""
+
+import argparse
+import sys
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR))
+
+from engines.wavelet_overlay import WaveletConfig, WaveletState, wavelet_tilts
+
+# ============================================================================
+# Configuration
+# ============================================================================
+
+PRICES_PATH = BASE_DIR / "data" / "prices.csv"
+OUT_DIR = BASE_DIR / "ensemble_outputs"
+STATE_PATH = OUT_DIR / "state" / "wavelet_modwt_state.npz"
+WAVELET_FILE = OUT_DIR / "wavelet_overlay_latest.csv"
+LOG_DIR = BASE_DIR / "logs"
+
+# 중기 추세 (A4) + 단기 반전 (D1), tilt std 1%p / cap 3%p
+CONFIG = WaveletConfig(
+    wavelet="haar",
+    levels=4,
+    detail_weights=(-0.5, 0.0, 0.0, 0.0),
+    approx_weight=1.0,
+    tilt_scale=0.01,
+    tilt_cap=0.03,
+)
+
+LOG_DIR.mkdir(exist_ok=True)
+LOG_FILE = LOG_DIR / f"wavelet_overlay_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+
+# ============================================================================
+# Logging
+# ============================================================================
+
+def log_message(msg: str, to_file: bool = True, to_console: bool = True):
+    """Log message to file and/or console"""
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    log_line = f"[{timestamp}] {msg}"
+
+    if to_console:
+        print(log_line)
+
+    if to_file:
+        with open(LOG_FILE, 'a') as f:
+            f.write(log_line + '\n')
+
+# ============================================================================
+# Data
+# ============================================================================
+
+def load_log_returns() -> pd.DataFrame:
+    """Load prices (long) → daily log returns (date x symbol)"""
+    log_message("Loading prices...")
+    px_long = pd.read_csv(PRICES_PATH)
+    px_long['timestamp'] = pd.to_datetime(px_long['timestamp']).dt.normalize()
+    px = px_long.pivot(index='timestamp', columns='symbol', values='close').sort_index()
+    px = px.ffill()
+    rets = np.log(px).diff().iloc[1:]
+    log_message(f"  Returns: {rets.shape}, {rets.index.min()} to {rets.index.max()}")
+    return rets
+
+# ============================================================================
+# Main
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Wavelet overlay generator (causal MODWT)")
+    parser.add_argument("--full", action="store_true", help="상태 무시, 전체 히스토리로 재계산")
+    parser.add_argument("--verify", action="store_true", help="증분 결과를 배치 MODWT 와 비교")
+    parser.add_argument("--state_path", type=str, default=str(STATE_PATH))
+    args = parser.parse_args()
+    state_path = Path(args.state_path)
+
+    log_message("=" * 80)
+    log_message("Wavelet Overlay Generator (PRODUCTION)")
+    log_message("=" * 80)
+    log_message(f"Config: {asdict(CONFIG)}")
+
+    rets = load_log_returns()
+    symbols = [str(c) for c in rets.columns]
+
+    state = None if args.full else WaveletState.load(state_path)
+    if state is not None and (asdict(state.config) != asdict(CONFIG) or state.symbols != symbols):
+        log_message("  State config / universe changed → rebuilding from history")
+        state = None
+
+    if state is None:
+        log_message(f"Building MODWT state from full history ({len(rets)} bars)...")
+        state = WaveletState.from_history(rets.iloc[:-1], CONFIG)
+        new = rets.iloc[-1:]
+    else:
+        new = rets[rets.index > pd.Timestamp(state.last_date)]
+        log_message(f"Incremental update from {state.last_date[:10]}: {len(new)} new bar(s)")
+
+    if len(new) == 0:
+        log_message("No new bars; wavelet overlay unchanged")
+        return WAVELET_FILE
+
+    for date, row in new.iterrows():
+        details, approx = state.update(row.to_numpy(dtype=np.float64))
+        state.last_date = pd.Timestamp(date).isoformat()
+    tilts = state.tilts(details, approx)
+    state.save(state_path)
+    log_message(f"  State saved: {state_path} (bars={state.count})")
+
+    if args.verify:
+        batch = wavelet_tilts(rets, CONFIG).iloc[-1].to_numpy()
+        diff = float(np.max(np.abs(batch - tilts)))
+        log_message(f"  Verify vs batch MODWT: max |Δtilt| = {diff:.2e}")
+        if diff > 1e-12:
+            log_message("❌ Incremental wavelet state diverges from batch (rerun with --full)")
+            sys.exit(1)
+
+    out = pd.DataFrame({'symbol': symbols, 'tilt_wavelet': tilts})
+    OUT_DIR.mkdir(exist_ok=True)
+    out.to_csv(WAVELET_FILE, index=False)
+
+    log_message("\nWavelet Overlay Statistics:")
+    log_message(f"  Date: {state.last_date[:10]}")
+    log_message(f"  Symbols: {len(out)} (non-zero: {(out['tilt_wavelet'] != 0).sum()})")
+    log_message(f"  Range: [{tilts.min():.6f}, {tilts.max():.6f}]")
+    log_message(f"  Std: {tilts.std():.6f}")
+    log_message(f"Saved: {WAVELET_FILE}")
+    return WAVELET_FILE
+
+
+if __name__ == "__main__":
+    main()
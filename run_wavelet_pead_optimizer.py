@@ -14,12 +14,17 @@ Wavelet + PEAD Overlay Weight Optimizer
 
 실행:
   python3 run_wavelet_pead_optimizer.py
+  python3 run_wavelet_pead_optimizer.py --bootstrap 2000 --wf_window 504
+    (가중치 안정성: walk-forward 재최적화 + block bootstrap 신뢰구간, ensemble/overlay_weights.py)
 
 Author: ARES7/ARES8 Research Team
 Date: 2025-12-01
 Version: 1.0
 """
 
+import argparse
+import sys
+
 import numpy as np
 import pandas as pd
 from pathlib import Path
@@ -48,6 +53,18 @@ TEST_END    = "2025-12-31"
 OUTPUT_DIR = BASE_DIR / "ensemble_outputs"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+sys.path.insert(0, str(BASE_DIR))
+from ensemble.overlay_weights import (
+    apply_walk_forward,
+    bootstrap_weights,
+    optimize_simplex,
+    walk_forward_weights,
+)
+
+# Overlay sleeves (열 이름) 와 run_wavelet_pead_prod.py 의 운영 고정 가중치
+SLEEVES = ["wv", "pead"]
+PROD_WEIGHTS = {"wv": 0.540, "pead": 0.460}
+
 # ============================================================================
 # Utility Functions
 # ============================================================================
@@ -103,7 +120,7 @@ def optimize_weights(trainval: pd.DataFrame) -> dict:
     Method 1: Theoretical optimization (Σ^-1 μ)
     Method 2: Grid search (fallback)
     """
-    sub = trainval[["wv", "pead"]].dropna()
+    sub = trainval[SLEEVES].dropna()
     if len(sub) < 30:
         raise ValueError("Insufficient Train+Val data (need both wv and pead)")
 
@@ -118,18 +135,13 @@ def optimize_weights(trainval: pd.DataFrame) -> dict:
             raise ValueError("Non-finite weights from solve")
     except Exception as e:
         print(f"  Warning: Theoretical optimization failed ({e}), using grid search")
-        # Fallback: Grid search
-        best = None
-        for w in np.linspace(0.0, 1.0, 51):  # w: PEAD weight, (1-w): Wavelet weight
-            overlay = (1 - w) * sub["wv"] + w * sub["pead"]
-            s = sharpe(overlay)
-            if best is None or s > best["sharpe"]:
-                best = {"w_pead": float(w), "w_wv": float(1 - w), "sharpe": float(s)}
+        # Fallback: 심플렉스 전체 격자 (1/50 간격) Sharpe 를 행렬곱 한 번에
+        best = optimize_simplex(X, steps=50)
         return {
-            "w_wv": best["w_wv"],
-            "w_pead": best["w_pead"],
+            "w_wv": float(best.weights[0]),
+            "w_pead": float(best.weights[1]),
             "source": "grid",
-            "trainval_sharpe": best["sharpe"],
+            "trainval_sharpe": best.sharpe,
         }
 
     # Normalize Σ^-1 μ result (sum to 1)
@@ -157,7 +169,59 @@ def optimize_weights(trainval: pd.DataFrame) -> dict:
 # Main Logic
 # ============================================================================
 
+def weight_stability(df: pd.DataFrame, trainval: pd.DataFrame, args) -> dict:
+    """
+    Walk-forward 재최적화 (전 구간) + Train+Val block bootstrap 가중치 신뢰구간
+    (--bootstrap 0 이면 bootstrap 만 생략)
+    """
+    print("=" * 80)
+    print("Weight Stability (walk-forward + block bootstrap)")
+    print("=" * 80)
+
+    sleeves = df[SLEEVES].dropna()
+    wf = walk_forward_weights(sleeves, window=args.wf_window, step=args.wf_step)
+    if len(wf) > 0:
+        wf_ret = apply_walk_forward(sleeves, wf)
+        print(f"Walk-forward: window={args.wf_window}, step={args.wf_step}, {len(wf)} re-optimizations")
+        for col in SLEEVES:
+            print(f"  {col:5s} weight: mean {wf[col].mean():.3f}, std {wf[col].std():.3f}, "
+                  f"range [{wf[col].min():.3f}, {wf[col].max():.3f}]")
+        _, _, wf_test = split_by_period(wf_ret.to_frame("ret"))
+        print(f"  OOS Sharpe (all): {sharpe(wf_ret):6.3f}, (Test): {sharpe(wf_test['ret']):6.3f}")
+    else:
+        print(f"Walk-forward: not enough data for window={args.wf_window}")
+
+    if args.bootstrap <= 0:
+        print()
+        return {"walk_forward": wf, "bootstrap": None, "prod_inside_ci": None}
+
+    sample = trainval[SLEEVES].dropna()
+    block = min(args.block, len(sample))
+    boot = bootstrap_weights(sample, n_boot=args.bootstrap, block=block, seed=args.seed)
+    ci = boot.summary(ci=0.90)
+    print(f"\nBlock bootstrap (Train+Val): {args.bootstrap} samples, block={block}"
+          + (f" (--block {args.block} > {len(sample)} days)" if block != args.block else ""))
+    print(ci.to_string(float_format=lambda x: f"{x:.3f}"))
+
+    inside = {
+        col: bool(ci.loc[col, "p5"] <= PROD_WEIGHTS[col] <= ci.loc[col, "p95"]) for col in SLEEVES
+    }
+    for col in SLEEVES:
+        flag = "inside" if inside[col] else "OUTSIDE"
+        print(f"  PROD {col}={PROD_WEIGHTS[col]:.3f}: {flag} 90% CI")
+    print()
+    return {"walk_forward": wf, "bootstrap": ci, "prod_inside_ci": all(inside.values())}
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Wavelet + PEAD overlay weight optimizer")
+    parser.add_argument("--wf_window", type=int, default=504, help="walk-forward 추정 윈도우 (거래일)")
+    parser.add_argument("--wf_step", type=int, default=21, help="walk-forward 재최적화 간격")
+    parser.add_argument("--bootstrap", type=int, default=1000, help="block bootstrap 표본 수 (0 이면 생략)")
+    parser.add_argument("--block", type=int, default=21, help="bootstrap 블록 길이")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
     print("=" * 80)
     print("Wavelet + PEAD Overlay Weight Optimizer")
     print("=" * 80)
@@ -212,6 +276,8 @@ def main():
     print(f"  Sharpe(T+V): {opt['trainval_sharpe']:6.3f}")
     print()
 
+    stability = weight_stability(df, trainval, args)
+
     # 5) Evaluate Test performance
     w_wv = opt["w_wv"]
     w_pead = opt["w_pead"]
@@ -292,6 +358,10 @@ def main():
             full_test_s = sharpe(full_test["base"] + full_test["overlay"])
             f.write(f"  Base Test Sharpe: {base_test_s:.6f}\n")
             f.write(f"  Base+Overlay Test Sharpe: {full_test_s:.6f}\n")
+        if stability["bootstrap"] is not None:
+            f.write("\nBootstrap weight CI (Train+Val, 90%):\n")
+            f.write(stability["bootstrap"].to_string(float_format=lambda x: f"{x:.6f}") + "\n")
+            f.write(f"PROD weights inside CI: {stability['prod_inside_ci']}\n")
     
     print(f"  Weight summary saved to: {summary_path}")
     print()
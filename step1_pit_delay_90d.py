@@ -3,13 +3,19 @@
 Step 1: PIT Delay 90일 적용
 ===========================
 Look-ahead bias 완전 제거 (negative lag 0건 달성)
+
++ SF1 quality 패널 캐시 (45/60/90일 delay 한 번에, engines/sf1_panel.py)
+  → step2~6 은 CSV 재로딩 / 종목별 merge 없이 캐시된 패널을 잘라 쓴다
 """
 
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+from engines.sf1_panel import load_quality_panels
+
 BASE_DIR = Path(__file__).parent
+PANEL_DELAYS = (45, 60, 90)
 
 
 def fix_pit_delay_90d():
@@ -106,6 +112,18 @@ def fix_pit_delay_90d():
     return delay_days, output_file
 
 
+def warm_quality_panels(delays=PANEL_DELAYS):
+    """prices 전체 (날짜 x 종목) 격자로 delay 별 quality 패널을 한 번에 계산해 캐시"""
+    
+    print(f"\n📦 Building SF1 quality panel cache (delays={list(delays)})...")
+    df = pd.read_csv(BASE_DIR / 'data' / 'prices.csv', usecols=['timestamp', 'symbol'])
+    dates = pd.DatetimeIndex(pd.to_datetime(df['timestamp']).dt.normalize().unique()).sort_values()
+    symbols = pd.Index(df['symbol'].unique()).sort_values()
+    
+    return load_quality_panels(dates, symbols, delays=delays, anchor='max')
+
+
 if __name__ == "__main__":
     delay_days, output_file = fix_pit_delay_90d()
+    warm_quality_panels()
     print(f"\n📌 Next: Use {output_file} for OOS-based Grid Search")
@@ -12,6 +12,8 @@ import json
 
 # Import optimized engine
 from optimized_backtest_engine import OptimizedBacktestEngine, calculate_metrics
+from engines.tuning_data import load_aligned_returns
+from engines.sf1_panel import build_quality_panels, load_quality_panels
 
 BASE_DIR = Path(__file__).parent
 
@@ -21,55 +23,10 @@ def merge_sf1_pit(stock_returns, sf1_df):
     
     print(f"\n🔗 Merging SF1 data (point-in-time, 90-day delay)...")
     
-    dates = stock_returns.index
-    symbols = stock_returns.columns
-    n_dates = len(dates)
-    n_symbols = len(symbols)
-    
-    # Convert to int64 for faster comparison
-    dates_int = dates.values.astype('datetime64[D]').astype(np.int64)
-    
-    # Pre-allocate
-    quality_matrix = np.full((n_dates, n_symbols), np.nan, dtype=np.float32)
-    
-    for j, ticker in enumerate(symbols):
-        if j % 20 == 0:
-            print(f"   Processing {j}/{n_symbols}...")
-        
-        ticker_sf1 = sf1_df[sf1_df['ticker'] == ticker].copy()
-        
-        if len(ticker_sf1) == 0:
-            continue
-        
-        ticker_sf1 = ticker_sf1.sort_values('datekey')
-        sf1_dates = ticker_sf1['datekey'].values.astype('datetime64[D]').astype(np.int64)
-        
-        # Quality scores
-        roe = ticker_sf1['roe'].fillna(0.0).values
-        ebitda_margin = ticker_sf1['ebitdamargin'].fillna(0.0).values
-        de = ticker_sf1['de'].fillna(1.0).values
-        
-        quality_scores = 0.5 * roe + 0.3 * ebitda_margin - 0.2 * de
-        
-        # Point-in-time merge
-        for i in range(n_dates):
-            target_date = dates_int[i]
-            
-            # Find latest SF1 data where datekey <= target_date
-            valid_idx = np.where(sf1_dates <= target_date)[0]
-            
-            if len(valid_idx) > 0:
-                latest_idx = valid_idx[-1]
-                quality_matrix[i, j] = quality_scores[latest_idx]
-    
-    quality_df = pd.DataFrame(
-        quality_matrix,
-        index=stock_returns.index,
-        columns=stock_returns.columns
-    )
-    
-    # Fill missing with median
-    quality_df = quality_df.fillna(quality_df.median())
+    # sf1_df 의 datekey 는 이미 delay 가 반영된 유효일 → delay 0, 종목 그룹핑 / searchsorted 한 번
+    quality_df = build_quality_panels(
+        sf1_df, stock_returns.index, stock_returns.columns, delays=(0,), anchor='datekey'
+    )[0]
     
     coverage = quality_df.notna().sum().sum() / quality_df.size * 100
     print(f"   Coverage: {coverage:.1f}%")
@@ -78,7 +35,7 @@ def merge_sf1_pit(stock_returns, sf1_df):
     return quality_df
 
 
-def run_oos_grid_search():
+def run_oos_grid_search(baseline_returns=None, stock_returns=None, quality_df=None):
     """Run Grid Search with OOS-based selection"""
     
     print("\n" + "="*80)
@@ -88,45 +45,18 @@ def run_oos_grid_search():
     # Load data
     print(f"\n📂 Loading data...")
     
-    # Baseline returns
-    baseline_file = BASE_DIR / 'results' / 'ares7_best_ensemble_results.json'
-    with open(baseline_file) as f:
-        baseline_data = json.load(f)
-    
-    dates = [item['date'] for item in baseline_data['daily_returns']]
-    returns = [item['ret'] for item in baseline_data['daily_returns']]
-    
-    baseline_returns = pd.Series(
-        returns,
-        index=pd.to_datetime(dates),
-        name='baseline'
-    )
-    
-    # Stock returns
-    prices_file = BASE_DIR / 'data' / 'prices.csv'
-    df = pd.read_csv(prices_file)
-    df['timestamp'] = pd.to_datetime(df['timestamp']).dt.normalize()
-    
-    prices = df.pivot(index='timestamp', columns='symbol', values='close')
-    stock_returns = prices.pct_change().fillna(0.0)
-    
-    # Align dates
-    common_dates = baseline_returns.index.intersection(stock_returns.index)
-    baseline_returns = baseline_returns.loc[common_dates]
-    stock_returns = stock_returns.loc[common_dates]
+    # Baseline / stock returns (공통 날짜 정렬; run_tuning_pipeline.py 는 캐시된 프레임 주입)
+    if baseline_returns is None or stock_returns is None:
+        baseline_returns, stock_returns = load_aligned_returns()
+    common_dates = stock_returns.index
     
     print(f"   Total dates: {len(common_dates)}")
     print(f"   Start: {common_dates[0].date()}")
     print(f"   End: {common_dates[-1].date()}")
     
-    # Load fixed SF1 data (90-day delay)
-    sf1_file = BASE_DIR / 'data' / 'ares7_sf1_fundamentals_pit90d.csv'
-    sf1_df = pd.read_csv(sf1_file, parse_dates=['datekey', 'calendardate'])
-    
-    print(f"   SF1 records: {len(sf1_df)}")
-    
-    # Merge SF1 (point-in-time, bias-free)
-    quality_df = merge_sf1_pit(stock_returns, sf1_df)
+    # SF1 quality panel (point-in-time, 90-day delay; results/cache/sf1_panels 공유)
+    if quality_df is None:
+        quality_df = load_quality_panels(stock_returns.index, stock_returns.columns, delays=(90,))[90]
     
     # Define train/OOS splits
     splits = {
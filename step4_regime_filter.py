@@ -8,6 +8,10 @@ BULL 레짐에서만 QM Overlay 적용
 import pandas as pd
 import numpy as np
 from pathlib import Path
+import json
+
+from engines.regime import RegimeFeatures, RegimeMask
+from engines.tuning_data import load_baseline_returns
 
 BASE_DIR = Path(__file__).parent
 
@@ -33,23 +37,10 @@ def compute_bull_regime(spx_prices):
         True if BULL regime, False otherwise
     """
     
-    # 1) SPX > 200-day MA
-    ma200 = spx_prices.rolling(200).mean()
-    cond1 = spx_prices > ma200
-    
-    # 2) SPX 6-month return > 0
-    ret_6m = spx_prices.pct_change(126)  # ~6 months
-    cond2 = ret_6m > 0
-    
-    # 3) SPX 12-month return > 0
-    ret_12m = spx_prices.pct_change(252)  # ~12 months
-    cond3 = ret_12m > 0
-    
-    # 4) VIX < 25 (placeholder - will be loaded separately)
-    # For now, we'll compute this in the main script
-    
-    # Combine conditions 1, 2, 3
-    bull_regime = cond1 & cond2 & cond3
+    # 1) SPX > MA200, 2) 6M 수익률 > 0, 3) 12M 수익률 > 0
+    # 4) VIX < 25 는 compute_full_bull_regime 에서 (VIX 별도 로드)
+    rf = RegimeFeatures(spx_prices.index, market=spx_prices)
+    bull_regime = rf.bull(vix_max=None).series(spx_prices.name)
     
     return bull_regime
 
@@ -93,39 +84,34 @@ def compute_full_bull_regime(spx_prices, vix_data=None):
     print("Computing BULL Regime")
     print("="*80)
     
-    # Conditions 1, 2, 3
-    ma200 = spx_prices.rolling(200).mean()
-    cond1 = spx_prices > ma200
-    
-    ret_6m = spx_prices.pct_change(126)
-    cond2 = ret_6m > 0
+    # 조건별 마스크 (engines/regime.py, 날짜 축 배열로 한 번 계산)
+    rf = RegimeFeatures(spx_prices.index, market=spx_prices, vix=vix_data)
+    cond1 = rf.above_ma(200)
+    cond2 = rf.momentum_above(126)
+    cond3 = rf.momentum_above(252)
     
-    ret_12m = spx_prices.pct_change(252)
-    cond3 = ret_12m > 0
-    
-    # Condition 4: VIX < 25
+    # Condition 4: VIX < 25 (VIX 는 SPX 날짜로 ffill 정렬)
     if vix_data is not None:
-        # Align VIX data with SPX dates
-        vix_aligned = vix_data.reindex(spx_prices.index, method='ffill')
-        cond4 = vix_aligned < 25
+        cond4 = rf.vix_below(25)
     else:
         # Dummy: assume VIX always < 25
         print(f"⚠️  Using dummy VIX condition (always True)")
-        cond4 = pd.Series(True, index=spx_prices.index)
+        cond4 = RegimeMask.full(rf.index, True)
     
     # Combine all conditions
-    bull_regime = cond1 & cond2 & cond3 & cond4
+    bull = cond1 & cond2 & cond3 & cond4
+    bull_regime = bull.series()
     
     # Statistics
-    total_days = len(bull_regime)
-    bull_days = bull_regime.sum()
+    total_days = len(bull)
+    bull_days = bull.count()
     bull_pct = bull_days / total_days * 100
     
     # Condition breakdown
-    cond1_pct = cond1.sum() / total_days * 100
-    cond2_pct = cond2.sum() / total_days * 100
-    cond3_pct = cond3.sum() / total_days * 100
-    cond4_pct = cond4.sum() / total_days * 100
+    cond1_pct = cond1.count() / total_days * 100
+    cond2_pct = cond2.count() / total_days * 100
+    cond3_pct = cond3.count() / total_days * 100
+    cond4_pct = cond4.count() / total_days * 100
     
     print(f"\n📊 Regime Statistics:")
     print(f"   Total days: {total_days}")
@@ -133,10 +119,10 @@ def compute_full_bull_regime(spx_prices, vix_data=None):
     print(f"   BEAR/HIGH_VOL days: {total_days - bull_days} ({100 - bull_pct:.1f}%)")
     
     print(f"\n📋 Condition Breakdown:")
-    print(f"   1) SPX > MA200: {cond1.sum()} ({cond1_pct:.1f}%)")
-    print(f"   2) 6M ret > 0: {cond2.sum()} ({cond2_pct:.1f}%)")
-    print(f"   3) 12M ret > 0: {cond3.sum()} ({cond3_pct:.1f}%)")
-    print(f"   4) VIX < 25: {cond4.sum()} ({cond4_pct:.1f}%)")
+    print(f"   1) SPX > MA200: {cond1.count()} ({cond1_pct:.1f}%)")
+    print(f"   2) 6M ret > 0: {cond2.count()} ({cond2_pct:.1f}%)")
+    print(f"   3) 12M ret > 0: {cond3.count()} ({cond3_pct:.1f}%)")
+    print(f"   4) VIX < 25: {cond4.count()} ({cond4_pct:.1f}%)")
     
     # Period analysis
     print(f"\n📅 Period Analysis:")
@@ -183,7 +169,9 @@ def compute_full_bull_regime(spx_prices, vix_data=None):
     return bull_regime, stats
 
 
-if __name__ == "__main__":
+def build_bull_regime(baseline_returns=None):
+    """ARES7-Best baseline 누적가를 SPX proxy 로 BULL 레짐 계산 → data/bull_regime.csv, stats JSON"""
+    
     print("\n" + "="*80)
     print("Step 4: 레짐 필터 구현 (BULL 조건)")
     print("="*80)
@@ -192,20 +180,8 @@ if __name__ == "__main__":
     print(f"\n📂 Loading SPX proxy data...")
     
     # Use ARES7-Best baseline as SPX proxy
-    import json
-    
-    baseline_file = BASE_DIR / 'results' / 'ares7_best_ensemble_results.json'
-    with open(baseline_file) as f:
-        baseline_data = json.load(f)
-    
-    dates = [item['date'] for item in baseline_data['daily_returns']]
-    returns = [item['ret'] for item in baseline_data['daily_returns']]
-    
-    baseline_returns = pd.Series(
-        returns,
-        index=pd.to_datetime(dates),
-        name='baseline'
-    )
+    if baseline_returns is None:
+        baseline_returns = load_baseline_returns()
     
     # Convert returns to prices (cumulative)
     spx_proxy = (1 + baseline_returns).cumprod() * 100
@@ -236,4 +212,9 @@ if __name__ == "__main__":
     
     print(f"✅ Stats saved: {stats_file}")
     
+    return bull_regime, stats
+
+
+if __name__ == "__main__":
+    build_bull_regime()
     print(f"\n📌 Next: Use bull_regime.csv for Grid Search with regime filter")
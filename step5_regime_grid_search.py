@@ -12,12 +12,13 @@ import json
 
 # Import optimized engine
 from optimized_backtest_engine import OptimizedBacktestEngine, calculate_metrics
-from step2_oos_grid_search import merge_sf1_pit
+from engines.tuning_data import load_aligned_returns, load_bull_regime
+from engines.sf1_panel import load_quality_panels
 
 BASE_DIR = Path(__file__).parent
 
 
-def run_regime_grid_search():
+def run_regime_grid_search(baseline_returns=None, stock_returns=None, quality_df=None, bull_regime=None):
     """Run Grid Search with regime filter"""
     
     print("\n" + "="*80)
@@ -27,45 +28,20 @@ def run_regime_grid_search():
     # Load data
     print(f"\n📂 Loading data...")
     
-    # Baseline returns
-    baseline_file = BASE_DIR / 'results' / 'ares7_best_ensemble_results.json'
-    with open(baseline_file) as f:
-        baseline_data = json.load(f)
-    
-    dates = [item['date'] for item in baseline_data['daily_returns']]
-    returns = [item['ret'] for item in baseline_data['daily_returns']]
-    
-    baseline_returns = pd.Series(
-        returns,
-        index=pd.to_datetime(dates),
-        name='baseline'
-    )
-    
-    # Stock returns
-    prices_file = BASE_DIR / 'data' / 'prices.csv'
-    df = pd.read_csv(prices_file)
-    df['timestamp'] = pd.to_datetime(df['timestamp']).dt.normalize()
-    
-    prices = df.pivot(index='timestamp', columns='symbol', values='close')
-    stock_returns = prices.pct_change().fillna(0.0)
-    
-    # Align dates
-    common_dates = baseline_returns.index.intersection(stock_returns.index)
-    baseline_returns = baseline_returns.loc[common_dates]
-    stock_returns = stock_returns.loc[common_dates]
+    # Baseline / stock returns (공통 날짜 정렬; run_tuning_pipeline.py 는 캐시된 프레임 주입)
+    if baseline_returns is None or stock_returns is None:
+        baseline_returns, stock_returns = load_aligned_returns()
+    common_dates = stock_returns.index
     
     print(f"   Total dates: {len(common_dates)}")
     
-    # Load fixed SF1 data (90-day delay)
-    sf1_file = BASE_DIR / 'data' / 'ares7_sf1_fundamentals_pit90d.csv'
-    sf1_df = pd.read_csv(sf1_file, parse_dates=['datekey', 'calendardate'])
-    
-    # Merge SF1 (point-in-time, bias-free)
-    quality_df = merge_sf1_pit(stock_returns, sf1_df)
+    # SF1 quality panel (point-in-time, 90-day delay; results/cache/sf1_panels 공유)
+    if quality_df is None:
+        quality_df = load_quality_panels(stock_returns.index, stock_returns.columns, delays=(90,))[90]
     
     # Load BULL regime
-    regime_file = BASE_DIR / 'data' / 'bull_regime.csv'
-    bull_regime = pd.read_csv(regime_file, parse_dates=[0], index_col=0).squeeze()
+    if bull_regime is None:
+        bull_regime = load_bull_regime()
     bull_regime = bull_regime.reindex(common_dates, fill_value=False)
     
     print(f"   BULL days: {bull_regime.sum()} ({bull_regime.sum()/len(bull_regime)*100:.1f}%)")